@@ -2,13 +2,16 @@
 Data Transformer for converting ScrapyResult data to platform-specific models
 """
 import logging
-from datetime import datetime
 from typing import Dict, Any
 
 from asgiref.sync import sync_to_async
 from django.utils import timezone
 
+from brightdata_integration.field_mappers import (
+    SOURCE_APIFY, extract_comment_list, get_mapper, parse_scraped_timestamp, to_int,
+)
 from scrapy_integration.models import ScrapyResult
+from scrapy_integration.retrieval_index import abatched_documents
 from tiktok_data.models import TikTokPost, Folder as TikTokFolder
 from linkedin_data.models import LinkedInPost, Folder as LinkedInFolder
 from facebook_data.models import FacebookPost, Folder as FacebookFolder
@@ -41,17 +44,18 @@ class DataTransformer:
             platform = results[0].job.config.platform
             logger.info(f"Transforming {len(results)} results for platform: {platform}")
             
-            # Transform based on platform
-            if platform == 'tiktok':
-                await self._transform_tiktok_data(results)
-            elif platform == 'linkedin':
-                await self._transform_linkedin_data(results)
-            elif platform == 'facebook':
-                await self._transform_facebook_data(results)
-            elif platform == 'instagram':
-                await self._transform_instagram_data(results)
-            else:
-                logger.warning(f"Unknown platform: {platform}")
+            # Transform based on platform; the posts and comments created are indexed together at the end
+            async with abatched_documents():
+                if platform == 'tiktok':
+                    await self._transform_tiktok_data(results)
+                elif platform == 'linkedin':
+                    await self._transform_linkedin_data(results)
+                elif platform == 'facebook':
+                    await self._transform_facebook_data(results)
+                elif platform == 'instagram':
+                    await self._transform_instagram_data(results)
+                else:
+                    logger.warning(f"Unknown platform: {platform}")
                 
         except Exception as e:
             logger.error(f"Error transforming data for job {job_id}: {str(e)}")
@@ -198,44 +202,11 @@ class DataTransformer:
         
         create_post = sync_to_async(TikTokPost.objects.create)
         
-        # Parse timestamp
-        timestamp = self._parse_timestamp(data.get('timestamp', ''))
-        
         # Extract comments data - handle both direct count and array length
-        # Try multiple possible field names for comments
-        comments_data = (data.get('comments') or 
-                        data.get('comment_list') or 
-                        data.get('commentsList') or 
-                        data.get('post_comments') or [])
-        
-        if isinstance(comments_data, list):
-            comments_count = len(comments_data)
-        else:
-            # Try multiple field names for comment count
-            comments_count = self._safe_int(
-                data.get('comments_count') or 
-                data.get('comment_count') or 
-                data.get('commentCount') or 
-                data.get('num_comments') or 0
-            )
+        comments_data = extract_comment_list(data)
         
         # Map data to TikTok model fields
-        post = await create_post(
-            url=data.get('post_url', result.source_url),
-            user_posted=data.get('username', ''),
-            description=data.get('text', ''),
-            hashtags=str(data.get('hashtags', [])),
-            num_comments=comments_count,
-            date_posted=timestamp,
-            likes=self._safe_int(data.get('likes', 0)),
-            videos=str(data.get('videos', [])),
-            photos=str(data.get('images', [])),
-            post_id=data.get('post_url', '').split('/')[-1] if data.get('post_url') else f"scraped_{result.id}",
-            discovery_input=result.source_url,
-            folder=folder,
-            content_type='video',
-            platform_type='tiktok'
-        )
+        post = await create_post(**self._map_result(result, data, 'tiktok'), folder=folder)
         
         # Create TikTok comments if they exist
         if isinstance(comments_data, list) and comments_data:
@@ -256,39 +227,17 @@ class DataTransformer:
         # LinkedIn data structure has metadata field containing the actual post data
         metadata = data.get('metadata', {})
         
-        # Parse timestamp from metadata
-        timestamp = self._parse_timestamp(metadata.get('date_posted', ''))
-        
         # Extract post text from chunk_text or metadata
         post_text = data.get('chunk_text', '').replace('*', '') if data.get('chunk_text') else ''
         
-        # Map data to LinkedIn model fields using the correct structure
-        post = await create_post(
-            url=metadata.get('url', result.source_url),
-            user_posted=metadata.get('user_id', ''),
-            user_id=metadata.get('user_id', ''),
-            user_url=metadata.get('user_url', ''),
+        # Map metadata to LinkedIn model fields; post identity and text live on the record itself
+        post_data = self._map_result(result, metadata, 'linkedin')
+        post_data.update(
             description=post_text,
             post_text=post_text,
-            post_type=metadata.get('post_type', 'post'),
-            account_type=metadata.get('account_type', ''),
-            hashtags=[],  # TODO: Extract from post text if needed
-            num_comments=self._safe_int(metadata.get('num_comments', 0)),
-            num_shares=self._safe_int(metadata.get('num_shares', 0)), 
-            likes=self._safe_int(metadata.get('num_likes', 0)),
-            num_likes=self._safe_int(metadata.get('num_likes', 0)),
-            date_posted=timestamp,
             post_id=data.get('id', f"scraped_{result.id}"),
-            discovery_input=result.source_url,
-            user_followers=self._safe_int(metadata.get('user_followers', 0)),
-            user_posts=self._safe_int(metadata.get('user_posts', 0)),
-            user_articles=self._safe_int(metadata.get('user_articles', 0)),
-            images=metadata.get('images', []) if metadata.get('has_images') else [],
-            videos=metadata.get('videos', []) if metadata.get('has_videos') else [],
-            folder=folder,
-            content_type='post',
-            platform_type='linkedin'
         )
+        post = await create_post(**post_data, folder=folder)
         
         logger.info(f"Created LinkedIn post {post.id} for user {metadata.get('user_id', 'unknown')}")
         return post
@@ -298,44 +247,13 @@ class DataTransformer:
         
         create_post = sync_to_async(FacebookPost.objects.create)
         
-        # Parse timestamp
-        timestamp = self._parse_timestamp(data.get('timestamp', ''))
-        
-        # Extract comments count - handle both direct count and array length
-        # Try multiple possible field names for comments
-        comments_data = (data.get('comments') or 
-                        data.get('comment_list') or 
-                        data.get('commentsList') or 
-                        data.get('post_comments') or [])
-        
-        if isinstance(comments_data, list):
-            comments_count = len(comments_data)
-        else:
-            # Try multiple field names for comment count
-            comments_count = self._safe_int(
-                data.get('comments_count') or 
-                data.get('comment_count') or 
-                data.get('commentCount') or 
-                data.get('num_comments') or 0
-            )
+        # Extract comments data - handle both direct count and array length
+        comments_data = extract_comment_list(data)
         
         # Map data to Facebook model fields
-        post = await create_post(
-            url=data.get('post_url', result.source_url),
-            user_posted=data.get('username', ''),
-            content=data.get('text', ''),
-            hashtags=str(data.get('hashtags', [])) if data.get('hashtags') else '',
-            num_comments=comments_count,
-            num_shares=self._safe_int(data.get('shares', 0)),
-            likes=self._safe_int(data.get('likes', 0)),
-            video_view_count=self._safe_int(data.get('views', 0)),
-            date_posted=timestamp,
-            post_id=data.get('post_url', '').split('/')[-1] if data.get('post_url') else f"scraped_{result.id}",
-            discovery_input=result.source_url,
-            folder=folder,
-            content_type='post',
-            platform_type='facebook'
-        )
+        post_data = self._map_result(result, data, 'facebook')
+        comments_count = post_data['num_comments']
+        post = await create_post(**post_data, folder=folder)
         
         # Process comments if available
         if isinstance(comments_data, list) and comments_data:
@@ -469,58 +387,25 @@ class DataTransformer:
         
         create_post = sync_to_async(InstagramPost.objects.create)
         
-        # Parse timestamp
-        timestamp = self._parse_timestamp(data.get('timestamp', ''))
-        
         # Map data to Instagram model fields
-        post = await create_post(
-            url=data.get('post_url', result.source_url),
-            user_posted=data.get('username', ''),
-            description=data.get('text', ''),
-            hashtags=data.get('hashtags', []),
-            num_comments=self._safe_int(data.get('comments_count', 0)),
-            likes=self._safe_int(data.get('likes', 0)),
-            views=self._safe_int(data.get('views', 0)),
-            date_posted=timestamp,
-            post_id=data.get('post_url', '').split('/')[-1] if data.get('post_url') else f"scraped_{result.id}",
-            photos=data.get('images', []),
-            videos=data.get('videos', []),
-            folder=folder,
-            content_type='post' if data.get('media_type') != 'video' else 'reel',
-            platform_type='instagram'
-        )
+        post = await create_post(**self._map_result(result, data, 'instagram'), folder=folder)
         
         logger.info(f"Created Instagram post {post.id} for user {data.get('username', 'unknown')}")
         return post
     
+    def _map_result(self, result, data, platform):
+        """Map a scraped record with the shared Apify table, filling in what only the result knows"""
+        post_data = get_mapper(platform, SOURCE_APIFY)(data)
+        post_data['url'] = post_data['url'] or result.source_url
+        post_data['discovery_input'] = result.source_url
+        if 'post_id' in post_data:
+            post_data['post_id'] = post_data['post_id'] or f"scraped_{result.id}"
+        return post_data
+    
     def _parse_timestamp(self, timestamp_str):
         """Parse timestamp string to datetime"""
-        
-        if not timestamp_str:
-            return timezone.now()
-            
-        # Handle different timestamp formats
-        formats = [
-            '%Y-%m-%dT%H:%M:%S.%fZ',
-            '%Y-%m-%dT%H:%M:%SZ', 
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%d',
-        ]
-        
-        for fmt in formats:
-            try:
-                dt = datetime.strptime(timestamp_str, fmt)
-                return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
-            except (ValueError, TypeError):
-                continue
-                
-        # If all parsing fails, return current time
-        logger.warning(f"Could not parse timestamp: {timestamp_str}")
-        return timezone.now()
+        return parse_scraped_timestamp(timestamp_str)
     
     def _safe_int(self, value):
         """Safely convert value to int"""
-        try:
-            return int(value) if value is not None else 0
-        except (ValueError, TypeError):
-            return 0
\ No newline at end of file
+        return to_int(value)
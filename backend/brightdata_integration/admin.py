@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BrightdataConfig, ScraperRequest, BatchScraperJob, BrightdataNotification, WebhookEvent
+from .models import BrightdataConfig, ScraperRequest, BatchScraperJob, BrightdataNotification, WebhookEvent, CsvImportJob
 
 @admin.register(BrightdataConfig)
 class BrightdataConfigAdmin(admin.ModelAdmin):
@@ -109,3 +109,12 @@ class WebhookEventAdmin(admin.ModelAdmin):
     
     def has_add_permission(self, request):
         return False  # Webhook events should only be created by webhooks
+
+
+@admin.register(CsvImportJob)
+class CsvImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'importer', 'file_name', 'status', 'rows_processed', 'created_at', 'finished_at')
+    list_filter = ('importer', 'status', 'created_at')
+    search_fields = ('file_name', 'importer')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'bytes_processed', 'rows_processed', 'result')
+    ordering = ('-created_at',)
@@ -0,0 +1,243 @@
+"""
+Pooled HTTP client for the BrightData API
+
+Every trigger call used to go through a bare requests.post(), which opens a new TLS
+connection per call, waits forever when no timeout is given and gives up on the
+first 429 or 5xx. BrightDataClient wraps one requests.Session per process:
+
+- keep-alive connections pooled per host (the pool holds BRIGHTDATA_MAX_CONCURRENCY
+  connections or more, so fan-out never opens throwaway ones)
+- (connect, read) timeouts on every call unless the caller passes its own
+- 429 and 5xx responses and connection errors are retried up to
+  BRIGHTDATA_MAX_RETRIES times with full-jitter exponential backoff (a random delay
+  up to BRIGHTDATA_BACKOFF_BASE * 2**attempt, capped at BRIGHTDATA_BACKOFF_MAX), or
+  after the Retry-After the server asked for. Non-idempotent requests such as a
+  trigger POST are only retried when they cannot have started anything: on 429,
+  503 and failures to connect. A 500, a dropped connection or a read timeout may
+  come after BrightData started a snapshot, and retrying would start another.
+- fan_out() runs independent calls (e.g. one trigger per platform and dataset) on
+  a thread pool of at most BRIGHTDATA_MAX_CONCURRENCY workers
+
+BRIGHTDATA_API_URL points the client elsewhere, e.g. at the fake server of
+fake_brightdata (the run_fake_brightdata command) for offline runs.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = 'https://api.brightdata.com'
+TRIGGER_PATH = '/datasets/v3/trigger'
+STATUS_PATH = '/datasets/v3/status'
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Statuses where the server turned the request away without acting on it
+UNSTARTED_STATUSES = frozenset({429, 503})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+MIN_POOL_SIZE = 10
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or an HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, moment.timestamp() - now)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None,
+                  rand: Callable[[], float] = random.random) -> float:
+    """Delay before retry number attempt + 1: the server's Retry-After, else full jitter"""
+    if retry_after is not None:
+        return min(retry_after, cap)
+    return rand() * min(cap, base * 2 ** attempt)
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of one fan_out() call: its return value or the exception it raised"""
+    item: Any
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BrightDataClient:
+    """Retrying BrightData API client over a pooled keep-alive session"""
+
+    def __init__(self, base_url: Optional[str] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 backoff_base: Optional[float] = None, backoff_max: Optional[float] = None,
+                 max_concurrency: Optional[int] = None, session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        def setting(value, name, default, cast):
+            return cast(value if value is not None else getattr(settings, name, default))
+
+        self.base_url = setting(base_url, 'BRIGHTDATA_API_URL', DEFAULT_API_URL, str).rstrip('/')
+        self.timeout = (
+            setting(connect_timeout, 'BRIGHTDATA_CONNECT_TIMEOUT', 5, float),
+            setting(read_timeout, 'BRIGHTDATA_READ_TIMEOUT', 60, float),
+        )
+        self.max_retries = max(0, setting(max_retries, 'BRIGHTDATA_MAX_RETRIES', 4, int))
+        self.backoff_base = setting(backoff_base, 'BRIGHTDATA_BACKOFF_BASE', 0.5, float)
+        self.backoff_max = setting(backoff_max, 'BRIGHTDATA_BACKOFF_MAX', 30, float)
+        self.max_concurrency = max(1, setting(max_concurrency, 'BRIGHTDATA_MAX_CONCURRENCY', 4, int))
+        self.session = session or self._new_session(max(self.max_concurrency, MIN_POOL_SIZE))
+        self.sleep = sleep
+
+    @staticmethod
+    def _new_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def url(self, path: str) -> str:
+        """Absolute API URL of a path such as TRIGGER_PATH"""
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying 429/5xx responses and connection errors (only
+        429, 503 and connect failures for non-idempotent methods). Returns the last response (which may still be an error status once the
+        retries are used up) and raises the last exception if every attempt failed.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                if attempt >= self.max_retries or not self._retryable_error(method, error):
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                reason = f"{type(error).__name__}: {error}"
+            else:
+                if not self._retryable_status(method, response.status_code) or attempt >= self.max_retries:
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after)
+                reason = f"HTTP {response.status_code}"
+                response.close()
+
+            attempt += 1
+            logger.warning(
+                f"BrightData {method} {url} failed ({reason}); retry {attempt}/{self.max_retries} in {delay:.2f}s"
+            )
+            self.sleep(delay)
+
+    @staticmethod
+    def _retryable_status(method: str, status: int) -> bool:
+        if method.upper() in IDEMPOTENT_METHODS:
+            return status in RETRY_STATUSES
+        return status in UNSTARTED_STATUSES
+
+    @staticmethod
+    def _retryable_error(method: str, error: Exception) -> bool:
+        if method.upper() in IDEMPOTENT_METHODS:
+            return True
+        # A connect failure never reached the server; a reset or read timeout may have
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.SSLError,
+                              requests.exceptions.ProxyError)):
+            return False
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def trigger(self, api_token: str, dataset_id: str, payload: List[dict], **params) -> requests.Response:
+        """Start a collection of dataset_id for payload; params are extra query parameters"""
+        return self.post(
+            self.url(TRIGGER_PATH),
+            headers={'Authorization': f'Bearer {api_token}', 'Content-Type': 'application/json'},
+            params={'dataset_id': dataset_id, **params},
+            json=payload,
+        )
+
+    # ------------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------------
+
+    def fan_out(self, call: Callable[[Any], Any], items: Iterable[Any],
+                max_concurrency: Optional[int] = None) -> List[FanOutResult]:
+        """
+        call(item) for every item, at most max_concurrency (default
+        BRIGHTDATA_MAX_CONCURRENCY) at a time; results are in the order of items.
+        call runs on worker threads, so it should only do HTTP, not database writes.
+        """
+        items = list(items)
+        workers = min(max_concurrency or self.max_concurrency, len(items))
+        if workers <= 1:
+            return [self._outcome(call, item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='brightdata') as pool:
+            futures = [pool.submit(self._outcome, call, item) for item in items]
+            return [future.result() for future in futures]
+
+    @staticmethod
+    def _outcome(call: Callable[[Any], Any], item: Any) -> FanOutResult:
+        try:
+            return FanOutResult(item, value=call(item))
+        except Exception as error:
+            return FanOutResult(item, error=error)
+
+
+_client: Optional[BrightDataClient] = None
+_client_settings: Optional[tuple] = None
+_client_lock = threading.Lock()
+
+_SETTING_NAMES = (
+    'BRIGHTDATA_API_URL', 'BRIGHTDATA_CONNECT_TIMEOUT', 'BRIGHTDATA_READ_TIMEOUT', 'BRIGHTDATA_MAX_RETRIES',
+    'BRIGHTDATA_BACKOFF_BASE', 'BRIGHTDATA_BACKOFF_MAX', 'BRIGHTDATA_MAX_CONCURRENCY',
+)
+
+
+def get_client() -> BrightDataClient:
+    """The process-wide client; rebuilt when the BRIGHTDATA_* settings change (tests)"""
+    global _client, _client_settings
+    current = tuple(getattr(settings, name, None) for name in _SETTING_NAMES)
+    with _client_lock:
+        if _client is None or current != _client_settings:
+            if _client is not None:
+                _client.session.close()
+            _client, _client_settings = BrightDataClient(), current
+        return _client
+
+
+def api_url(path: str) -> str:
+    """Absolute URL of an API path on the configured BrightData host"""
+    return get_client().url(path)
@@ -0,0 +1,979 @@
+"""
+Chunked CSV import pipeline for the platform uploaders
+
+Every upload_csv endpoint (Instagram posts and comments, Facebook comments,
+LinkedIn and TikTok posts) goes through the same steps:
+- the encoding is sniffed from the first SNIFF_BYTES of the upload instead of
+  decoding the whole file with up to four codecs; the rest is decoded strictly,
+  except that bytes a UTF-8 upload cannot decode are read as LEGACY_ENCODING (e.g.
+  a row pasted in from Excel). Anything still undecodable fails the import with
+  its row number instead of being imported as replacement characters
+- rows are decoded and parsed as they are read from the uploaded file
+- rows are mapped, validated and coerced per batch; lookups (existing rows,
+  parent posts of comments) are one query per batch
+- each batch is upserted with bulk_create / bulk_update; a batch that fails as a
+  whole is replayed row by row, so failing rows are reported as before
+- uploads above CSV_IMPORT_ASYNC_THRESHOLD_BYTES are stored as a CsvImportJob and
+  imported by the process_csv_imports worker; clients poll the job for progress
+
+Importers build the same response bodies the per-view loops used to return.
+"""
+
+import codecs
+import csv
+import io
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from reports.post_stats import PostStatsDelta
+from reports.hashtags import PostHashtags
+from reports.search import SearchDocuments
+from scrapy_integration.retrieval_index import RetrievalDocuments
+from users.models import Project
+
+from .field_mappers import (
+    SOURCE_CSV, FieldSpec, compile_mapper, get_mapper, json_or_none, parse_datetime,
+    parse_iso_datetime, to_int,
+)
+from .ingestion import DERIVED_FIELDS, SYSTEM_FIELDS, normalize_field_value
+from .models import CsvImportChunk, CsvImportJob
+
+try:
+    from dateutil import parser as dateutil_parser
+    HAS_DATEUTIL = True
+except ImportError:
+    HAS_DATEUTIL = False
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 64 * 1024
+LEGACY_ENCODING = 'cp1252'
+LEGACY_FALLBACK = 'csv_import_legacy_fallback'
+STORAGE_CHUNK_BYTES = 1024 * 1024
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_ASYNC_THRESHOLD = 10 * 1024 * 1024
+
+
+class CsvImportError(ValueError):
+    """The upload cannot be imported at all (reported as a 400 or a failed job)"""
+
+
+class LeaseLostError(Exception):
+    """The job was re-queued as stale and claimed by another worker mid-import"""
+
+
+def get_import_batch_size() -> int:
+    return int(getattr(settings, 'CSV_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+def get_async_threshold() -> int:
+    """Uploads larger than this many bytes are queued; 0 imports everything inline"""
+    return int(getattr(settings, 'CSV_IMPORT_ASYNC_THRESHOLD_BYTES', DEFAULT_ASYNC_THRESHOLD))
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def sniff_encoding(prefix: bytes) -> str:
+    """Encoding of an upload, judged from its first bytes"""
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # final=False: the prefix may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        prefix.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def _legacy_fallback(error: UnicodeDecodeError) -> Tuple[str, int]:
+    """Decode error handler: read the bytes UTF-8 rejected as LEGACY_ENCODING"""
+    try:
+        return error.object[error.start:error.end].decode(LEGACY_ENCODING), error.end
+    except UnicodeDecodeError:
+        raise error
+
+
+codecs.register_error(LEGACY_FALLBACK, _legacy_fallback)
+
+
+def _strip_nul(lines: Iterable[str]) -> Iterable[str]:
+    for line in lines:
+        yield line.replace('\x00', '') if '\x00' in line else line
+
+
+class CsvSource:
+    """Rows of an uploaded CSV file, decoded as they are read"""
+
+    def __init__(self, fileobj):
+        # Django uploads wrap the real file (BytesIO or a temporary file)
+        self.binary = getattr(fileobj, 'file', fileobj)
+        self.binary.seek(0)
+        self.encoding = sniff_encoding(self.binary.read(SNIFF_BYTES))
+        self.binary.seek(0)
+        self.errors = LEGACY_FALLBACK if self.encoding.startswith('utf-8') else 'strict'
+        self.text = io.TextIOWrapper(self.binary, encoding=self.encoding, errors=self.errors, newline='')
+        self.reader = csv.DictReader(_strip_nul(self.text))
+
+    @property
+    def fieldnames(self) -> List[str]:
+        return self.reader.fieldnames or []
+
+    @property
+    def bytes_read(self) -> int:
+        return self.binary.tell()
+
+    def __iter__(self):
+        return iter(self.reader)
+
+    def undecodable_row(self) -> int:
+        """Line number (the header being 1) of the first byte the upload cannot be decoded at"""
+        # The reader decodes ahead of the rows it has parsed, so find the byte again
+        self.binary.seek(0)
+        decoder = codecs.getincrementaldecoder(self.encoding)(self.errors)
+        lines = 1
+        while True:
+            block = self.binary.read(STORAGE_CHUNK_BYTES)
+            pending = len(decoder.getstate()[0])
+            try:
+                decoder.decode(block, final=not block)
+            except UnicodeDecodeError as e:
+                return lines + block[:max(0, e.start - pending)].count(b'\n')
+            if not block:
+                return lines
+            lines += block.count(b'\n')
+
+    def close(self) -> None:
+        # Leave the upload open; Django closes it with the request
+        self.text.detach()
+
+
+class StoredUpload(io.RawIOBase):
+    """Read-only file over the CsvImportChunk rows of a job, fetched one chunk at a time"""
+
+    def __init__(self, job: CsvImportJob):
+        super().__init__()
+        self.job_id = job.pk
+        self._rewind()
+
+    def _rewind(self) -> None:
+        self._index = 0
+        self._chunk = b''
+        self._offset = 0
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation('Stored uploads can only be rewound')
+        self._rewind()
+        return 0
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        if self._offset >= len(self._chunk):
+            data = CsvImportChunk.objects.filter(job_id=self.job_id, index=self._index).values_list(
+                'data', flat=True
+            ).first()
+            if data is None:
+                return 0
+            self._chunk, self._offset = bytes(data), 0
+            self._index += 1
+        size = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:size] = self._chunk[self._offset:self._offset + size]
+        self._offset += size
+        self._position += size
+        return size
+
+
+# ---------------------------------------------------------------------------
+# Coercers for comment exports
+# ---------------------------------------------------------------------------
+
+def strip_quotes(value) -> str:
+    if value is None:
+        return ''
+    return str(value).strip().strip('"').strip("'")
+
+
+def flat_text(value) -> str:
+    """Quotes stripped and line breaks flattened, as the Instagram comment uploader always did"""
+    if value is None:
+        return ''
+    return strip_quotes(str(value).replace('\x00', '').replace('\r', '').replace('\n', ' '))
+
+
+def int_or_none(value) -> Optional[int]:
+    return to_int(value) if value else None
+
+
+def parse_comment_date(value):
+    """Facebook comment dates: dateutil when installed, else ISO-8601"""
+    if not value:
+        return None
+    if HAS_DATEUTIL:
+        try:
+            return dateutil_parser.parse(str(value))
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return parse_iso_datetime(str(value))
+
+
+INSTAGRAM_COMMENT_CSV = [
+    FieldSpec('comment_id', 'comment_id', 'id', default='', coerce=flat_text),
+    FieldSpec('post_id', 'post_id', 'id', default='', coerce=flat_text),
+    FieldSpec('post_url', 'post_url', 'url', default='', coerce=flat_text),
+    FieldSpec('post_user', coerce=flat_text),
+    FieldSpec('comment', 'comment', 'comment_text', 'text', default='', coerce=flat_text),
+    FieldSpec('comment_date', coerce=parse_datetime),
+    FieldSpec('comment_user', coerce=flat_text),
+    FieldSpec('comment_user_url', coerce=flat_text),
+    FieldSpec('likes_number', coerce=to_int),
+    FieldSpec('replies_number', coerce=to_int),
+    FieldSpec('replies', coerce=json_or_none),
+    FieldSpec('hashtag_comment', coerce=flat_text),
+    FieldSpec('tagged_users_in_comment', coerce=json_or_none),
+    FieldSpec('url', coerce=flat_text),
+]
+
+FACEBOOK_COMMENT_CSV = [
+    FieldSpec('comment_id', 'comment_id', 'id', default='', coerce=strip_quotes),
+    FieldSpec('post_id', 'post_id', 'id', 'original_post_id', default='', coerce=strip_quotes),
+    FieldSpec('url', 'url', 'post_url', default='', coerce=strip_quotes),
+    FieldSpec('post_url', 'post_url', 'url', default='', coerce=strip_quotes),
+    FieldSpec('user_name', 'user_name', 'username', default='', coerce=strip_quotes),
+    FieldSpec('user_id', 'user_id', 'userid', default='', coerce=strip_quotes),
+    FieldSpec('user_url', 'user_url', 'profile_url', default='', coerce=strip_quotes),
+    FieldSpec('commentator_profile', 'commentator_profile', 'profile', default='', coerce=strip_quotes),
+    FieldSpec('comment_text', 'comment_text', 'text', 'content', 'comment', default='', coerce=strip_quotes),
+    FieldSpec('date_created', coerce=parse_comment_date),
+    FieldSpec('comment_link', 'comment_link', 'link', default='', coerce=strip_quotes),
+    FieldSpec('num_likes', coerce=to_int),
+    FieldSpec('num_replies', coerce=to_int),
+    FieldSpec('attached_files', 'attached_files', 'attachments', default='', coerce=strip_quotes),
+    FieldSpec('video_length', coerce=int_or_none),
+    FieldSpec('source_type', 'source_type', 'type', default='', coerce=strip_quotes),
+    FieldSpec('subtype', coerce=strip_quotes),
+    FieldSpec('type', 'type', 'comment_type', default='', coerce=strip_quotes),
+]
+
+
+# ---------------------------------------------------------------------------
+# Importers
+# ---------------------------------------------------------------------------
+
+class PendingRow:
+    """A validated row waiting for its batch to be written"""
+    __slots__ = ('number', 'row', 'values', 'key')
+
+    def __init__(self, number: int, row: dict, values: Dict[str, Any]):
+        self.number = number
+        self.row = row
+        self.values = values
+        self.key = None
+
+
+class CsvImporter:
+    """
+    Streams an uploaded CSV into one model of a platform app.
+
+    Subclasses name the model and the fields identifying a row within a folder,
+    turn each CSV row into column values in prepare_row() (returning None for rows
+    they skip or reject), and build the endpoint's response body in response().
+    """
+    name = None
+    model_label = None
+    folder_model_label = None
+    key_fields: Tuple[str, ...] = ('post_id',)
+
+    def __init__(self, folder=None, batch_size: Optional[int] = None):
+        self.model = apps.get_model(self.model_label)
+        self.folder = folder
+        self.batch_size = max(1, batch_size or get_import_batch_size())
+        self.fields = {
+            field.attname: field for field in self.model._meta.concrete_fields
+            if field.name not in SYSTEM_FIELDS
+        }
+        self.derived_fields = DERIVED_FIELDS & set(self.fields)
+        self.has_updated_at = any(field.name == 'updated_at' for field in self.model._meta.concrete_fields)
+        self.rows_read = 0
+        self.created = 0
+        self.updated = 0
+
+    # Hooks -----------------------------------------------------------------
+
+    def begin(self, fieldnames: List[str], sample: List[dict]) -> None:
+        """Inspect the header and the first batch before any row is prepared"""
+
+    def prepare_row(self, row: dict) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def row_number(self) -> int:
+        """Number reported for the row being prepared"""
+        return self.rows_read
+
+    def resolve(self, batch: List[PendingRow]) -> None:
+        """Batch-wide lookups (e.g. parent posts) before the batch is written"""
+
+    def write_failed(self, pending: PendingRow, error: Exception) -> None:
+        raise NotImplementedError
+
+    def response(self) -> Tuple[Dict[str, Any], int]:
+        raise NotImplementedError
+
+    # Pipeline --------------------------------------------------------------
+
+    def import_file(self, fileobj, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """Import every row of fileobj; progress(rows_read, bytes_read) is called after each batch"""
+        source = CsvSource(fileobj)
+        try:
+            logger.info(f"Importing {self.name} CSV into folder "
+                        f"{self.folder.pk if self.folder else 'None'} (encoding: {source.encoding})")
+            self.run(source, progress)
+        except csv.Error as e:
+            raise CsvImportError(f'Error reading CSV file: {str(e)}') from e
+        except UnicodeDecodeError as e:
+            raise CsvImportError(
+                f'Error reading CSV file: row {source.undecodable_row()} is not valid {source.encoding} text'
+            ) from e
+        finally:
+            source.close()
+
+        logger.info(f"Imported {self.name} CSV: {self.rows_read} rows, "
+                    f"{self.created} created, {self.updated} updated")
+
+    def run(self, source: CsvSource, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        rows = iter(source)
+        sample = list(islice(rows, self.batch_size))
+        self.begin(source.fieldnames, sample)
+
+        batch: List[PendingRow] = []
+        for row in chain(sample, rows):
+            self.rows_read += 1
+            values = self.prepare_row(row)
+            if values is not None:
+                batch.append(PendingRow(self.row_number(), row, values))
+            if self.rows_read % self.batch_size == 0:
+                self._flush(batch)
+                batch = []
+                if progress:
+                    progress(self.rows_read, source.bytes_read)
+
+        if batch:
+            self._flush(batch)
+        if progress:
+            progress(self.rows_read, source.bytes_read)
+
+    def _flush(self, batch: List[PendingRow]) -> None:
+        if not batch:
+            return
+        self.resolve(batch)
+
+        unique: Dict[Tuple[str, Any], PendingRow] = {}
+        for pending in batch:
+            try:
+                pending.values = self._build_values(pending.values)
+            except (ValidationError, TypeError, ValueError) as e:
+                self.write_failed(pending, e)
+                continue
+            pending.key = self._key(pending.values)
+            if pending.key in unique:
+                # Repeated row within the batch: the later copy wins
+                self.updated += 1
+            unique[pending.key] = pending
+
+        if not unique:
+            return
+        pendings = list(unique.values())
+        try:
+            with transaction.atomic():
+                self._write(pendings)
+        except (DatabaseError, ValidationError, TypeError, ValueError) as e:
+            logger.warning(f"Bulk write of {len(pendings)} {self.name} rows failed ({str(e)}); "
+                           f"retrying row by row")
+            for pending in pendings:
+                try:
+                    with transaction.atomic():
+                        self._write([pending])
+                except (DatabaseError, ValidationError, TypeError, ValueError) as row_error:
+                    self.write_failed(pending, row_error)
+
+    def _build_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize column values exactly as save() would store them"""
+        values = {name: value for name, value in values.items() if name in self.fields}
+        candidate = self.model(**values)
+        sync = getattr(candidate, 'sync_legacy_fields', None)
+        if sync is not None:
+            sync()
+            for name in self.derived_fields:
+                values[name] = getattr(candidate, name)
+        return {
+            name: normalize_field_value(self.fields[name], getattr(candidate, name))
+            for name in values
+        }
+
+    def _key(self, values: Dict[str, Any]) -> Tuple[str, Any]:
+        for field in self.key_fields:
+            if values.get(field):
+                return field, values[field]
+        return self.key_fields[0], values.get(self.key_fields[0])
+
+    def _fetch_existing(self, pendings: List[PendingRow]) -> Dict[Tuple[str, Any], Any]:
+        existing = {}
+        for field in self.key_fields:
+            keys = [pending.key[1] for pending in pendings if pending.key[0] == field]
+            if not keys:
+                continue
+            queryset = self.model.objects.filter(folder=self.folder, **{f'{field}__in': keys})
+            for instance in queryset.order_by('pk'):
+                existing.setdefault((field, getattr(instance, field)), instance)
+        return existing
+
+    def _write(self, pendings: List[PendingRow]) -> None:
+        existing = self._fetch_existing(pendings)
+        now = timezone.now()
+
+        stats = PostStatsDelta(self.model, self.folder)
+        search = SearchDocuments(self.model)
+        hashtags = PostHashtags(self.model, self.folder)
+        retrieval = RetrievalDocuments(self.model, self.folder)
+
+        to_create, to_update, changed_fields = [], [], set()
+        for pending in pendings:
+            instance = existing.get(pending.key)
+            if instance is None:
+                to_create.append(self.model(folder=self.folder, **pending.values))
+                continue
+            changed = [name for name, value in pending.values.items() if getattr(instance, name) != value]
+            if changed:
+                counted = stats.watches(changed)
+                if counted:
+                    stats.add(instance, -1)
+                for name in changed:
+                    setattr(instance, name, pending.values[name])
+                if counted:
+                    stats.add(instance)
+                if search.watches(changed):
+                    search.add(instance)
+                if hashtags.watches(changed):
+                    hashtags.add(instance)
+                if retrieval.watches(changed):
+                    retrieval.add(instance)
+                if self.has_updated_at:
+                    instance.updated_at = now
+                to_update.append(instance)
+                changed_fields.update(changed)
+
+        if to_create:
+            self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+            for instance in to_create:
+                stats.add(instance)
+                search.add(instance)
+                hashtags.add(instance, created=True)
+                retrieval.add(instance)
+        if to_update:
+            if self.has_updated_at:
+                changed_fields.add('updated_at')
+            self.model.objects.bulk_update(to_update, sorted(changed_fields), batch_size=self.batch_size)
+        stats.apply()
+        search.apply()
+        hashtags.apply()
+        retrieval.apply()
+        if (to_create or to_update) and self.folder is not None:
+            Project.bump_data_version([self.folder.project_id])
+
+        self.created += len(to_create)
+        self.updated += len(pendings) - len(to_create)
+
+
+class InstagramPostImporter(CsvImporter):
+    name = 'instagram_posts'
+    model_label = 'instagram_data.InstagramPost'
+    folder_model_label = 'instagram_data.Folder'
+
+    # Columns only found in post exports / reel exports
+    POST_FIELDS = {'latest_comments', 'engagement_score_view', 'post_content', 'videos_duration', 'images', 'photos_number'}
+    REEL_FIELDS = {'video_play_count', 'length', 'video_url', 'audio_url', 'top_comments', 'product_type'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mapper = get_mapper('instagram', SOURCE_CSV)
+        self.rejected: List[Dict[str, Any]] = []
+        self.content_type = 'post'
+        self.detection_reason = ''
+
+    def begin(self, fieldnames, sample):
+        headers = set(fieldnames)
+        post_matches = headers & self.POST_FIELDS
+        reel_matches = headers & self.REEL_FIELDS
+        # Reel exports mark every row with the 'clips' product type, so the first batch is enough
+        has_clips_product_type = any('clips' in str(row.get('product_type', '')).lower() for row in sample)
+        has_video_columns = 'video_play_count' in headers and 'audio_url' in headers
+
+        if has_clips_product_type or len(reel_matches) > len(post_matches) or has_video_columns:
+            self.content_type = 'reel'
+            self.detection_reason = (f"Detected as reel (found {len(reel_matches)} reel-specific fields: "
+                                     f"{reel_matches}, clips product type: {has_clips_product_type})")
+        else:
+            self.content_type = 'post'
+            self.detection_reason = (f"Detected as post (found {len(post_matches)} post-specific fields: "
+                                     f"{post_matches})")
+        logger.info(f"Auto-detection result: {self.detection_reason}")
+
+    def prepare_row(self, row):
+        if not row:
+            self.rejected.append({'reason': 'Empty row', 'row_number': self.rows_read + 1})
+            return None
+
+        # post_id from post_id/shortcode/content_id or the URL
+        values = self.mapper(row)
+        if not values['post_id']:
+            text = str(row)
+            self.rejected.append({
+                'reason': 'Missing post_id',
+                'row_number': self.rows_read + 1,
+                'data': text[:100] + '...' if len(text) > 100 else text,
+            })
+            return None
+
+        values['content_type'] = row.get('content_type', self.content_type)
+        values['platform_type'] = 'IG Post' if self.content_type == 'post' else 'IG Reel'
+        return values
+
+    def write_failed(self, pending, error):
+        self.rejected.append({
+            'reason': str(error),
+            'row_number': pending.number + 1,  # +1 for header
+            'post_id': pending.values.get('post_id'),
+            'date': pending.row.get('date_posted', 'unknown'),
+        })
+
+    def response(self):
+        total_count = self.created + self.updated
+        content_type_label = 'reels' if self.content_type == 'reel' else 'posts'
+        message = (f"Successfully processed {total_count} Instagram {content_type_label}: "
+                   f"{self.created} created, {self.updated} updated")
+        if self.rejected:
+            message += f". {len(self.rejected)} rows were rejected."
+
+        return {
+            'message': message,
+            'total_rows_in_csv': self.rows_read,
+            'count': total_count,
+            'created': self.created,
+            'updated': self.updated,
+            'rejected': len(self.rejected),
+            'rejected_details': self.rejected[:10],  # Only return first 10 rejected rows
+            'content_type': self.content_type,
+            'detected_content_type': self.content_type,
+            'detection_reason': self.detection_reason,
+        }, 201
+
+
+class CommentImporter(CsvImporter):
+    """
+    Comment exports: rows without comment data are skipped, comments are linked
+    to their post when it is already stored
+    """
+    key_fields = ('comment_id',)
+    post_model_label = None
+    post_field = None
+    text_field = None
+    specs: List[FieldSpec] = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mapper = compile_mapper(self.specs, name=f'map_csv_{self.name}')
+        self.rows_processed = 0
+        self.rows_skipped = 0
+        self.errors: List[str] = []
+
+    def is_unavailable(self, row: dict) -> bool:
+        """Rows carrying a scraper warning/error instead of a comment"""
+        return bool((row.get('warning') or '').strip() or (row.get('error') or '').strip())
+
+    def row_number(self):
+        return self.rows_processed
+
+    def prepare_row(self, row):
+        if not row or all(not value for value in row.values()):
+            return None
+        self.rows_processed += 1
+
+        if self.is_unavailable(row):
+            self.rows_skipped += 1
+            return None
+
+        values = self.mapper(row)
+        if not values[self.text_field]:
+            self.rows_skipped += 1
+            return None
+        if not values['comment_id']:
+            self.errors.append(f"Row {self.rows_processed}: Missing comment_id")
+            self.rows_skipped += 1
+            return None
+        return values
+
+    def resolve(self, batch):
+        post_ids = {pending.values['post_id'] for pending in batch if pending.values['post_id']}
+        posts: Dict[str, int] = {}
+        if post_ids:
+            post_model = apps.get_model(self.post_model_label)
+            for post_id, pk in post_model.objects.filter(post_id__in=post_ids).order_by('pk').values_list('post_id', 'id'):
+                posts.setdefault(post_id, pk)
+        for pending in batch:
+            pending.values[self.post_field] = posts.get(pending.values['post_id'])
+
+    def write_failed(self, pending, error):
+        self.errors.append(f"Error processing row {pending.number}: {str(error)}")
+        self.rows_skipped += 1
+
+    def response(self):
+        body = {
+            'status': 'success',
+            'message': (f'CSV processed successfully. {self.rows_processed} rows processed, '
+                        f'{self.created} added, {self.updated} updated, {self.rows_skipped} skipped.'),
+            'rows_processed': self.rows_processed,
+            'rows_added': self.created,
+            'rows_updated': self.updated,
+            'rows_skipped': self.rows_skipped,
+        }
+        if self.errors:
+            body['errors'] = self.errors[:10]  # Limit number of errors returned
+            body['total_errors'] = len(self.errors)
+        return body, 200
+
+
+class InstagramCommentImporter(CommentImporter):
+    name = 'instagram_comments'
+    model_label = 'instagram_data.InstagramComment'
+    folder_model_label = 'instagram_data.Folder'
+    post_model_label = 'instagram_data.InstagramPost'
+    post_field = 'instagram_post_id'
+    text_field = 'comment'
+    specs = INSTAGRAM_COMMENT_CSV
+
+
+class FacebookCommentImporter(CommentImporter):
+    name = 'facebook_comments'
+    model_label = 'facebook_data.FacebookComment'
+    folder_model_label = 'facebook_data.Folder'
+    post_model_label = 'facebook_data.FacebookPost'
+    post_field = 'facebook_post_id'
+    text_field = 'comment_text'
+    specs = FACEBOOK_COMMENT_CSV
+
+    UNAVAILABLE_WARNINGS = ('This post has no comments.', 'For this type of posts (reels) comments are not available.')
+    UNAVAILABLE_ERRORS = ('Crawl failed after multiple attempts, please try again later',)
+
+    def is_unavailable(self, row):
+        return ((row.get('warning') or '').strip() in self.UNAVAILABLE_WARNINGS or
+                (row.get('error') or '').strip() in self.UNAVAILABLE_ERRORS)
+
+
+class FacebookUploadImporter(FacebookCommentImporter):
+    """Upload on the posts endpoint: imports comments and reports whether the export looked like posts or reels"""
+    name = 'facebook_posts'
+
+    POST_FIELDS = {'num_likes_type', 'original_post', 'attachments', 'post_type', 'post_external_link'}
+    REEL_FIELDS = {'video_view_count', 'length', 'audio', 'thumbnail'}
+
+    def begin(self, fieldnames, sample):
+        headers = set(fieldnames)
+        post_matches = headers & self.POST_FIELDS
+        reel_matches = headers & self.REEL_FIELDS
+        if len(reel_matches) > len(post_matches):
+            self.content_type = 'reel'
+            self.detection_reason = f"Detected as reel (found {len(reel_matches)} reel-specific fields: {reel_matches})"
+        else:
+            self.content_type = 'post'
+            self.detection_reason = f"Detected as post (found {len(post_matches)} post-specific fields: {post_matches})"
+        logger.info(f"Auto-detection result: {self.detection_reason}")
+
+    def response(self):
+        body, status_code = super().response()
+        body['detected_content_type'] = self.content_type
+        body['detection_reason'] = self.detection_reason
+        return body, status_code
+
+
+class TrackerPostImporter(CsvImporter):
+    """GE Tracker post exports; rows are matched by post_id, else by URL"""
+    key_fields = ('post_id', 'url')
+    platform = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mapper = get_mapper(self.platform, SOURCE_CSV)
+        self.failed_rows: List[Dict[str, Any]] = []
+
+    def begin(self, fieldnames, sample):
+        if not sample:
+            raise CsvImportError('The CSV file is empty or improperly formatted')
+
+    def prepare_row(self, row):
+        try:
+            values = self.mapper(row)
+        except Exception as e:
+            self.failed_rows.append({'row': row, 'error': str(e)})
+            return None
+        if not values['post_id'] and not values['url']:
+            self.failed_rows.append({'row': row, 'error': 'Missing post_id and URL'})
+            return None
+        return values
+
+    def write_failed(self, pending, error):
+        self.failed_rows.append({'row': pending.row, 'error': str(error)})
+
+    def response(self):
+        return {
+            'success': True,
+            'created_count': self.created + self.updated,
+            'failed_count': len(self.failed_rows),
+            'failed_rows': self.failed_rows[:10],  # Limit to first 10 for readability
+        }, 200
+
+
+class LinkedInPostImporter(TrackerPostImporter):
+    name = 'linkedin_posts'
+    platform = 'linkedin'
+    model_label = 'linkedin_data.LinkedInPost'
+    folder_model_label = 'linkedin_data.Folder'
+
+
+class TikTokPostImporter(TrackerPostImporter):
+    name = 'tiktok_posts'
+    platform = 'tiktok'
+    model_label = 'tiktok_data.TikTokPost'
+    folder_model_label = 'tiktok_data.Folder'
+
+
+IMPORTERS = {
+    importer.name: importer for importer in (
+        InstagramPostImporter, InstagramCommentImporter, FacebookCommentImporter,
+        FacebookUploadImporter, LinkedInPostImporter, TikTokPostImporter,
+    )
+}
+
+
+# ---------------------------------------------------------------------------
+# Entry point for the upload_csv views
+# ---------------------------------------------------------------------------
+
+def enqueue_upload(importer_name: str, upload, folder=None) -> CsvImportJob:
+    """Store an upload in the database, chunk by chunk, for the background worker"""
+    with transaction.atomic():
+        job = CsvImportJob.objects.create(
+            importer=importer_name,
+            folder_id=folder.pk if folder else None,
+            file_name=upload.name[:255],
+            size_bytes=upload.size,
+        )
+        for index, data in enumerate(upload.chunks(STORAGE_CHUNK_BYTES)):
+            CsvImportChunk.objects.create(job=job, index=index, data=data)
+    logger.info(f"Queued {importer_name} CSV import job {job.id} ({upload.size} bytes)")
+    return job
+
+
+def import_upload(importer_name: str, upload, folder=None) -> Tuple[Dict[str, Any], int]:
+    """
+    Import an uploaded CSV and return (response body, HTTP status).
+
+    Uploads above CSV_IMPORT_ASYNC_THRESHOLD_BYTES are queued instead; the 202
+    body carries the job id and the URL to poll for progress and the result.
+    """
+    threshold = get_async_threshold()
+    if threshold and upload.size > threshold:
+        job = enqueue_upload(importer_name, upload, folder)
+        return {
+            'message': f'Large file queued for background import (job {job.id})',
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('csvimportjob-detail', args=[job.id]),
+        }, 202
+
+    importer = IMPORTERS[importer_name](folder=folder)
+    try:
+        importer.import_file(upload)
+    except CsvImportError as e:
+        return {'error': str(e)}, 400
+    return importer.response()
+
+
+# ---------------------------------------------------------------------------
+# Background worker
+# ---------------------------------------------------------------------------
+
+class CsvImportWorker:
+    """
+    Claims queued CsvImportJobs and imports them one at a time; run several
+    process_csv_imports workers for parallelism
+    """
+
+    def __init__(self, stale_after: Optional[int] = None, max_attempts: Optional[int] = None,
+                 worker_id: Optional[str] = None):
+        self.stale_after = stale_after or getattr(settings, 'CSV_IMPORT_WORKER_STALE_AFTER', 900)
+        self.max_attempts = max_attempts or getattr(settings, 'CSV_IMPORT_WORKER_MAX_ATTEMPTS', 3)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def recover_stale_jobs(self) -> int:
+        """Re-queue jobs whose worker stopped reporting progress (imports are idempotent upserts)"""
+        cutoff = timezone.now() - timedelta(seconds=self.stale_after)
+        stale = CsvImportJob.objects.filter(status='processing', locked_at__lt=cutoff)
+
+        exhausted_ids = list(stale.filter(attempts__gte=self.max_attempts).values_list('id', flat=True))
+        if exhausted_ids:
+            CsvImportJob.objects.filter(id__in=exhausted_ids).update(
+                status='failed',
+                error_message='Import abandoned by worker; retry limit reached',
+                finished_at=timezone.now(),
+                locked_at=None,
+                locked_by=None,
+            )
+            CsvImportChunk.objects.filter(job_id__in=exhausted_ids).delete()
+        requeued = stale.filter(attempts__lt=self.max_attempts).update(
+            status='pending', locked_at=None, locked_by=None
+        )
+
+        if requeued or exhausted_ids:
+            logger.warning(f"Recovered stale CSV import jobs: {requeued} re-queued, {len(exhausted_ids)} failed")
+        return requeued + len(exhausted_ids)
+
+    def claim_job(self) -> Optional[CsvImportJob]:
+        """Atomically move the oldest pending job to 'processing'"""
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                CsvImportJob.objects.select_for_update(skip_locked=True)
+                .filter(status='pending')
+                .order_by('id')
+                .only('id')
+                .first()
+            )
+            if job is None:
+                return None
+            claimed = CsvImportJob.objects.filter(pk=job.pk, status='pending').update(
+                status='processing',
+                locked_at=now,
+                locked_by=self.worker_id,
+                attempts=F('attempts') + 1,
+                started_at=now,
+            )
+        if not claimed:
+            return None
+        return CsvImportJob.objects.get(pk=job.pk)
+
+    def _load_folder(self, importer_class, folder_id):
+        if folder_id is None:
+            return None
+        folder = apps.get_model(importer_class.folder_model_label).objects.filter(pk=folder_id).first()
+        if folder is None:
+            raise CsvImportError(f'Folder with id {folder_id} does not exist')
+        return folder
+
+    def _leased(self, job: CsvImportJob):
+        """The job, if this worker still holds its lease"""
+        return CsvImportJob.objects.filter(pk=job.pk, status='processing', locked_by=self.worker_id)
+
+    def process_job(self, job: CsvImportJob) -> bool:
+        """Import one claimed job and record the outcome"""
+        start_time = time.time()
+        result, error_message = None, None
+
+        def report(rows_read: int, bytes_read: int) -> None:
+            # Doubles as the lease heartbeat, so long imports are not taken for stale
+            renewed = self._leased(job).update(
+                rows_processed=rows_read, bytes_processed=bytes_read, locked_at=timezone.now()
+            )
+            if not renewed:
+                raise LeaseLostError(f'CSV import job {job.id} was claimed by another worker')
+
+        try:
+            importer_class = IMPORTERS.get(job.importer)
+            if importer_class is None:
+                raise CsvImportError(f'Unknown importer: {job.importer}')
+            importer = importer_class(folder=self._load_folder(importer_class, job.folder_id))
+            importer.import_file(io.BufferedReader(StoredUpload(job), STORAGE_CHUNK_BYTES), progress=report)
+            result, _ = importer.response()
+        except CsvImportError as e:
+            error_message = str(e)
+        except LeaseLostError as e:
+            logger.warning(f"{str(e)}; stopped importing")
+            return False
+        except Exception as e:
+            logger.exception(f"Error processing CSV import job {job.id}")
+            error_message = f'Processing error: {str(e)[:200]}'
+
+        finished = self._leased(job).update(
+            status='failed' if error_message else 'completed',
+            result=result if result is not None else {'error': error_message},
+            error_message=error_message,
+            finished_at=timezone.now(),
+            locked_at=None,
+            locked_by=None,
+        )
+        if not finished:
+            # The worker now holding the job records its outcome and still reads its chunks
+            logger.warning(f"CSV import job {job.id} lease was lost to another worker; outcome not recorded")
+            return False
+        CsvImportChunk.objects.filter(job_id=job.pk).delete()
+
+        logger.info(f"CSV import job {job.id} ({job.importer}) "
+                    f"{'failed' if error_message else 'completed'} in {round(time.time() - start_time, 3)}s")
+        return error_message is None
+
+    def run_once(self, limit: int = 1) -> Dict[str, int]:
+        """Recover, then import up to `limit` queued jobs; returns a summary"""
+        self.recover_stale_jobs()
+        results = []
+        while len(results) < limit:
+            job = self.claim_job()
+            if job is None:
+                break
+            results.append(self.process_job(job))
+
+        return {
+            'processed': len(results),
+            'successful': sum(1 for result in results if result),
+            'failed': sum(1 for result in results if not result),
+        }
+
+    def run_forever(self, poll_interval: float = 2.0) -> None:
+        logger.info(f"CSV import worker {self.worker_id} started")
+        last_recovery = 0.0
+        while True:
+            if time.time() - last_recovery >= min(self.stale_after, 60):
+                self.recover_stale_jobs()
+                last_recovery = time.time()
+            job = self.claim_job()
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+            self.process_job(job)
@@ -0,0 +1,188 @@
+"""
+Local stand-in for the BrightData dataset API
+
+Lets the trigger path, retries and fan-out be exercised without a BrightData
+account or network access. It answers:
+
+- POST /datasets/v3/trigger?dataset_id=... with {"snapshot_id": "..."}
+- GET /datasets/v3/status and /datasets/v3/progress/<snapshot_id> with a ready status
+
+after an artificial latency, and can fail on purpose: `script` is a list of status
+codes (None: answer normally) used for the first requests in order, and
+failure_rate fails further requests at random with failure_status. Failures
+carry Retry-After when retry_after is set. Every request is recorded as it
+arrives, together with the highest number of requests handled at the same time.
+
+Used by test_brightdata_client, the benchmark_brightdata_client command and
+run_fake_brightdata (set BRIGHTDATA_API_URL to its URL).
+"""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class FakeRequest:
+    method: str
+    path: str
+    dataset_id: Optional[str]
+    items: int
+    authorization: Optional[str]
+    # Set once the response is sent; None while the request is being handled
+    status: Optional[int] = None
+
+
+class FakeBrightData:
+    """Threaded fake BrightData server; use as a context manager or start()/stop()"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 script: Iterable[Optional[int]] = (), failure_rate: float = 0.0,
+                 failure_status: int = 503, retry_after: Optional[float] = None,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.script = list(script)
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests: List[FakeRequest] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._snapshots = 0
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeBrightData':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeBrightData':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            failed = sum(1 for request in self.requests if (request.status or 0) >= 400)
+            return {
+                'requests': len(self.requests),
+                'failed': failed,
+                'succeeded': len(self.requests) - failed,
+                'max_in_flight': self.max_in_flight,
+            }
+
+    # ------------------------------------------------------------------
+    # Request handling (called from the server's threads)
+    # ------------------------------------------------------------------
+
+    def _enter(self, request: FakeRequest) -> Optional[int]:
+        """Record the request and pick its injected failure status, if any"""
+        with self._lock:
+            self.requests.append(request)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if self.script:
+                return self.script.pop(0)
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                return self.failure_status
+            return None
+
+    def _leave(self, request: FakeRequest, status: int) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            request.status = status
+
+    def _next_snapshot_id(self) -> str:
+        with self._lock:
+            self._snapshots += 1
+            return f's_fake{self._snapshots:06d}'
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        parsed = urlparse(handler.path)
+        query = parse_qs(parsed.query)
+        body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+        try:
+            items = json.loads(body) if body else []
+        except ValueError:
+            items = None
+
+        request = FakeRequest(
+            method=handler.command,
+            path=parsed.path,
+            dataset_id=(query.get('dataset_id') or [None])[0],
+            items=len(items) if isinstance(items, list) else 0,
+            authorization=handler.headers.get('Authorization'),
+        )
+        failure = self._enter(request)
+        status, headers = 200, {}
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if failure is not None:
+                status, data = failure, {'error': 'injected failure'}
+                if self.retry_after is not None:
+                    headers['Retry-After'] = f'{self.retry_after:g}'
+            elif handler.command == 'POST' and parsed.path.rstrip('/') == '/datasets/v3/trigger':
+                if not isinstance(items, list) or not query.get('dataset_id'):
+                    status, data = 400, {'error': 'dataset_id and a JSON array body are required'}
+                else:
+                    data = {'snapshot_id': self._next_snapshot_id()}
+            elif handler.command == 'GET' and parsed.path.startswith('/datasets/v3/'):
+                data = {'status': 'ready'}
+            else:
+                status, data = 404, {'error': 'not found'}
+            _respond(handler, status, data, headers)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (e.g. a read timeout)
+            handler.close_connection = True
+        finally:
+            self._leave(request, status)
+
+
+def _respond(handler: BaseHTTPRequestHandler, status: int, data: dict, headers: Dict[str, str]) -> None:
+    body = json.dumps(data).encode()
+    handler.send_response(status)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Content-Length', str(len(body)))
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def _handler_for(server: FakeBrightData):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so pooled clients reuse their connections
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            server.handle(self)
+
+        def do_POST(self):
+            server.handle(self)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
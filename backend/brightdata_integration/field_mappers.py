@@ -0,0 +1,726 @@
+"""
+Declarative field mappings for incoming post records
+
+Posts reach us from BrightData webhooks, Apify/Scrapy results and GE Tracker CSV
+uploads. Each source describes how its records map onto our post models as a table
+of FieldSpec entries (target field, fallback source keys, default, coercer); the
+table is compiled once into a plain Python function whose body is a single dict
+literal with inlined lookups, so mapping a post no longer re-evaluates platform
+branches, imports or try/except blocks per record.
+
+    mapper = get_mapper('instagram')            # BrightData webhook payloads
+    mapper = get_mapper('tiktok', source='csv')  # GE Tracker CSV rows
+    mapped = mapper(record)
+"""
+
+import ast
+import datetime
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.utils import timezone
+
+try:
+    import dateparser
+    HAS_DATEPARSER = True
+except ImportError:
+    HAS_DATEPARSER = False
+
+logger = logging.getLogger(__name__)
+
+SOURCE_BRIGHTDATA = 'brightdata'
+SOURCE_APIFY = 'apify'
+SOURCE_CSV = 'csv'
+
+# Platforms without a dedicated BrightData table use the generic one
+GENERIC_PLATFORM = 'generic'
+
+_EMPTY_VALUES = (None, '', '""')
+
+_TRUE_STRINGS = frozenset(('true', 'yes', '1', 't', 'y', 'on'))
+
+_CSV_DATE_FORMATS = (
+    '%Y-%m-%dT%H:%M:%S.%fZ',  # 2025-04-14T08:27:06.000Z
+    '%Y-%m-%dT%H:%M:%SZ',     # 2025-04-14T08:27:06Z
+    '%Y-%m-%dT%H:%M:%S.%f',   # 2025-04-14T08:27:06.000
+    '%Y-%m-%dT%H:%M:%S',      # 2025-04-14T08:27:06
+    '%Y-%m-%d',               # 2023-01-31
+    '%Y-%m-%d %H:%M:%S',      # 2023-01-31 12:30:45
+    '%Y-%m-%d %H:%M',         # 2023-01-31 12:30
+    '%d/%m/%Y',               # 31/01/2023
+    '%m/%d/%Y',               # 01/31/2023
+    '%Y/%m/%d',               # 2023/01/31
+    '%d-%m-%Y',               # 31-01-2023
+    '%m-%d-%Y',               # 01-31-2023
+    '%d.%m.%Y',               # 31.01.2023
+    '%m.%d.%Y',               # 01.31.2023
+    '%b %d, %Y',              # Jan 31, 2023
+    '%d %b %Y',               # 31 Jan 2023
+    '%B %d, %Y',              # January 31, 2023
+    '%d %B %Y',               # 31 January 2023
+)
+
+_SCRAPED_TIMESTAMP_FORMATS = (
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+)
+
+_INSTAGRAM_POST_URL = re.compile(r'/p/([^/]+)/')
+
+
+# ---------------------------------------------------------------------------
+# Coercers
+# ---------------------------------------------------------------------------
+
+def _clean(value):
+    return value.strip().strip('"\'') if isinstance(value, str) else value
+
+
+def to_int(value) -> int:
+    """Integer or 0; accepts decimal strings such as '12.0' from CSV exports"""
+    value = _clean(value)
+    if value in _EMPTY_VALUES:
+        return 0
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        try:
+            return int(float(value))
+        except (ValueError, TypeError, OverflowError):
+            return 0
+
+
+def to_float(value) -> float:
+    """Float or 0.0"""
+    value = _clean(value)
+    if value in _EMPTY_VALUES:
+        return 0.0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def to_bool(value) -> bool:
+    """Boolean from bools, numbers and 'true'/'yes'/'1'-style strings"""
+    if isinstance(value, bool):
+        return value
+    if value in _EMPTY_VALUES:
+        return False
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_STRINGS
+    try:
+        return bool(int(value))
+    except (ValueError, TypeError):
+        return False
+
+
+def json_or_none(value):
+    """Decode JSON strings (CSV cells holding lists/objects); other values pass through"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def parse_iso_datetime(value) -> Optional[datetime.datetime]:
+    """Parse BrightData ISO-8601 timestamps ('Z' suffix included), None when unparseable"""
+    if not value or not isinstance(value, str):
+        return value or None
+    try:
+        return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def parse_datetime(value) -> Optional[datetime.datetime]:
+    """
+    Lenient date parsing for CSV cells: ISO-8601, Unix timestamps (s or ms),
+    then dateparser when installed, otherwise a list of common formats
+    """
+    if isinstance(value, datetime.datetime):
+        return value
+    clean_date = _clean(value)
+    if not clean_date or not isinstance(clean_date, str):
+        return None
+
+    # Fast path for ISO format dates (like 2025-04-14T08:27:06.000Z)
+    if 'T' in clean_date and (clean_date.endswith('Z') or '+' in clean_date):
+        try:
+            return datetime.datetime.fromisoformat(clean_date.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+
+    # Unix timestamps in seconds (10 digits) or milliseconds (13 digits)
+    if clean_date.isdigit() and len(clean_date) >= 10:
+        try:
+            timestamp = int(clean_date)
+            if len(clean_date) >= 13:
+                timestamp = timestamp // 1000
+            return datetime.datetime.fromtimestamp(timestamp)
+        except (ValueError, OverflowError, OSError):
+            pass
+
+    if HAS_DATEPARSER:
+        try:
+            return dateparser.parse(
+                clean_date,
+                settings={
+                    'TIMEZONE': 'UTC',
+                    'RETURN_AS_TIMEZONE_AWARE': False,
+                    'DATE_ORDER': 'YMD',  # Prefer Year-Month-Day format
+                }
+            )
+        except Exception:
+            return None
+
+    for fmt in _CSV_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(clean_date, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_scraped_timestamp(value) -> datetime.datetime:
+    """Timestamps of Apify/Scrapy results; falls back to now() like the transformer always has"""
+    if value:
+        for fmt in _SCRAPED_TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.datetime.strptime(value, fmt)
+                return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+            except (ValueError, TypeError):
+                continue
+        logger.warning(f"Could not parse timestamp: {value}")
+    return timezone.now()
+
+
+# ---------------------------------------------------------------------------
+# Derived values shared by several tables
+# ---------------------------------------------------------------------------
+
+def extract_comment_list(record: dict):
+    """Comments embedded in a scraped record, under whichever key the actor used"""
+    return (record.get('comments') or
+            record.get('comment_list') or
+            record.get('commentsList') or
+            record.get('post_comments') or [])
+
+
+def count_comments(record: dict) -> int:
+    """Length of the embedded comment list, else the first reported comment count"""
+    comments = extract_comment_list(record)
+    if isinstance(comments, list):
+        return len(comments)
+    return to_int(
+        record.get('comments_count') or
+        record.get('comment_count') or
+        record.get('commentCount') or
+        record.get('num_comments') or 0
+    )
+
+
+def _post_id_from_post_url(record: dict) -> Optional[str]:
+    post_url = record.get('post_url')
+    return post_url.split('/')[-1] if post_url else None
+
+
+def _instagram_csv_post_id(row: dict) -> Optional[str]:
+    for key in ('post_id', 'shortcode', 'content_id'):
+        if row.get(key):
+            return row[key]
+    match = _INSTAGRAM_POST_URL.search(row.get('url') or '')
+    return match.group(1) if match else None
+
+
+def _instagram_csv_date(row: dict):
+    return parse_datetime(row.get('date_posted')) or parse_datetime(row.get('timestamp'))
+
+
+def _linkedin_csv_user(row: dict) -> str:
+    return row['use_url'].split('/')[-1] if row.get('use_url') else ''
+
+
+def _linkedin_csv_engagement(row: dict) -> int:
+    # Comments weighted more than likes
+    return to_int(row.get('num_likes')) + to_int(row.get('num_comments')) * 2
+
+
+def _tiktok_csv_engagement(row: dict) -> float:
+    return (
+        to_int(row.get('digg_count')) +
+        to_int(row.get('comment_count')) * 2 +
+        to_int(row.get('share_count')) * 3 +
+        to_int(row.get('collect_count')) * 2 +
+        to_int(row.get('play_count')) * 0.1  # Views/plays weighted less
+    )
+
+
+# ---------------------------------------------------------------------------
+# Spec and compiler
+# ---------------------------------------------------------------------------
+
+class FieldSpec:
+    """
+    One output field of a mapping table.
+
+    sources: keys tried in order; with several keys the first truthy value wins
+             (the `a or b or c` idiom), with one key a present-but-falsy value is
+             kept. Defaults to the field name itself.
+    default: value when no source key yields one
+    coerce:  callable applied to the looked-up value
+    derive:  callable receiving the whole record, for computed fields
+    value:   constant output
+    """
+    __slots__ = ('name', 'sources', 'default', 'coerce', 'derive', 'value', 'has_value')
+
+    _NO_VALUE = object()
+
+    def __init__(self, name: str, *sources: str, default: Any = None,
+                 coerce: Optional[Callable] = None, derive: Optional[Callable[[dict], Any]] = None,
+                 value: Any = _NO_VALUE):
+        self.name = name
+        self.sources = sources or (name,)
+        self.default = default
+        self.coerce = coerce
+        self.derive = derive
+        self.has_value = value is not self._NO_VALUE
+        self.value = value if self.has_value else None
+
+    def __repr__(self):
+        return f"FieldSpec({self.name!r}, sources={self.sources!r})"
+
+
+def _literal(value: Any, binding: str, namespace: Dict[str, Any]) -> str:
+    """Inline literals (fresh [] / {} per record); bind anything else by name"""
+    try:
+        if ast.literal_eval(repr(value)) == value:
+            return repr(value)
+    except (ValueError, SyntaxError):
+        pass
+    namespace[binding] = value
+    return binding
+
+
+def _expression(spec: FieldSpec, index: int, namespace: Dict[str, Any]) -> str:
+    if spec.has_value:
+        return _literal(spec.value, f'_value{index}', namespace)
+
+    if spec.derive is not None:
+        namespace[f'_derive{index}'] = spec.derive
+        expression = f'_derive{index}(record)'
+    else:
+        default = _literal(spec.default, f'_default{index}', namespace)
+        if len(spec.sources) == 1:
+            expression = f'get({spec.sources[0]!r}, {default})'
+        else:
+            lookups = ' or '.join(f'get({source!r})' for source in spec.sources)
+            expression = f'({lookups} or {default})'
+
+    if spec.coerce is not None:
+        namespace[f'_coerce{index}'] = spec.coerce
+        expression = f'_coerce{index}({expression})'
+    return expression
+
+
+def compile_mapper(specs: Iterable[FieldSpec], name: str = 'map_record') -> Callable[[dict], dict]:
+    """Generate a `record -> dict` function whose body is one dict literal"""
+    namespace: Dict[str, Any] = {}
+    entries = {}
+    for index, spec in enumerate(specs):
+        # Later entries replace earlier ones, as repeated keys in a dict literal would
+        entries[spec.name] = _expression(spec, index, namespace)
+
+    body = '\n'.join(f'        {field!r}: {expression},' for field, expression in entries.items())
+    source = f'def {name}(record):\n    get = record.get\n    return {{\n{body}\n    }}\n'
+    exec(compile(source, f'<field mapper {name}>', 'exec'), namespace)
+
+    mapper = namespace[name]
+    mapper.source = source
+    mapper.fields = tuple(entries)
+    return mapper
+
+
+# ---------------------------------------------------------------------------
+# Mapping tables
+# ---------------------------------------------------------------------------
+
+MAPPINGS: Dict[Tuple[str, str], List[FieldSpec]] = {}
+
+MAPPINGS[('instagram', SOURCE_BRIGHTDATA)] = [
+    FieldSpec('url', default=''),
+    FieldSpec('post_id', 'post_id', 'pk', default=''),
+    FieldSpec('user_posted', 'user_posted', 'user_name', 'username', default=''),
+    FieldSpec('description', 'description', 'caption', 'text', default=''),
+    FieldSpec('hashtags', default=[]),
+    FieldSpec('num_comments', 'num_comments', 'comments', 'comments_count', default=0),
+    FieldSpec('date_posted', 'date_posted', 'date', 'timestamp', default=''),
+    FieldSpec('likes', 'likes', 'likes_count', default=0),
+    FieldSpec('photos', default=[]),
+    FieldSpec('videos', default=[]),
+    FieldSpec('thumbnail', default=''),
+    FieldSpec('views', default=0),
+    FieldSpec('video_play_count', default=0),
+    FieldSpec('video_view_count', default=0),
+    FieldSpec('length', default=''),
+    FieldSpec('video_url', default=''),
+    FieldSpec('audio_url', default=''),
+    FieldSpec('shortcode', default=''),
+    FieldSpec('content_id', default=''),
+    FieldSpec('instagram_pk', 'pk', 'instagram_pk', default=''),
+    FieldSpec('content_type', default=''),
+    FieldSpec('platform_type', default=''),
+    FieldSpec('product_type', default=''),
+    FieldSpec('user_posted_id', 'user_posted_id', 'user_id', default=''),
+    FieldSpec('followers', default=0),
+    FieldSpec('posts_count', default=0),
+    FieldSpec('following', default=0),
+    FieldSpec('profile_image_link', default=''),
+    FieldSpec('user_profile_url', default=''),
+    FieldSpec('profile_url', default=''),
+    FieldSpec('is_verified', default=False),
+    FieldSpec('is_paid_partnership', default=False),
+    FieldSpec('partnership_details', default={}),
+    FieldSpec('coauthor_producers', default=[]),
+    FieldSpec('location', default=''),
+    FieldSpec('latest_comments', default=[]),
+    FieldSpec('top_comments', default=[]),
+    FieldSpec('engagement_score', default=0.0),
+    FieldSpec('engagement_score_view', default=0),
+    FieldSpec('tagged_users', default=[]),
+    FieldSpec('audio', default={}),
+    FieldSpec('post_content', default={}),
+    FieldSpec('videos_duration', default={}),
+    FieldSpec('images', default=[]),
+    FieldSpec('photos_number', default=0),
+    FieldSpec('alt_text', default=''),
+    FieldSpec('discovery_input', default=''),
+    FieldSpec('has_handshake', default=False),
+]
+
+MAPPINGS[('facebook', SOURCE_BRIGHTDATA)] = [
+    FieldSpec('url', default=''),
+    FieldSpec('post_id', default=''),
+    FieldSpec('user_url', default=''),
+    FieldSpec('user_username_raw', default=''),
+    FieldSpec('content', default=''),
+    FieldSpec('date_posted'),
+    FieldSpec('num_comments', default=0),
+    FieldSpec('num_shares', default=0),
+    FieldSpec('likes', default=0),
+    FieldSpec('video_view_count'),
+    FieldSpec('page_name', default=''),
+    FieldSpec('profile_id', default=''),
+    FieldSpec('page_intro', default=''),
+    FieldSpec('page_category', default=''),
+    FieldSpec('page_logo', default=''),
+    FieldSpec('page_external_website', default=''),
+    FieldSpec('page_likes'),
+    FieldSpec('page_followers'),
+    FieldSpec('page_is_verified', default=False),
+    FieldSpec('page_phone', default=''),
+    FieldSpec('page_email', default=''),
+    FieldSpec('page_creation_time'),
+    FieldSpec('page_reviews_score', default=''),
+    FieldSpec('page_reviewers_amount'),
+    FieldSpec('page_price_range', default=''),
+    FieldSpec('attachments_data', 'attachments'),
+    FieldSpec('post_external_image'),
+    FieldSpec('page_url', default=''),
+    FieldSpec('header_image', default=''),
+    FieldSpec('avatar_image_url', default=''),
+    FieldSpec('profile_handle', default=''),
+    FieldSpec('is_sponsored', default=False),
+    FieldSpec('shortcode', default=''),
+    FieldSpec('is_page', default=False),
+    FieldSpec('about'),
+    FieldSpec('active_ads_urls'),
+    FieldSpec('delegate_page_id', default=''),
+    FieldSpec('post_type', default=''),
+    FieldSpec('timestamp'),
+    FieldSpec('input'),
+    FieldSpec('num_likes_type'),
+    FieldSpec('count_reactions_type'),
+]
+
+MAPPINGS[('linkedin', SOURCE_BRIGHTDATA)] = [
+    # Core post fields
+    FieldSpec('url', default=''),
+    FieldSpec('post_id', 'id', 'post_id', default=''),
+    FieldSpec('user_id', default=''),
+    FieldSpec('user_posted', 'user_posted', 'user_name', 'title', default=''),
+    FieldSpec('user_url', 'use_url', 'user_url', default=''),
+    FieldSpec('user_title', default=''),
+    FieldSpec('user_headline', 'headline', default=''),
+    FieldSpec('description', default=''),
+    FieldSpec('hashtags', default=[]),
+    FieldSpec('num_comments', default=0),
+    FieldSpec('date_posted', coerce=parse_iso_datetime),
+    FieldSpec('likes', default=0),
+    FieldSpec('photos', default=''),
+    FieldSpec('location', default=''),
+    FieldSpec('latest_comments', default=[]),
+    FieldSpec('discovery_input', default=''),
+    FieldSpec('thumbnail', default=''),
+    FieldSpec('content_type', default=''),
+    FieldSpec('platform_type', default=''),
+    FieldSpec('engagement_score', default=0.0),
+    FieldSpec('tagged_users', default=''),
+    FieldSpec('followers', default=0),
+    FieldSpec('posts_count', default=0),
+    FieldSpec('profile_image_link', default=''),
+    FieldSpec('is_verified', default=False),
+    FieldSpec('is_paid_partnership', default=False),
+
+    # LinkedIn-specific fields
+    FieldSpec('post_title', 'title', default=''),
+    FieldSpec('post_text', default=''),
+    FieldSpec('post_text_html', default=''),
+    FieldSpec('num_likes', default=0),
+    FieldSpec('num_shares', default=0),
+    FieldSpec('user_followers', default=0),
+    FieldSpec('user_posts', default=0),
+    FieldSpec('user_articles', default=0),
+    FieldSpec('num_connections', default=0),
+    FieldSpec('post_type', default=''),
+    FieldSpec('account_type', default=''),
+    FieldSpec('images', default=[]),
+    FieldSpec('videos', default=[]),
+    FieldSpec('video_duration', default=0),
+    FieldSpec('video_thumbnail', default=''),
+    FieldSpec('external_link_data', default=[]),
+    FieldSpec('embedded_links', default=[]),
+    FieldSpec('document_cover_image', default=''),
+    FieldSpec('document_page_count', default=0),
+    FieldSpec('tagged_companies', default=[]),
+    FieldSpec('tagged_people', default=[]),
+    FieldSpec('repost_data', 'repost', default={}),
+    FieldSpec('author_profile_pic', default=''),
+]
+
+MAPPINGS[(GENERIC_PLATFORM, SOURCE_BRIGHTDATA)] = [
+    FieldSpec('url', default=''),
+    FieldSpec('post_id', 'post_id', 'id', default=''),
+    FieldSpec('content', 'text', 'content', 'description', default=''),
+    FieldSpec('date_posted', 'date', 'created_time', 'timestamp'),
+    FieldSpec('likes', 'likes_count', 'likes', default=0),
+    FieldSpec('num_comments', 'comments_count', 'comments', default=0),
+    FieldSpec('num_shares', 'shares_count', 'shares', default=0),
+    FieldSpec('user_posted', 'username', 'author', 'user', default=''),
+]
+
+# Apify/Scrapy results; url/post_id are completed by the transformer from the
+# ScrapyResult (source_url, result id) when the record carries none
+MAPPINGS[('tiktok', SOURCE_APIFY)] = [
+    FieldSpec('url', 'post_url'),
+    FieldSpec('user_posted', 'username', default=''),
+    FieldSpec('description', 'text', default=''),
+    FieldSpec('hashtags', default=[], coerce=str),
+    FieldSpec('num_comments', derive=count_comments),
+    FieldSpec('date_posted', 'timestamp', default='', coerce=parse_scraped_timestamp),
+    FieldSpec('likes', default=0, coerce=to_int),
+    FieldSpec('videos', default=[], coerce=str),
+    FieldSpec('photos', 'images', default=[], coerce=str),
+    FieldSpec('post_id', derive=_post_id_from_post_url),
+    FieldSpec('content_type', value='video'),
+    FieldSpec('platform_type', value='tiktok'),
+]
+
+MAPPINGS[('facebook', SOURCE_APIFY)] = [
+    FieldSpec('url', 'post_url'),
+    FieldSpec('user_posted', 'username', default=''),
+    FieldSpec('content', 'text', default=''),
+    FieldSpec('hashtags', derive=lambda record: str(record['hashtags']) if record.get('hashtags') else ''),
+    FieldSpec('num_comments', derive=count_comments),
+    FieldSpec('num_shares', 'shares', default=0, coerce=to_int),
+    FieldSpec('likes', default=0, coerce=to_int),
+    FieldSpec('video_view_count', 'views', default=0, coerce=to_int),
+    FieldSpec('date_posted', 'timestamp', default='', coerce=parse_scraped_timestamp),
+    FieldSpec('post_id', derive=_post_id_from_post_url),
+    FieldSpec('content_type', value='post'),
+    FieldSpec('platform_type', value='facebook'),
+]
+
+MAPPINGS[('instagram', SOURCE_APIFY)] = [
+    FieldSpec('url', 'post_url'),
+    FieldSpec('user_posted', 'username', default=''),
+    FieldSpec('description', 'text', default=''),
+    FieldSpec('hashtags', default=[]),
+    FieldSpec('num_comments', 'comments_count', default=0, coerce=to_int),
+    FieldSpec('likes', default=0, coerce=to_int),
+    FieldSpec('views', default=0, coerce=to_int),
+    FieldSpec('date_posted', 'timestamp', default='', coerce=parse_scraped_timestamp),
+    FieldSpec('post_id', derive=_post_id_from_post_url),
+    FieldSpec('photos', 'images', default=[]),
+    FieldSpec('videos', default=[]),
+    FieldSpec('content_type', derive=lambda record: 'reel' if record.get('media_type') == 'video' else 'post'),
+    FieldSpec('platform_type', value='instagram'),
+]
+
+# LinkedIn results carry the post under 'metadata'; this table maps that dict
+MAPPINGS[('linkedin', SOURCE_APIFY)] = [
+    FieldSpec('url'),
+    FieldSpec('user_posted', 'user_id', default=''),
+    FieldSpec('user_id', default=''),
+    FieldSpec('user_url', default=''),
+    FieldSpec('post_type', default='post'),
+    FieldSpec('account_type', default=''),
+    FieldSpec('hashtags', value=[]),
+    FieldSpec('num_comments', default=0, coerce=to_int),
+    FieldSpec('num_shares', default=0, coerce=to_int),
+    FieldSpec('likes', 'num_likes', default=0, coerce=to_int),
+    FieldSpec('num_likes', default=0, coerce=to_int),
+    FieldSpec('date_posted', default='', coerce=parse_scraped_timestamp),
+    FieldSpec('user_followers', default=0, coerce=to_int),
+    FieldSpec('user_posts', default=0, coerce=to_int),
+    FieldSpec('user_articles', default=0, coerce=to_int),
+    FieldSpec('images', derive=lambda metadata: metadata.get('images', []) if metadata.get('has_images') else []),
+    FieldSpec('videos', derive=lambda metadata: metadata.get('videos', []) if metadata.get('has_videos') else []),
+    FieldSpec('content_type', value='post'),
+    FieldSpec('platform_type', value='linkedin'),
+]
+
+# GE Tracker CSV exports; context-dependent columns (folder, detected content type)
+# are filled in by the uploading view
+MAPPINGS[('instagram', SOURCE_CSV)] = [
+    # Basic fields
+    FieldSpec('url', default=''),
+    FieldSpec('user_posted', default=''),
+    FieldSpec('description', default=''),
+    FieldSpec('num_comments', coerce=to_int),
+    FieldSpec('date_posted', derive=_instagram_csv_date),
+    FieldSpec('likes', coerce=to_int),
+    FieldSpec('post_id', derive=_instagram_csv_post_id),
+
+    # Media content fields (JSON-encoded cells)
+    FieldSpec('hashtags', coerce=json_or_none),
+    FieldSpec('photos', coerce=json_or_none),
+    FieldSpec('videos', coerce=json_or_none),
+    FieldSpec('thumbnail', default=''),
+
+    # Video-specific fields (mainly for reels)
+    FieldSpec('views', coerce=to_int),
+    FieldSpec('video_play_count', coerce=to_int),
+    FieldSpec('video_view_count', coerce=to_int),
+    FieldSpec('length', default=''),
+    FieldSpec('video_url', default=''),
+    FieldSpec('audio_url', default=''),
+
+    # Instagram-specific identifiers
+    FieldSpec('shortcode', default=''),
+    FieldSpec('content_id', default=''),
+    FieldSpec('instagram_pk', 'pk', default=''),
+    FieldSpec('product_type', default=''),
+
+    # User profile information
+    FieldSpec('user_posted_id', default=''),
+    FieldSpec('followers', coerce=to_int),
+    FieldSpec('posts_count', coerce=to_int),
+    FieldSpec('following', coerce=to_int),
+    FieldSpec('profile_image_link', default=''),
+    FieldSpec('user_profile_url', default=''),
+    FieldSpec('profile_url', default=''),
+    FieldSpec('is_verified', coerce=to_bool),
+
+    # Partnership and collaboration
+    FieldSpec('is_paid_partnership', coerce=to_bool),
+    FieldSpec('partnership_details', coerce=json_or_none),
+    FieldSpec('coauthor_producers', coerce=json_or_none),
+
+    # Comments and engagement
+    FieldSpec('location', default=''),
+    FieldSpec('latest_comments', coerce=json_or_none),
+    FieldSpec('top_comments', coerce=json_or_none),
+    FieldSpec('engagement_score', coerce=to_float),
+    FieldSpec('engagement_score_view', coerce=to_int),
+    FieldSpec('tagged_users', coerce=json_or_none),
+    FieldSpec('audio', coerce=json_or_none),
+    FieldSpec('post_content', coerce=json_or_none),
+    FieldSpec('videos_duration', coerce=json_or_none),
+
+    # Image-specific fields
+    FieldSpec('images', coerce=json_or_none),
+    FieldSpec('photos_number', coerce=to_int),
+    FieldSpec('alt_text', default=''),
+
+    # Legacy fields (keep for backward compatibility)
+    FieldSpec('discovery_input', default=''),
+    FieldSpec('has_handshake', coerce=to_bool),
+]
+
+MAPPINGS[('linkedin', SOURCE_CSV)] = [
+    FieldSpec('url', default=''),
+    FieldSpec('post_id', 'id', default=''),
+    FieldSpec('user_posted', derive=_linkedin_csv_user),
+    FieldSpec('description', 'post_text', default=''),
+    FieldSpec('hashtags', default=''),
+    FieldSpec('likes', 'num_likes', coerce=to_int),
+    FieldSpec('num_comments', coerce=to_int),
+    FieldSpec('date_posted', coerce=parse_datetime),
+    FieldSpec('photos', 'images', default=''),
+    FieldSpec('videos', default=''),
+    FieldSpec('latest_comments', 'top_visible_comments', default=''),
+    FieldSpec('followers', 'user_followers', coerce=to_int),
+    FieldSpec('posts_count', 'user_posts', coerce=to_int),
+    FieldSpec('profile_image_link', 'author_profile_pic', default=''),
+    FieldSpec('content_type', 'post_type', default=''),
+    FieldSpec('tagged_users', 'tagged_people', default=''),
+    FieldSpec('location', value=''),  # Not available in the CSV
+    FieldSpec('discovery_input', default=''),
+    FieldSpec('engagement_score', derive=_linkedin_csv_engagement),
+]
+
+MAPPINGS[('tiktok', SOURCE_CSV)] = [
+    FieldSpec('url', default=''),
+    FieldSpec('post_id', default=''),
+    FieldSpec('user_posted', 'profile_username', default=''),
+    FieldSpec('description', default=''),
+    FieldSpec('hashtags', default=''),
+    FieldSpec('likes', 'digg_count', coerce=to_int),
+    FieldSpec('num_comments', 'comment_count', coerce=to_int),
+    FieldSpec('date_posted', 'create_time', coerce=parse_datetime),
+    FieldSpec('videos', 'video_url', default=''),
+    FieldSpec('thumbnail', 'preview_image', default=''),
+    FieldSpec('profile_image_link', 'profile_avatar', default=''),
+    FieldSpec('content_type', 'post_type', default='video'),
+    FieldSpec('discovery_input', default=''),
+    FieldSpec('is_verified', coerce=to_bool),
+    FieldSpec('followers', 'profile_followers', coerce=to_int),
+    FieldSpec('location', 'region', 'country', default=''),
+    FieldSpec('tagged_users', 'tagged_user', default=''),
+    FieldSpec('engagement_score', derive=_tiktok_csv_engagement),
+]
+
+_COMPILED: Dict[Tuple[str, str], Callable[[dict], dict]] = {}
+
+
+def get_mapper(platform: str, source: str = SOURCE_BRIGHTDATA) -> Callable[[dict], dict]:
+    """Compiled mapper for a platform and record source (compiled on first use, then cached)"""
+    key = ((platform or '').lower(), source)
+    mapper = _COMPILED.get(key)
+    if mapper is not None:
+        return mapper
+
+    specs = MAPPINGS.get(key)
+    if specs is None and source == SOURCE_BRIGHTDATA:
+        mapper = _COMPILED[key] = get_mapper(GENERIC_PLATFORM)
+        return mapper
+    if specs is None:
+        raise ValueError(f"No {source} field mapping for platform: {platform}")
+
+    mapper = compile_mapper(specs, name=re.sub(r'\W', '_', f'map_{source}_{key[0]}'))
+    _COMPILED[key] = mapper
+    return mapper
+
+
+def map_post_fields(post_data: dict, platform: str) -> dict:
+    """Map a BrightData post to model fields"""
+    return get_mapper(platform)(post_data)
@@ -0,0 +1,359 @@
+"""
+Bulk ingestion engine for BrightData post payloads
+
+Replaces the per-post get_or_create loop of the webhook path with set-based writes:
+- existing (post_id, folder) keys are pre-fetched once per chunk
+- new posts are written with bulk_create, changed posts with bulk_update
+- LinkedIn comments of newly created posts are written with bulk_create
+- a chunk that fails as a whole (integrity race, bad value) is replayed row by row,
+  so one broken post never drops the rest of the snapshot
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, models, transaction
+from django.utils import timezone
+
+from reports.post_stats import PostStatsDelta
+from reports.hashtags import PostHashtags
+from reports.search import SearchDocuments
+from scrapy_integration.retrieval_index import RetrievalDocuments
+from users.models import Project
+
+from .field_mappers import get_mapper, parse_iso_datetime
+
+logger = logging.getLogger(__name__)
+
+PLATFORM_POST_MODELS = {
+    'facebook': 'facebook_data.FacebookPost',
+    'instagram': 'instagram_data.InstagramPost',
+    'linkedin': 'linkedin_data.LinkedInPost',
+    'tiktok': 'tiktok_data.TikTokPost',
+}
+
+# Columns managed by the engine itself rather than by the field mapper
+SYSTEM_FIELDS = {'id', 'folder', 'created_at', 'updated_at'}
+
+# Columns derived from mapped values by a model's sync_legacy_fields() hook
+DERIVED_FIELDS = {'hashtags_text'}
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_ingest_batch_size() -> int:
+    """Chunk size used for pre-fetching and bulk writes"""
+    return int(getattr(settings, 'WEBHOOK_INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+def get_post_model(platform: str):
+    """Return the post model for a platform, or None for unknown platforms"""
+    label = PLATFORM_POST_MODELS.get((platform or '').lower())
+    return apps.get_model(label) if label else None
+
+
+def get_post_key(post_data: dict) -> Optional[str]:
+    """Identifier used to match an incoming post against stored rows"""
+    post_id = post_data.get('post_id') or post_data.get('id') or post_data.get('pk')
+    return str(post_id) if post_id else None
+
+
+def is_ingestible(post_data: Any, platform: str) -> bool:
+    """
+    Filter out invalid entries (warnings, errors, entries without required fields)
+    """
+    if not isinstance(post_data, dict):
+        return False
+
+    # Skip entries with warnings or errors
+    if post_data.get('warning') or post_data.get('error') or post_data.get('warning_code'):
+        return False
+
+    # Skip entries without essential fields
+    platform = platform.lower()
+    if platform == 'instagram':
+        return bool(post_data.get('url') or post_data.get('post_id') or post_data.get('pk'))
+    if platform == 'facebook':
+        return bool(post_data.get('url') or post_data.get('post_id'))
+    return bool(post_data.get('url') or post_data.get('post_id') or post_data.get('id'))
+
+
+def normalize_field_value(field: models.Field, value):
+    """
+    Coerce a mapped value to what the database column will hold, so that
+    change detection compares like with like (e.g. ISO strings vs datetimes)
+    """
+    if value is None:
+        if not field.null and field.has_default():
+            return field.get_default()
+        return None
+    if value == '' and field.null and not isinstance(field, (models.CharField, models.TextField)):
+        return None
+    if isinstance(field, models.JSONField):
+        return value
+    try:
+        value = field.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        return value
+    if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+@dataclass
+class IngestionResult:
+    """Counts reported by an ingestion run"""
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    comments_created: int = 0
+
+    def merge(self, other: 'IngestionResult') -> None:
+        self.created += other.created
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.failed += other.failed
+        self.comments_created += other.comments_created
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class BulkPostIngestor:
+    """
+    Upserts BrightData posts for one platform into one folder using bulk writes.
+
+    Posts are keyed by (post_id, folder); when no folder is known the key is post_id
+    alone, which matches the lookup the webhook path has always used.
+    """
+
+    def __init__(self, platform: str, folder=None, batch_size: Optional[int] = None,
+                 mapper: Optional[Callable[[dict], dict]] = None):
+        self.platform = platform.lower()
+        self.model = get_post_model(self.platform)
+        if self.model is None:
+            raise ValueError(f"No post model registered for platform: {platform}")
+        self.mapper = mapper or get_mapper(self.platform)
+        self.folder = folder
+        self.batch_size = max(1, batch_size or get_ingest_batch_size())
+        self.fields = {
+            field.name: field for field in self.model._meta.concrete_fields
+            if field.name not in SYSTEM_FIELDS
+        }
+        self.derived_fields = DERIVED_FIELDS & set(self.fields)
+
+    def ingest(self, posts: Iterable[dict]) -> IngestionResult:
+        """Consume posts (any iterable, including generators) chunk by chunk"""
+        result = IngestionResult()
+        chunk: List[Tuple[str, dict]] = []
+
+        for post_data in posts:
+            if not is_ingestible(post_data, self.platform):
+                result.skipped += 1
+                continue
+            key = get_post_key(post_data)
+            if not key:
+                result.skipped += 1
+                continue
+            chunk.append((key, post_data))
+            if len(chunk) >= self.batch_size:
+                result.merge(self._flush(chunk))
+                chunk = []
+
+        if chunk:
+            result.merge(self._flush(chunk))
+
+        logger.info(f"Ingested {self.platform} posts into folder "
+                    f"{self.folder.id if self.folder else 'None'}: {result.as_dict()}")
+        return result
+
+    def _flush(self, chunk: List[Tuple[str, dict]]) -> IngestionResult:
+        result = IngestionResult()
+        rows: Dict[str, Tuple[Dict[str, Any], dict]] = {}
+
+        for key, post_data in chunk:
+            try:
+                values = self._build_values(key, post_data)
+            except Exception as e:
+                logger.error(f"Error mapping {self.platform} post {key}: {str(e)}")
+                result.failed += 1
+                continue
+            if key in rows:
+                # Repeated post within the snapshot: the later copy wins
+                result.updated += 1
+            rows[key] = (values, post_data)
+
+        if not rows:
+            return result
+
+        try:
+            with transaction.atomic():
+                result.merge(self._write(rows))
+        except (DatabaseError, ValidationError, TypeError, ValueError) as e:
+            logger.warning(f"Bulk write of {len(rows)} {self.platform} posts failed ({str(e)}); "
+                           f"retrying row by row")
+            for key, row in rows.items():
+                try:
+                    with transaction.atomic():
+                        result.merge(self._write({key: row}))
+                except (DatabaseError, ValidationError, TypeError, ValueError) as row_error:
+                    logger.error(f"Error processing {self.platform} post {key}: {str(row_error)}")
+                    result.failed += 1
+
+        return result
+
+    def _build_values(self, key: str, post_data: dict) -> Dict[str, Any]:
+        """Map a raw post to normalized column values"""
+        mapped = self.mapper(post_data)
+        values = {name: value for name, value in mapped.items() if name in self.fields}
+        values['post_id'] = key
+
+        # Run the model's legacy hook on a transient instance so derived
+        # columns are computed exactly as save() would compute them
+        candidate = self.model(**values)
+        self._sync_legacy_fields(candidate)
+        for name in self.derived_fields:
+            values[name] = getattr(candidate, name)
+
+        return {
+            name: normalize_field_value(self.fields[name], getattr(candidate, name))
+            for name in values
+        }
+
+    def _fetch_existing(self, keys: List[str]) -> Dict[str, models.Model]:
+        queryset = self.model.objects.filter(post_id__in=keys)
+        if self.folder is not None:
+            queryset = queryset.filter(folder=self.folder)
+        existing = {}
+        for post in queryset.order_by('pk'):
+            existing.setdefault(post.post_id, post)
+        return existing
+
+    def _write(self, rows: Dict[str, Tuple[Dict[str, Any], dict]]) -> IngestionResult:
+        result = IngestionResult()
+        existing = self._fetch_existing(list(rows))
+        now = timezone.now()
+
+        stats = PostStatsDelta(self.model, self.folder)
+        search = SearchDocuments(self.model)
+        hashtags = PostHashtags(self.model, self.folder)
+        retrieval = RetrievalDocuments(self.model, self.folder)
+
+        to_create, new_posts = [], []
+        to_update, changed_fields = [], set()
+
+        for key, (values, post_data) in rows.items():
+            post = existing.get(key)
+            if post is None:
+                post = self.model(folder=self.folder, **values)
+                to_create.append(post)
+                new_posts.append((post, post_data))
+                continue
+
+            changed = [name for name, value in values.items() if getattr(post, name) != value]
+            if changed:
+                counted = stats.watches(changed)
+                if counted:
+                    stats.add(post, -1)
+                for name in changed:
+                    setattr(post, name, values[name])
+                if counted:
+                    stats.add(post)
+                if search.watches(changed):
+                    search.add(post)
+                if hashtags.watches(changed):
+                    hashtags.add(post)
+                if retrieval.watches(changed):
+                    retrieval.add(post)
+                post.updated_at = now
+                to_update.append(post)
+                changed_fields.update(changed)
+            result.updated += 1
+
+        if to_create:
+            self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+            result.created = len(to_create)
+            for post in to_create:
+                stats.add(post)
+                search.add(post)
+                hashtags.add(post, created=True)
+                retrieval.add(post)
+        if to_update:
+            self.model.objects.bulk_update(
+                to_update, sorted(changed_fields | {'updated_at'}), batch_size=self.batch_size
+            )
+        stats.apply()
+        search.apply()
+        hashtags.apply()
+        retrieval.apply()
+        if (to_create or to_update) and self.folder is not None:
+            Project.bump_data_version([self.folder.project_id])
+
+        if new_posts and self.platform == 'linkedin':
+            result.comments_created = self._create_linkedin_comments(new_posts)
+
+        return result
+
+    def _sync_legacy_fields(self, post) -> None:
+        sync = getattr(post, 'sync_legacy_fields', None)
+        if sync is not None:
+            sync()
+
+    def _ensure_primary_keys(self, posts: List[models.Model]) -> None:
+        """Backends without INSERT ... RETURNING leave bulk-created pks unset"""
+        if connection.features.can_return_rows_from_bulk_insert or all(post.pk for post in posts):
+            return
+        ids = dict(
+            self.model.objects.filter(folder=self.folder, post_id__in=[post.post_id for post in posts])
+            .values_list('post_id', 'id')
+        )
+        for post in posts:
+            post.pk = ids.get(post.post_id)
+
+    def _create_linkedin_comments(self, new_posts: List[Tuple[models.Model, dict]]) -> int:
+        """Bulk-create top visible comments for LinkedIn posts created in this chunk"""
+        LinkedInComment = apps.get_model('linkedin_data.LinkedInComment')
+        self._ensure_primary_keys([post for post, _ in new_posts])
+
+        comments = []
+        for post, post_data in new_posts:
+            if not post.pk:
+                continue
+            seen = set()
+            for comment_data in post_data.get('top_visible_comments') or []:
+                if not isinstance(comment_data, dict):
+                    continue
+                comment_id = comment_data.get('comment_id', '')
+                if comment_id in seen:
+                    continue
+                seen.add(comment_id)
+                comments.append(LinkedInComment(
+                    comment_id=comment_id,
+                    post=post,
+                    folder=self.folder,
+                    comment_text=comment_data.get('comment', ''),
+                    comment_date=normalize_field_value(
+                        LinkedInComment._meta.get_field('comment_date'),
+                        parse_iso_datetime(comment_data.get('comment_date')),
+                    ),
+                    user_id=comment_data.get('user_id', ''),
+                    user_name=comment_data.get('user_name', ''),
+                    user_url=comment_data.get('use_url', ''),
+                    user_title=comment_data.get('user_title', ''),
+                    num_reactions=comment_data.get('num_reactions') or 0,
+                    tagged_users=comment_data.get('tagged_users', []),
+                ))
+
+        if comments:
+            LinkedInComment.objects.bulk_create(comments, batch_size=self.batch_size)
+            retrieval = RetrievalDocuments(LinkedInComment, self.folder)
+            for comment in comments:
+                retrieval.add(comment)
+            retrieval.apply()
+        return len(comments)
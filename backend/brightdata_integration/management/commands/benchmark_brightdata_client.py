@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand
+from brightdata_integration.brightdata_client import TRIGGER_PATH, BrightDataClient
+from brightdata_integration.fake_brightdata import FakeBrightData
+import requests
+import time
+
+PLATFORMS = ('facebook', 'instagram', 'linkedin', 'tiktok')
+
+
+class Command(BaseCommand):
+    help = 'Compare bare requests.post triggers with the pooled, retrying and concurrent BrightData client on a local fake API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--datasets',
+            type=int,
+            default=3,
+            help='Datasets (content types) per platform; one trigger each (default: 3)'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.2,
+            help='Seconds the fake API takes per response (default: 0.2)'
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0.1,
+            help='Fraction of responses that are 503s (default: 0.1)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[1, 4, 8],
+            help='Client concurrency caps to measure (default: 1 4 8)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Seed of the injected failures, so every run sees the same ones (default: 42)'
+        )
+
+    def handle(self, *args, **options):
+        jobs = [
+            (f'gd_{platform}_{number}', [{'url': f'https://www.{platform}.com/account_{number}/'}])
+            for platform in PLATFORMS
+            for number in range(options['datasets'])
+        ]
+        self.stdout.write(
+            f"{len(jobs)} triggers, {options['latency']:.2f}s latency, {options['failure_rate']:.0%} injected 503s"
+        )
+
+        results = [('bare requests.post', self._measure(options, jobs, None))]
+        for concurrency in options['concurrency']:
+            results.append((f'client x{concurrency}', self._measure(options, jobs, concurrency)))
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("BRIGHTDATA CLIENT BENCHMARK")
+        self.stdout.write("="*50)
+        for label, result in results:
+            self.stdout.write(
+                f"{label:>20}: {result['triggered']}/{len(jobs)} triggered in {result['seconds']:.2f}s "
+                f"({result['requests']} requests, {result['max_in_flight']} in flight at most)"
+            )
+
+    def _measure(self, options, jobs, concurrency):
+        with FakeBrightData(latency=options['latency'], failure_rate=options['failure_rate'],
+                            seed=options['seed']) as server:
+            start = time.time()
+            if concurrency is None:
+                # The old path: one connection per call, no retries, one platform after another
+                url = f'{server.url}{TRIGGER_PATH}'
+                statuses = [
+                    requests.post(url, params={'dataset_id': dataset_id}, json=payload, timeout=30).status_code
+                    for dataset_id, payload in jobs
+                ]
+            else:
+                client = BrightDataClient(base_url=server.url, max_concurrency=concurrency,
+                                          backoff_base=options['latency'], backoff_max=5)
+                outcomes = client.fan_out(lambda job: client.trigger('benchmark', job[0], job[1]), jobs)
+                statuses = [outcome.value.status_code if outcome.ok else None for outcome in outcomes]
+                client.session.close()
+            seconds = time.time() - start
+            stats = server.stats()
+
+        return {
+            'seconds': seconds,
+            'triggered': sum(1 for status in statuses if status == 200),
+            'requests': stats['requests'],
+            'max_in_flight': stats['max_in_flight'],
+        }
@@ -0,0 +1,173 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from brightdata_integration.snapshot_stream import iter_url_records
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = ('legacy', 'streaming')
+
+
+def _synthetic_post(index):
+    """Instagram-shaped post roughly the size of a real BrightData record"""
+    return {
+        'post_id': f'BENCH{index:09d}',
+        'url': f'https://www.instagram.com/p/BENCH{index:09d}/',
+        'user_posted': f'account_{index % 500}',
+        'description': ' '.join(random.choice(('run', 'train', 'win', 'just', 'do', 'it', 'new', 'drop'))
+                                for _ in range(120)),
+        'hashtags': [f'#tag{random.randint(0, 999)}' for _ in range(8)],
+        'num_comments': random.randint(0, 5000),
+        'likes': random.randint(0, 100000),
+        'date_posted': '2025-01-15T10:00:00.000Z',
+        'photos': [f'https://cdn.example.com/{index}/{n}.jpg' for n in range(4)],
+        'latest_comments': [
+            {'comments': 'Great post ' * 5, 'user_commenting': f'fan_{n}', 'likes': n}
+            for n in range(6)
+        ],
+        'is_verified': index % 7 == 0,
+        'content_type': 'post',
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare peak RSS of the legacy response.json() path and the streaming snapshot reader'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size-mb',
+            type=int,
+            default=200,
+            help='Size of the synthetic snapshot in MB (default: 200)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['json', 'ndjson'],
+            default='json',
+            help='Snapshot format (default: json array)'
+        )
+        parser.add_argument(
+            '--file',
+            type=str,
+            default=None,
+            help='Use an existing snapshot file instead of generating one'
+        )
+        parser.add_argument(
+            '--measure',
+            choices=MODES,
+            default=None,
+            help='Internal: measure a single mode in this process and print the result as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['measure']:
+            if not options['file']:
+                raise CommandError('--measure requires --file')
+            self.stdout.write(json.dumps(self._measure(options['measure'], options['file'])))
+            return
+
+        path = options['file']
+        generated = path is None
+        if generated:
+            path = self._generate(options['size_mb'], options['format'])
+
+        try:
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            self.stdout.write(f"Snapshot: {path} ({size_mb:.1f} MB)")
+            results = {mode: self._run_child(mode, path) for mode in MODES}
+        finally:
+            if generated:
+                os.remove(path)
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("SNAPSHOT PARSING BENCHMARK")
+        self.stdout.write("="*50)
+        for mode, result in results.items():
+            if result['posts'] is None:
+                self.stdout.write(f"{mode:>9}: failed to parse snapshot")
+                continue
+            self.stdout.write(
+                f"{mode:>9}: {result['posts']} posts in {result['seconds']:.1f}s, "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB "
+                f"(+{result['peak_rss_mb'] - result['baseline_rss_mb']:.0f} MB over baseline)"
+            )
+
+    def _generate(self, size_mb, fmt):
+        """Write a synthetic snapshot without holding it in memory"""
+        target = size_mb * 1024 * 1024
+        handle, path = tempfile.mkstemp(suffix=f'.{fmt}')
+        self.stdout.write(f"Generating {size_mb} MB {fmt} snapshot...")
+
+        written, index = 0, 0
+        with os.fdopen(handle, 'w', encoding='utf-8') as snapshot:
+            if fmt == 'json':
+                written += snapshot.write('[')
+            while written < target:
+                line = json.dumps(_synthetic_post(index))
+                if fmt == 'json':
+                    written += snapshot.write((',\n' if index else '\n') + line)
+                else:
+                    written += snapshot.write(line + '\n')
+                index += 1
+            if fmt == 'json':
+                snapshot.write('\n]')
+        return path
+
+    def _run_child(self, mode, path):
+        """Each mode runs in a fresh process so ru_maxrss is not shared between them"""
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+        output = subprocess.run(
+            [sys.executable, manage_py, 'benchmark_snapshot_stream', '--measure', mode, '--file', path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def _measure(self, mode, path):
+        """Download the snapshot over local HTTP, as the webhook worker does, and consume every post"""
+        directory, name = os.path.split(os.path.abspath(path))
+        handler = partial(_QuietHandler, directory=directory)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/{name}'
+
+        baseline = _peak_rss_mb()
+        start = time.time()
+        try:
+            if mode == 'legacy':
+                import requests
+                try:
+                    posts = sum(1 for _ in requests.get(url, timeout=600).json())
+                except ValueError:
+                    posts = None  # response.json() cannot parse NDJSON at all
+            else:
+                posts = sum(1 for _ in iter_url_records(url, timeout=600))
+        finally:
+            server.shutdown()
+
+        return {
+            'mode': mode,
+            'posts': posts,
+            'seconds': time.time() - start,
+            'baseline_rss_mb': baseline,
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
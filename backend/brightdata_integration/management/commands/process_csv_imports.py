@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from brightdata_integration.csv_import import CsvImportWorker
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Import CSV uploads queued as background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Maximum number of import jobs to process (default: 10)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Run as a long-lived worker instead of processing queued jobs and exiting'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty (default: 2.0)'
+        )
+
+    def handle(self, *args, **options):
+        worker = CsvImportWorker()
+
+        if options['loop']:
+            self.stdout.write(f"Starting CSV import worker {worker.worker_id}")
+            try:
+                worker.run_forever(poll_interval=options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write("CSV import worker stopped.")
+            return
+
+        summary = worker.run_once(limit=options['limit'])
+        if not summary['processed']:
+            self.stdout.write("No queued CSV imports found.")
+            return
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("IMPORT SUMMARY")
+        self.stdout.write("="*50)
+        self.stdout.write(f"Total processed: {summary['processed']}")
+        self.stdout.write(f"Successful: {summary['successful']}")
+        self.stdout.write(f"Failed: {summary['failed']}")
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from brightdata_integration.fake_brightdata import FakeBrightData
+import time
+
+
+class Command(BaseCommand):
+    help = 'Serve a local fake BrightData API (set BRIGHTDATA_API_URL to its URL) for offline trigger runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Port to listen on (default: 8765)'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.2,
+            help='Seconds each response is delayed (default: 0.2)'
+        )
+        parser.add_argument(
+            '--failure-rate',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with --failure-status (default: 0)'
+        )
+        parser.add_argument(
+            '--failure-status',
+            type=int,
+            default=503,
+            help='Status code of injected failures (default: 503)'
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=float,
+            default=None,
+            help='Retry-After seconds sent with injected failures'
+        )
+
+    def handle(self, *args, **options):
+        server = FakeBrightData(
+            port=options['port'],
+            latency=options['latency'],
+            failure_rate=options['failure_rate'],
+            failure_status=options['failure_status'],
+            retry_after=options['retry_after'],
+        ).start()
+        self.stdout.write(f"Fake BrightData API listening on {server.url}")
+        self.stdout.write(f"Run the backend with BRIGHTDATA_API_URL={server.url} to send triggers here")
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+
+        # Summary
+        stats = server.stats()
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("FAKE BRIGHTDATA SUMMARY")
+        self.stdout.write("="*50)
+        self.stdout.write(f"Requests: {stats['requests']}")
+        self.stdout.write(f"Succeeded: {stats['succeeded']}")
+        self.stdout.write(f"Failed (injected or invalid): {stats['failed']}")
+        self.stdout.write(f"Most requests in flight: {stats['max_in_flight']}")
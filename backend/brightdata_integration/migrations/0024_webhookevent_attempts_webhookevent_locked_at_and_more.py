@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brightdata_integration', '0023_remove_webhook_status_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='attempts',
+            field=models.IntegerField(default=0, help_text='Number of times a worker has claimed this event'),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, help_text='When the current worker claimed this event', null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='locked_by',
+            field=models.CharField(blank=True, help_text='Worker currently processing this event', max_length=255, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['snapshot_id', 'status'], name='webhook_eve_snapsho_3bb86c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['status', 'locked_at'], name='webhook_eve_status_430d9b_idx'),
+        ),
+    ]
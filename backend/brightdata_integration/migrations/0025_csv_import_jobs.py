@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-17 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brightdata_integration', '0024_webhookevent_attempts_webhookevent_locked_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('importer', models.CharField(help_text="Importer key, e.g. 'instagram_posts'", max_length=50)),
+                ('folder_id', models.IntegerField(blank=True, help_text="Target folder in the importer's platform app", null=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('bytes_processed', models.BigIntegerField(default=0)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('result', models.JSONField(blank=True, help_text='Response body the upload would have returned inline', null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'csv_import_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='csv_import__status_ffdb6a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CsvImportChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField()),
+                ('data', models.BinaryField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='brightdata_integration.csvimportjob')),
+            ],
+            options={
+                'db_table': 'csv_import_chunks',
+                'ordering': ['job', 'index'],
+                'unique_together': {('job', 'index')},
+            },
+        ),
+    ]
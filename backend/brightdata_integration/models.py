@@ -253,6 +253,11 @@ class WebhookEvent(models.Model):
     error_message = models.TextField(blank=True, null=True)
     received_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(blank=True, null=True)
+
+    # Worker lease (see webhook_worker.WebhookWorker)
+    attempts = models.IntegerField(default=0, help_text="Number of times a worker has claimed this event")
+    locked_at = models.DateTimeField(blank=True, null=True, help_text="When the current worker claimed this event")
+    locked_by = models.CharField(max_length=255, blank=True, null=True, help_text="Worker currently processing this event")
     
     class Meta:
         db_table = 'webhook_events'
@@ -260,7 +265,77 @@ class WebhookEvent(models.Model):
             models.Index(fields=['status', 'received_at']),
             models.Index(fields=['snapshot_id']),
             models.Index(fields=['platform']),
+            models.Index(fields=['snapshot_id', 'status']),
+            models.Index(fields=['status', 'locked_at']),
         ]
     
     def __str__(self):
         return f"WebhookEvent {self.id}: {self.platform} - {self.snapshot_id} ({self.status})"
+
+
+class CsvImportJob(models.Model):
+    """
+    A platform CSV upload too large to import within the request; processed by
+    the process_csv_imports worker (see csv_import.CsvImportWorker)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    importer = models.CharField(max_length=50, help_text="Importer key, e.g. 'instagram_posts'")
+    folder_id = models.IntegerField(null=True, blank=True, help_text="Target folder in the importer's platform app")
+    file_name = models.CharField(max_length=255)
+    size_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Progress
+    bytes_processed = models.BigIntegerField(default=0)
+    rows_processed = models.IntegerField(default=0)
+    result = models.JSONField(null=True, blank=True, help_text="Response body the upload would have returned inline")
+    error_message = models.TextField(blank=True, null=True)
+
+    # Worker lease
+    attempts = models.IntegerField(default=0)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=255, blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'csv_import_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    @property
+    def progress(self):
+        """Percentage of the upload consumed so far"""
+        if self.status == 'completed':
+            return 100.0
+        if not self.size_bytes:
+            return 0.0
+        return round(min(100.0, self.bytes_processed * 100.0 / self.size_bytes), 1)
+
+    def __str__(self):
+        return f"CsvImportJob {self.id}: {self.importer} - {self.file_name} ({self.status})"
+
+
+class CsvImportChunk(models.Model):
+    """
+    Raw bytes of a queued upload, stored in the database so web and worker
+    containers need no shared file storage; deleted once the job finishes
+    """
+    job = models.ForeignKey(CsvImportJob, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        db_table = 'csv_import_chunks'
+        unique_together = [['job', 'index']]
+        ordering = ['job', 'index']
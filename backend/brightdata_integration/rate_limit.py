@@ -0,0 +1,116 @@
+"""
+Shared token-bucket rate limiting and replay detection for webhooks
+
+A bucket holds up to `capacity` tokens and gains `refill_rate` tokens per second;
+each request takes one, so clients may burst up to the capacity and are then held to
+the refill rate. Unlike a counter that is read, incremented and written back, the
+refill-and-take step runs atomically:
+
+- on a Redis cache (CACHES['webhook_security'] with REDIS_URL set, see settings) as
+  one Lua script, so every gunicorn worker and server shares the same buckets
+- on any other cache under a process lock, which is exact for LocMemCache (a single
+  development process) but per process, like the cache itself
+
+Replay detection stores a fingerprint of each accepted delivery with cache.add(),
+which only succeeds for the first writer (SET NX on Redis).
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket; ARGV: capacity, refill rate (tokens/s), now (s), cost, ttl (s)
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+return {allowed, tostring(tokens)}
+"""
+
+_local_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: float
+    # Seconds until the request would be allowed; 0 when it was
+    retry_after: float = 0.0
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by client, stored in a Django cache"""
+
+    def __init__(self, cache, capacity: float, refill_rate: float, prefix: str = 'webhook_rate'):
+        self.cache = cache
+        self.capacity = max(float(capacity), 1.0)
+        self.refill_rate = max(float(refill_rate), 1e-6)
+        self.prefix = prefix
+        # Once full again a bucket is the same as a missing one, so it may expire then
+        self.ttl = math.ceil(self.capacity / self.refill_rate) + 1
+
+    @property
+    def shared(self) -> bool:
+        """Whether buckets are shared between processes"""
+        return isinstance(self.cache, RedisCache)
+
+    def consume(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        bucket_key = f'{self.prefix}:{key}'
+        if self.shared:
+            allowed, tokens = self._consume_redis(bucket_key, cost, now)
+        else:
+            allowed, tokens = self._consume_locked(bucket_key, cost, now)
+        retry_after = 0.0 if allowed else (cost - tokens) / self.refill_rate
+        return RateLimitDecision(allowed, tokens, retry_after)
+
+    def _consume_redis(self, bucket_key: str, cost: float, now: float):
+        key = self.cache.make_and_validate_key(bucket_key)
+        # RedisCache has no scripting API; run the script on the client it writes with
+        client = self.cache._cache.get_client(key, write=True)
+        allowed, tokens = client.register_script(TOKEN_BUCKET_SCRIPT)(
+            keys=[key], args=[self.capacity, self.refill_rate, now, cost, self.ttl]
+        )
+        return bool(int(allowed)), float(tokens)
+
+    def _consume_locked(self, bucket_key: str, cost: float, now: float):
+        with _local_lock:
+            tokens, updated = self.cache.get(bucket_key) or (self.capacity, now)
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.cache.set(bucket_key, (tokens, now), timeout=self.ttl)
+        return allowed, tokens
+
+
+class ReplayCache:
+    """Remembers delivery fingerprints for `window` seconds; the first sighting wins"""
+
+    def __init__(self, cache, window: int, prefix: str = 'webhook_replay'):
+        self.cache = cache
+        self.window = max(int(window), 1)
+        self.prefix = prefix
+
+    def first_seen(self, fingerprint: str) -> bool:
+        """True the first time a fingerprint is offered within the window"""
+        return self.cache.add(f'{self.prefix}:{fingerprint}', 1, timeout=self.window)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import BrightdataConfig, ScraperRequest, BatchScraperJob, BrightdataNotification
+from .models import BrightdataConfig, ScraperRequest, BatchScraperJob, BrightdataNotification, CsvImportJob
 
 class BrightdataConfigSerializer(serializers.ModelSerializer):
     """Serializer for Brightdata API configuration"""
@@ -95,3 +95,17 @@ class BrightdataNotificationSerializer(serializers.ModelSerializer):
             'raw_data', 'request_ip', 'request_headers', 'created_at', 'processed_at'
         ]
         read_only_fields = ['id', 'created_at', 'processed_at']
+
+
+class CsvImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for queued CSV uploads, polled by the frontend for progress"""
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = CsvImportJob
+        fields = [
+            'id', 'importer', 'folder_id', 'file_name', 'size_bytes', 'status', 'progress',
+            'bytes_processed', 'rows_processed', 'result', 'error_message', 'attempts',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -6,15 +6,16 @@ from tracked sources using BrightData's API.
 """
 
 import logging
-import requests
 import json
 import datetime
+from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 from django.utils import timezone
 from django.db import transaction
 from urllib.parse import urlparse, urlunparse
 from django.conf import settings
 
+from .brightdata_client import TRIGGER_PATH, get_client
 from .models import BatchScraperJob, ScraperRequest, BrightdataConfig
 from track_accounts.models import TrackSource
 from facebook_data.models import Folder as FacebookFolder
@@ -24,6 +25,17 @@ from tiktok_data.models import Folder as TikTokFolder
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class BatchTriggerCall:
+    """A prepared BrightData trigger call for the scraper requests of one batch"""
+    scraper_requests: List[ScraperRequest]
+    url: str
+    headers: Dict[str, str]
+    params: Dict[str, str]
+    payload: List[Dict]
+
+
 class AutomatedBatchScraper:
     """
     Service for automated batch scraping from tracked sources across multiple platforms
@@ -376,7 +388,9 @@ class AutomatedBatchScraper:
 
     def _execute_batch_requests(self, scraper_requests: List[ScraperRequest]) -> Dict:
         """
-        Group scraper requests by platform+content_type and execute batch API calls
+        Group scraper requests by platform+content_type and execute batch API calls.
+        The calls of all groups are sent concurrently (at most BRIGHTDATA_MAX_CONCURRENCY
+        at a time); building them and storing their results stays on this thread.
         """
         # Group requests by platform+content_type combination
         request_groups = {}
@@ -387,6 +401,7 @@ class AutomatedBatchScraper:
             request_groups[key].append(request)
 
         batch_results = {}
+        prepared = []
 
         for group_key, requests in request_groups.items():
             self.logger.info(f"Executing batch API call for {group_key} with {len(requests)} sources")
@@ -394,72 +409,73 @@ class AutomatedBatchScraper:
             try:
                 # Get the platform from the first request (all requests in group have same platform)
                 base_platform = requests[0].platform.split('_')[0]
+                payload = self._batch_payload_for_platform(base_platform, requests)
+                call = self._prepare_batch_call(requests, payload) if payload is not None else None
+                if call is None:
+                    self._record_batch_result(batch_results, group_key, requests, False)
+                else:
+                    prepared.append((group_key, call))
 
-                # Execute batch call based on platform
-                success = self._execute_batch_for_platform(base_platform, requests)
-
-                batch_results[group_key] = {
-                    'successful': len(requests) if success else 0,
-                    'failed': 0 if success else len(requests),
-                    'total_sources': len(requests)
-                }
+            except Exception as e:
+                self._record_batch_error(batch_results, group_key, requests, e)
 
-                # Update request statuses
-                status = 'pending' if success else 'failed'
-                for request in requests:
-                    request.status = status
-                    if not success:
-                        request.error_message = f"Batch API call failed for {group_key}"
-                    request.save()
+        outcomes = get_client().fan_out(self._send_batch_call, [call for _, call in prepared])
 
+        for (group_key, call), outcome in zip(prepared, outcomes):
+            try:
+                success = self._finish_batch_call(call, outcome.value, outcome.error)
+                self._record_batch_result(batch_results, group_key, call.scraper_requests, success)
             except Exception as e:
-                self.logger.error(f"Error executing batch for {group_key}: {str(e)}")
-                batch_results[group_key] = {
-                    'successful': 0,
-                    'failed': len(requests),
-                    'total_sources': len(requests)
-                }
-
-                # Mark all requests as failed
-                for request in requests:
-                    request.status = 'failed'
-                    request.error_message = f"Batch execution error: {str(e)}"
-                    request.save()
+                self._record_batch_error(batch_results, group_key, call.scraper_requests, e)
 
         return batch_results
 
-    def _execute_batch_for_platform(self, platform: str, requests: List[ScraperRequest]) -> bool:
-        """
-        Execute a batch API call for a specific platform with multiple sources
-        """
-        if not requests:
-            return True
+    def _record_batch_result(self, batch_results: Dict, group_key: str, requests: List[ScraperRequest], success: bool) -> None:
+        batch_results[group_key] = {
+            'successful': len(requests) if success else 0,
+            'failed': 0 if success else len(requests),
+            'total_sources': len(requests)
+        }
+
+        # Update request statuses
+        status = 'pending' if success else 'failed'
+        for request in requests:
+            request.status = status
+            if not success:
+                request.error_message = f"Batch API call failed for {group_key}"
+            request.save()
+
+    def _record_batch_error(self, batch_results: Dict, group_key: str, requests: List[ScraperRequest], error: Exception) -> None:
+        self.logger.error(f"Error executing batch for {group_key}: {str(error)}")
+        batch_results[group_key] = {
+            'successful': 0,
+            'failed': len(requests),
+            'total_sources': len(requests)
+        }
 
-        # Use the first request to get config and determine the trigger method
-        first_request = requests[0]
+        # Mark all requests as failed
+        for request in requests:
+            request.status = 'failed'
+            request.error_message = f"Batch execution error: {str(error)}"
+            request.save()
 
-        # Map platform to batch trigger method
-        platform_batch_methods = {
-            'facebook': self._trigger_facebook_batch,
-            'instagram': self._trigger_instagram_batch,
-            'linkedin': self._trigger_linkedin_batch,
-            'tiktok': self._trigger_tiktok_batch,
+    def _batch_payload_for_platform(self, platform: str, requests: List[ScraperRequest]) -> Optional[List[Dict]]:
+        """
+        Build the batch payload of a platform's requests (None for unsupported platforms)
+        """
+        # Map platform to batch payload builder
+        platform_payload_builders = {
+            'facebook': self._facebook_batch_payload,      # posts and comments
+            'instagram': self._instagram_batch_payload,    # posts, reels and comments
+            'linkedin': self._linkedin_batch_payload,
+            'tiktok': self._tiktok_batch_payload,
         }
 
-        # Handle platform-specific content types
-        if platform == 'facebook':
-            # Facebook supports both posts and comments
-            return self._trigger_facebook_batch(requests)
-        elif platform == 'instagram':
-            # Instagram supports posts, reels, and comments
-            return self._trigger_instagram_batch(requests)
-        else:
-            # Other platforms use the standard mapping
-            batch_method = platform_batch_methods.get(platform)
-            if not batch_method:
-                self.logger.error(f"No batch trigger method found for platform: {platform}")
-                return False
-            return batch_method(requests)
+        payload_builder = platform_payload_builders.get(platform)
+        if not payload_builder:
+            self.logger.error(f"No batch trigger method found for platform: {platform}")
+            return None
+        return payload_builder(requests)
 
     def _get_platform_url(self, source: TrackSource, platform: str) -> Optional[str]:
         """
@@ -700,7 +716,7 @@ class AutomatedBatchScraper:
             if not webhook_base_url:
                 raise ValueError("BRIGHTDATA_WEBHOOK_BASE_URL setting is not configured")
 
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -796,7 +812,7 @@ class AutomatedBatchScraper:
             scraper_request.save()
 
             # Make the API request
-            response = requests.post(url, headers=headers, params=params, json=payload)
+            response = get_client().post(url, headers=headers, params=params, json=payload)
 
             # ===== DETAILED RESPONSE LOGGING =====
             print("\n📥 BRIGHTDATA API RESPONSE:")
@@ -902,6 +918,10 @@ class AutomatedBatchScraper:
         """Trigger Facebook batch scrape with multiple sources"""
         if not requests:
             return True
+        return self._make_brightdata_batch_request(requests, self._facebook_batch_payload(requests))
+
+    def _facebook_batch_payload(self, requests: List[ScraperRequest]) -> List[Dict]:
+        """Facebook batch payload with one item per source"""
 
         # Get platform-specific parameters from the first request
         platform_params = {}
@@ -947,14 +967,16 @@ class AutomatedBatchScraper:
 
             payload.append(item)
 
-        # Use the first request for API call configuration, but update ALL requests with the response
-        success = self._make_brightdata_batch_request(requests, payload)
-        return success
+        return payload
 
     def _trigger_instagram_batch(self, requests: List[ScraperRequest]) -> bool:
         """Trigger Instagram batch scrape with multiple sources"""
         if not requests:
             return True
+        return self._make_brightdata_batch_request(requests, self._instagram_batch_payload(requests))
+
+    def _instagram_batch_payload(self, requests: List[ScraperRequest]) -> List[Dict]:
+        """Instagram batch payload with one item per source"""
 
         # Get content type from the first request (all requests in batch have same content type)
         content_type = requests[0].platform.split('_')[-1]  # gets 'posts', 'reels', etc.
@@ -1000,14 +1022,16 @@ class AutomatedBatchScraper:
                 }
                 payload.append(item)
 
-        # Use the first request for API call configuration, but update ALL requests with the response
-        success = self._make_brightdata_batch_request(requests, payload)
-        return success
+        return payload
 
     def _trigger_linkedin_batch(self, requests: List[ScraperRequest]) -> bool:
         """Trigger LinkedIn batch scrape with multiple sources"""
         if not requests:
             return True
+        return self._make_brightdata_batch_request(requests, self._linkedin_batch_payload(requests))
+
+    def _linkedin_batch_payload(self, requests: List[ScraperRequest]) -> List[Dict]:
+        """LinkedIn batch payload with one item per source"""
 
         # Get platform-specific parameters from the first request
         platform_params = {}
@@ -1034,14 +1058,16 @@ class AutomatedBatchScraper:
 
             payload.append(item)
 
-        # Use the first request for API call configuration, but update ALL requests with the response
-        success = self._make_brightdata_batch_request(requests, payload)
-        return success
+        return payload
 
     def _trigger_tiktok_batch(self, requests: List[ScraperRequest]) -> bool:
         """Trigger TikTok batch scrape with multiple sources"""
         if not requests:
             return True
+        return self._make_brightdata_batch_request(requests, self._tiktok_batch_payload(requests))
+
+    def _tiktok_batch_payload(self, requests: List[ScraperRequest]) -> List[Dict]:
+        """TikTok batch payload with one item per source"""
 
         # Create batch payload with all sources
         payload = []
@@ -1051,23 +1077,33 @@ class AutomatedBatchScraper:
                 "URL": request.target_url,
             })
 
-        # Use the first request for API call configuration, but update ALL requests with the response
-        success = self._make_brightdata_batch_request(requests, payload)
-        return success
+        return payload
 
     def _make_brightdata_batch_request(self, scraper_requests: List[ScraperRequest], payload: List[Dict]) -> bool:
         """
         Make a batch API request to BrightData and update ALL requests with the same snapshot_id
         """
-        if not scraper_requests:
+        call = self._prepare_batch_call(scraper_requests, payload)
+        if call is None:
             return False
+        try:
+            response = self._send_batch_call(call)
+        except Exception as e:
+            return self._finish_batch_call(call, None, e)
+        return self._finish_batch_call(call, response)
+
+    def _prepare_batch_call(self, scraper_requests: List[ScraperRequest], payload: List[Dict]) -> Optional['BatchTriggerCall']:
+        """
+        Build the trigger call of a batch and mark its requests as processing.
+        Returns None (with the requests marked failed) when the call cannot be made.
+        """
+        if not scraper_requests:
+            return None
 
         # Use the first request for configuration
         primary_request = scraper_requests[0]
 
         try:
-            import requests  # Import requests library explicitly to avoid naming conflict
-
             config = primary_request.config
 
             # Import Django settings to get webhook base URL
@@ -1075,7 +1111,7 @@ class AutomatedBatchScraper:
             if not webhook_base_url:
                 raise ValueError("BRIGHTDATA_WEBHOOK_BASE_URL setting is not configured")
 
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -1174,9 +1210,29 @@ class AutomatedBatchScraper:
                 request.status = 'processing'
                 request.save()
 
-            # Make the API request
-            response = requests.post(url, headers=headers, params=params, json=payload)
+            return BatchTriggerCall(scraper_requests, url, headers, params, payload)
+
+        except Exception as e:
+            self._fail_batch_call(scraper_requests, e)
+            return None
+
+    def _send_batch_call(self, call: 'BatchTriggerCall'):
+        """Send a prepared trigger call; HTTP only, so it can run on a fan-out thread"""
+        return get_client().post(call.url, headers=call.headers, params=call.params, json=call.payload)
 
+    def _finish_batch_call(self, call: 'BatchTriggerCall', response, error: Optional[Exception] = None) -> bool:
+        """
+        Store the outcome of a sent trigger call on ALL requests of the batch
+        """
+        scraper_requests = call.scraper_requests
+        primary_request = scraper_requests[0]
+        payload = call.payload
+
+        if error is not None:
+            self._fail_batch_call(scraper_requests, error)
+            return False
+
+        try:
             # ===== DETAILED RESPONSE LOGGING =====
             print("\n📥 BRIGHTDATA API RESPONSE:")
             print(f"Status Code: {response.status_code}")
@@ -1226,64 +1282,42 @@ class AutomatedBatchScraper:
                 return False
 
         except Exception as e:
-            error_msg = f"Exception during BrightData batch request for {primary_request.platform}: {str(e)}"
-            self.logger.error(error_msg)
+            self._fail_batch_call(scraper_requests, e)
+            return False
 
-            # Update ALL requests with failed status
-            for request in scraper_requests:
-                request.status = 'failed'
-                request.error_message = error_msg
-                request.save()
+    def _fail_batch_call(self, scraper_requests: List[ScraperRequest], error: Exception) -> None:
+        error_msg = f"Exception during BrightData batch request for {scraper_requests[0].platform}: {str(error)}"
+        self.logger.error(error_msg)
 
-            print(f"❌ EXCEPTION! Error: {str(e)}")
-            print("="*80 + "\n")
-            return False
+        # Update ALL requests with failed status
+        for request in scraper_requests:
+            request.status = 'failed'
+            request.error_message = error_msg
+            request.save()
+
+        print(f"❌ EXCEPTION! Error: {str(error)}")
+        print("="*80 + "\n")
 
     def _pre_create_platform_folders(self, scrape_job: 'workflow.ScrapingJob', unified_folder_id: int) -> Dict[str, int]:
         """
         Pre-create platform-specific folders for a scraping job
         Returns a dict mapping platform to folder_id
         """
-        platform_folders = {}
-        
         try:
             from track_accounts.models import UnifiedRunFolder
+            from workflow.correct_folder_service import CorrectFolderService
+            from workflow.folder_materializer import FolderMaterializer
+
             unified_folder = UnifiedRunFolder.objects.get(id=unified_folder_id)
-            
-            # Pre-create folders for all platforms
+
+            # Pre-create folders for all platforms, linked through unified_job_folder
             platforms = ['instagram', 'facebook', 'linkedin', 'tiktok']
-            
-            for platform in platforms:
-                try:
-                    if platform == 'instagram':
-                        from instagram_data.models import Folder
-                    elif platform == 'facebook':
-                        from facebook_data.models import Folder
-                    elif platform == 'linkedin':
-                        from linkedin_data.models import Folder
-                    elif platform == 'tiktok':
-                        from tiktok_data.models import Folder
-                    else:
-                        continue
-                    
-                    # Create platform-specific folder
-                    platform_folder = Folder.objects.create(
-                        name=f"{platform.title()} - {unified_folder.name}",
-                        description=f"Pre-created folder for {platform} scraping job",
-                        category=unified_folder.category or 'posts',
-                        project_id=unified_folder.project_id,
-                        scraping_run=unified_folder.scraping_run,
-                        scrape_job=scrape_job,  # NEW: Direct link to ScrapingJob
-                        unified_job_folder=unified_folder
-                    )
-                    
-                    platform_folders[platform] = platform_folder.id
-                    self.logger.info(f"✅ Pre-created {platform} folder: {platform_folder.id} for job: {scrape_job.id}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Error creating {platform} folder: {str(e)}")
-                    continue
-            
+            storage_folders = FolderMaterializer(CorrectFolderService()).create_storage_folders(
+                [unified_folder], platforms=platforms, need_ids=True
+            )
+
+            platform_folders = {platform: folder.id for (platform, _), folder in storage_folders.items()}
+            self.logger.info(f"✅ Pre-created {len(platform_folders)} platform folders for job: {scrape_job.id}")
             return platform_folders
             
         except Exception as e:
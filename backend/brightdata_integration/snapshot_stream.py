@@ -0,0 +1,203 @@
+"""
+Streaming reader for BrightData snapshot payloads
+
+Snapshots are delivered either as one JSON array or as NDJSON (one post per line),
+optionally gzip-compressed. Parsing them with response.json() keeps the raw bytes,
+the decoded text and every post dict in memory at once; this reader decodes the
+input chunk by chunk and yields one post at a time, so memory stays bounded by the
+largest single post rather than by the snapshot size.
+
+Accepted inputs:
+- any iterable of bytes/str chunks (iter_records)
+- file paths and file-like objects, including Django requests (iter_file_records)
+- HTTP URLs, streamed with requests (iter_url_records)
+"""
+
+import codecs
+import itertools
+import json
+import os
+import zlib
+from typing import IO, Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+_WHITESPACE = ' \t\r\n'
+
+_decoder = json.JSONDecoder()
+
+
+class SnapshotFormatError(ValueError):
+    """The payload is not a JSON array, a JSON document or NDJSON"""
+
+
+def _gunzip_if_needed(chunks: Iterable[Union[bytes, str]]) -> Iterator[Union[bytes, str]]:
+    """Transparently decompress gzip input (e.g. *.json.gz snapshot files)"""
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    if not (isinstance(first, bytes) and first.startswith(GZIP_MAGIC)):
+        yield first
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in itertools.chain([first], chunks):
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def _decode_chunks(chunks: Iterable[Union[bytes, str]]) -> Iterator[str]:
+    """UTF-8 decode byte chunks without splitting multi-byte characters (BOM tolerated)"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    for chunk in _gunzip_if_needed(chunks):
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+class _TextBuffer:
+    """Sliding window over decoded input; consumed text is dropped on every refill"""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks = _decode_chunks(chunks)
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk; False once the input is exhausted"""
+        if self.eof:
+            return False
+        piece = next(self._chunks, None)
+        if piece is None:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + piece
+        self.pos = 0
+        return True
+
+    def grow(self) -> bool:
+        """Double the unread window (amortizes re-parsing of values spanning many chunks)"""
+        target = max(2 * (len(self.text) - self.pos), 1)
+        grown = False
+        while len(self.text) - self.pos < target and self.fill():
+            grown = True
+        return grown
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, '' at end of input"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def decode_value(self) -> Any:
+        """Decode the JSON value starting at the current position"""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if self.grow():
+                    continue
+                raise SnapshotFormatError(f'Invalid JSON in snapshot: {e.msg}') from e
+            if end == len(self.text) and self.grow():
+                # A number or literal may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(buffer: _TextBuffer) -> Iterator[Any]:
+    buffer.pos += 1  # opening '['
+    expect_value = True
+    while True:
+        char = buffer.peek()
+        if not char:
+            raise SnapshotFormatError('Unterminated JSON array in snapshot')
+        if char == ']':
+            buffer.pos += 1
+            return
+        if char == ',' and not expect_value:
+            buffer.pos += 1
+            expect_value = True
+            continue
+        if not expect_value:
+            raise SnapshotFormatError(f'Expected "," or "]" in snapshot, got {char!r}')
+        yield buffer.decode_value()
+        expect_value = False
+
+
+def iter_records(chunks: Iterable[Union[bytes, str]]) -> Iterator[Any]:
+    """
+    Yield the records of a snapshot given as chunks of bytes or text.
+
+    - a top-level JSON array yields its elements
+    - NDJSON (or any sequence of concatenated JSON values) yields each value
+    - an envelope object such as {"data": [...]} yields the items of "data",
+      matching how the webhook path has always unwrapped such payloads
+    """
+    buffer = _TextBuffer(chunks)
+    while True:
+        char = buffer.peek()
+        if not char:
+            return
+        if char == '[':
+            yield from _iter_array(buffer)
+            continue
+
+        value = buffer.decode_value()
+        if isinstance(value, dict) and isinstance(value.get('data'), list):
+            yield from value['data']
+        else:
+            yield value
+
+
+def _read_chunks(fileobj: IO, chunk_size: int) -> Iterator[Union[bytes, str]]:
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_file_records(source: Union[str, os.PathLike, IO],
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Stream records from a file path or any object with read() (files, Django requests)"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fileobj:
+            yield from iter_records(_read_chunks(fileobj, chunk_size))
+        return
+    yield from iter_records(_read_chunks(source, chunk_size))
+
+
+def iter_url_records(url: str, timeout: Optional[float] = None,
+                     session: Optional[requests.Session] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Download a snapshot with a streamed GET and yield its records as they arrive"""
+    http = session or requests
+    with http.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        yield from iter_records(response.iter_content(chunk_size=chunk_size))
+
+
+def peek_records(records: Iterable[Any], count: int = 1) -> Tuple[Iterator[Any], List[Any]]:
+    """Look at the first records (e.g. for platform detection) without losing them"""
+    records = iter(records)
+    head = list(itertools.islice(records, count))
+    return itertools.chain(head, records), head
@@ -0,0 +1,184 @@
+"""
+Tests for the pooled BrightData client, against the local fake BrightData API
+"""
+
+import socket
+import threading
+
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from brightdata_integration.brightdata_client import (
+    STATUS_PATH, TRIGGER_PATH, BrightDataClient, backoff_delay, get_client, parse_retry_after,
+)
+from brightdata_integration.fake_brightdata import FakeBrightData
+from brightdata_integration.models import BrightdataConfig, ScraperRequest
+from brightdata_integration.services import AutomatedBatchScraper
+
+
+def _client(server, sleeps=None, **options):
+    options.setdefault('backoff_base', 0.01)
+    sleep = sleeps.append if sleeps is not None else (lambda seconds: None)
+    return BrightDataClient(base_url=server.url, sleep=sleep, **options)
+
+
+class BackoffTest(SimpleTestCase):
+
+    def test_full_jitter_and_retry_after(self):
+        self.assertEqual(backoff_delay(3, 0.5, 30, rand=lambda: 1.0), 4.0)
+        self.assertEqual(backoff_delay(10, 0.5, 30, rand=lambda: 1.0), 30)
+        self.assertEqual(backoff_delay(3, 0.5, 30, rand=lambda: 0.25), 1.0)
+        self.assertEqual(backoff_delay(0, 0.5, 30, retry_after=7), 7)
+        self.assertEqual(backoff_delay(0, 0.5, 30, retry_after=120), 30)
+
+        self.assertEqual(parse_retry_after('2'), 2.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:10 GMT', now=1445412480), 10.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class BrightDataClientTest(SimpleTestCase):
+
+    def test_retries_429_and_5xx_honouring_retry_after(self):
+        sleeps = []
+        with FakeBrightData(script=[429, 503], retry_after=1.5) as server:
+            response = _client(server, sleeps).trigger('token', 'gd_posts', [{'url': 'https://x.com/a'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['snapshot_id'].startswith('s_fake'))
+        self.assertEqual(sleeps, [1.5, 1.5])
+        self.assertEqual([request.status for request in server.requests], [429, 503, 200])
+        self.assertEqual(server.requests[-1].authorization, 'Bearer token')
+        self.assertEqual((server.requests[-1].dataset_id, server.requests[-1].items), ('gd_posts', 1))
+
+    def test_returns_last_response_when_retries_run_out(self):
+        sleeps = []
+        with FakeBrightData(script=[500, 500, 500]) as server:
+            client = _client(server, sleeps, max_retries=2)
+            response = client.get(client.url(STATUS_PATH))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(all(0 <= delay <= 0.01 * 2 ** attempt for attempt, delay in enumerate(sleeps)))
+
+    def test_trigger_is_only_retried_when_nothing_started(self):
+        # A 500 may come after the snapshot was started; 429 and 503 never do
+        with FakeBrightData(script=[429, 500]) as server:
+            response = _client(server).trigger('token', 'gd_posts', [])
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual([request.status for request in server.requests], [429, 500])
+
+    def test_dropped_connections_are_only_retried_for_get(self):
+        accepted = []
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+
+        def hang_up():
+            while True:
+                try:
+                    connection, _ = listener.accept()
+                except OSError:
+                    return
+                with connection:
+                    connection.recv(65536)
+                    accepted.append(connection)
+
+        threading.Thread(target=hang_up, daemon=True).start()
+        try:
+            client = BrightDataClient(base_url=f'http://127.0.0.1:{listener.getsockname()[1]}', max_retries=2,
+                                      backoff_base=0.01, sleep=lambda seconds: None)
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.trigger('token', 'gd_posts', [])
+            self.assertEqual(len(accepted), 1)
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                client.get(client.url(STATUS_PATH))
+            self.assertEqual(len(accepted), 4)
+        finally:
+            listener.close()
+
+    def test_client_errors_are_not_retried(self):
+        with FakeBrightData(script=[400]) as server:
+            response = _client(server).trigger('token', 'gd_posts', [])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_connection_errors_are_retried_then_raised(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        sleeps = []
+        client = BrightDataClient(base_url=f'http://127.0.0.1:{port}', max_retries=2, backoff_base=0.01,
+                                  sleep=sleeps.append)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.trigger('token', 'gd_posts', [])
+        self.assertEqual(len(sleeps), 2)
+
+    def test_post_read_timeouts_are_not_retried(self):
+        with FakeBrightData(latency=0.5) as server:
+            client = _client(server, read_timeout=0.1)
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                client.post(client.url(TRIGGER_PATH), params={'dataset_id': 'gd_posts'}, json=[])
+        self.assertEqual(len(server.requests), 1)
+
+    def test_fan_out_is_capped_and_ordered(self):
+        jobs = [f'gd_{number}' for number in range(8)]
+        with FakeBrightData(latency=0.1, script=[None, 503]) as server:
+            client = _client(server, max_concurrency=3)
+            outcomes = client.fan_out(lambda dataset_id: client.trigger('token', dataset_id, []).json(), jobs)
+        self.assertEqual([outcome.item for outcome in outcomes], jobs)
+        self.assertTrue(all(outcome.ok for outcome in outcomes))
+        self.assertEqual(len({outcome.value['snapshot_id'] for outcome in outcomes}), 8)
+        self.assertEqual(server.max_in_flight, 3)
+        self.assertEqual(len(server.requests), 9)
+
+    def test_fan_out_captures_errors(self):
+        def call(number):
+            if number == 1:
+                raise ValueError('bad job')
+            return number * 2
+
+        outcomes = BrightDataClient(base_url='http://localhost').fan_out(call, [0, 1, 2], max_concurrency=2)
+        self.assertEqual([outcome.value for outcome in outcomes], [0, None, 4])
+        self.assertIsInstance(outcomes[1].error, ValueError)
+
+
+class BatchScraperTriggerTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.scraper_requests = []
+        for platform, dataset_id in (('instagram_posts', 'gd_ig'), ('facebook_posts', 'gd_fb'),
+                                     ('linkedin_posts', 'gd_li'), ('tiktok_posts', 'gd_tt')):
+            config = BrightdataConfig.objects.create(platform=platform, api_token='token', dataset_id=dataset_id)
+            for number in range(2):
+                cls.scraper_requests.append(ScraperRequest.objects.create(
+                    config=config, platform=platform, target_url=f'https://example.com/{platform}/{number}',
+                ))
+
+    def test_platforms_are_triggered_concurrently(self):
+        with FakeBrightData(latency=0.2, script=[503]) as server:
+            with override_settings(BRIGHTDATA_API_URL=server.url, BRIGHTDATA_MAX_CONCURRENCY=4,
+                                   BRIGHTDATA_BACKOFF_BASE=0.01, BRIGHTDATA_WEBHOOK_BASE_URL='https://hooks.test'):
+                results = AutomatedBatchScraper()._execute_batch_requests(self.scraper_requests)
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result['successful'] == 2 for result in results.values()))
+        self.assertEqual(server.max_in_flight, 4)
+        self.assertEqual(sorted(request.dataset_id for request in server.requests if request.status == 200),
+                         ['gd_fb', 'gd_ig', 'gd_li', 'gd_tt'])
+
+        triggered = ScraperRequest.objects.filter(pk__in=[request.pk for request in self.scraper_requests])
+        self.assertEqual(set(triggered.values_list('status', flat=True)), {'pending'})
+        self.assertEqual(len(set(triggered.values_list('request_id', flat=True))), 4)
+
+    def test_failed_platform_does_not_stop_the_others(self):
+        with FakeBrightData(script=[400]) as server:
+            with override_settings(BRIGHTDATA_API_URL=server.url, BRIGHTDATA_MAX_CONCURRENCY=1,
+                                   BRIGHTDATA_WEBHOOK_BASE_URL='https://hooks.test'):
+                results = AutomatedBatchScraper()._execute_batch_requests(self.scraper_requests)
+                self.assertEqual(get_client().base_url, server.url)
+
+        self.assertEqual(sorted(result['failed'] for result in results.values()), [0, 0, 0, 2])
+        failed = ScraperRequest.objects.filter(status='failed')
+        self.assertEqual(failed.count(), 2)
+        self.assertTrue(all('Batch API call failed' in request.error_message for request in failed))
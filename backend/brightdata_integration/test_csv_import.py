@@ -0,0 +1,267 @@
+"""
+Tests for the chunked CSV import pipeline behind the upload_csv endpoints
+"""
+
+import csv
+import io
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from brightdata_integration.csv_import import CsvImportWorker, InstagramPostImporter, sniff_encoding
+from brightdata_integration.models import CsvImportChunk, CsvImportJob
+from facebook_data.models import FacebookComment, FacebookPost, Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder, InstagramComment, InstagramPost
+from linkedin_data.models import LinkedInPost
+
+
+def _csv(rows, encoding='utf-8'):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode(encoding)
+
+
+def _upload(content, name='export.csv'):
+    return SimpleUploadedFile(name, content, content_type='text/csv')
+
+
+def _instagram_posts(count, start=0, **extra):
+    return [
+        {
+            'url': f'https://www.instagram.com/p/IG{index}/', 'post_id': f'IG{index}',
+            'user_posted': 'nike', 'description': f'Post {index}', 'likes': str(index),
+            'date_posted': '2025-04-14T08:27:06.000Z', 'latest_comments': '[]', **extra,
+        }
+        for index in range(start, start + count)
+    ]
+
+
+class SniffEncodingTest(SimpleTestCase):
+
+    def test_encodings(self):
+        self.assertEqual(sniff_encoding(b'\xef\xbb\xbfpost_id\n'), 'utf-8-sig')
+        self.assertEqual(sniff_encoding('café'.encode('utf-8')), 'utf-8')
+        # A multi-byte character cut by the prefix boundary is still UTF-8
+        self.assertEqual(sniff_encoding('café'.encode('utf-8')[:-1]), 'utf-8')
+        self.assertEqual(sniff_encoding('café ’'.encode('cp1252')), 'cp1252')
+        self.assertEqual(sniff_encoding(b'caf\xe9 \x81'), 'latin-1')
+
+
+@override_settings(CSV_IMPORT_ASYNC_THRESHOLD_BYTES=0)
+class InstagramPostUploadTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.folder = InstagramFolder.objects.create(name='Nike')
+
+    def _post(self, content):
+        return self.client.post('/api/instagram-data/posts/upload_csv/', {
+            'file': _upload(content), 'folder_id': self.folder.id,
+        })
+
+    def test_creates_updates_and_reports_rejected_rows(self):
+        InstagramPost.objects.create(folder=self.folder, url='https://www.instagram.com/p/IG0/', post_id='IG0', likes=1)
+        rows = _instagram_posts(3)
+        rows.append({key: '' for key in rows[0]})
+
+        response = self._post(_csv(rows))
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body['total_rows_in_csv'], body['created'], body['updated'], body['rejected']), (4, 2, 1, 1))
+        self.assertEqual(body['rejected_details'][0]['reason'], 'Missing post_id')
+        self.assertEqual(body['rejected_details'][0]['row_number'], 5)
+        self.assertEqual(body['detected_content_type'], 'post')
+        updated = InstagramPost.objects.get(post_id='IG0')
+        self.assertEqual(updated.likes, 0)
+        self.assertEqual(updated.platform_type, 'IG Post')
+        self.assertEqual(InstagramPost.objects.filter(folder=self.folder).count(), 3)
+
+    def test_clips_product_type_marks_upload_as_reels(self):
+        response = self._post(_csv(_instagram_posts(2, product_type='clips')))
+
+        self.assertEqual(response.json()['detected_content_type'], 'reel')
+        self.assertEqual(set(InstagramPost.objects.values_list('platform_type', flat=True)), {'IG Reel'})
+
+    def test_windows_encoded_upload(self):
+        rows = _instagram_posts(1, description='Café ’round the corner')
+
+        self._post(_csv(rows, encoding='cp1252'))
+
+        self.assertEqual(InstagramPost.objects.get().description, 'Café ’round the corner')
+
+    def test_windows_encoded_row_in_utf8_upload(self):
+        # The sniffed prefix reads as UTF-8; a row past it was saved as cp1252
+        description = 'Café ' + 'x' * 40000
+        rows = _instagram_posts(2, description=description)
+        rows.append(_instagram_posts(1, start=2, description='Zoë’s café')[0])
+        content = _csv(rows).replace('Zoë’s café'.encode('utf-8'), 'Zoë’s café'.encode('cp1252'))
+
+        self._post(content)
+
+        self.assertEqual(dict(InstagramPost.objects.values_list('post_id', 'description')),
+                         {'IG0': description, 'IG1': description, 'IG2': 'Zoë’s café'})
+
+    def test_undecodable_row_fails_the_import(self):
+        # The bad byte is past the sniffed prefix, which reads as cp1252
+        rows = _instagram_posts(3, description='Café ’' + 'x' * 30000)
+        rows.append(_instagram_posts(1, start=3, description='Broken <byte>')[0])
+        content = _csv(rows, encoding='cp1252').replace(b'<byte>', b'\x81')  # Undefined in cp1252
+
+        response = self._post(content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Error reading CSV file: row 5 is not valid cp1252 text')
+        self.assertFalse(InstagramPost.objects.exists())
+
+    def test_rows_are_written_in_bulk(self):
+        importer = InstagramPostImporter(folder=self.folder, batch_size=100)
+
+        with CaptureQueriesContext(connection) as context:
+            importer.import_file(io.BytesIO(_csv(_instagram_posts(80))))
+
+        # One lookup plus a few INSERTs (SQLite caps parameters per statement), not two queries per row
+        self.assertEqual(importer.created, 80)
+        self.assertLess(len(context.captured_queries), 15)
+
+
+@override_settings(CSV_IMPORT_ASYNC_THRESHOLD_BYTES=0)
+class CommentUploadTest(TestCase):
+
+    def test_instagram_comments_are_linked_and_skipped_like_before(self):
+        folder = InstagramFolder.objects.create(name='Comments', category='comments')
+        post = InstagramPost.objects.create(url='https://www.instagram.com/p/P1/', post_id='P1')
+        base = {
+            'comment_id': 'C1', 'post_id': 'P1', 'post_url': 'https://www.instagram.com/p/P1/',
+            'comment': 'Great\nshot', 'comment_user': 'fan', 'likes_number': '3.0',
+            'comment_date': '2025-05-26T03:49:32.000Z', 'warning': '',
+        }
+        rows = [
+            base,
+            {**base, 'comment_id': 'C2', 'warning': 'No comments'},
+            {**base, 'comment_id': '', 'comment': 'No id'},
+            {**base, 'comment_id': 'C3', 'comment': ''},
+        ]
+
+        response = self.client.post('/api/instagram-data/comments/upload_csv/', {
+            'file': _upload(_csv(rows)), 'folder_id': folder.id,
+        })
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((body['rows_processed'], body['rows_added'], body['rows_skipped']), (4, 1, 3))
+        self.assertEqual(body['errors'], ['Row 3: Missing comment_id'])
+        comment = InstagramComment.objects.get()
+        self.assertEqual((comment.instagram_post_id, comment.comment, comment.likes_number), (post.id, 'Great shot', 3))
+
+    def test_facebook_post_endpoint_reports_detection_and_row_errors(self):
+        folder = FacebookFolder.objects.create(name='FB')
+        post = FacebookPost.objects.create(url='https://www.facebook.com/p/1', post_id='F1')
+        FacebookComment.objects.create(url='https://www.facebook.com/p/1', post_id='F1', post_url='https://www.facebook.com/p/1', comment_id='TAKEN')
+        rows = [
+            {'comment_id': 'FC1', 'post_id': 'F1', 'comment_text': 'Nice', 'date_created': '2025-01-02', 'video_view_count': '', 'thumbnail': ''},
+            # comment_id is unique across folders, so this row fails on its own
+            {'comment_id': 'TAKEN', 'post_id': 'F1', 'comment_text': 'Dup', 'date_created': '', 'video_view_count': '', 'thumbnail': ''},
+        ]
+
+        response = self.client.post('/api/facebook-data/posts/upload_csv/', {
+            'file': _upload(_csv(rows)), 'folder_id': folder.id,
+        })
+
+        body = response.json()
+        self.assertEqual(body['detected_content_type'], 'reel')
+        self.assertEqual((body['rows_added'], body['rows_skipped'], body['total_errors']), (1, 1, 1))
+        self.assertTrue(body['errors'][0].startswith('Error processing row 2:'))
+        self.assertEqual(FacebookComment.objects.get(comment_id='FC1').facebook_post_id, post.id)
+
+
+@override_settings(CSV_IMPORT_ASYNC_THRESHOLD_BYTES=0)
+class TrackerPostUploadTest(TestCase):
+
+    def test_linkedin_rows_match_by_post_id_or_url(self):
+        LinkedInPost.objects.create(url='https://www.linkedin.com/posts/2', post_id='', user_posted='acme')
+        rows = [
+            {'id': 'L1', 'url': 'https://www.linkedin.com/posts/1', 'use_url': 'https://www.linkedin.com/in/acme'},
+            {'id': '', 'url': 'https://www.linkedin.com/posts/2', 'use_url': 'https://www.linkedin.com/in/acme'},
+            {'id': '', 'url': '', 'use_url': ''},
+        ]
+
+        response = self.client.post('/api/linkedin-data/posts/upload_csv/', {'file': _upload(_csv(rows))})
+
+        body = response.json()
+        self.assertEqual((body['created_count'], body['failed_count']), (2, 1))
+        self.assertEqual(body['failed_rows'][0]['error'], 'Missing post_id and URL')
+        self.assertEqual(LinkedInPost.objects.count(), 2)
+
+    def test_empty_file_is_rejected(self):
+        response = self.client.post('/api/tiktok-data/posts/upload_csv/', {'file': _upload(b'post_id,url\n')})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'The CSV file is empty or improperly formatted')
+
+
+@override_settings(CSV_IMPORT_ASYNC_THRESHOLD_BYTES=100)
+class BackgroundImportTest(TestCase):
+
+    def test_large_upload_is_queued_and_imported_by_worker(self):
+        folder = InstagramFolder.objects.create(name='Nike')
+        content = _csv(_instagram_posts(30))
+
+        with self.settings(CSV_IMPORT_BATCH_SIZE=7):
+            response = self.client.post('/api/instagram-data/posts/upload_csv/', {
+                'file': _upload(content), 'folder_id': folder.id,
+            })
+            self.assertEqual(response.status_code, 202)
+            job = CsvImportJob.objects.get(pk=response.json()['job_id'])
+            self.assertEqual(job.size_bytes, len(content))
+            self.assertTrue(CsvImportChunk.objects.filter(job=job).exists())
+            self.assertFalse(InstagramPost.objects.exists())
+
+            summary = CsvImportWorker(worker_id='w1').run_once()
+
+        self.assertEqual(summary, {'processed': 1, 'successful': 1, 'failed': 0})
+        self.assertEqual(InstagramPost.objects.filter(folder=folder).count(), 30)
+        self.assertFalse(CsvImportChunk.objects.filter(job=job).exists())
+
+        status_response = self.client.get(response.json()['status_url'])
+        job_status = status_response.json()
+        self.assertEqual((job_status['status'], job_status['progress'], job_status['rows_processed']), ('completed', 100.0, 30))
+        self.assertEqual(job_status['bytes_processed'], len(content))
+        self.assertEqual(job_status['result']['created'], 30)
+
+    def test_job_reclaimed_mid_import_is_left_to_its_new_worker(self):
+        folder = InstagramFolder.objects.create(name='Nike')
+        job = CsvImportJob.objects.create(importer='instagram_posts', folder_id=folder.id, file_name='x.csv',
+                                          size_bytes=10)
+        CsvImportChunk.objects.create(job=job, index=0, data=_csv(_instagram_posts(30)))
+        worker = CsvImportWorker(worker_id='w1')
+        leased = worker._leased
+
+        def taken_over(claimed):
+            # Re-queued as stale and claimed by another worker after the first batch
+            CsvImportJob.objects.filter(pk=claimed.pk).update(locked_by='w2')
+            return leased(claimed)
+
+        with self.settings(CSV_IMPORT_BATCH_SIZE=7), mock.patch.object(worker, '_leased', side_effect=taken_over):
+            summary = worker.run_once()
+
+        self.assertEqual(summary, {'processed': 1, 'successful': 0, 'failed': 1})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.rows_processed, job.result), ('processing', 'w2', 0, None))
+        self.assertTrue(CsvImportChunk.objects.filter(job=job).exists())
+        self.assertEqual(InstagramPost.objects.filter(folder=folder).count(), 7)
+
+    def test_job_for_deleted_folder_fails(self):
+        job = CsvImportJob.objects.create(importer='instagram_posts', folder_id=999, file_name='x.csv', size_bytes=10)
+        CsvImportChunk.objects.create(job=job, index=0, data=b'post_id\nA\n')
+
+        CsvImportWorker().run_once()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_message, 'Folder with id 999 does not exist')
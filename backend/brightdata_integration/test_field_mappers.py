@@ -0,0 +1,124 @@
+"""
+Tests for the compiled field mapping tables
+"""
+
+import datetime
+
+from django.test import SimpleTestCase
+
+from brightdata_integration.field_mappers import (
+    SOURCE_APIFY, SOURCE_CSV, FieldSpec, compile_mapper, get_mapper,
+    json_or_none, parse_datetime, to_bool, to_int,
+)
+from brightdata_integration.management.commands.benchmark_field_mappers import (
+    PLATFORMS, legacy_map_post_fields, sample_post,
+)
+
+
+class BrightDataMapperTest(SimpleTestCase):
+
+    def test_compiled_mappers_match_legacy_mapper(self):
+        sparse = {'url': 'https://example.com/p/1', 'pk': '99', 'likes_count': 3, 'caption': 'Hi'}
+        for platform in PLATFORMS + ('youtube',):
+            for record in (sample_post(platform, 1), sparse, {}):
+                with self.subTest(platform=platform, record=record):
+                    self.assertEqual(get_mapper(platform)(record), legacy_map_post_fields(record, platform))
+
+    def test_mutable_defaults_are_fresh_per_record(self):
+        mapper = get_mapper('instagram')
+        first = mapper({})
+        first['hashtags'].append('#leak')
+        first['audio']['id'] = 1
+
+        second = mapper({})
+        self.assertEqual((second['hashtags'], second['audio']), ([], {}))
+
+    def test_platform_lookup(self):
+        self.assertIs(get_mapper('Instagram'), get_mapper('instagram'))
+        self.assertIs(get_mapper('youtube'), get_mapper(None))
+        with self.assertRaises(ValueError):
+            get_mapper('youtube', SOURCE_CSV)
+
+    def test_compile_mapper_source_rules(self):
+        mapper = compile_mapper([
+            FieldSpec('single', default='x'),
+            FieldSpec('fallback', 'a', 'b', default='none'),
+            FieldSpec('count', coerce=to_int),
+            FieldSpec('total', derive=lambda record: len(record)),
+            FieldSpec('constant', value='fixed'),
+        ])
+
+        self.assertEqual(mapper.fields, ('single', 'fallback', 'count', 'total', 'constant'))
+        self.assertEqual(
+            mapper({'single': '', 'a': 0, 'b': 'B', 'count': '7'}),
+            {'single': '', 'fallback': 'B', 'count': 7, 'total': 4, 'constant': 'fixed'},
+        )
+        self.assertEqual(mapper({})['fallback'], 'none')
+
+
+class CsvMapperTest(SimpleTestCase):
+
+    def test_instagram_row(self):
+        mapped = get_mapper('instagram', SOURCE_CSV)({
+            'url': 'https://www.instagram.com/p/ABC123/',
+            'likes': '15.0',
+            'hashtags': '["#run", "#win"]',
+            'is_verified': 'TRUE',
+            'date_posted': '2025-04-14T08:27:06.000Z',
+        })
+
+        self.assertEqual(mapped['post_id'], 'ABC123')
+        self.assertEqual(mapped['likes'], 15)
+        self.assertEqual(mapped['hashtags'], ['#run', '#win'])
+        self.assertIs(mapped['is_verified'], True)
+        self.assertIsNone(mapped['photos'])
+        self.assertEqual(mapped['date_posted'].year, 2025)
+
+    def test_linkedin_row(self):
+        mapped = get_mapper('linkedin', SOURCE_CSV)({
+            'id': 'urn:1',
+            'use_url': 'https://www.linkedin.com/company/acme',
+            'num_likes': '10',
+            'num_comments': '3',
+        })
+
+        self.assertEqual((mapped['post_id'], mapped['user_posted']), ('urn:1', 'acme'))
+        self.assertEqual(mapped['engagement_score'], 16)
+        self.assertEqual(mapped['location'], '')
+
+    def test_tiktok_row(self):
+        mapper = get_mapper('tiktok', SOURCE_CSV)
+
+        self.assertEqual(mapper({'country': 'FR'})['location'], 'FR')
+        self.assertEqual(mapper({'region': 'EU', 'country': 'FR'})['location'], 'EU')
+        self.assertEqual(mapper({})['content_type'], 'video')
+        self.assertEqual(mapper({'digg_count': '10', 'play_count': '100'})['engagement_score'], 20)
+
+    def test_apify_linkedin_metadata(self):
+        mapped = get_mapper('linkedin', SOURCE_APIFY)({'num_likes': '4', 'user_id': 'acme'})
+
+        self.assertEqual((mapped['likes'], mapped['user_posted'], mapped['hashtags']), (4, 'acme', []))
+
+
+class CoercerTest(SimpleTestCase):
+
+    def test_to_int(self):
+        for value, expected in (('12', 12), ('12.0', 12), (' "3" ', 3), ('', 0), (None, 0), ('n/a', 0), (7.9, 7)):
+            with self.subTest(value=value):
+                self.assertEqual(to_int(value), expected)
+
+    def test_to_bool(self):
+        for value in (True, 'true', 'Yes', '1', 1):
+            self.assertIs(to_bool(value), True)
+        for value in (False, 'false', 'no', '', None, 0):
+            self.assertIs(to_bool(value), False)
+
+    def test_json_or_none(self):
+        self.assertEqual(json_or_none('{"a": 1}'), {'a': 1})
+        self.assertEqual(json_or_none('plain text'), 'plain text')
+        self.assertIsNone(json_or_none(''))
+
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime('2023-01-31').date(), datetime.date(2023, 1, 31))
+        self.assertEqual(parse_datetime('1700000000000'), datetime.datetime.fromtimestamp(1700000000))
+        self.assertIsNone(parse_datetime(''))
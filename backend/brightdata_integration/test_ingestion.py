@@ -0,0 +1,121 @@
+"""
+Tests for the bulk webhook ingestion engine
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from users.models import Project
+from instagram_data.models import Folder as InstagramFolder, InstagramPost
+from linkedin_data.models import Folder as LinkedInFolder, LinkedInPost, LinkedInComment
+from brightdata_integration.ingestion import BulkPostIngestor
+
+
+def _instagram_post(post_id, likes=10, **extra):
+    post = {
+        'post_id': post_id,
+        'url': f'https://www.instagram.com/p/{post_id}/',
+        'user_posted': 'nike',
+        'description': f'Post {post_id}',
+        'likes': likes,
+        'num_comments': 2,
+        'date_posted': '2025-01-15T10:00:00.000Z',
+        'hashtags': ['#run'],
+    }
+    post.update(extra)
+    return post
+
+
+class BulkPostIngestorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='ingest', password='testpass')
+        cls.project = Project.objects.create(name='Ingestion Project', owner=cls.user)
+        cls.instagram_folder = InstagramFolder.objects.create(name='IG Job', project=cls.project)
+        cls.linkedin_folder = LinkedInFolder.objects.create(name='LI Job', project=cls.project)
+
+    def _ingestor(self, platform='instagram', folder=None, batch_size=None):
+        return BulkPostIngestor(platform, folder=folder or self.instagram_folder, batch_size=batch_size)
+
+    def test_creates_new_posts_in_chunks(self):
+        posts = [_instagram_post(f'IG{i}') for i in range(7)]
+
+        # 3 chunks x (savepoint, pre-fetch, bulk insert, stats upsert, search upsert, hashtag insert,
+        # data version bump, release) - independent of post count
+        with self.assertNumQueries(24):
+            result = self._ingestor(batch_size=3).ingest(iter(posts))
+
+        self.assertEqual(result.created, 7)
+        self.assertEqual(result.updated, 0)
+        self.assertEqual(InstagramPost.objects.filter(folder=self.instagram_folder).count(), 7)
+        stored = InstagramPost.objects.get(post_id='IG0')
+        self.assertEqual(stored.date_posted.year, 2025)
+
+    def test_counts_match_legacy_reporting(self):
+        self._ingestor().ingest([_instagram_post('IG1'), _instagram_post('IG2')])
+
+        result = self._ingestor().ingest([
+            _instagram_post('IG1'),                       # unchanged existing row
+            _instagram_post('IG2', likes=99),             # changed existing row
+            _instagram_post('IG3'),                       # new row
+            {'warning': 'Profile not found', 'warning_code': 'dead_page'},
+            {'description': 'no identifiers'},
+        ])
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.updated, 2)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(InstagramPost.objects.get(post_id='IG2').likes, 99)
+        self.assertEqual(InstagramPost.objects.filter(post_id='IG1').count(), 1)
+
+    def test_same_post_in_other_folder_is_a_new_row(self):
+        other_folder = InstagramFolder.objects.create(name='Other Job', project=self.project)
+        self._ingestor().ingest([_instagram_post('IG1')])
+
+        result = self._ingestor(folder=other_folder).ingest([_instagram_post('IG1')])
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(InstagramPost.objects.filter(post_id='IG1').count(), 2)
+
+    def test_bad_row_does_not_drop_chunk(self):
+        result = self._ingestor().ingest([
+            _instagram_post('IG1'),
+            _instagram_post('IG2', likes='not-a-number'),
+            _instagram_post('IG3'),
+        ])
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.failed, 1)
+        self.assertFalse(InstagramPost.objects.filter(post_id='IG2').exists())
+
+    @override_settings(WEBHOOK_INGEST_BATCH_SIZE=2)
+    def test_batch_size_comes_from_settings(self):
+        self.assertEqual(self._ingestor().batch_size, 2)
+
+    def test_linkedin_posts_and_comments(self):
+        post = {
+            'id': 'LI1',
+            'url': 'https://www.linkedin.com/posts/LI1',
+            'user_id': 'acme',
+            'date_posted': '2025-02-01T08:00:00.000Z',
+            'hashtags': ['#ai', '#ml'],
+            'top_visible_comments': [
+                {'comment_id': 'C1', 'comment': 'Great', 'comment_date': '2025-02-01T09:00:00Z'},
+                {'comment_id': 'C1', 'comment': 'Great'},
+                {'comment_id': 'C2', 'comment': 'Nice', 'num_reactions': None},
+            ],
+        }
+
+        result = self._ingestor('linkedin', folder=self.linkedin_folder).ingest([post])
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.comments_created, 2)
+        stored = LinkedInPost.objects.get(post_id='LI1')
+        self.assertEqual(stored.hashtags_text, '#ai, #ml')
+        self.assertEqual(LinkedInComment.objects.filter(post=stored, folder=self.linkedin_folder).count(), 2)
+
+        # Re-delivery of the same snapshot neither duplicates posts nor comments
+        again = self._ingestor('linkedin', folder=self.linkedin_folder).ingest([post])
+        self.assertEqual((again.created, again.updated, again.comments_created), (0, 1, 0))
+        self.assertEqual(LinkedInComment.objects.count(), 2)
@@ -0,0 +1,82 @@
+"""
+Tests for the streaming snapshot reader
+"""
+
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from brightdata_integration.snapshot_stream import (
+    SnapshotFormatError, iter_file_records, iter_records, peek_records,
+)
+
+POSTS = [
+    {'post_id': 'P1', 'description': 'Café ☕ launch', 'likes': 12},
+    {'post_id': 'P2', 'description': 'Nested {"not": "json"} [text]', 'likes': 0, 'tags': ['#a', '#b']},
+    {'post_id': 'P3', 'description': None, 'likes': 1234567890},
+]
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class SnapshotStreamTest(SimpleTestCase):
+
+    def test_json_array_across_any_chunk_boundary(self):
+        data = json.dumps(POSTS, ensure_ascii=False, indent=2).encode('utf-8')
+
+        # 1-byte chunks split multi-byte characters, strings and numbers
+        for size in (1, 3, 7, 64, len(data)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_records(_chunks(data, size))), POSTS)
+
+    def test_ndjson(self):
+        data = ('\n'.join(json.dumps(post) for post in POSTS) + '\n\n').encode('utf-8')
+
+        self.assertEqual(list(iter_records(_chunks(data, 5))), POSTS)
+
+    def test_envelope_bom_and_gzip(self):
+        envelope = json.dumps({'snapshot_id': 's_1', 'data': POSTS}).encode('utf-8')
+
+        self.assertEqual(list(iter_records([envelope])), POSTS)
+        self.assertEqual(list(iter_records([b'\xef\xbb\xbf' + envelope])), POSTS)
+        self.assertEqual(list(iter_records(_chunks(gzip.compress(envelope), 10))), POSTS)
+
+    def test_empty_input(self):
+        self.assertEqual(list(iter_records([])), [])
+        self.assertEqual(list(iter_records([b'[]'])), [])
+        self.assertEqual(list(iter_records([b'  \n'])), [])
+
+    def test_invalid_input_raises_format_error(self):
+        for data in (b'[{"post_id": "P1"} {"post_id": "P2"}]', b'[{"post_id": "P1"},', b'{"post_id": '):
+            with self.subTest(data=data):
+                with self.assertRaises(SnapshotFormatError):
+                    list(iter_records(_chunks(data, 4)))
+
+    def test_file_path_and_file_object(self):
+        data = json.dumps(POSTS).encode('utf-8')
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as snapshot:
+            snapshot.write(data)
+        self.addCleanup(os.remove, snapshot.name)
+
+        self.assertEqual(list(iter_file_records(snapshot.name, chunk_size=8)), POSTS)
+        self.assertEqual(list(iter_file_records(io.BytesIO(data), chunk_size=8)), POSTS)
+
+    def test_records_are_yielded_lazily(self):
+        def chunks():
+            yield json.dumps(POSTS[0]) + '\n'
+            raise AssertionError('second chunk read before it was needed')
+
+        records = iter_records(chunks())
+        self.assertEqual(next(records), POSTS[0])
+
+    def test_peek_records_keeps_all_records(self):
+        records, head = peek_records(iter(POSTS))
+
+        self.assertEqual(head, POSTS[:1])
+        self.assertEqual(list(records), POSTS)
@@ -0,0 +1,114 @@
+"""
+Tests for the bucketed webhook metrics store and WebhookMonitor
+"""
+
+import threading
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from brightdata_integration.webhook_metrics import HOUR, MINUTE, WebhookMetricsStore, latency_bin, percentile
+from brightdata_integration.webhook_monitor import WebhookHealthStatus, WebhookMonitor
+
+NOW = 1_750_000_000.0
+
+
+class WebhookMetricsStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['webhook_cache']
+        self.cache.clear()
+        self.store = WebhookMetricsStore(self.cache, prefix='test_metrics', retention=3600, max_events=5)
+
+    def test_percentiles_from_histogram(self):
+        self.assertEqual(latency_bin(10), 0)
+        self.assertEqual(latency_bin(11), 1)
+        self.assertEqual(latency_bin(60000), 11)
+        for latency in range(1, 101):
+            self.store.record(True, latency / 1000, {}, now=NOW)
+        totals = self.store.totals(now=NOW)
+        self.assertEqual((totals.total, totals.latency_count, totals.max_ms, totals.min_ms), (100, 100, 100, 1))
+        self.assertAlmostEqual(totals.avg_ms, 50.5)
+        self.assertAlmostEqual(totals.percentile_ms(0.50), 50, delta=5)
+        self.assertAlmostEqual(totals.percentile_ms(0.95), 95, delta=5)
+        self.assertAlmostEqual(totals.percentile_ms(0.99), 99, delta=5)
+        self.assertEqual(percentile([0] * 12, 0.5), 0.0)
+
+    def test_windows_and_hourly_buckets(self):
+        self.store.record(True, 0.2, {}, now=NOW - 2 * HOUR)
+        self.store.record(False, 0.4, {}, now=NOW - 30 * MINUTE)
+        self.store.record(True, 0.1, {}, now=NOW)
+
+        current = self.store.totals(now=NOW)
+        self.assertEqual((current.total, current.success, current.failed), (2, 1, 1))
+        self.assertEqual(self.store.totals(seconds=10 * MINUTE, now=NOW).total, 1)
+
+        hourly = self.store.hourly(3, now=NOW)
+        self.assertEqual(sum(bucket.total for _, bucket in hourly), 3)
+        self.assertEqual([hour for hour, _ in hourly], sorted(hour for hour, _ in hourly))
+        self.assertEqual(sum(bucket.total for _, bucket in self.store.hourly(1, now=NOW)), 1)
+
+    def test_event_ring_is_bounded(self):
+        for number in range(8):
+            self.store.record(True, 0.01, {'event_id': f'e{number}'}, now=NOW)
+        self.assertEqual([event['event_id'] for event in self.store.recent_events()], ['e3', 'e4', 'e5', 'e6', 'e7'])
+        self.assertEqual([event['event_id'] for event in self.store.recent_events(2)], ['e6', 'e7'])
+
+        self.store.reset(now=NOW)
+        self.assertEqual(self.store.recent_events(), [])
+        self.assertEqual(self.store.totals(now=NOW).total, 0)
+
+    def test_concurrent_writers_lose_no_counts(self):
+        def record():
+            for _ in range(200):
+                self.store.record(True, 0.05, {}, now=NOW)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        totals = self.store.totals(now=NOW)
+        self.assertEqual((totals.total, totals.latency_count), (800, 800))
+
+
+class WebhookMonitorTest(SimpleTestCase):
+
+    def setUp(self):
+        caches['webhook_security'].clear()
+        caches['default'].clear()
+        self.monitor = WebhookMonitor()
+        self.monitor.health_refresh_interval = 0
+
+    def test_metrics_health_and_analytics(self):
+        for _ in range(18):
+            self.monitor.record_webhook_event('data_delivery', 'success', response_time=0.2, client_ip='10.0.0.1')
+        for _ in range(2):
+            self.monitor.record_webhook_event('data_delivery', 'error', response_time=12.0,
+                                              client_ip='10.0.0.2', error_message='Invalid payload')
+
+        metrics = self.monitor.get_current_metrics()
+        self.assertEqual((metrics.total_requests, metrics.successful_requests, metrics.failed_requests), (20, 18, 2))
+        self.assertAlmostEqual(metrics.error_rate, 0.1)
+        self.assertLess(metrics.p50_response_time, 0.25)
+        self.assertGreater(metrics.p99_response_time, 10)
+        self.assertIsNotNone(metrics.last_failure)
+
+        health = self.monitor.get_health_status()
+        self.assertEqual(health['status'], WebhookHealthStatus.UNHEALTHY)
+        self.assertIn('Very slow response times', health['issues'])
+
+        analytics = self.monitor.get_performance_analytics(hours=1)
+        self.assertEqual(analytics['total_events'], 20)
+        self.assertEqual(analytics['success_rate'], 90.0)
+        self.assertEqual(analytics['error_types'], {'Invalid payload': 2})
+        self.assertEqual(analytics['top_clients'][0], {'ip': '10.0.0.1', 'requests': 18})
+        self.assertEqual(sum(hour['total'] for hour in analytics['hourly_breakdown']), 20)
+
+        events = self.monitor.get_recent_events(limit=5, event_type='data_delivery')
+        self.assertEqual(len(events), 5)
+        self.assertEqual(events[-1]['status'], 'error')
+
+        self.monitor.reset_metrics()
+        self.assertEqual(self.monitor.get_current_metrics().total_requests, 0)
+        self.assertEqual(self.monitor.get_health_status()['status'], WebhookHealthStatus.HEALTHY)
@@ -0,0 +1,105 @@
+"""
+Tests for webhook rate limiting and replay detection
+"""
+
+import json
+import threading
+import time
+
+from django.core.cache import caches
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from brightdata_integration.rate_limit import ReplayCache, TokenBucketLimiter
+from brightdata_integration.webhook_security import EnhancedWebhookSecurity
+
+
+class TokenBucketLimiterTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['webhook_security']
+        self.cache.clear()
+
+    def test_burst_then_refill(self):
+        limiter = TokenBucketLimiter(self.cache, capacity=3, refill_rate=1)
+        decisions = [limiter.consume('10.0.0.1', now=100.0).allowed for _ in range(4)]
+        self.assertEqual(decisions, [True, True, True, False])
+        self.assertAlmostEqual(limiter.consume('10.0.0.1', now=100.0).retry_after, 1.0)
+
+        # Half a second refills half a token; a second a whole one
+        self.assertFalse(limiter.consume('10.0.0.1', now=100.5).allowed)
+        self.assertTrue(limiter.consume('10.0.0.1', now=101.0).allowed)
+        # Idle time never fills the bucket beyond its capacity
+        self.assertEqual(
+            [limiter.consume('10.0.0.1', now=200.0).allowed for _ in range(4)], [True, True, True, False]
+        )
+        # Buckets are per key
+        self.assertTrue(limiter.consume('10.0.0.2', now=200.0).allowed)
+
+    def test_concurrent_requests_never_exceed_capacity(self):
+        limiter = TokenBucketLimiter(self.cache, capacity=50, refill_rate=0.001)
+        allowed = []
+
+        def hit():
+            for _ in range(25):
+                allowed.append(limiter.consume('burst', now=1000.0).allowed)
+
+        threads = [threading.Thread(target=hit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 50)
+
+    def test_replay_cache(self):
+        replays = ReplayCache(self.cache, window=60)
+        self.assertTrue(replays.first_seen('abc'))
+        self.assertFalse(replays.first_seen('abc'))
+        self.assertTrue(replays.first_seen('abd'))
+
+
+@override_settings(BRIGHTDATA_WEBHOOK_TOKEN='secret', WEBHOOK_RATE_LIMIT=60, WEBHOOK_RATE_BURST=2)
+class EnhancedWebhookSecurityTest(SimpleTestCase):
+
+    def setUp(self):
+        caches['webhook_security'].clear()
+        self.security = EnhancedWebhookSecurity()
+        self.factory = RequestFactory()
+
+    def _request(self, payload, **headers):
+        return self.factory.post('/api/brightdata/webhook/', data=json.dumps(payload),
+                                 content_type='application/json', **headers)
+
+    def test_rate_limit_uses_token_bucket(self):
+        request = self._request({})
+        self.assertEqual([self.security.check_rate_limit(request) for _ in range(3)], [True, True, False])
+
+    def test_replay_keyed_on_signature_and_timestamp(self):
+        now = int(time.time())
+        first = self._request([{'url': 'https://x'}], HTTP_X_BRIGHTDATA_TIMESTAMP=str(now),
+                              HTTP_X_BRIGHTDATA_SIGNATURE='sha256=aaa')
+        self.assertTrue(self.security.verify_timestamp(first))
+        self.assertFalse(self.security.verify_timestamp(first))
+
+        # Another delivery in the same second is not a replay
+        other = self._request([{'url': 'https://y'}], HTTP_X_BRIGHTDATA_TIMESTAMP=str(now),
+                              HTTP_X_BRIGHTDATA_SIGNATURE='sha256=bbb')
+        self.assertTrue(self.security.verify_timestamp(other))
+
+        # Bearer tokens are the same for every delivery, so the body tells deliveries apart
+        bearer = {'HTTP_X_BRIGHTDATA_TIMESTAMP': str(now), 'HTTP_AUTHORIZATION': 'Bearer secret'}
+        self.assertTrue(self.security.verify_timestamp(self._request({'n': 1}, **bearer)))
+        self.assertTrue(self.security.verify_timestamp(self._request({'n': 2}, **bearer)))
+        self.assertFalse(self.security.verify_timestamp(self._request({'n': 2}, **bearer)))
+
+    def test_timestamp_from_parsed_payload(self):
+        payload = {'timestamp': int(time.time()), 'url': 'https://x'}
+        request = self._request(payload)
+        # Without the parsed payload the body is not decoded again
+        self.assertFalse(self.security.verify_timestamp(request))
+        self.assertTrue(self.security.verify_timestamp(request, payload))
+
+        valid, result = self.security.comprehensive_webhook_validation(
+            self._request({'timestamp': int(time.time()) + 1}, HTTP_AUTHORIZATION='Bearer secret'),
+        )
+        self.assertTrue(valid, result)
+        self.assertEqual(result['warnings'], [])
@@ -0,0 +1,180 @@
+"""
+Tests for asynchronous webhook processing (202 hand-off and the webhook worker)
+"""
+
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from instagram_data.models import InstagramPost
+from brightdata_integration.models import WebhookEvent
+from brightdata_integration.snapshot_stream import iter_records
+from brightdata_integration.webhook_monitor import webhook_monitor
+from brightdata_integration.webhook_worker import WebhookWorker
+
+
+def _posts(*post_ids):
+    return [
+        {
+            'post_id': post_id,
+            'url': f'https://www.instagram.com/p/{post_id}/',
+            'user_posted': 'nike',
+            'likes': 5,
+        }
+        for post_id in post_ids
+    ]
+
+
+class WebhookWorkerTest(TestCase):
+
+    def _event(self, snapshot_id, payload=None, **extra):
+        return WebhookEvent.objects.create(
+            platform='instagram',
+            snapshot_id=snapshot_id,
+            raw_payload=payload if payload is not None else _posts(f'{snapshot_id}-1'),
+            status=extra.pop('status', 'pending'),
+            **extra,
+        )
+
+    def test_later_event_of_a_snapshot_waits_for_earlier_one(self):
+        first = self._event('s_1')
+        second = self._event('s_1')
+        other = self._event('s_2')
+
+        claimed = WebhookWorker(worker_id='w1').claim_events(limit=10)
+
+        self.assertEqual([event.id for event in claimed], [first.id, other.id])
+        self.assertEqual(claimed[0].attempts, 1)
+        self.assertEqual(WebhookEvent.objects.get(pk=second.pk).status, 'pending')
+
+        # Nothing else is claimable until the first event of s_1 is closed
+        self.assertEqual(WebhookWorker(worker_id='w2').claim_events(limit=10), [])
+        WebhookEvent.objects.filter(pk=first.pk).update(status='completed')
+        self.assertEqual([e.id for e in WebhookWorker(worker_id='w2').claim_events(limit=10)], [second.id])
+
+    def test_stale_events_are_requeued_or_failed(self):
+        old = timezone.now() - timedelta(hours=1)
+        retryable = self._event('s_1', status='processing', locked_at=old, locked_by='dead:1', attempts=1)
+        exhausted = self._event('s_2', status='processing', locked_at=old, locked_by='dead:1', attempts=3)
+        fresh = self._event('s_3', status='processing', locked_at=timezone.now(), locked_by='live:1', attempts=1)
+
+        recovered = WebhookWorker(stale_after=60, max_attempts=3).recover_stale_events()
+
+        self.assertEqual(recovered, 2)
+        retryable.refresh_from_db()
+        exhausted.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((retryable.status, retryable.locked_by), ('pending', None))
+        self.assertEqual(exhausted.status, 'failed')
+        self.assertEqual(fresh.status, 'processing')
+
+    def test_run_once_ingests_posts(self):
+        event = self._event('s_1', payload=_posts('IG1', 'IG2'))
+
+        summary = WebhookWorker(concurrency=1).run_once()
+
+        self.assertEqual(summary, {'processed': 1, 'successful': 1, 'failed': 0})
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'completed')
+        self.assertIsNotNone(event.processed_at)
+        self.assertIsNone(event.locked_at)
+        self.assertEqual(InstagramPost.objects.filter(post_id__in=['IG1', 'IG2']).count(), 2)
+
+    def test_outcomes_are_recorded_in_the_webhook_metrics(self):
+        webhook_monitor.reset_metrics()
+        worker = WebhookWorker(concurrency=1, max_attempts=1)
+        worker.process_now(self._event('s_1', payload=_posts('IG1')))
+        # Unroutable address: the download fails fast without network access
+        worker.process_now(self._event('s_2', payload={'file_url': 'http://127.0.0.1:9/snapshot.json'}))
+
+        metrics = webhook_monitor.get_current_metrics()
+        self.assertEqual((metrics.total_requests, metrics.successful_requests, metrics.failed_requests), (2, 1, 1))
+        self.assertGreater(metrics.p50_response_time, 0)
+        events = webhook_monitor.get_recent_events(event_type='data_delivery')
+        self.assertEqual(sorted(event['metadata']['snapshot_id'] for event in events), ['s_1', 's_2'])
+
+    def test_failed_download_is_retried_until_attempts_run_out(self):
+        # Unroutable address: the download fails fast without network access
+        event = self._event('s_1', payload={'file_url': 'http://127.0.0.1:9/snapshot.json'})
+        worker = WebhookWorker(concurrency=1, max_attempts=2)
+
+        self.assertFalse(worker.process_now(event))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('pending', 1))
+
+        self.assertFalse(worker.process_now(event))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', 2))
+
+
+    def test_malformed_snapshot_fails_without_retrying(self):
+        event = self._event('s_1', payload={'file_url': 'https://brightdata.example/snapshot.json'})
+        body = [b'[{"post_id": "IG1", "url": "https://www.instagram.com/p/IG1/"}, {"post_id": ']
+
+        with mock.patch('brightdata_integration.webhook_worker.iter_url_records',
+                        side_effect=lambda url, timeout=None: iter_records(body)):
+            self.assertFalse(WebhookWorker(concurrency=1, max_attempts=3).process_now(event))
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', 1))
+        self.assertTrue(event.error_message.startswith('Malformed snapshot'))
+
+    @override_settings(WEBHOOK_INGEST_BATCH_SIZE=1)
+    def test_long_ingestions_renew_their_lease(self):
+        event = self._event('s_1', payload=_posts('IG1', 'IG2', 'IG3'))
+        worker = WebhookWorker(concurrency=1, worker_id='w1')
+
+        with mock.patch.object(worker, 'renew_lease', wraps=worker.renew_lease) as renew:
+            self.assertTrue(worker.process_now(event))
+        self.assertGreaterEqual(renew.call_count, 3)
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'completed')
+
+    @override_settings(WEBHOOK_INGEST_BATCH_SIZE=1)
+    def test_lost_lease_stops_ingestion_and_leaves_the_event(self):
+        event = self._event('s_1', payload=_posts('IG1', 'IG2', 'IG3'))
+        worker = WebhookWorker(concurrency=1, worker_id='w1')
+        renew_lease = worker.renew_lease
+
+        def taken_over(claimed):
+            # Re-queued as stale and claimed by another worker after the first chunk
+            WebhookEvent.objects.filter(pk=claimed.pk).update(locked_by='w2')
+            return renew_lease(claimed)
+
+        with mock.patch.object(worker, 'renew_lease', side_effect=taken_over):
+            self.assertFalse(worker.process_now(event))
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.locked_by, event.processed_at), ('processing', 'w2', None))
+        self.assertEqual(list(InstagramPost.objects.values_list('post_id', flat=True)), ['IG1'])
+
+
+class WebhookEndpointTest(TestCase):
+
+    def _post(self, payload):
+        return self.client.post(
+            '/api/brightdata/webhook/?snapshot_id=s_42',
+            data=json.dumps(payload),
+            content_type='application/json',
+            HTTP_X_PLATFORM='instagram',
+        )
+
+    @override_settings(WEBHOOK_ASYNC_PROCESSING=True)
+    def test_webhook_is_acknowledged_before_processing(self):
+        response = self._post(_posts('IG1'))
+
+        self.assertEqual(response.status_code, 202)
+        event = WebhookEvent.objects.get(pk=response.json()['webhook_event_id'])
+        self.assertEqual((event.status, event.snapshot_id), ('pending', 's_42'))
+        self.assertFalse(InstagramPost.objects.exists())
+
+    @override_settings(WEBHOOK_ASYNC_PROCESSING=False)
+    def test_webhook_can_still_be_processed_inline(self):
+        response = self._post(_posts('IG1'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'processed')
+        self.assertTrue(InstagramPost.objects.filter(post_id='IG1').exists())
@@ -9,6 +9,7 @@ router.register(r'requests', views.ScraperRequestViewSet)
 router.register(r'scraper-requests', views.ScraperRequestViewSet, basename='scraperrequest-alt')  # Support both formats
 router.register(r'batch-jobs', views.BatchScraperJobViewSet)
 router.register(r'notifications', views.BrightdataNotificationViewSet)
+router.register(r'csv-imports', views.CsvImportJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,6 +1,5 @@
 from django.shortcuts import render
 import json
-import requests
 import logging
 from datetime import datetime, timedelta
 from django.shortcuts import get_object_or_404
@@ -12,12 +11,20 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import BrightdataConfig, ScraperRequest, BatchScraperJob, BrightdataNotification, WebhookEvent
+from .models import BrightdataConfig, ScraperRequest, BatchScraperJob, BrightdataNotification, WebhookEvent, CsvImportJob
 from .serializers import (
     BrightdataConfigSerializer, ScraperRequestSerializer, ScraperRequestCreateSerializer,
-    BatchScraperJobSerializer, BatchScraperJobCreateSerializer, BrightdataNotificationSerializer
+    BatchScraperJobSerializer, BatchScraperJobCreateSerializer, BrightdataNotificationSerializer,
+    CsvImportJobSerializer
 )
+from .brightdata_client import STATUS_PATH, TRIGGER_PATH, get_client
 from .services import AutomatedBatchScraper, create_and_execute_batch_job
+from .field_mappers import get_mapper
+from .ingestion import BulkPostIngestor, get_post_model
+from .snapshot_stream import SnapshotFormatError
+from .webhook_worker import RetryableWebhookError, WebhookWorker
+from django.conf import settings
+import reprlib
 import traceback
 from urllib.parse import urlencode, urlparse, urlunparse
 
@@ -271,7 +278,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
             end_date = request.data.get('end_date', '')
 
             # Prepare Brightdata API request
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -410,7 +417,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
                 print("🚀 MAKING API REQUEST...")
                 print("="*80)
 
-                response = requests.post(url, headers=headers, params=params, json=data)
+                response = get_client().post(url, headers=headers, params=params, json=data)
 
                 print("\n📥 BRIGHTDATA API RESPONSE:")
                 print(f"Status Code: {response.status_code}")
@@ -560,7 +567,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
             folder_id = request.data.get('folder_id')
 
             # Prepare Brightdata API request
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -637,7 +644,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
 
                 print("=======================================\n")
 
-                response = requests.post(url, headers=headers, params=params, json=data)
+                response = get_client().post(url, headers=headers, params=params, json=data)
 
                 print("\n==== DEBUG: BRIGHTDATA API RESPONSE (LINKEDIN) ====")
                 print(f"Status code: {response.status_code}")
@@ -786,7 +793,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
             folder_id = request.data.get('folder_id')
 
             # Prepare Brightdata API request
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -863,7 +870,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
 
                 print("=======================================\n")
 
-                response = requests.post(url, headers=headers, params=params, json=data)
+                response = get_client().post(url, headers=headers, params=params, json=data)
 
                 print("\n==== DEBUG: BRIGHTDATA API RESPONSE (TIKTOK) ====")
                 print(f"Status code: {response.status_code}")
@@ -966,7 +973,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
                                status=status.HTTP_400_BAD_REQUEST)
 
             # Test URL for Brightdata API
-            url = "https://api.brightdata.com/datasets/v3/status"  # Use status endpoint for testing
+            url = get_client().url(STATUS_PATH)  # Use status endpoint for testing
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -983,7 +990,7 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
             print("=======================================\n")
 
             # Make the API request to Brightdata
-            response = requests.get(url, headers=headers, params=params)
+            response = get_client().get(url, headers=headers, params=params)
 
             # Log the test response
             print("\n==== DEBUG: BRIGHTDATA TEST RESPONSE ====")
@@ -1064,11 +1071,11 @@ class ScraperRequestViewSet(viewsets.ModelViewSet):
 @require_http_methods(["POST"])
 def brightdata_webhook(request):
     """
-    Safe webhook handler that always captures raw payload first, then validates
+    Safe webhook handler that always captures raw payload first, then validates.
+    Valid deliveries are acknowledged with 202 and processed by the webhook worker.
     """
     import time
     import traceback
-    import requests
     import logging
     from datetime import datetime
     
@@ -1098,13 +1105,11 @@ def brightdata_webhook(request):
     try:
         # 3. ALWAYS SAVE RAW PAYLOAD FIRST (for debugging)
         logger.info("📦 CAPTURING RAW PAYLOAD:")
-        try:
-            raw_body = request.body.decode("utf-8")
-            logger.info(f"Raw body: {raw_body[:1000]}...")  # First 1000 chars
-        except UnicodeDecodeError as e:
-            logger.error(f"❌ Unicode decode error: {e}")
-            raw_body = str(request.body)
-            logger.info(f"Raw body (bytes): {raw_body[:1000]}...")
+        # Only a prefix is decoded for logging; json.loads() parses the bytes directly,
+        # so large deliveries are not held as bytes, text and objects at the same time
+        body = request.body
+        body_preview = body[:1000].decode("utf-8", errors="replace")
+        logger.info(f"Raw body: {body_preview}...")  # First 1000 chars
 
         # 4. PARSE JSON (but don't fail yet)
         logger.info("🔍 PARSING JSON PAYLOAD:")
@@ -1126,11 +1131,11 @@ def brightdata_webhook(request):
                     logger.info(f"📋 Data keys: {list(data.keys())}")
                 elif isinstance(data, list):
                     logger.info(f"📋 List length: {len(data)}")
-                logger.info(f"📄 Parsed JSON: {str(data)[:500]}...")  # First 500 chars
+                logger.info(f"📄 Parsed JSON: {reprlib.repr(data)}")  # Bounded preview
             except json.JSONDecodeError as e:
                 json_error = str(e)
                 logger.error(f"❌ JSON decode error: {e}")
-                logger.error(f"❌ Raw body that failed: {raw_body}")
+                logger.error(f"❌ Raw body that failed: {body_preview}...")
                 # Don't return error yet - save the raw payload first
         else:
             logger.error(f"❌ Unsupported content type: {request.content_type}")
@@ -1258,7 +1263,10 @@ def brightdata_webhook(request):
             webhook_event = WebhookEvent.objects.create(
                 platform=platform,
                 snapshot_id=snapshot_id,
-                raw_payload=data if data else {'raw_body': raw_body, 'json_error': json_error},
+                raw_payload=data if data else {
+                    'raw_body': body.decode("utf-8", errors="replace"),
+                    'json_error': json_error
+                },
                 status=status,
                 error_message=json_error if json_error else None
             )
@@ -1314,131 +1322,50 @@ def brightdata_webhook(request):
 
         logger.info(f"✅ Metadata extracted successfully")
 
-        # 8. PROCESS REAL WEBHOOK DATA
-        # Handle BrightData file_url payload format
-        if isinstance(data, dict) and 'file_url' in data:
-            logger.info(f"BrightData sent file_url: {data['file_url']}")
-            try:
-                response = requests.get(data['file_url'], timeout=30)
-                response.raise_for_status()
-                posts_data = response.json()
-                logger.info(f"Successfully fetched {len(posts_data) if isinstance(posts_data, list) else 1} posts from file_url")
-                # Update the data with the fetched content
-                data['fetched_data'] = posts_data
-            except Exception as e:
-                logger.error(f"Failed to fetch data from file_url: {str(e)}")
-                if webhook_event:
-                    webhook_event.status = 'file_url_error'
-                    webhook_event.error_message = f'Failed to fetch data from file_url: {str(e)}'
-                    webhook_event.save()
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'Failed to fetch data from file_url: {str(e)}',
-                    'webhook_event_id': webhook_event.id if webhook_event else None,
-                    'snapshot_id': snapshot_id
-                }, status=500)
-        else:
-            # Direct data format
-            posts_data = data if isinstance(data, list) else data.get('data', [])
-            logger.info(f"Processing direct data format with {len(posts_data) if isinstance(posts_data, list) else 1} items")
-
-        # 9. PROCESS THE ACTUAL DATA
-        logger.info("🔄 PROCESSING WEBHOOK DATA:")
-        
-        # NEW: Find ScrapingJob directly by snapshot_id
-        scrape_job = None
-        try:
-            from workflow.models import ScrapingJob
-            scrape_job = ScrapingJob.objects.filter(snapshot_id=snapshot_id).first()
-            if scrape_job:
-                logger.info(f"✅ Found ScrapingJob directly by snapshot_id: {scrape_job.id}")
-                # Update job webhook status
-                scrape_job.webhook_received_at = timezone.now()
-                scrape_job.webhook_status = 'received'
-                scrape_job.save()
-            else:
-                logger.warning(f"⚠️  No ScrapingJob found with snapshot_id: {snapshot_id}")
-        except Exception as e:
-            logger.warning(f"⚠️  Error finding ScrapingJob: {str(e)}")
-        
-        # Find associated scraper requests for this snapshot_id (for backward compatibility)
-        scraper_requests = []
-        try:
-            scraper_requests = ScraperRequest.objects.filter(
-                request_id=snapshot_id
-            ).order_by('created_at')
-            logger.info(f"📋 Found {len(scraper_requests)} scraper requests for snapshot_id: {snapshot_id}")
-            
-            # Update ScraperRequest webhook status
-            for req in scraper_requests:
-                req.webhook_received_at = timezone.now()
-                req.webhook_status = 'received'
-                req.data_webhook_id = snapshot_id
-                req.save()
-                
-        except Exception as e:
-            logger.warning(f"⚠️  Error finding scraper requests: {str(e)}")
-        
-        # Process the data
-        try:
-            # 🔧 FIX 2: Ensure processing function exists and works
-            if not callable(_process_webhook_data_with_batch_support):
-                raise Exception("_process_webhook_data_with_batch_support function is not callable")
-            
-            logger.info(f"🔄 Calling _process_webhook_data_with_batch_support with platform: {platform}")
-            success = _process_webhook_data_with_batch_support(posts_data, platform, scraper_requests, scrape_job)
-            
-            if success:
-                logger.info(f"✅ Data processing completed successfully")
-                # Update job status to completed
-                if scrape_job:
-                    scrape_job.status = 'completed'
-                    scrape_job.webhook_status = 'processed'
-                    scrape_job.save()
-            else:
-                logger.warning(f"⚠️  Data processing completed with warnings")
-                
-        except NameError as e:
-            logger.error(f"❌ _process_webhook_data_with_batch_support function not found: {str(e)}")
-            if webhook_event:
-                webhook_event.status = 'processing_error'
-                webhook_event.error_message = f'Processing function not found: {str(e)}'
-                webhook_event.save()
+        # 8. HAND OFF TO THE WEBHOOK WORKER
+        # Downloading file_url snapshots and ingesting posts can take minutes, so it
+        # runs in the worker (manage.py process_webhook_queue --loop), not in this request
+        if not webhook_event:
+            # Nothing was persisted, so nothing could be processed later - let BrightData retry
             return JsonResponse({
-                'status': 'processing_error',
-                'message': f'Processing function not found: {str(e)}',
-                'webhook_event_id': webhook_event.id if webhook_event else None,
-                'snapshot_id': snapshot_id
-            }, status=500)
-        except Exception as e:
-            logger.error(f"❌ Error processing data: {str(e)}")
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
-            if webhook_event:
-                webhook_event.status = 'processing_error'
-                webhook_event.error_message = f'Data processing error: {str(e)}'
-                webhook_event.save()
-            return JsonResponse({
-                'status': 'processing_error',
-                'message': f'Error processing data: {str(e)}',
-                'webhook_event_id': webhook_event.id if webhook_event else None,
+                'status': 'error',
+                'message': 'Failed to persist webhook event',
                 'snapshot_id': snapshot_id,
                 'processing_time': round(time.time() - start_time, 3)
-            }, status=500)
+            }, status=503)
 
-        # 10. UPDATE STATUS TO PROCESSED
-        if webhook_event:
-            webhook_event.status = 'processed'
-            webhook_event.save()
-            logger.info(f"✅ WebhookEvent status updated to 'processed'")
+        if getattr(settings, 'WEBHOOK_ASYNC_PROCESSING', True):
+            processing_time = round(time.time() - start_time, 3)
+            logger.info(f"✅ Webhook queued for processing: {snapshot_id} (event {webhook_event.id}) in {processing_time}s")
+            logger.info("="*80)
+            return JsonResponse({
+                'status': 'accepted',
+                'message': 'Webhook received and queued for processing',
+                'webhook_event_id': webhook_event.id,
+                'snapshot_id': snapshot_id,
+                'processing_time': processing_time
+            }, status=202)
 
+        # Synchronous mode: process inline (e.g. local development without a worker)
+        logger.info("🔄 PROCESSING WEBHOOK DATA INLINE:")
+        success = WebhookWorker(concurrency=1).process_now(webhook_event)
+        webhook_event.refresh_from_db()
         processing_time = round(time.time() - start_time, 3)
-        logger.info(f"✅ Webhook processed successfully: {snapshot_id} in {processing_time}s")
         logger.info("="*80)
 
+        if not success:
+            return JsonResponse({
+                'status': 'processing_error',
+                'message': webhook_event.error_message or 'Failed to process webhook data',
+                'webhook_event_id': webhook_event.id,
+                'snapshot_id': snapshot_id,
+                'processing_time': processing_time
+            }, status=500)
+
         return JsonResponse({
             'status': 'processed',
             'message': 'Webhook data processed successfully',
-            'webhook_event_id': webhook_event.id if webhook_event else None,
+            'webhook_event_id': webhook_event.id,
             'snapshot_id': snapshot_id,
             'processing_time': processing_time
         })
@@ -1800,65 +1727,13 @@ def _process_webhook_data_with_batch_support(data, platform: str, scraper_reques
     Process incoming webhook data with support for batch jobs (multiple scraper requests)
     Uses pre-created platform-specific folders instead of creating them during webhook processing
     """
-    from datetime import datetime
-    from django.utils import timezone
     try:
-        # Import platform-specific models
-        from facebook_data.models import FacebookPost
-        from instagram_data.models import InstagramPost
-        from linkedin_data.models import LinkedInPost
-        from tiktok_data.models import TikTokPost
-
-        # Platform to model mapping
-        platform_models = {
-            'facebook': FacebookPost,
-            'instagram': InstagramPost,
-            'linkedin': LinkedInPost,
-            'tiktok': TikTokPost,
-        }
-
-        PostModel = platform_models.get(platform.lower())
-        if not PostModel:
+        if not get_post_model(platform):
             logger.error(f"No model found for platform: {platform}")
             return False
 
-        # Extract posts from data
-        posts_data = data if isinstance(data, list) else data.get('data', [])
-
-        # Filter out invalid entries (warnings, errors, entries without required fields)
-        valid_posts = []
-        skipped_count = 0
-
-        for post_data in posts_data:
-            # Skip entries with warnings or errors
-            if post_data.get('warning') or post_data.get('error') or post_data.get('warning_code'):
-                skipped_count += 1
-                logger.info(f"Skipping warning/error entry: {post_data.get('warning', post_data.get('error', 'Unknown warning'))}")
-                continue
-
-            # Skip entries without essential fields
-            if platform.lower() == 'instagram':
-                # For Instagram, we need either 'url' or 'post_id'
-                if not (post_data.get('url') or post_data.get('post_id') or post_data.get('pk')):
-                    skipped_count += 1
-                    logger.info(f"Skipping Instagram entry without URL or post_id: {post_data}")
-                    continue
-            elif platform.lower() == 'facebook':
-                # For Facebook, we need either 'url' or 'post_id'
-                if not (post_data.get('url') or post_data.get('post_id')):
-                    skipped_count += 1
-                    logger.info(f"Skipping Facebook entry without URL or post_id: {post_data}")
-                    continue
-            else:
-                # For other platforms, we need at least 'url' or 'post_id'
-                if not (post_data.get('url') or post_data.get('post_id') or post_data.get('id')):
-                    skipped_count += 1
-                    logger.info(f"Skipping {platform} entry without URL or ID: {post_data}")
-                    continue
-
-            valid_posts.append(post_data)
-
-        logger.info(f"Processing {len(valid_posts)} valid posts, skipped {skipped_count} invalid entries")
+        # Extract posts from data (lists, {'data': [...]} envelopes or streamed iterators)
+        posts_data = data.get('data', []) if isinstance(data, dict) else data
 
         # NEW: Get pre-created platform-specific folder from ScrapingJob
         platform_folder = None
@@ -1938,128 +1813,21 @@ def _process_webhook_data_with_batch_support(data, platform: str, scraper_reques
                 except Exception as e:
                     logger.error(f"Error in fallback folder creation: {str(e)}")
 
-        created_count = 0
+        if not platform_folder:
+            logger.warning(f"⚠️  No platform folder found for {platform} posts")
 
-        for post_data in valid_posts:
-            try:
-                # Map common fields
-                post_fields = _map_post_fields(post_data, platform)
+        # Bulk upsert: one pre-fetch and a couple of bulk writes per chunk
+        ingestor = BulkPostIngestor(platform, folder=platform_folder)
+        result = ingestor.ingest(posts_data)
 
-                # NEW: Use pre-created platform folder
-                if platform_folder:
-                    post_fields['folder'] = platform_folder
-                    logger.info(f"✅ Using pre-created platform folder: {platform_folder.id} for post")
-                else:
-                    logger.warning(f"⚠️  No platform folder found for {platform} posts")
-                    
-                # NEW: Add webhook tracking
-                post_fields['webhook_snapshot_id'] = scraper_requests[0].request_id if scraper_requests else None
-                post_fields['webhook_received_at'] = timezone.now()
-
-                # Create or update post
-                post_id = post_data.get('post_id') or post_data.get('id') or post_data.get('pk')
-                if post_id:
-                    # For all platforms, check uniqueness by post_id and folder (if folder exists)
-                    folder = post_fields.get('folder')
-                    
-                    # FALLBACK: If no folder assigned, try to find or create one
-                    if not folder and scraper_requests:
-                        try:
-                            # Try to get the folder from the first scraper request
-                            shared_folder_id = scraper_requests[0].folder_id
-                            if shared_folder_id:
-                                from track_accounts.models import UnifiedRunFolder
-                                unified_folder = UnifiedRunFolder.objects.get(id=shared_folder_id)
-                                
-                                # Try to get or create platform folder
-                                if platform.lower() == 'facebook':
-                                    from facebook_data.models import Folder
-                                    folder, created = Folder.objects.get_or_create(
-                                        unified_job_folder=unified_folder,
-                                        defaults={
-                                            'name': unified_folder.name,
-                                            'description': f'Created from UnifiedRunFolder {unified_folder.id}',
-                                            'project_id': unified_folder.project_id,
-                                            'scraping_run': unified_folder.scraping_run
-                                        }
-                                    )
-                                    if created:
-                                        logger.info(f"✅ Created fallback Facebook folder: {folder.id}")
-                                    post_fields['folder'] = folder
-                        except Exception as e:
-                            logger.error(f"Error in fallback folder creation: {str(e)}")
-                    
-                    if folder:
-                        # If post has a folder, check uniqueness by post_id and folder
-                        post, created = PostModel.objects.get_or_create(
-                            post_id=post_id,
-                            folder=folder,
-                            defaults=post_fields
-                        )
-                    else:
-                        # If no folder, check uniqueness by post_id only
-                        post, created = PostModel.objects.get_or_create(
-                            post_id=post_id,
-                            defaults=post_fields
-                        )
-                    if created:
-                        created_count += 1
-                        user_posted = post_data.get('user_posted', 'Unknown')
-                        logger.info(f"✅ Created new {platform} post: {post_id} from @{user_posted} in folder: {folder.name if folder else 'No folder'}")
-                        
-                        # Process LinkedIn comments if this is a LinkedIn post
-                        if platform.lower() == 'linkedin':
-                            try:
-                                from linkedin_data.models import LinkedInComment
-                                from datetime import datetime
-                                
-                                comments_data = post_data.get('top_visible_comments', [])
-                                if comments_data:
-                                    logger.info(f"Processing {len(comments_data)} LinkedIn comments for post {post_id}")
-                                    
-                                    for comment_data in comments_data:
-                                        try:
-                                            # Convert comment date
-                                            comment_date = comment_data.get('comment_date')
-                                            if comment_date and isinstance(comment_date, str):
-                                                try:
-                                                    comment_date = datetime.fromisoformat(comment_date.replace('Z', '+00:00'))
-                                                except:
-                                                    comment_date = None
-                                            
-                                            # Create comment
-                                            comment, comment_created = LinkedInComment.objects.get_or_create(
-                                                comment_id=comment_data.get('comment_id', ''),
-                                                post=post,
-                                                defaults={
-                                                    'folder': folder,
-                                                    'comment_text': comment_data.get('comment', ''),
-                                                    'comment_date': comment_date,
-                                                    'user_id': comment_data.get('user_id', ''),
-                                                    'user_name': comment_data.get('user_name', ''),
-                                                    'user_url': comment_data.get('use_url', ''),
-                                                    'user_title': comment_data.get('user_title', ''),
-                                                    'num_reactions': comment_data.get('num_reactions', 0),
-                                                    'tagged_users': comment_data.get('tagged_users', []),
-                                                }
-                                            )
-                                            if comment_created:
-                                                logger.info(f"✅ Created LinkedIn comment: {comment.comment_id}")
-                                        except Exception as e:
-                                            logger.error(f"Error processing LinkedIn comment: {str(e)}")
-                                            continue
-                            except Exception as e:
-                                logger.error(f"Error processing LinkedIn comments: {str(e)}")
-                    else:
-                        logger.info(f"Updated existing {platform} post: {post_id}")
-
-            except Exception as e:
-                logger.error(f"Error processing {platform} post: {str(e)}")
-                continue
-
-        logger.info(f"✅ Successfully processed {created_count} new {platform} posts")
+        logger.info(f"✅ Successfully processed {result.created} new {platform} posts "
+                    f"(updated: {result.updated}, skipped: {result.skipped}, failed: {result.failed})")
         return True
 
+    except (RetryableWebhookError, SnapshotFormatError):
+        # Snapshot download broke off mid-stream (re-queued) or the body is malformed
+        # (failed); either way the worker records it
+        raise
     except Exception as e:
         logger.error(f"Error in _process_webhook_data_with_batch_support: {str(e)}")
         return False
@@ -2073,193 +1841,9 @@ def _process_webhook_data(data, platform: str, scraper_request=None):
 
 def _map_post_fields(post_data: dict, platform: str) -> dict:
     """
-    Map BrightData post fields to our model fields based on actual BrightData JSON structure
+    Map BrightData post fields to our model fields (tables in field_mappers.MAPPINGS)
     """
-
-    if platform.lower() == 'instagram':
-        # Map Instagram-specific fields based on actual BrightData structure
-        mapped_data = {
-            'url': post_data.get('url', ''),
-            'post_id': post_data.get('post_id', '') or post_data.get('pk', ''),
-            'user_posted': post_data.get('user_posted', '') or post_data.get('user_name', '') or post_data.get('username', ''),
-            'description': post_data.get('description', '') or post_data.get('caption', '') or post_data.get('text', ''),
-            'hashtags': post_data.get('hashtags', []),
-            'num_comments': post_data.get('num_comments', 0) or post_data.get('comments', 0) or post_data.get('comments_count', 0),
-            'date_posted': post_data.get('date_posted', '') or post_data.get('date', '') or post_data.get('timestamp', ''),
-            'likes': post_data.get('likes', 0) or post_data.get('likes_count', 0),
-            'photos': post_data.get('photos', []),
-            'videos': post_data.get('videos', []),
-            'thumbnail': post_data.get('thumbnail', ''),
-            'views': post_data.get('views', 0),
-            'video_play_count': post_data.get('video_play_count', 0),
-            'video_view_count': post_data.get('video_view_count', 0),
-            'length': post_data.get('length', ''),
-            'video_url': post_data.get('video_url', ''),
-            'audio_url': post_data.get('audio_url', ''),
-            'shortcode': post_data.get('shortcode', ''),
-            'content_id': post_data.get('content_id', ''),
-            'instagram_pk': post_data.get('pk', '') or post_data.get('instagram_pk', ''),
-            'content_type': post_data.get('content_type', ''),
-            'platform_type': post_data.get('platform_type', ''),
-            'product_type': post_data.get('product_type', ''),
-            'user_posted_id': post_data.get('user_posted_id', '') or post_data.get('user_id', ''),
-            'followers': post_data.get('followers', 0),
-            'posts_count': post_data.get('posts_count', 0),
-            'following': post_data.get('following', 0),
-            'profile_image_link': post_data.get('profile_image_link', ''),
-            'user_profile_url': post_data.get('user_profile_url', ''),
-            'profile_url': post_data.get('profile_url', ''),
-            'is_verified': post_data.get('is_verified', False),
-            'is_paid_partnership': post_data.get('is_paid_partnership', False),
-            'partnership_details': post_data.get('partnership_details', {}),
-            'coauthor_producers': post_data.get('coauthor_producers', []),
-            'location': post_data.get('location', ''),
-            'latest_comments': post_data.get('latest_comments', []),
-            'top_comments': post_data.get('top_comments', []),
-            'engagement_score': post_data.get('engagement_score', 0.0),
-            'engagement_score_view': post_data.get('engagement_score_view', 0),
-            'tagged_users': post_data.get('tagged_users', []),
-            'audio': post_data.get('audio', {}),
-            'post_content': post_data.get('post_content', {}),
-            'videos_duration': post_data.get('videos_duration', {}),
-            'images': post_data.get('images', []),
-            'photos_number': post_data.get('photos_number', 0),
-            'alt_text': post_data.get('alt_text', ''),
-            'discovery_input': post_data.get('discovery_input', ''),
-            'has_handshake': post_data.get('has_handshake', False),
-        }
-        return mapped_data
-
-    elif platform.lower() == 'facebook':
-        # Map Facebook-specific fields based on actual BrightData structure
-        mapped_data = {
-            'url': post_data.get('url', ''),
-            'post_id': post_data.get('post_id', ''),
-            'user_url': post_data.get('user_url', ''),
-            'user_username_raw': post_data.get('user_username_raw', ''),
-            'content': post_data.get('content', ''),
-            'date_posted': post_data.get('date_posted'),
-            'num_comments': post_data.get('num_comments', 0),
-            'num_shares': post_data.get('num_shares', 0),
-            'likes': post_data.get('likes', 0),
-            'video_view_count': post_data.get('video_view_count'),
-            'page_name': post_data.get('page_name', ''),
-            'profile_id': post_data.get('profile_id', ''),
-            'page_intro': post_data.get('page_intro', ''),
-            'page_category': post_data.get('page_category', ''),
-            'page_logo': post_data.get('page_logo', ''),
-            'page_external_website': post_data.get('page_external_website', ''),
-            'page_likes': post_data.get('page_likes'),
-            'page_followers': post_data.get('page_followers'),
-            'page_is_verified': post_data.get('page_is_verified', False),
-            'page_phone': post_data.get('page_phone', ''),
-            'page_email': post_data.get('page_email', ''),
-            'page_creation_time': post_data.get('page_creation_time'),
-            'page_reviews_score': post_data.get('page_reviews_score', ''),
-            'page_reviewers_amount': post_data.get('page_reviewers_amount'),
-            'page_price_range': post_data.get('page_price_range', ''),
-            'attachments_data': post_data.get('attachments'),
-            'post_external_image': post_data.get('post_external_image'),
-            'page_url': post_data.get('page_url', ''),
-            'header_image': post_data.get('header_image', ''),
-            'avatar_image_url': post_data.get('avatar_image_url', ''),
-            'profile_handle': post_data.get('profile_handle', ''),
-            'is_sponsored': post_data.get('is_sponsored', False),
-            'shortcode': post_data.get('shortcode', ''),
-            'is_page': post_data.get('is_page', False),
-            'about': post_data.get('about'),
-            'active_ads_urls': post_data.get('active_ads_urls'),
-            'delegate_page_id': post_data.get('delegate_page_id', ''),
-            'post_type': post_data.get('post_type', ''),
-            'timestamp': post_data.get('timestamp'),
-            'input': post_data.get('input'),
-            'num_likes_type': post_data.get('num_likes_type'),
-            'count_reactions_type': post_data.get('count_reactions_type'),
-        }
-        return mapped_data
-
-    elif platform.lower() == 'linkedin':
-        # Map LinkedIn-specific fields based on actual BrightData structure
-        from datetime import datetime
-        
-        # Convert date string to datetime if needed
-        date_posted = post_data.get('date_posted')
-        if date_posted and isinstance(date_posted, str):
-            try:
-                date_posted = datetime.fromisoformat(date_posted.replace('Z', '+00:00'))
-            except:
-                date_posted = None
-        
-        mapped_data = {
-            # Core post fields
-            'url': post_data.get('url', ''),
-            'post_id': post_data.get('id') or post_data.get('post_id', ''),
-            'user_id': post_data.get('user_id', ''),
-            'user_posted': post_data.get('user_posted', '') or post_data.get('user_name', '') or post_data.get('title', ''),
-            'user_url': post_data.get('use_url') or post_data.get('user_url', ''),
-            'user_title': post_data.get('user_title', ''),
-            'user_headline': post_data.get('headline', ''),
-            'description': post_data.get('description', ''),
-            'hashtags': post_data.get('hashtags', []),
-            'num_comments': post_data.get('num_comments', 0),
-            'date_posted': date_posted,
-            'likes': post_data.get('likes', 0),
-            'photos': post_data.get('photos', ''),
-            'videos': post_data.get('videos', ''),
-            'location': post_data.get('location', ''),
-            'latest_comments': post_data.get('latest_comments', []),
-            'discovery_input': post_data.get('discovery_input', ''),
-            'thumbnail': post_data.get('thumbnail', ''),
-            'content_type': post_data.get('content_type', ''),
-            'platform_type': post_data.get('platform_type', ''),
-            'engagement_score': post_data.get('engagement_score', 0.0),
-            'tagged_users': post_data.get('tagged_users', ''),
-            'followers': post_data.get('followers', 0),
-            'posts_count': post_data.get('posts_count', 0),
-            'profile_image_link': post_data.get('profile_image_link', ''),
-            'is_verified': post_data.get('is_verified', False),
-            'is_paid_partnership': post_data.get('is_paid_partnership', False),
-            
-            # New LinkedIn-specific fields
-            'post_title': post_data.get('title', ''),
-            'post_text': post_data.get('post_text', ''),
-            'post_text_html': post_data.get('post_text_html', ''),
-            'num_likes': post_data.get('num_likes', 0),
-            'num_shares': post_data.get('num_shares', 0),
-            'user_followers': post_data.get('user_followers', 0),
-            'user_posts': post_data.get('user_posts', 0),
-            'user_articles': post_data.get('user_articles', 0),
-            'num_connections': post_data.get('num_connections', 0),
-            'post_type': post_data.get('post_type', ''),
-            'account_type': post_data.get('account_type', ''),
-            'images': post_data.get('images', []),
-            'videos': post_data.get('videos', []),
-            'video_duration': post_data.get('video_duration', 0),
-            'video_thumbnail': post_data.get('video_thumbnail', ''),
-            'external_link_data': post_data.get('external_link_data', []),
-            'embedded_links': post_data.get('embedded_links', []),
-            'document_cover_image': post_data.get('document_cover_image', ''),
-            'document_page_count': post_data.get('document_page_count', 0),
-            'tagged_companies': post_data.get('tagged_companies', []),
-            'tagged_people': post_data.get('tagged_people', []),
-            'repost_data': post_data.get('repost', {}),
-            'author_profile_pic': post_data.get('author_profile_pic', ''),
-        }
-        return mapped_data
-
-    # Generic mapping for other platforms
-    common_mapping = {
-        'url': post_data.get('url', ''),
-        'post_id': post_data.get('post_id') or post_data.get('id', ''),
-        'content': post_data.get('text') or post_data.get('content') or post_data.get('description', ''),
-        'date_posted': post_data.get('date') or post_data.get('created_time') or post_data.get('timestamp'),
-        'likes': post_data.get('likes_count') or post_data.get('likes') or 0,
-        'num_comments': post_data.get('comments_count') or post_data.get('comments') or 0,
-        'num_shares': post_data.get('shares_count') or post_data.get('shares') or 0,
-        'user_posted': post_data.get('username') or post_data.get('author') or post_data.get('user', ''),
-    }
-
-    return common_mapping
+    return get_mapper(platform)(post_data)
 
 class BatchScraperJobViewSet(viewsets.ModelViewSet):
     """API endpoint for automated batch scraper jobs"""
@@ -2532,6 +2116,27 @@ def scrape_comments(request):
                       status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class CsvImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """API endpoint for polling background CSV imports"""
+    queryset = CsvImportJob.objects.all()
+    serializer_class = CsvImportJobSerializer
+    permission_classes = [AllowAny]  # For testing, use proper permissions in production
+
+    def get_queryset(self):
+        """Filter by status or importer if specified"""
+        queryset = CsvImportJob.objects.all()
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+
+        importer = self.request.query_params.get('importer')
+        if importer:
+            queryset = queryset.filter(importer=importer)
+
+        return queryset.order_by('-created_at')
+
+
 class BrightdataNotificationViewSet(viewsets.ReadOnlyModelViewSet):
     """API endpoint for viewing BrightData notifications"""
     queryset = BrightdataNotification.objects.all()
@@ -2601,6 +2206,9 @@ def webhook_metrics(request):
                 'avg_response_time': round(metrics.avg_response_time, 3),
                 'max_response_time': round(metrics.max_response_time, 3),
                 'min_response_time': round(metrics.min_response_time, 3) if metrics.min_response_time != float('inf') else 0,
+                'p50_response_time': round(metrics.p50_response_time, 3),
+                'p95_response_time': round(metrics.p95_response_time, 3),
+                'p99_response_time': round(metrics.p99_response_time, 3),
                 'last_success': metrics.last_success.isoformat() if metrics.last_success else None,
                 'last_failure': metrics.last_failure.isoformat() if metrics.last_failure else None,
             },
@@ -2748,11 +2356,11 @@ def test_webhook_security(request):
         )
 
         # Run comprehensive validation
-        is_valid, validation_result = webhook_security.comprehensive_webhook_validation(mock_request)
+        is_valid, validation_result = webhook_security.comprehensive_webhook_validation(mock_request, test_payload)
 
         # Additional individual tests
         signature_valid = webhook_security.verify_webhook_signature(mock_request, mock_request.body)
-        timestamp_valid = webhook_security.verify_timestamp(mock_request)
+        timestamp_valid = webhook_security.verify_timestamp(mock_request, test_payload)
         rate_limit_ok = webhook_security.check_rate_limit(mock_request)
         ip_whitelisted = webhook_security.verify_ip_whitelist(mock_request)
 
@@ -2774,6 +2382,8 @@ def test_webhook_security(request):
             'test_configuration': {
                 'webhook_token_configured': bool(getattr(settings, 'BRIGHTDATA_WEBHOOK_TOKEN', '')),
                 'rate_limit': getattr(settings, 'WEBHOOK_RATE_LIMIT', 100),
+                'rate_burst': webhook_security.rate_burst,
+                'rate_limit_shared': webhook_security.rate_limiter.shared,
                 'timestamp_max_age': getattr(settings, 'WEBHOOK_MAX_TIMESTAMP_AGE', 300),
                 'ip_whitelist_enabled': bool(getattr(settings, 'WEBHOOK_ALLOWED_IPS', [])),
             },
@@ -0,0 +1,241 @@
+"""
+Bucketed webhook metrics over the Django cache
+
+WebhookMonitor used to read the whole event list and metrics dict from the cache,
+change them and write them back on every webhook, which costs O(events) per call and
+drops updates when workers record at the same time. This store only ever adds to
+counters:
+
+- per-minute buckets (kept for WEBHOOK_METRICS_RETENTION) and per-hour buckets (kept
+  for ANALYTICS_HOURS) of request, success and failure counts, the latency sum and a
+  fixed latency histogram, each value its own key updated with cache.incr(), which
+  is atomic on Redis and Memcached (and under the process lock of LocMemCache)
+- a ring of the last WEBHOOK_MAX_EVENTS events: an atomic sequence number picks the
+  slot, so recording an event is one incr() and one set()
+
+Reads fetch the buckets of a window with one get_many() and merge them, giving
+counts, averages and p50/p95/p99 latencies without touching individual events.
+Percentiles are interpolated within the histogram bins, so they are estimates with
+the bins' resolution. The bucket maxima and minima are best effort: a concurrent
+larger value may be overwritten by a smaller one.
+"""
+
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds of the latency histogram bins in milliseconds; one more bin holds the rest
+LATENCY_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+MINUTE = 60
+HOUR = 3600
+ANALYTICS_HOURS = 168
+
+_COUNTERS = ('total', 'success', 'failed', 'latency_sum', 'latency_count')
+_BINS = tuple(f'bin{index}' for index in range(len(LATENCY_BOUNDS_MS) + 1))
+
+
+def latency_bin(latency_ms: int) -> int:
+    """Index of the histogram bin a latency falls in"""
+    return bisect_left(LATENCY_BOUNDS_MS, latency_ms)
+
+
+def percentile(histogram: List[int], fraction: float, max_ms: Optional[int] = None) -> float:
+    """
+    Latency (ms) below which fraction of the histogram's samples fall, interpolated
+    linearly within the bin; the open last bin ends at the largest latency seen
+    """
+    count = sum(histogram)
+    if not count:
+        return 0.0
+    rank = fraction * count
+    seen = 0
+    for index, samples in enumerate(histogram):
+        if samples and seen + samples >= rank:
+            lower = LATENCY_BOUNDS_MS[index - 1] if index else 0
+            if index < len(LATENCY_BOUNDS_MS):
+                upper = LATENCY_BOUNDS_MS[index]
+            else:
+                upper = max(max_ms or lower, lower)
+            if max_ms is not None:
+                upper = min(upper, max(max_ms, lower))
+            return lower + (upper - lower) * (rank - seen) / samples
+        seen += samples
+    return float(max_ms or LATENCY_BOUNDS_MS[-1])
+
+
+@dataclass
+class BucketTotals:
+    """Merged counters of one or more buckets"""
+    total: int = 0
+    success: int = 0
+    failed: int = 0
+    latency_sum: int = 0
+    latency_count: int = 0
+    histogram: List[int] = field(default_factory=lambda: [0] * len(_BINS))
+    max_ms: Optional[int] = None
+    min_ms: Optional[int] = None
+
+    def merge(self, other: 'BucketTotals') -> 'BucketTotals':
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.histogram = [mine + theirs for mine, theirs in zip(self.histogram, other.histogram)]
+        if other.max_ms is not None:
+            self.max_ms = other.max_ms if self.max_ms is None else max(self.max_ms, other.max_ms)
+        if other.min_ms is not None:
+            self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+        return self
+
+    @property
+    def avg_ms(self) -> float:
+        return self.latency_sum / self.latency_count if self.latency_count else 0.0
+
+    def percentile_ms(self, fraction: float) -> float:
+        return percentile(self.histogram, fraction, self.max_ms)
+
+
+class WebhookMetricsStore:
+    """Time-bucketed counters, latency histograms and an event ring in a Django cache"""
+
+    def __init__(self, cache, prefix: str = 'webhook_metrics', retention: int = 3600,
+                 max_events: int = 1000, analytics_hours: int = ANALYTICS_HOURS):
+        self.cache = cache
+        self.prefix = prefix
+        self.retention = retention
+        self.max_events = max(1, max_events)
+        self.analytics_hours = analytics_hours
+        self._timeouts = {MINUTE: retention + MINUTE, HOUR: (analytics_hours + 1) * HOUR}
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(self, success: bool, response_time: float, event: Dict[str, Any],
+               now: Optional[float] = None) -> int:
+        """Count one webhook and store it in the event ring; returns its sequence number"""
+        now = time.time() if now is None else now
+        latency_ms = int(round(response_time * 1000)) if response_time > 0 else None
+
+        for resolution in (MINUTE, HOUR):
+            index = int(now // resolution)
+            self._incr(self._key(resolution, index, 'total'), 1, resolution)
+            self._incr(self._key(resolution, index, 'success' if success else 'failed'), 1, resolution)
+            if latency_ms is not None:
+                self._incr(self._key(resolution, index, 'latency_sum'), latency_ms, resolution)
+                self._incr(self._key(resolution, index, 'latency_count'), 1, resolution)
+                self._incr(self._key(resolution, index, _BINS[latency_bin(latency_ms)]), 1, resolution)
+        if latency_ms is not None:
+            index = int(now // MINUTE)
+            self._extreme(self._key(MINUTE, index, 'max'), latency_ms, max)
+            self._extreme(self._key(MINUTE, index, 'min'), latency_ms, min)
+
+        self.cache.set(self._last_key('success' if success else 'failure'), now, timeout=None)
+
+        seq = self._incr(f'{self.prefix}:events:seq', 1, None)
+        self.cache.set(
+            self._slot_key(seq), {**event, 'seq': seq, 'ts': now}, timeout=self.retention * 2
+        )
+        return seq
+
+    def _incr(self, key: str, delta: int, resolution: Optional[int]) -> int:
+        timeout = self._timeouts.get(resolution)
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            # Missing (new bucket, or expired): create it, unless another writer just did
+            if self.cache.add(key, delta, timeout=timeout):
+                return delta
+            return self.cache.incr(key, delta)
+
+    def _extreme(self, key: str, value: int, pick) -> None:
+        current = self.cache.get(key)
+        if current is None or pick(current, value) != current:
+            self.cache.set(key, value, timeout=self._timeouts[MINUTE])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def totals(self, seconds: Optional[int] = None, now: Optional[float] = None) -> BucketTotals:
+        """Merged minute buckets of the last seconds (default: the retention window)"""
+        now = time.time() if now is None else now
+        seconds = self.retention if seconds is None else seconds
+        last = int(now // MINUTE)
+        first = int((now - seconds) // MINUTE) + 1
+        return self.merge_buckets(bucket for _, bucket in self._buckets(MINUTE, range(first, last + 1)))
+
+    def hourly(self, hours: int, now: Optional[float] = None) -> List[Tuple[int, BucketTotals]]:
+        """(hour start as epoch seconds, totals) of the last hours that saw webhooks, oldest first"""
+        now = time.time() if now is None else now
+        last = int(now // HOUR)
+        hours = min(hours, self.analytics_hours)
+        return [
+            (index * HOUR, bucket)
+            for index, bucket in self._buckets(HOUR, range(last - hours + 1, last + 1))
+            if bucket.total
+        ]
+
+    def last_seen(self, outcome: str) -> Optional[float]:
+        """Epoch seconds of the last 'success' or 'failure'"""
+        return self.cache.get(self._last_key(outcome))
+
+    def recent_events(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest limit events of the ring (default: all of it), oldest first"""
+        seq = self.cache.get(f'{self.prefix}:events:seq') or 0
+        count = min(seq, self.max_events, limit if limit is not None else self.max_events)
+        wanted = range(seq - count + 1, seq + 1)
+        found = self.cache.get_many([self._slot_key(number) for number in wanted])
+        events = []
+        for number in wanted:
+            event = found.get(self._slot_key(number))
+            # A slot reused by a newer event, or expired, is skipped
+            if event is not None and event.get('seq') == number:
+                events.append(event)
+        return events
+
+    def reset(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        keys = [f'{self.prefix}:events:seq', self._last_key('success'), self._last_key('failure')]
+        keys += [f'{self.prefix}:events:{slot}' for slot in range(self.max_events)]
+        for resolution, window in ((MINUTE, self.retention), (HOUR, self.analytics_hours * HOUR)):
+            last = int(now // resolution)
+            for index in range(int((now - window) // resolution), last + 1):
+                keys += self._bucket_keys(resolution, index)
+        self.cache.delete_many(keys)
+
+    @staticmethod
+    def merge_buckets(buckets: Iterable[BucketTotals]) -> BucketTotals:
+        merged = BucketTotals()
+        for bucket in buckets:
+            merged.merge(bucket)
+        return merged
+
+    def _buckets(self, resolution: int, indexes: Iterable[int]) -> List[Tuple[int, BucketTotals]]:
+        indexes = list(indexes)
+        keys = [key for index in indexes for key in self._bucket_keys(resolution, index)]
+        values = self.cache.get_many(keys)
+        buckets = []
+        for index in indexes:
+            def value(name, default=0):
+                return values.get(self._key(resolution, index, name), default)
+
+            bucket = BucketTotals(**{name: value(name) for name in _COUNTERS})
+            bucket.histogram = [value(name) for name in _BINS]
+            bucket.max_ms = value('max', None)
+            bucket.min_ms = value('min', None)
+            buckets.append((index, bucket))
+        return buckets
+
+    def _bucket_keys(self, resolution: int, index: int) -> List[str]:
+        names = _COUNTERS + _BINS + (('max', 'min') if resolution == MINUTE else ())
+        return [self._key(resolution, index, name) for name in names]
+
+    def _key(self, resolution: int, index: int, name: str) -> str:
+        return f'{self.prefix}:{resolution}:{index}:{name}'
+
+    def _slot_key(self, seq: int) -> str:
+        return f'{self.prefix}:events:{seq % self.max_events}'
+
+    def _last_key(self, outcome: str) -> str:
+        return f'{self.prefix}:last_{outcome}'
@@ -7,20 +7,31 @@ This module provides comprehensive monitoring, metrics, and alerting for webhook
 - Health metrics and dashboards
 - Retry queue management
 - Performance analytics
+
+Counts, latencies and the recent event log live in a WebhookMetricsStore (see
+webhook_metrics): atomic per-minute and per-hour counters with latency histograms,
+and a bounded event ring, so recording is O(1) and concurrent workers never
+overwrite each other's updates. The store, health status and alerts share the
+WEBHOOK_METRICS_CACHE alias (by default webhook_security, which is Redis when
+REDIS_URL is set), so every process records into and reads the same metrics.
+The webhook worker records one event per processed delivery.
 """
 
 import json
 import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import InvalidCacheBackendError
 from django.conf import settings
 from django.utils import timezone
 from django.db import models
 from django.contrib.auth.models import User
 
+from .webhook_metrics import HOUR, WebhookMetricsStore
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -35,6 +46,9 @@ class WebhookMetrics:
     error_rate: float = 0.0
     last_success: Optional[datetime] = None
     last_failure: Optional[datetime] = None
+    p50_response_time: float = 0.0
+    p95_response_time: float = 0.0
+    p99_response_time: float = 0.0
 
 @dataclass
 class WebhookEvent:
@@ -63,16 +77,31 @@ class WebhookMonitor:
     """
 
     def __init__(self):
-        self.metrics_key = "webhook_metrics"
-        self.events_key = "webhook_events"
         self.health_key = "webhook_health"
+        self.health_refresh_key = "webhook_health_refresh"
         self.alerts_key = "webhook_alerts"
 
         # Configuration
-        self.max_events = getattr(settings, 'WEBHOOK_MAX_EVENTS', 1000)
-        self.metrics_retention = getattr(settings, 'WEBHOOK_METRICS_RETENTION', 3600)  # 1 hour
-        self.error_threshold = getattr(settings, 'WEBHOOK_ERROR_THRESHOLD', 0.1)  # 10%
-        self.response_time_threshold = getattr(settings, 'WEBHOOK_RESPONSE_TIME_THRESHOLD', 5.0)  # 5 seconds
+        self.max_events = int(getattr(settings, 'WEBHOOK_MAX_EVENTS', 1000))
+        self.metrics_retention = int(getattr(settings, 'WEBHOOK_METRICS_RETENTION', 3600))  # 1 hour
+        self.error_threshold = float(getattr(settings, 'WEBHOOK_ERROR_THRESHOLD', 0.1))  # 10%
+        self.response_time_threshold = float(getattr(settings, 'WEBHOOK_RESPONSE_TIME_THRESHOLD', 5.0))  # 5 seconds
+        # Health (and the error rate alert) is re-evaluated at most this often, not on every event
+        self.health_refresh_interval = int(getattr(settings, 'WEBHOOK_HEALTH_REFRESH_INTERVAL', 5))
+
+        self.store = WebhookMetricsStore(
+            self._metrics_cache(),
+            retention=self.metrics_retention,
+            max_events=self.max_events,
+        )
+
+    @staticmethod
+    def _metrics_cache():
+        alias = getattr(settings, 'WEBHOOK_METRICS_CACHE', 'webhook_security')
+        try:
+            return caches[alias]
+        except InvalidCacheBackendError:
+            return cache
 
     def record_webhook_event(self, event_type: str, status: str, response_time: float = 0.0,
                            payload_size: int = 0, client_ip: str = '', user_agent: str = '',
@@ -96,14 +125,12 @@ class WebhookMonitor:
                 metadata=metadata or {}
             )
 
-            # Store event
+            # Count the event and store it in the event ring
             self._store_event(event)
 
-            # Update metrics
-            self._update_metrics(event)
-
-            # Check health status
-            self._update_health_status()
+            # Check health status (throttled)
+            if self.store.cache.add(self.health_refresh_key, True, timeout=self.health_refresh_interval):
+                self._update_health_status()
 
             # Check for alerts
             self._check_alerts(event)
@@ -116,96 +143,40 @@ class WebhookMonitor:
             return ""
 
     def _store_event(self, event: WebhookEvent):
-        """Store webhook event in cache"""
+        """Add the event to the metric buckets and the event ring"""
         try:
-            events = cache.get(self.events_key, [])
-
             # Convert event to dict for JSON serialization
             event_dict = asdict(event)
             event_dict['timestamp'] = event.timestamp.isoformat()
 
-            events.append(event_dict)
-
-            # Keep only recent events
-            if len(events) > self.max_events:
-                events = events[-self.max_events:]
-
-            cache.set(self.events_key, events, timeout=self.metrics_retention * 2)
+            self.store.record(
+                event.status == 'success', event.response_time, event_dict, now=event.timestamp.timestamp()
+            )
 
         except Exception as e:
             logger.error(f"Error storing webhook event: {str(e)}")
 
-    def _update_metrics(self, event: WebhookEvent):
-        """Update webhook performance metrics"""
-        try:
-            metrics = self.get_current_metrics()
-
-            # Update counters
-            metrics.total_requests += 1
-
-            if event.status == 'success':
-                metrics.successful_requests += 1
-                metrics.last_success = event.timestamp
-            else:
-                metrics.failed_requests += 1
-                metrics.last_failure = event.timestamp
-
-            # Update response time metrics
-            if event.response_time > 0:
-                if metrics.min_response_time == float('inf'):
-                    metrics.min_response_time = event.response_time
-                else:
-                    metrics.min_response_time = min(metrics.min_response_time, event.response_time)
-
-                metrics.max_response_time = max(metrics.max_response_time, event.response_time)
-
-                # Calculate average (simplified rolling average)
-                if metrics.total_requests == 1:
-                    metrics.avg_response_time = event.response_time
-                else:
-                    metrics.avg_response_time = (
-                        (metrics.avg_response_time * (metrics.total_requests - 1) + event.response_time) /
-                        metrics.total_requests
-                    )
-
-            # Calculate error rate
-            if metrics.total_requests > 0:
-                metrics.error_rate = metrics.failed_requests / metrics.total_requests
-
-            # Store updated metrics
-            metrics_dict = asdict(metrics)
-            metrics_dict['last_success'] = metrics.last_success.isoformat() if metrics.last_success else None
-            metrics_dict['last_failure'] = metrics.last_failure.isoformat() if metrics.last_failure else None
-
-            # Handle infinity values for JSON serialization
-            if metrics.min_response_time == float('inf'):
-                metrics_dict['min_response_time'] = 0.0
-
-            cache.set(self.metrics_key, metrics_dict, timeout=self.metrics_retention)
-
-        except Exception as e:
-            logger.error(f"Error updating webhook metrics: {str(e)}")
-
     def get_current_metrics(self) -> WebhookMetrics:
-        """Get current webhook metrics"""
+        """Webhook metrics over the retention window, merged from the minute buckets"""
         try:
-            metrics_dict = cache.get(self.metrics_key, {})
-
-            if not metrics_dict:
-                return WebhookMetrics()
-
-            # Convert back from dict
-            metrics = WebhookMetrics(**{
-                k: v for k, v in metrics_dict.items()
-                if k in ['total_requests', 'successful_requests', 'failed_requests',
-                        'avg_response_time', 'max_response_time', 'min_response_time', 'error_rate']
-            })
+            totals = self.store.totals()
+            metrics = WebhookMetrics(
+                total_requests=totals.total,
+                successful_requests=totals.success,
+                failed_requests=totals.failed,
+                avg_response_time=totals.avg_ms / 1000,
+                max_response_time=(totals.max_ms or 0) / 1000,
+                min_response_time=totals.min_ms / 1000 if totals.min_ms is not None else float('inf'),
+                error_rate=totals.failed / totals.total if totals.total else 0.0,
+                p50_response_time=totals.percentile_ms(0.50) / 1000,
+                p95_response_time=totals.percentile_ms(0.95) / 1000,
+                p99_response_time=totals.percentile_ms(0.99) / 1000,
+            )
 
-            # Parse datetime fields
-            if metrics_dict.get('last_success'):
-                metrics.last_success = datetime.fromisoformat(metrics_dict['last_success'])
-            if metrics_dict.get('last_failure'):
-                metrics.last_failure = datetime.fromisoformat(metrics_dict['last_failure'])
+            for outcome, name in (('success', 'last_success'), ('failure', 'last_failure')):
+                seen = self.store.last_seen(outcome)
+                if seen is not None:
+                    setattr(metrics, name, datetime.fromtimestamp(seen, tz=dt_timezone.utc))
 
             return metrics
 
@@ -216,21 +187,19 @@ class WebhookMonitor:
     def get_recent_events(self, limit: int = 50, event_type: str = None) -> List[Dict]:
         """Get recent webhook events"""
         try:
-            events = cache.get(self.events_key, [])
-
-            # Filter by event type if specified
-            if event_type:
-                events = [e for e in events if e.get('event_type') == event_type]
+            if not event_type:
+                return self.store.recent_events(limit)
 
-            # Return most recent events
+            # Filter by event type over the whole ring, then keep the most recent
+            events = [e for e in self.store.recent_events() if e.get('event_type') == event_type]
             return events[-limit:] if events else []
 
         except Exception as e:
             logger.error(f"Error getting recent events: {str(e)}")
             return []
 
-    def _update_health_status(self):
-        """Update overall webhook health status"""
+    def _update_health_status(self) -> Dict:
+        """Update overall webhook health status from the metric buckets"""
         try:
             metrics = self.get_current_metrics()
 
@@ -263,12 +232,12 @@ class WebhookMonitor:
                 health_status = WebhookHealthStatus.DEGRADED
                 health_details['issues'].append(f'Error rate above threshold ({metrics.error_rate:.1%})')
 
-            # Check response time
-            if metrics.avg_response_time > self.response_time_threshold * 2:
+            # Check response time (95th percentile, so a few slow calls do not hide behind the mean)
+            if metrics.p95_response_time > self.response_time_threshold * 2:
                 if health_status == WebhookHealthStatus.HEALTHY:
                     health_status = WebhookHealthStatus.UNHEALTHY
                 health_details['issues'].append('Very slow response times')
-            elif metrics.avg_response_time > self.response_time_threshold:
+            elif metrics.p95_response_time > self.response_time_threshold:
                 if health_status == WebhookHealthStatus.HEALTHY:
                     health_status = WebhookHealthStatus.DEGRADED
                 health_details['issues'].append('Slow response times')
@@ -282,44 +251,52 @@ class WebhookMonitor:
                     health_details['issues'].append('Recent failures detected')
 
             health_details['status'] = health_status
-            cache.set(self.health_key, health_details, timeout=self.metrics_retention)
+            self.store.cache.set(self.health_key, health_details, timeout=self.metrics_retention)
+
+            # High error rate alert
+            if metrics.error_rate > self.error_threshold and metrics.total_requests >= 10:
+                self._store_alerts([{
+                    'type': 'HIGH_ERROR_RATE',
+                    'severity': 'warning',
+                    'message': f'Webhook error rate is {metrics.error_rate:.1%}',
+                    'timestamp': timezone.now().isoformat()
+                }])
+
+            return health_details
 
         except Exception as e:
             logger.error(f"Error updating health status: {str(e)}")
+            return {}
 
     def get_health_status(self) -> Dict:
         """Get current webhook health status"""
         try:
+            health = self.store.cache.get(self.health_key)
+            if health is None and self.store.totals().total:
+                health = self._update_health_status()
+            if health:
+                return health
+
             default_metrics = asdict(WebhookMetrics())
             # Handle infinity values for JSON serialization
             if default_metrics['min_response_time'] == float('inf'):
                 default_metrics['min_response_time'] = 0.0
 
-            return cache.get(self.health_key, {
+            return {
                 'status': WebhookHealthStatus.HEALTHY,
                 'timestamp': timezone.now().isoformat(),
                 'metrics': default_metrics,
                 'issues': []
-            })
+            }
         except Exception as e:
             logger.error(f"Error getting health status: {str(e)}")
             return {'status': WebhookHealthStatus.CRITICAL, 'issues': ['Monitoring system error']}
 
     def _check_alerts(self, event: WebhookEvent):
-        """Check if event should trigger alerts"""
+        """Check if event should trigger alerts (the error rate is checked with the health status)"""
         try:
             alerts = []
 
-            # High error rate alert
-            metrics = self.get_current_metrics()
-            if metrics.error_rate > self.error_threshold and metrics.total_requests >= 10:
-                alerts.append({
-                    'type': 'HIGH_ERROR_RATE',
-                    'severity': 'warning',
-                    'message': f'Webhook error rate is {metrics.error_rate:.1%}',
-                    'timestamp': timezone.now().isoformat()
-                })
-
             # Slow response time alert
             if event.response_time > self.response_time_threshold:
                 alerts.append({
@@ -338,31 +315,33 @@ class WebhookMonitor:
                     'timestamp': timezone.now().isoformat()
                 })
 
-            # Store alerts
             if alerts:
-                existing_alerts = cache.get(self.alerts_key, [])
-                existing_alerts.extend(alerts)
+                self._store_alerts(alerts)
 
-                # Keep only recent alerts (last 24 hours worth)
-                cutoff_time = timezone.now() - timedelta(hours=24)
-                existing_alerts = [
-                    alert for alert in existing_alerts
-                    if datetime.fromisoformat(alert['timestamp']) > cutoff_time
-                ]
+        except Exception as e:
+            logger.error(f"Error checking alerts: {str(e)}")
 
-                cache.set(self.alerts_key, existing_alerts, timeout=86400)  # 24 hours
+    def _store_alerts(self, alerts: List[Dict]):
+        existing_alerts = self.store.cache.get(self.alerts_key, [])
+        existing_alerts.extend(alerts)
 
-                # Log alerts
-                for alert in alerts:
-                    logger.warning(f"Webhook Alert: {alert['type']} - {alert['message']}")
+        # Keep only recent alerts (last 24 hours worth)
+        cutoff_time = timezone.now() - timedelta(hours=24)
+        existing_alerts = [
+            alert for alert in existing_alerts
+            if datetime.fromisoformat(alert['timestamp']) > cutoff_time
+        ]
 
-        except Exception as e:
-            logger.error(f"Error checking alerts: {str(e)}")
+        self.store.cache.set(self.alerts_key, existing_alerts, timeout=86400)  # 24 hours
+
+        # Log alerts
+        for alert in alerts:
+            logger.warning(f"Webhook Alert: {alert['type']} - {alert['message']}")
 
     def get_alerts(self, severity: str = None) -> List[Dict]:
         """Get webhook alerts"""
         try:
-            alerts = cache.get(self.alerts_key, [])
+            alerts = self.store.cache.get(self.alerts_key, [])
 
             if severity:
                 alerts = [alert for alert in alerts if alert.get('severity') == severity]
@@ -374,76 +353,62 @@ class WebhookMonitor:
             return []
 
     def get_performance_analytics(self, hours: int = 24) -> Dict:
-        """Get detailed performance analytics"""
+        """
+        Detailed performance analytics: counts and latency percentiles from the hourly
+        buckets, error types and clients from the events still in the ring
+        """
         try:
-            events = self.get_recent_events(limit=self.max_events)
-
-            # Filter events by time window
-            cutoff_time = timezone.now() - timedelta(hours=hours)
-            recent_events = [
-                event for event in events
-                if datetime.fromisoformat(event['timestamp']) > cutoff_time
-            ]
+            now = time.time()
+            hourly = self.store.hourly(hours, now=now)
 
-            if not recent_events:
+            if not hourly:
                 return {
                     'total_events': 0,
                     'success_rate': 0,
                     'avg_response_time': 0,
+                    'p50_response_time': 0,
+                    'p95_response_time': 0,
+                    'p99_response_time': 0,
                     'hourly_breakdown': [],
                     'error_types': {},
                     'top_clients': {}
                 }
 
-            # Calculate analytics
-            total_events = len(recent_events)
-            successful_events = len([e for e in recent_events if e['status'] == 'success'])
-            success_rate = (successful_events / total_events) * 100 if total_events > 0 else 0
+            totals = WebhookMetricsStore.merge_buckets(bucket for _, bucket in hourly)
+            success_rate = (totals.success / totals.total) * 100 if totals.total > 0 else 0
 
-            response_times = [e['response_time'] for e in recent_events if e['response_time'] > 0]
-            avg_response_time = sum(response_times) / len(response_times) if response_times else 0
+            # Error types and clients of the events in the window (numeric timestamps, no parsing)
+            cutoff = now - hours * HOUR
+            recent_events = [event for event in self.store.recent_events() if event.get('ts', 0) > cutoff]
 
-            # Hourly breakdown
-            hourly_data = {}
-            for event in recent_events:
-                hour = datetime.fromisoformat(event['timestamp']).strftime('%Y-%m-%d %H:00')
-                if hour not in hourly_data:
-                    hourly_data[hour] = {'total': 0, 'success': 0, 'errors': 0}
-
-                hourly_data[hour]['total'] += 1
-                if event['status'] == 'success':
-                    hourly_data[hour]['success'] += 1
-                else:
-                    hourly_data[hour]['errors'] += 1
-
-            # Error types
             error_types = {}
+            client_ips = {}
             for event in recent_events:
                 if event['status'] != 'success' and event.get('error_message'):
                     error_type = event['error_message'][:50]  # Truncate for grouping
                     error_types[error_type] = error_types.get(error_type, 0) + 1
-
-            # Top clients by IP
-            client_ips = {}
-            for event in recent_events:
                 ip = event.get('client_ip', 'unknown')
                 client_ips[ip] = client_ips.get(ip, 0) + 1
 
             top_clients = sorted(client_ips.items(), key=lambda x: x[1], reverse=True)[:10]
 
             return {
-                'total_events': total_events,
+                'total_events': totals.total,
                 'success_rate': round(success_rate, 2),
-                'avg_response_time': round(avg_response_time, 3),
+                'avg_response_time': round(totals.avg_ms / 1000, 3),
+                'p50_response_time': round(totals.percentile_ms(0.50) / 1000, 3),
+                'p95_response_time': round(totals.percentile_ms(0.95) / 1000, 3),
+                'p99_response_time': round(totals.percentile_ms(0.99) / 1000, 3),
                 'hourly_breakdown': [
                     {
-                        'hour': hour,
-                        'total': data['total'],
-                        'success': data['success'],
-                        'errors': data['errors'],
-                        'success_rate': round((data['success'] / data['total']) * 100, 1) if data['total'] > 0 else 0
+                        'hour': datetime.fromtimestamp(hour, tz=dt_timezone.utc).strftime('%Y-%m-%d %H:00'),
+                        'total': bucket.total,
+                        'success': bucket.success,
+                        'errors': bucket.failed,
+                        'success_rate': round((bucket.success / bucket.total) * 100, 1) if bucket.total > 0 else 0,
+                        'p95_response_time': round(bucket.percentile_ms(0.95) / 1000, 3),
                     }
-                    for hour, data in sorted(hourly_data.items())
+                    for hour, bucket in hourly
                 ],
                 'error_types': dict(sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:10]),
                 'top_clients': [{'ip': ip, 'requests': count} for ip, count in top_clients]
@@ -456,10 +421,10 @@ class WebhookMonitor:
     def reset_metrics(self):
         """Reset all webhook metrics (for testing/maintenance)"""
         try:
-            cache.delete(self.metrics_key)
-            cache.delete(self.events_key)
-            cache.delete(self.health_key)
-            cache.delete(self.alerts_key)
+            self.store.reset()
+            self.store.cache.delete(self.health_key)
+            self.store.cache.delete(self.alerts_key)
+            self.store.cache.delete(self.health_refresh_key)
             logger.info("Webhook metrics reset successfully")
         except Exception as e:
             logger.error(f"Error resetting metrics: {str(e)}")
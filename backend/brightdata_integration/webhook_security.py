@@ -4,7 +4,7 @@ Enhanced Webhook Security Module for Professional-Grade BrightData Integration
 This module implements enterprise-level security measures for webhook endpoints:
 - HMAC signature verification
 - Timestamp-based replay attack prevention
-- Rate limiting and IP whitelisting
+- Rate limiting (shared token buckets, see rate_limit) and IP whitelisting
 - Comprehensive logging and monitoring
 - Certificate pinning support
 """
@@ -18,13 +18,16 @@ import ipaddress
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from django.conf import settings
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import InvalidCacheBackendError
 from django.http import HttpRequest
 from django.utils.crypto import constant_time_compare
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+from .rate_limit import ReplayCache, TokenBucketLimiter
+
 logger = logging.getLogger(__name__)
 
 class WebhookSecurityError(Exception):
@@ -50,11 +53,24 @@ class EnhancedWebhookSecurity:
 
     def __init__(self):
         self.webhook_token = getattr(settings, 'BRIGHTDATA_WEBHOOK_TOKEN', '')
-        self.max_timestamp_age = getattr(settings, 'WEBHOOK_MAX_TIMESTAMP_AGE', 300)  # 5 minutes
-        self.rate_limit = getattr(settings, 'WEBHOOK_RATE_LIMIT', 100)  # requests per minute
+        self.max_timestamp_age = int(getattr(settings, 'WEBHOOK_MAX_TIMESTAMP_AGE', 300))  # 5 minutes
+        self.rate_limit = int(getattr(settings, 'WEBHOOK_RATE_LIMIT', 100))  # requests per minute
+        self.rate_burst = int(getattr(settings, 'WEBHOOK_RATE_BURST', 0) or self.rate_limit)
         self.allowed_ips = getattr(settings, 'WEBHOOK_ALLOWED_IPS', [])
         self.enable_certificate_pinning = getattr(settings, 'WEBHOOK_ENABLE_CERT_PINNING', False)
 
+        security_cache = self._security_cache()
+        self.rate_limiter = TokenBucketLimiter(security_cache, capacity=self.rate_burst, refill_rate=self.rate_limit / 60)
+        self.replay_cache = ReplayCache(security_cache, window=self.max_timestamp_age * 2)
+
+    @staticmethod
+    def _security_cache():
+        alias = getattr(settings, 'WEBHOOK_SECURITY_CACHE', 'webhook_security')
+        try:
+            return caches[alias]
+        except InvalidCacheBackendError:
+            return cache
+
     def verify_webhook_signature(self, request: HttpRequest, payload: bytes) -> bool:
         """
         Verify HMAC signature of webhook payload
@@ -98,21 +114,17 @@ class EnhancedWebhookSecurity:
             logger.error(f"Error verifying webhook signature: {str(e)}")
             return False
 
-    def verify_timestamp(self, request: HttpRequest) -> bool:
+    def verify_timestamp(self, request: HttpRequest, payload=None) -> bool:
         """
-        Verify timestamp to prevent replay attacks
+        Verify timestamp to prevent replay attacks. payload is the already parsed JSON
+        body, consulted when no timestamp header is sent.
         """
         try:
             timestamp_header = request.headers.get('X-BrightData-Timestamp') or request.headers.get('X-Timestamp')
 
-            if not timestamp_header:
+            if not timestamp_header and isinstance(payload, dict):
                 # If no timestamp provided, check if payload contains one
-                try:
-                    if hasattr(request, 'body'):
-                        payload = json.loads(request.body)
-                        timestamp_header = payload.get('timestamp')
-                except (json.JSONDecodeError, AttributeError):
-                    pass
+                timestamp_header = payload.get('timestamp')
 
             if not timestamp_header:
                 logger.warning("No timestamp found in webhook request")
@@ -138,36 +150,43 @@ class EnhancedWebhookSecurity:
                 logger.warning(f"Webhook timestamp too old. Diff: {time_diff}s, Max: {self.max_timestamp_age}s")
                 return False
 
-            # Check for potential replay attack
-            replay_key = f"webhook_replay_{webhook_time}_{request.headers.get('X-BrightData-ID', 'unknown')}"
-            if cache.get(replay_key):
-                logger.warning(f"Potential replay attack detected: {replay_key}")
+            # Check for potential replay attack: the same signed delivery seen twice
+            fingerprint = self.replay_fingerprint(request, webhook_time)
+            if not self.replay_cache.first_seen(fingerprint):
+                logger.warning(f"Potential replay attack detected: {fingerprint[:16]}...")
                 return False
 
-            # Store timestamp to prevent replay
-            cache.set(replay_key, True, timeout=self.max_timestamp_age * 2)
-
             return True
 
         except Exception as e:
             logger.error(f"Error verifying webhook timestamp: {str(e)}")
             return False
 
+    def replay_fingerprint(self, request: HttpRequest, webhook_time: int) -> str:
+        """
+        Digest of the delivery's signature and timestamp. A bearer token (or no
+        signature) is the same for every delivery, so the body stands in for it.
+        """
+        signature = request.headers.get('X-BrightData-Signature') or request.headers.get('Authorization', '')
+        if not signature or signature.startswith('Bearer ') or 'sha256=' not in signature:
+            body = getattr(request, 'body', b'') or b''
+            signature = hashlib.sha256(body if isinstance(body, bytes) else body.encode()).hexdigest()
+        return hashlib.sha256(f'{signature}:{webhook_time}'.encode()).hexdigest()
+
     def check_rate_limit(self, request: HttpRequest) -> bool:
         """
-        Check if request exceeds rate limits
+        Take a token from the client's bucket (WEBHOOK_RATE_BURST tokens, refilled at
+        WEBHOOK_RATE_LIMIT per minute)
         """
         try:
             client_ip = self.get_client_ip(request)
-            rate_key = f"webhook_rate_{client_ip}"
-
-            current_requests = cache.get(rate_key, 0)
-            if current_requests >= self.rate_limit:
-                logger.warning(f"Rate limit exceeded for IP {client_ip}: {current_requests}/{self.rate_limit}")
+            decision = self.rate_limiter.consume(client_ip)
+            if not decision.allowed:
+                logger.warning(
+                    f"Rate limit exceeded for IP {client_ip}: {self.rate_limit}/min, "
+                    f"burst {self.rate_burst}, retry in {decision.retry_after:.1f}s"
+                )
                 return False
-
-            # Increment counter with 1-minute expiry
-            cache.set(rate_key, current_requests + 1, timeout=60)
             return True
 
         except Exception as e:
@@ -323,9 +342,10 @@ class EnhancedWebhookSecurity:
         except Exception as e:
             logger.error(f"Error logging security event: {str(e)}")
 
-    def comprehensive_webhook_validation(self, request: HttpRequest) -> Tuple[bool, dict]:
+    def comprehensive_webhook_validation(self, request: HttpRequest, parsed_payload=None) -> Tuple[bool, dict]:
         """
-        Perform comprehensive webhook validation
+        Perform comprehensive webhook validation. Callers that already decoded the
+        JSON body pass it as parsed_payload so it is not decoded again.
         """
         validation_result = {
             'valid': True,
@@ -335,8 +355,14 @@ class EnhancedWebhookSecurity:
         }
 
         try:
-            # Get request payload
+            # Get request payload, decoded once
             payload = request.body
+            json_error = None
+            if parsed_payload is None and payload:
+                try:
+                    parsed_payload = json.loads(payload)
+                except json.JSONDecodeError as e:
+                    json_error = e
 
             # 1. Rate limiting check
             if not self.check_rate_limit(request):
@@ -362,22 +388,20 @@ class EnhancedWebhookSecurity:
                 self.log_webhook_security_event(request, 'INVALID_SIGNATURE', {})
 
             # 4. Timestamp verification
-            if not self.verify_timestamp(request):
+            if not self.verify_timestamp(request, parsed_payload):
                 validation_result['warnings'].append('Invalid or missing timestamp')
                 validation_result['security_score'] -= 20
                 self.log_webhook_security_event(request, 'INVALID_TIMESTAMP', {})
 
             # 5. Payload validation
-            if payload:
-                try:
-                    parsed_payload = json.loads(payload)
-                    is_valid, errors = self.validate_webhook_payload(parsed_payload)
-                    if not is_valid:
-                        validation_result['warnings'].extend(errors)
-                        validation_result['security_score'] -= 10
-                except json.JSONDecodeError:
-                    validation_result['warnings'].append('Invalid JSON payload')
-                    validation_result['security_score'] -= 15
+            if json_error is not None:
+                validation_result['warnings'].append('Invalid JSON payload')
+                validation_result['security_score'] -= 15
+            elif parsed_payload is not None:
+                is_valid, errors = self.validate_webhook_payload(parsed_payload)
+                if not is_valid:
+                    validation_result['warnings'].extend(errors)
+                    validation_result['security_score'] -= 10
 
             return validation_result['valid'], validation_result
 
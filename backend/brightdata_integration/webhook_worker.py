@@ -0,0 +1,352 @@
+"""
+Background processing of persisted BrightData webhook events
+
+The webhook endpoint only stores a WebhookEvent and acknowledges it; this module
+does the slow part (downloading file_url snapshots and ingesting posts):
+- events are claimed with row locking (SELECT ... FOR UPDATE SKIP LOCKED where supported)
+- claimed events are processed in a bounded thread pool
+- events of the same snapshot are processed strictly in arrival order
+- events left in 'processing' by a crashed worker are re-queued after a lease timeout;
+  a running worker renews its lease after each ingestion chunk, and only records
+  the outcome of an event whose lease it still holds
+- every recorded outcome (and retry) is counted by webhook_monitor, so the webhook
+  dashboards show processing times and error rates across all workers
+"""
+
+import os
+import socket
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from .ingestion import get_ingest_batch_size
+from .models import WebhookEvent, ScraperRequest
+from .snapshot_stream import SnapshotFormatError, iter_url_records, peek_records
+from .webhook_monitor import webhook_monitor
+
+logger = logging.getLogger(__name__)
+
+# Statuses of events that still hold their snapshot's place in the queue
+OPEN_STATUSES = ('pending', 'processing')
+
+
+class RetryableWebhookError(Exception):
+    """Transient failure (e.g. snapshot download); the event is re-queued until attempts run out"""
+
+
+class LeaseLostError(Exception):
+    """The event was re-queued as stale and claimed by another worker mid-ingestion"""
+
+
+def _stream_file_url(file_url: str):
+    timeout = getattr(settings, 'WEBHOOK_FILE_DOWNLOAD_TIMEOUT', 120)
+    try:
+        yield from iter_url_records(file_url, timeout=timeout)
+    except requests.RequestException as e:
+        # Only transport failures are retried: a malformed body (SnapshotFormatError)
+        # would be just as malformed next time. Ingestion is an idempotent upsert, so
+        # a retry may safely replay posts already written
+        raise RetryableWebhookError(f'Failed to fetch data from file_url: {str(e)}') from e
+
+
+def load_event_posts(event: WebhookEvent):
+    """
+    Resolve the posts carried by an event; file_url snapshots are streamed,
+    so the result may be a lazy iterator rather than a list
+    """
+    data = event.raw_payload
+    if isinstance(data, dict) and 'file_url' in data:
+        if 'fetched_data' in data:
+            return data['fetched_data']
+        return _stream_file_url(data['file_url'])
+    return data if isinstance(data, list) else data.get('data', [])
+
+
+def update_related_statuses(scraper_requests: List[ScraperRequest], success: bool = True) -> None:
+    """Update all related statuses (ScraperRequest, BatchScraperJob, ScrapingJob, ScrapingRun)"""
+    if not scraper_requests:
+        return
+
+    from workflow.models import ScrapingJob, WorkflowTask
+
+    try:
+        # Get all unique batch jobs
+        batch_jobs = {r.batch_job for r in scraper_requests if r.batch_job}
+
+        # Update ScraperRequest statuses
+        status = 'completed' if success else 'failed'
+        ScraperRequest.objects.filter(id__in=[r.id for r in scraper_requests]).update(
+            status=status,
+            completed_at=timezone.now() if success else None,
+            error_message=None if success else 'Failed to process webhook data'
+        )
+
+        for batch_job in batch_jobs:
+            try:
+                # Update BatchScraperJob
+                if batch_job.status != status:
+                    batch_job.status = status
+                    if not success:
+                        batch_job.error_log = 'Failed to process webhook data'
+                    batch_job.save()
+
+                # Update WorkflowTask statuses (legacy)
+                WorkflowTask.objects.filter(batch_job=batch_job).exclude(status=status).update(status=status)
+
+                # Update ScrapingJob statuses (ScrapingJob.save() refreshes the parent run)
+                for scraping_job in ScrapingJob.objects.filter(batch_job=batch_job).exclude(status=status):
+                    scraping_job.status = status
+                    if success:
+                        scraping_job.completed_at = timezone.now()
+                    else:
+                        scraping_job.error_message = 'Failed to process webhook data'
+                    scraping_job.save()
+            except Exception as e:
+                logger.error(f"Error updating batch job {batch_job.id} statuses: {str(e)}")
+
+    except Exception as e:
+        logger.error(f"Error updating related statuses: {str(e)}")
+
+
+class WebhookWorker:
+    """
+    Claims pending WebhookEvents and processes them with bounded parallelism
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, stale_after: Optional[int] = None,
+                 max_attempts: Optional[int] = None, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency or getattr(settings, 'WEBHOOK_WORKER_CONCURRENCY', 4))
+        self.stale_after = stale_after or getattr(settings, 'WEBHOOK_WORKER_STALE_AFTER', 900)
+        self.max_attempts = max_attempts or getattr(settings, 'WEBHOOK_WORKER_MAX_ATTEMPTS', 3)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def recover_stale_events(self) -> int:
+        """Re-queue events whose worker died mid-processing (lease expired)"""
+        cutoff = timezone.now() - timedelta(seconds=self.stale_after)
+        stale = WebhookEvent.objects.filter(status='processing').filter(
+            Q(locked_at__lt=cutoff) | Q(locked_at__isnull=True, received_at__lt=cutoff)
+        )
+
+        exhausted = stale.filter(attempts__gte=self.max_attempts).update(
+            status='failed',
+            error_message='Processing abandoned by worker; retry limit reached',
+            processed_at=timezone.now(),
+            locked_at=None,
+            locked_by=None,
+        )
+        requeued = stale.filter(attempts__lt=self.max_attempts).update(
+            status='pending', locked_at=None, locked_by=None
+        )
+
+        if requeued or exhausted:
+            logger.warning(f"Recovered stale webhook events: {requeued} re-queued, {exhausted} failed")
+        return requeued + exhausted
+
+    def claim_events(self, limit: int) -> List[WebhookEvent]:
+        """
+        Atomically move up to `limit` pending events to 'processing'.
+
+        An event is only claimable when it is the oldest open event of its snapshot,
+        so later deliveries of a snapshot never overtake earlier ones.
+        """
+        if limit <= 0:
+            return []
+
+        now = timezone.now()
+        with transaction.atomic():
+            candidates = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status='pending')
+                .order_by('id')
+                .only('id', 'snapshot_id')[:limit * 4]
+            )
+            if not candidates:
+                return []
+
+            snapshot_ids = {event.snapshot_id for event in candidates if event.snapshot_id}
+            first_open: Dict[str, int] = dict(
+                WebhookEvent.objects.filter(snapshot_id__in=snapshot_ids, status__in=OPEN_STATUSES)
+                .values('snapshot_id')
+                .annotate(first_id=Min('id'))
+                .values_list('snapshot_id', 'first_id')
+            )
+
+            claim_ids = []
+            for event in candidates:
+                if event.snapshot_id and first_open.get(event.snapshot_id) != event.id:
+                    continue  # an earlier event of this snapshot is still open
+                claim_ids.append(event.id)
+                if len(claim_ids) >= limit:
+                    break
+
+            WebhookEvent.objects.filter(id__in=claim_ids, status='pending').update(
+                status='processing',
+                locked_at=now,
+                locked_by=self.worker_id,
+                attempts=F('attempts') + 1,
+            )
+
+        return list(
+            WebhookEvent.objects.filter(
+                id__in=claim_ids, status='processing', locked_by=self.worker_id, locked_at=now
+            ).order_by('id')
+        )
+
+    def process_event(self, event: WebhookEvent) -> bool:
+        """Ingest one claimed event and record the outcome"""
+        from .views import _detect_platform_from_data, _process_webhook_data_with_batch_support
+
+        start_time = time.time()
+        scraper_requests = []
+        error_message = None
+        success = False
+
+        try:
+            posts_data = load_event_posts(event)
+            platform = event.platform
+            if not platform:
+                posts_data, sample = peek_records(posts_data)
+                platform = _detect_platform_from_data(sample)
+            posts_data = self._renewing_lease(event, posts_data)
+
+            if event.snapshot_id:
+                scraper_requests = list(
+                    ScraperRequest.objects.filter(request_id=event.snapshot_id)
+                    .select_related('batch_job')
+                    .order_by('created_at')
+                )
+            if not scraper_requests:
+                logger.warning(f"No scraper requests found for snapshot_id: {event.snapshot_id}")
+
+            success = _process_webhook_data_with_batch_support(posts_data, platform, scraper_requests)
+            if not success:
+                error_message = 'Failed to process webhook data'
+        except RetryableWebhookError as e:
+            error_message = str(e)
+            if event.attempts < self.max_attempts:
+                logger.warning(f"Webhook event {event.id} will be retried: {error_message}")
+                requeued = self._leased(event).update(
+                    status='pending', error_message=error_message, locked_at=None, locked_by=None
+                )
+                if requeued:
+                    self._record_metrics(event, False, start_time, error_message)
+                return False
+        except SnapshotFormatError as e:
+            logger.error(f"Webhook event {event.id} has a malformed snapshot: {str(e)}")
+            error_message = f'Malformed snapshot: {str(e)[:200]}'
+        except Exception as e:
+            logger.exception(f"Error processing webhook event {event.id}")
+            error_message = f'Processing error: {str(e)[:200]}'
+
+        finished = self._leased(event).update(
+            status='completed' if success else 'failed',
+            error_message=error_message,
+            processed_at=timezone.now(),
+            locked_at=None,
+            locked_by=None,
+        )
+        if not finished:
+            # The worker now holding the event records its outcome
+            logger.warning(f"Webhook event {event.id} lease was lost to another worker; outcome not recorded")
+            return False
+        update_related_statuses(scraper_requests, success=success)
+        self._record_metrics(event, success, start_time, error_message)
+
+        logger.info(f"Webhook event {event.id} ({event.snapshot_id}) "
+                    f"{'completed' if success else 'failed'} in {round(time.time() - start_time, 3)}s")
+        return success
+
+    @staticmethod
+    def _record_metrics(event: WebhookEvent, success: bool, start_time: float,
+                        error_message: Optional[str] = None) -> None:
+        webhook_monitor.record_webhook_event(
+            'data_delivery',
+            'success' if success else 'error',
+            response_time=time.time() - start_time,
+            error_message=error_message,
+            metadata={'webhook_event_id': event.id, 'snapshot_id': event.snapshot_id, 'platform': event.platform},
+        )
+
+    def _leased(self, event: WebhookEvent):
+        """The event, if this worker still holds its lease"""
+        return WebhookEvent.objects.filter(pk=event.pk, status='processing', locked_by=self.worker_id)
+
+    def renew_lease(self, event: WebhookEvent) -> bool:
+        return self._leased(event).update(locked_at=timezone.now()) > 0
+
+    def _renewing_lease(self, event: WebhookEvent, posts):
+        """
+        Yield the posts, renewing the event's lease each time the ingestor comes
+        back for the next chunk; stops if the lease was lost meanwhile
+        """
+        batch_size = get_ingest_batch_size()
+        for index, post in enumerate(posts, 1):
+            yield post
+            if index % batch_size == 0 and not self.renew_lease(event):
+                raise LeaseLostError(f'Webhook event {event.id} was claimed by another worker')
+
+    def process_now(self, event: WebhookEvent) -> bool:
+        """Claim a specific pending event and process it in the calling thread"""
+        claimed = WebhookEvent.objects.filter(pk=event.pk, status='pending').update(
+            status='processing',
+            locked_at=timezone.now(),
+            locked_by=self.worker_id,
+            attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            return False
+        event.refresh_from_db()
+        return self.process_event(event)
+
+    def _process_in_thread(self, event: WebhookEvent) -> bool:
+        try:
+            return self.process_event(event)
+        finally:
+            # Each pool thread holds its own connection; don't leak it
+            connection.close()
+
+    def run_once(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Recover, claim one batch and process it; returns a summary"""
+        self.recover_stale_events()
+        events = self.claim_events(limit or self.concurrency)
+
+        if self.concurrency == 1 or len(events) <= 1:
+            results = [self.process_event(event) for event in events]
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                results = list(pool.map(self._process_in_thread, events))
+
+        return {
+            'processed': len(results),
+            'successful': sum(1 for result in results if result),
+            'failed': sum(1 for result in results if not result),
+        }
+
+    def run_forever(self, poll_interval: float = 2.0) -> None:
+        """Keep the pool full: claim new events as soon as a slot frees up"""
+        logger.info(f"Webhook worker {self.worker_id} started (concurrency: {self.concurrency})")
+        last_recovery = 0.0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = set()
+            while True:
+                if time.time() - last_recovery >= min(self.stale_after, 60):
+                    self.recover_stale_events()
+                    last_recovery = time.time()
+
+                for event in self.claim_events(self.concurrency - len(in_flight)):
+                    in_flight.add(pool.submit(self._process_in_thread, event))
+
+                if in_flight:
+                    done, in_flight = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    in_flight = set(in_flight)
+                else:
+                    time.sleep(poll_interval)
@@ -446,16 +446,62 @@ if (os.getenv('PLATFORM_APPLICATION_NAME') is not None):
 
 # Add webhook configuration
 WEBHOOK_RATE_LIMIT = os.environ.get('WEBHOOK_RATE_LIMIT', 100)  # requests per minute
+WEBHOOK_RATE_BURST = int(os.environ.get('WEBHOOK_RATE_BURST', 0))  # bucket size, 0: one minute's worth
+WEBHOOK_SECURITY_CACHE = os.environ.get('WEBHOOK_SECURITY_CACHE', 'webhook_security')
 WEBHOOK_MAX_TIMESTAMP_AGE = os.environ.get('WEBHOOK_MAX_TIMESTAMP_AGE', 300)  # 5 minutes
 WEBHOOK_MAX_EVENTS = os.environ.get('WEBHOOK_MAX_EVENTS', 1000)
 WEBHOOK_METRICS_RETENTION = os.environ.get('WEBHOOK_METRICS_RETENTION', 3600)  # 1 hour
+WEBHOOK_METRICS_CACHE = os.environ.get('WEBHOOK_METRICS_CACHE', 'webhook_security')  # cache alias holding metric buckets, shared by every process
+WEBHOOK_HEALTH_REFRESH_INTERVAL = int(os.environ.get('WEBHOOK_HEALTH_REFRESH_INTERVAL', 5))  # seconds between health checks
 WEBHOOK_ERROR_THRESHOLD = os.environ.get('WEBHOOK_ERROR_THRESHOLD', 0.1)  # 10%
 WEBHOOK_RESPONSE_TIME_THRESHOLD = os.environ.get('WEBHOOK_RESPONSE_TIME_THRESHOLD', 5.0)  # 5 seconds
 WEBHOOK_ENABLE_CERT_PINNING = os.environ.get('WEBHOOK_ENABLE_CERT_PINNING', 'False').lower() == 'true'
+WEBHOOK_INGEST_BATCH_SIZE = int(os.environ.get('WEBHOOK_INGEST_BATCH_SIZE', 500))  # posts per bulk write
+WEBHOOK_ASYNC_PROCESSING = os.environ.get('WEBHOOK_ASYNC_PROCESSING', 'True').lower() == 'true'  # ack with 202, ingest in worker
+WEBHOOK_WORKER_CONCURRENCY = int(os.environ.get('WEBHOOK_WORKER_CONCURRENCY', 4))  # events processed in parallel
+WEBHOOK_WORKER_STALE_AFTER = int(os.environ.get('WEBHOOK_WORKER_STALE_AFTER', 900))  # 15 minutes before re-queueing
+WEBHOOK_WORKER_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_WORKER_MAX_ATTEMPTS', 3))
+WEBHOOK_FILE_DOWNLOAD_TIMEOUT = int(os.environ.get('WEBHOOK_FILE_DOWNLOAD_TIMEOUT', 120))  # seconds
 
 # Webhook IP whitelist (comma-separated)
 WEBHOOK_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('WEBHOOK_ALLOWED_IPS', '').split(',') if ip.strip()]
 
+# BrightData API client
+BRIGHTDATA_API_URL = os.environ.get('BRIGHTDATA_API_URL', 'https://api.brightdata.com')  # point at run_fake_brightdata for offline runs
+BRIGHTDATA_CONNECT_TIMEOUT = float(os.environ.get('BRIGHTDATA_CONNECT_TIMEOUT', 5))  # seconds
+BRIGHTDATA_READ_TIMEOUT = float(os.environ.get('BRIGHTDATA_READ_TIMEOUT', 60))  # seconds
+BRIGHTDATA_MAX_RETRIES = int(os.environ.get('BRIGHTDATA_MAX_RETRIES', 4))  # retries on 429/5xx and connection errors
+BRIGHTDATA_BACKOFF_BASE = float(os.environ.get('BRIGHTDATA_BACKOFF_BASE', 0.5))  # seconds, doubled per retry (full jitter)
+BRIGHTDATA_BACKOFF_MAX = float(os.environ.get('BRIGHTDATA_BACKOFF_MAX', 30))  # seconds
+BRIGHTDATA_MAX_CONCURRENCY = int(os.environ.get('BRIGHTDATA_MAX_CONCURRENCY', 4))  # trigger calls in flight per batch job
+
+# Scheduled scraping tasks (run_scheduler)
+SCHEDULER_MAX_JOBS_PER_PROJECT = int(os.environ.get('SCHEDULER_MAX_JOBS_PER_PROJECT', 2))  # pending/processing batch jobs per project
+SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', 20))  # due tasks claimed per pass
+SCHEDULER_CONCURRENCY = int(os.environ.get('SCHEDULER_CONCURRENCY', 4))  # batch jobs executed in parallel
+SCHEDULER_MAX_SLEEP = float(os.environ.get('SCHEDULER_MAX_SLEEP', 60))  # seconds; picks up new and edited tasks
+SCHEDULER_DEFER_SECONDS = int(os.environ.get('SCHEDULER_DEFER_SECONDS', 60))  # retry delay for tasks of a busy project
+SCHEDULER_JOB_TIMEOUT = int(os.environ.get('SCHEDULER_JOB_TIMEOUT', 6 * 3600))  # older active jobs stop counting against the limit
+
+# AI analysis chat snapshots (see scrapy_integration.analysis_snapshot)
+AI_ANALYSIS_SNAPSHOT_CACHE = os.environ.get('AI_ANALYSIS_SNAPSHOT_CACHE', 'default')  # cache alias holding the snapshots
+AI_ANALYSIS_SNAPSHOT_TIMEOUT = int(os.environ.get('AI_ANALYSIS_SNAPSHOT_TIMEOUT', 3600))  # seconds; bounds staleness after untracked writes
+
+# AI chat retrieval index (see scrapy_integration.retrieval_index)
+AI_RETRIEVAL_INDEX_DIR = os.environ.get('AI_RETRIEVAL_INDEX_DIR', str(BASE_DIR / 'retrieval_index'))  # one directory per project, shared by web and workers
+AI_RETRIEVAL_FEATURES = int(os.environ.get('AI_RETRIEVAL_FEATURES', 1 << 20))  # hashed term buckets (power of two)
+AI_RETRIEVAL_TOP_K = int(os.environ.get('AI_RETRIEVAL_TOP_K', 8))  # posts and comments put in each chat prompt
+
+# Data exports
+CSV_EXPORT_CHUNK_SIZE = int(os.environ.get('CSV_EXPORT_CHUNK_SIZE', 2000))  # rows fetched per cursor round-trip
+COLUMNAR_EXPORT_ROW_GROUP_SIZE = int(os.environ.get('COLUMNAR_EXPORT_ROW_GROUP_SIZE', 10000))  # rows per Parquet row group / Arrow batch
+
+# CSV imports
+CSV_IMPORT_BATCH_SIZE = int(os.environ.get('CSV_IMPORT_BATCH_SIZE', 500))  # rows per bulk write
+CSV_IMPORT_ASYNC_THRESHOLD_BYTES = int(os.environ.get('CSV_IMPORT_ASYNC_THRESHOLD_BYTES', 10 * 1024 * 1024))  # larger uploads run in process_csv_imports; 0 = always inline
+CSV_IMPORT_WORKER_STALE_AFTER = int(os.environ.get('CSV_IMPORT_WORKER_STALE_AFTER', 900))  # seconds without progress before re-queueing
+CSV_IMPORT_WORKER_MAX_ATTEMPTS = int(os.environ.get('CSV_IMPORT_WORKER_MAX_ATTEMPTS', 3))
+
 # Auto-detect Upsun/Production URLs
 def get_webhook_base_url():
     """Auto-detect the correct base URL for webhooks based on environment"""
@@ -533,7 +579,15 @@ CACHES = {
             'MAX_ENTRIES': 10000,
             'CULL_FREQUENCY': 3,
         }
-    }
+    },
+    # Webhook rate limit buckets, replay fingerprints and metrics; with REDIS_URL every worker shares them
+    'webhook_security': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'webhook-security',
+    },
 }
 
 # Development-specific webhook settings
@@ -561,3 +615,4 @@ print(f"Webhook Base URL: {BRIGHTDATA_BASE_URL}")  # For debugging
 
 # OpenAI API Configuration (reconstruct from split parts to avoid GitHub detection)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') or (os.getenv('OPENAI_KEY_PREFIX', '') + os.getenv('OPENAI_KEY_SUFFIX', ''))
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None  # OpenAI-compatible endpoint, e.g. a local fake completion server
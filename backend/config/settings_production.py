@@ -140,6 +140,7 @@ BRIGHTDATA_WEBHOOK_TOKEN = os.getenv('BRIGHTDATA_WEBHOOK_TOKEN', '8af6995e-3baa-
 
 # OpenAI configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
 
 # Email configuration for production
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -169,19 +170,73 @@ CACHES = {
             'MAX_ENTRIES': 10000,
             'CULL_FREQUENCY': 3,
         }
-    }
+    },
+    # Webhook rate limit buckets, replay fingerprints and metrics; with REDIS_URL every worker shares them
+    'webhook_security': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'webhook-security',
+    },
 }
 
 # Webhook configuration
 WEBHOOK_RATE_LIMIT = int(os.environ.get('WEBHOOK_RATE_LIMIT', 100))
+WEBHOOK_RATE_BURST = int(os.environ.get('WEBHOOK_RATE_BURST', 0))
+WEBHOOK_SECURITY_CACHE = os.environ.get('WEBHOOK_SECURITY_CACHE', 'webhook_security')
 WEBHOOK_MAX_TIMESTAMP_AGE = int(os.environ.get('WEBHOOK_MAX_TIMESTAMP_AGE', 300))
 WEBHOOK_MAX_EVENTS = int(os.environ.get('WEBHOOK_MAX_EVENTS', 1000))
 WEBHOOK_METRICS_RETENTION = int(os.environ.get('WEBHOOK_METRICS_RETENTION', 3600))
+WEBHOOK_METRICS_CACHE = os.environ.get('WEBHOOK_METRICS_CACHE', 'webhook_security')
+WEBHOOK_HEALTH_REFRESH_INTERVAL = int(os.environ.get('WEBHOOK_HEALTH_REFRESH_INTERVAL', 5))
 WEBHOOK_ERROR_THRESHOLD = float(os.environ.get('WEBHOOK_ERROR_THRESHOLD', 0.1))
 WEBHOOK_RESPONSE_TIME_THRESHOLD = float(os.environ.get('WEBHOOK_RESPONSE_TIME_THRESHOLD', 5.0))
 WEBHOOK_ENABLE_CERT_PINNING = os.environ.get('WEBHOOK_ENABLE_CERT_PINNING', 'False').lower() == 'true'
+WEBHOOK_INGEST_BATCH_SIZE = int(os.environ.get('WEBHOOK_INGEST_BATCH_SIZE', 500))
+WEBHOOK_ASYNC_PROCESSING = os.environ.get('WEBHOOK_ASYNC_PROCESSING', 'True').lower() == 'true'
+WEBHOOK_WORKER_CONCURRENCY = int(os.environ.get('WEBHOOK_WORKER_CONCURRENCY', 4))
+WEBHOOK_WORKER_STALE_AFTER = int(os.environ.get('WEBHOOK_WORKER_STALE_AFTER', 900))
+WEBHOOK_WORKER_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_WORKER_MAX_ATTEMPTS', 3))
+WEBHOOK_FILE_DOWNLOAD_TIMEOUT = int(os.environ.get('WEBHOOK_FILE_DOWNLOAD_TIMEOUT', 120))
 
 # Webhook IP whitelist
 WEBHOOK_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('WEBHOOK_ALLOWED_IPS', '').split(',') if ip.strip()]
 
+# BrightData API client
+BRIGHTDATA_API_URL = os.environ.get('BRIGHTDATA_API_URL', 'https://api.brightdata.com')
+BRIGHTDATA_CONNECT_TIMEOUT = float(os.environ.get('BRIGHTDATA_CONNECT_TIMEOUT', 5))
+BRIGHTDATA_READ_TIMEOUT = float(os.environ.get('BRIGHTDATA_READ_TIMEOUT', 60))
+BRIGHTDATA_MAX_RETRIES = int(os.environ.get('BRIGHTDATA_MAX_RETRIES', 4))
+BRIGHTDATA_BACKOFF_BASE = float(os.environ.get('BRIGHTDATA_BACKOFF_BASE', 0.5))
+BRIGHTDATA_BACKOFF_MAX = float(os.environ.get('BRIGHTDATA_BACKOFF_MAX', 30))
+BRIGHTDATA_MAX_CONCURRENCY = int(os.environ.get('BRIGHTDATA_MAX_CONCURRENCY', 4))
+
+# Scheduled scraping tasks
+SCHEDULER_MAX_JOBS_PER_PROJECT = int(os.environ.get('SCHEDULER_MAX_JOBS_PER_PROJECT', 2))
+SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', 20))
+SCHEDULER_CONCURRENCY = int(os.environ.get('SCHEDULER_CONCURRENCY', 4))
+SCHEDULER_MAX_SLEEP = float(os.environ.get('SCHEDULER_MAX_SLEEP', 60))
+SCHEDULER_DEFER_SECONDS = int(os.environ.get('SCHEDULER_DEFER_SECONDS', 60))
+SCHEDULER_JOB_TIMEOUT = int(os.environ.get('SCHEDULER_JOB_TIMEOUT', 6 * 3600))
+
+# AI analysis chat snapshots
+AI_ANALYSIS_SNAPSHOT_CACHE = os.environ.get('AI_ANALYSIS_SNAPSHOT_CACHE', 'default')
+AI_ANALYSIS_SNAPSHOT_TIMEOUT = int(os.environ.get('AI_ANALYSIS_SNAPSHOT_TIMEOUT', 3600))
+
+# AI chat retrieval index
+AI_RETRIEVAL_INDEX_DIR = os.environ.get('AI_RETRIEVAL_INDEX_DIR', '/app/backend/retrieval_index')
+AI_RETRIEVAL_FEATURES = int(os.environ.get('AI_RETRIEVAL_FEATURES', 1 << 20))
+AI_RETRIEVAL_TOP_K = int(os.environ.get('AI_RETRIEVAL_TOP_K', 8))
+
+# Data exports
+CSV_EXPORT_CHUNK_SIZE = int(os.environ.get('CSV_EXPORT_CHUNK_SIZE', 2000))
+COLUMNAR_EXPORT_ROW_GROUP_SIZE = int(os.environ.get('COLUMNAR_EXPORT_ROW_GROUP_SIZE', 10000))
+
+# CSV imports
+CSV_IMPORT_BATCH_SIZE = int(os.environ.get('CSV_IMPORT_BATCH_SIZE', 500))
+CSV_IMPORT_ASYNC_THRESHOLD_BYTES = int(os.environ.get('CSV_IMPORT_ASYNC_THRESHOLD_BYTES', 10 * 1024 * 1024))
+CSV_IMPORT_WORKER_STALE_AFTER = int(os.environ.get('CSV_IMPORT_WORKER_STALE_AFTER', 900))
+CSV_IMPORT_WORKER_MAX_ATTEMPTS = int(os.environ.get('CSV_IMPORT_WORKER_MAX_ATTEMPTS', 3))
+
 print(f"Production settings loaded. BRIGHTDATA_BASE_URL: {BRIGHTDATA_BASE_URL}")
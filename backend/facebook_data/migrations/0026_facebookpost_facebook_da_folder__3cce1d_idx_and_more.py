@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facebook_data', '0025_remove_facebookpost_facebook_da_scrape__3db206_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['folder', 'date_posted', 'id'], name='facebook_da_folder__3cce1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['folder', 'likes', 'id'], name='facebook_da_folder__cad365_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facebookpost',
+            index=models.Index(fields=['folder', 'num_comments', 'id'], name='facebook_da_folder__509954_idx'),
+        ),
+    ]
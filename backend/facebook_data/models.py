@@ -1,8 +1,18 @@
 from django.db import models
+from reports.folder_counts import ContentCountQuerySet
 from users.models import Project
 
 # Create your models here.
 
+class FolderQuerySet(ContentCountQuerySet):
+    def content_counts(self):
+        return {
+            'post_count': FacebookPost.objects.filter(content_type='post'),
+            'reel_count': FacebookPost.objects.filter(content_type='reel'),
+            'comment_count': FacebookComment.objects.all(),
+        }
+
+
 class Folder(models.Model):
     """
     Model for organizing Facebook data into folders with different categories
@@ -34,6 +44,8 @@ class Folder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FolderQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
     
@@ -206,6 +218,10 @@ class FacebookPost(models.Model):
             models.Index(fields=['date_posted']),
             models.Index(fields=['page_name']),
             models.Index(fields=['content_type']),
+            # Keyset pagination of a folder by each sortable field (reports.pagination)
+            models.Index(fields=['folder', 'date_posted', 'id']),
+            models.Index(fields=['folder', 'likes', 'id']),
+            models.Index(fields=['folder', 'num_comments', 'id']),
         ] 
 
 class FacebookComment(models.Model):
@@ -62,13 +62,21 @@ class FolderSerializer(serializers.ModelSerializer):
         
         return instance
     
+    # Counts come from Folder.objects.with_content_counts() when the view annotated them
+
     def get_post_count(self, obj):
+        if hasattr(obj, 'post_count'):
+            return obj.post_count
         return obj.posts.filter(content_type='post').count()
     
     def get_reel_count(self, obj):
+        if hasattr(obj, 'reel_count'):
+            return obj.reel_count
         return obj.posts.filter(content_type='reel').count()
     
     def get_comment_count(self, obj):
+        if hasattr(obj, 'comment_count'):
+            return obj.comment_count
         return obj.comments.count()
     
     def get_platform(self, obj):
@@ -16,7 +16,9 @@ from django.conf import settings
 from dateutil import parser as date_parser
 
 from .models import FacebookPost, FacebookComment, CommentScrapingJob, Folder
+from brightdata_integration.brightdata_client import TRIGGER_PATH, get_client
 from brightdata_integration.models import BrightdataConfig
+from scrapy_integration.retrieval_index import batched_documents
 
 logger = logging.getLogger(__name__)
 
@@ -153,7 +155,7 @@ class FacebookCommentScraper:
         Make the BrightData API request for comment scraping
         """
         try:
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -169,7 +171,7 @@ class FacebookCommentScraper:
             
             self.logger.info(f"Submitting {len(payload)} posts for comment scraping")
             
-            response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+            response = get_client().post(url, headers=headers, params=params, json=payload)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -212,7 +214,7 @@ class FacebookCommentScraper:
         }
         
         try:
-            with transaction.atomic():
+            with transaction.atomic(), batched_documents():
                 for comment_data in webhook_data:
                     try:
                         self._process_single_comment(comment_data, result, job_id=None)
@@ -377,7 +379,7 @@ class FacebookCommentScraper:
         Make a direct BrightData API request (without job tracking)
         """
         try:
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -389,7 +391,7 @@ class FacebookCommentScraper:
             
             self.logger.info(f"Submitting {len(payload)} Facebook URLs for comment scraping")
             
-            response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+            response = get_client().post(url, headers=headers, params=params, json=payload)
             
             if response.status_code == 200:
                 response_data = response.json()
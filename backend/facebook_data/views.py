@@ -1,7 +1,5 @@
 from django.shortcuts import render, get_object_or_404
-import csv
 import json
-import io
 import datetime
 from rest_framework import viewsets, status
 from rest_framework.response import Response
@@ -10,8 +8,15 @@ from rest_framework.permissions import AllowAny
 from django.http import HttpResponse
 from .models import FacebookPost, Folder, FacebookComment, CommentScrapingJob
 from .serializers import FacebookPostSerializer, FolderSerializer, FacebookCommentSerializer, CommentScrapingJobSerializer
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.db import models
+from brightdata_integration.csv_import import import_upload
+from reports.exports import Column, iso_datetime, json_text, raw, stream_csv_response
+from reports.columnar import PARQUET, columnar_response
+from reports.post_stats import average, folder_summary, move_posts
+from reports.pagination import PostKeysetPagination, sort_posts, sparse_list_response
+from reports.hashtags import posts_with_hashtag
+from reports.search import search_posts
 
 # Try to import dateparser, but provide a fallback if it's not available
 try:
@@ -21,6 +26,62 @@ except ImportError:
     HAS_DATEPARSER = False
     print("Warning: dateparser module not available. Using basic date parsing.")
 
+_FACEBOOK_RAW_FIELDS = {
+    'num_comments', 'num_shares', 'video_view_count', 'likes', 'page_likes', 'page_followers',
+    'page_is_verified', 'num_of_posts', 'has_handshake', 'is_sponsored', 'days_range', 'following',
+    'is_page', 'include_profile_data', 'page_reviews_score', 'page_reviewers_amount',
+}
+_FACEBOOK_DATE_FIELDS = {
+    'date_posted', 'until_date', 'from_date', 'start_date', 'end_date', 'timestamp', 'page_creation_time',
+}
+_FACEBOOK_JSON_FIELDS = {
+    'num_likes_type', 'count_reactions_type', 'attachments_data', 'original_post', 'active_ads_urls', 'input',
+}
+
+
+def _facebook_column(name):
+    if name in _FACEBOOK_RAW_FIELDS:
+        return raw(name)
+    if name in _FACEBOOK_DATE_FIELDS:
+        return Column(name, format=iso_datetime)
+    if name in _FACEBOOK_JSON_FIELDS:
+        return Column(name, format=json_text)
+    return Column(name)
+
+
+FACEBOOK_REEL_COLUMNS = [_facebook_column(name) for name in (
+    'url', 'post_id', 'user_url', 'user_username_raw', 'content', 'date_posted', 'hashtags',
+    'num_comments', 'num_shares', 'video_view_count', 'likes', 'page_name', 'profile_id',
+    'page_intro', 'page_category', 'page_logo', 'page_external_website', 'page_likes',
+    'page_followers', 'page_is_verified', 'thumbnail', 'external_link', 'page_url',
+    'header_image', 'avatar_image_url', 'profile_handle', 'shortcode', 'length', 'audio',
+    'num_of_posts', 'posts_to_not_include', 'until_date', 'from_date', 'start_date',
+    'end_date', 'timestamp', 'input', 'error', 'error_code', 'warning', 'warning_code'
+)]
+
+FACEBOOK_POST_COLUMNS = [_facebook_column(name) for name in (
+    'url', 'post_id', 'user_url', 'user_username_raw', 'content', 'date_posted', 'hashtags',
+    'num_comments', 'num_shares', 'num_likes_type', 'page_name', 'profile_id',
+    'page_intro', 'page_category', 'page_logo', 'page_external_website', 'page_likes',
+    'page_followers', 'page_is_verified', 'original_post', 'attachments_data', 'other_posts_url',
+    'post_external_link', 'post_external_title', 'post_external_image', 'page_url',
+    'header_image', 'avatar_image_url', 'profile_handle', 'has_handshake', 'is_sponsored',
+    'sponsor_name', 'shortcode', 'video_view_count', 'likes', 'days_range', 'num_of_posts',
+    'post_image', 'posts_to_not_include', 'until_date', 'from_date', 'post_type',
+    'following', 'start_date', 'end_date', 'link_description_text', 'count_reactions_type',
+    'is_page', 'include_profile_data', 'page_phone', 'page_email', 'page_creation_time',
+    'page_reviews_score', 'page_reviewers_amount', 'page_price_range', 'about',
+    'active_ads_urls', 'delegate_page_id', 'timestamp', 'input', 'error', 'error_code',
+    'warning', 'warning_code'
+)]
+
+FACEBOOK_COMMENT_COLUMNS = [
+    Column('comment_id'), Column('post_id'), Column('post_url'), Column('user_name'),
+    Column('user_id'), Column('user_url'), Column('comment_text'),
+    Column('date_created', format=iso_datetime), raw('num_likes'), raw('num_replies'),
+    Column('source_type'), Column('type'), Column('commentator_profile'), Column('comment_link'),
+]
+
 # Create your views here.
 
 class FolderViewSet(viewsets.ModelViewSet):
@@ -49,7 +110,7 @@ class FolderViewSet(viewsets.ModelViewSet):
             return Folder.objects.none()
         
         # Filter by project
-        queryset = Folder.objects.filter(project_id=project_id)
+        queryset = Folder.objects.filter(project_id=project_id).with_content_counts()
         
         # Filter by parent folder if specified
         parent_folder = self.request.query_params.get('parent_folder')
@@ -65,7 +126,9 @@ class FolderViewSet(viewsets.ModelViewSet):
         
         if include_hierarchy:
             # Prefetch related subfolders for hierarchical display
-            queryset = queryset.prefetch_related('subfolders')
+            queryset = queryset.prefetch_related(
+                Prefetch('subfolders', queryset=Folder.objects.with_content_counts())
+            )
         
         return queryset
     
@@ -178,10 +241,10 @@ class FolderViewSet(viewsets.ModelViewSet):
             
             # Move all content in this folder to uncategorized (folder=None) before deletion
             if folder.category == 'posts':
-                posts_moved = FacebookPost.objects.filter(folder=folder).update(folder=None)
+                posts_moved = move_posts(FacebookPost.objects.filter(folder=folder), None)
                 print(f"Moved {posts_moved} posts to uncategorized")
             elif folder.category == 'reels':
-                reels_moved = FacebookPost.objects.filter(folder=folder, content_type='reel').update(folder=None)
+                reels_moved = move_posts(FacebookPost.objects.filter(folder=folder, content_type='reel'), None)
                 print(f"Moved {reels_moved} reels to uncategorized")
             elif folder.category == 'comments':
                 comments_moved = FacebookComment.objects.filter(folder=folder).update(folder=None)
@@ -213,32 +276,10 @@ class FolderViewSet(viewsets.ModelViewSet):
                 # Apply search if provided
                 search_query = request.query_params.get('search', '')
                 if search_query:
-                    search_filter = Q()
-                    available_fields = [f.name for f in FacebookPost._meta.get_fields()]
-                    
-                    if 'user_posted' in available_fields:
-                        search_filter |= Q(user_posted__icontains=search_query)
-                    if 'content' in available_fields:
-                        search_filter |= Q(content__icontains=search_query)
-                    if 'hashtags' in available_fields:
-                        search_filter |= Q(hashtags__icontains=search_query)
-                    if 'page_name' in available_fields:
-                        search_filter |= Q(page_name__icontains=search_query)
-                    
-                    if search_filter:
-                        posts = posts.filter(search_filter)
+                    posts = search_posts(posts, search_query)
                 
-                # Paginate results
-                page = self.paginate_queryset(posts)
-                if page is not None:
-                    serializer = FacebookPostSerializer(page, many=True)
-                    return self.get_paginated_response(serializer.data)
-                
-                serializer = FacebookPostSerializer(posts, many=True)
-                return Response({
-                    'category': 'posts',
-                    'results': serializer.data
-                })
+                # Paginated (or streamed with ?page_size=all), optionally with ?fields=
+                return sparse_list_response(request, posts, FacebookPostSerializer, extra={'category': 'posts'})
                 
             elif folder.category == 'reels':
                 # Return Facebook reels
@@ -247,32 +288,10 @@ class FolderViewSet(viewsets.ModelViewSet):
                 # Apply search if provided
                 search_query = request.query_params.get('search', '')
                 if search_query:
-                    search_filter = Q()
-                    available_fields = [f.name for f in FacebookPost._meta.get_fields()]
-                    
-                    if 'user_posted' in available_fields:
-                        search_filter |= Q(user_posted__icontains=search_query)
-                    if 'content' in available_fields:
-                        search_filter |= Q(content__icontains=search_query)
-                    if 'hashtags' in available_fields:
-                        search_filter |= Q(hashtags__icontains=search_query)
-                    if 'page_name' in available_fields:
-                        search_filter |= Q(page_name__icontains=search_query)
-                    
-                    if search_filter:
-                        reels = reels.filter(search_filter)
+                    reels = search_posts(reels, search_query)
                 
-                # Paginate results
-                page = self.paginate_queryset(reels)
-                if page is not None:
-                    serializer = FacebookPostSerializer(page, many=True)
-                    return self.get_paginated_response(serializer.data)
-                
-                serializer = FacebookPostSerializer(reels, many=True)
-                return Response({
-                    'category': 'reels',
-                    'results': serializer.data
-                })
+                # Paginated (or streamed with ?page_size=all), optionally with ?fields=
+                return sparse_list_response(request, reels, FacebookPostSerializer, extra={'category': 'reels'})
                 
             elif folder.category == 'comments':
                 # Return Facebook comments
@@ -287,17 +306,8 @@ class FolderViewSet(viewsets.ModelViewSet):
                     search_filter |= Q(post_id__icontains=search_query)
                     comments = comments.filter(search_filter)
                 
-                # Paginate results
-                page = self.paginate_queryset(comments)
-                if page is not None:
-                    serializer = FacebookCommentSerializer(page, many=True)
-                    return self.get_paginated_response(serializer.data)
-                
-                serializer = FacebookCommentSerializer(comments, many=True)
-                return Response({
-                    'category': 'comments',
-                    'results': serializer.data
-                })
+                # Paginated (or streamed with ?page_size=all), optionally with ?fields=
+                return sparse_list_response(request, comments, FacebookCommentSerializer, extra={'category': 'comments'})
             
             else:
                 return Response({'error': 'Unknown folder category'}, status=status.HTTP_400_BAD_REQUEST)
@@ -311,6 +321,7 @@ class FacebookPostViewSet(viewsets.ModelViewSet):
     """
     serializer_class = FacebookPostSerializer
     permission_classes = [AllowAny]  # Allow any user to access these endpoints for testing
+    pagination_class = PostKeysetPagination
     
     def get_queryset(self):
         """
@@ -362,40 +373,17 @@ class FacebookPostViewSet(viewsets.ModelViewSet):
             if content_type and 'content_type' in [f.name for f in FacebookPost._meta.get_fields()]:
                 queryset = queryset.filter(content_type=content_type)
             
-            # Add search functionality
+            # Add search functionality (full-text index, see reports.search)
             search_query = self.request.query_params.get('search', '')
             if search_query:
-                # Build a dynamic Q object with fields that exist in the model
-                search_filter = Q()
-                available_fields = [f.name for f in FacebookPost._meta.get_fields()]
-                
-                # Check each field individually to avoid errors with missing fields
-                if 'user_posted' in available_fields:
-                    search_filter |= Q(user_posted__icontains=search_query)
-                
-                if 'description' in available_fields:
-                    search_filter |= Q(description__icontains=search_query)
-                
-                if 'content' in available_fields:
-                    search_filter |= Q(content__icontains=search_query)
-                
-                if 'hashtags' in available_fields:
-                    search_filter |= Q(hashtags__icontains=search_query)
-                
-                if 'content_type' in available_fields:
-                    search_filter |= Q(content_type__icontains=search_query)
-                
-                if 'post_id' in available_fields:
-                    search_filter |= Q(post_id__icontains=search_query)
-                
-                if 'page_name' in available_fields:
-                    search_filter |= Q(page_name__icontains=search_query)
-                
-                # Apply the search filter if we have any valid conditions
-                if search_filter:
-                    queryset = queryset.filter(search_filter)
+                queryset = search_posts(queryset, search_query, rank=self.request.query_params.get('sort_by') == 'relevance')
             
-            return queryset
+            # Posts carrying a hashtag (hashtag index, see reports.hashtags)
+            hashtag = self.request.query_params.get('hashtag')
+            if hashtag:
+                queryset = posts_with_hashtag(queryset, hashtag)
+            
+            return sort_posts(queryset, self.request)
         except Exception as e:
             # Log the error and return empty queryset
             print(f"Error in get_queryset: {str(e)}")
@@ -547,252 +535,9 @@ class FacebookPostViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            # Decode and parse CSV with proper encoding handling
-            try:
-                # Try UTF-8 first, then UTF-8 with BOM, then fallback to other encodings
-                try:
-                    decoded_file = csv_file.read().decode('utf-8-sig')
-                except UnicodeDecodeError:
-                    csv_file.seek(0)  # Reset file pointer
-                    try:
-                        decoded_file = csv_file.read().decode('utf-8')
-                    except UnicodeDecodeError:
-                        csv_file.seek(0)  # Reset file pointer
-                        try:
-                            decoded_file = csv_file.read().decode('latin1')
-                        except UnicodeDecodeError:
-                            csv_file.seek(0)  # Reset file pointer
-                            decoded_file = csv_file.read().decode('cp1252', errors='replace')
-                
-                # Clean up any problematic characters that might cause issues
-                # Replace null bytes and other control characters
-                decoded_file = decoded_file.replace('\x00', '').replace('\r\n', '\n').replace('\r', '\n')
-                
-            except Exception as e:
-                return Response(
-                    {'error': f'Error reading CSV file. Please ensure it is a valid UTF-8 encoded CSV file. Error: {str(e)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            csv_data = csv.DictReader(io.StringIO(decoded_file))
-            
-            # Auto-detect content type based on CSV headers
-            headers = set(csv_data.fieldnames or [])
-            
-            # Define unique fields for each content type
-            post_unique_fields = {'num_likes_type', 'original_post', 'attachments', 'post_type', 'post_external_link'}
-            reel_unique_fields = {'video_view_count', 'length', 'audio', 'thumbnail'}
-            
-            # Detect content type based on presence of unique fields
-            post_matches = len(headers.intersection(post_unique_fields))
-            reel_matches = len(headers.intersection(reel_unique_fields))
-            
-            if reel_matches > post_matches:
-                content_type = 'reel'
-                detected_reason = f"Detected as reel (found {reel_matches} reel-specific fields: {headers.intersection(reel_unique_fields)})"
-            else:
-                content_type = 'post'
-                detected_reason = f"Detected as post (found {post_matches} post-specific fields: {headers.intersection(post_unique_fields)})"
-            
-            print(f"Auto-detection result: {detected_reason}")
-            
-            rows_processed = 0
-            rows_added = 0
-            rows_updated = 0
-            rows_skipped = 0
-            errors = []
-            
-            for row in csv_data:
-                # Skip empty rows
-                if not row or all(not v for v in row.values()):
-                    continue
-                
-                rows_processed += 1
-                
-                # Debug: Print first few rows
-                if rows_processed <= 3:
-                    print(f"Row {rows_processed}: {dict(row)}")
-                
-                # Check if this row has warning or error messages indicating no comments
-                warning = row.get('warning', '').strip()
-                error = row.get('error', '').strip()
-                
-                # Skip rows with specific warnings/errors that indicate no actual comment data
-                if warning in ['This post has no comments.', 'For this type of posts (reels) comments are not available.'] or \
-                   error in ['Crawl failed after multiple attempts, please try again later']:
-                    rows_skipped += 1
-                    print(f"Skipping row {rows_processed}: {warning or error}")
-                    continue
-                
-                # Extract and validate required fields - be flexible with field extraction
-                comment_id = ''
-                for key in ['comment_id', 'id']:
-                    if key in row and row[key]:
-                        comment_id = str(row[key]).strip().strip('"').strip("'")
-                        break
-                
-                # Check if comment text exists
-                comment_text = ''
-                for key in ['comment_text', 'text', 'content', 'comment']:
-                    if key in row and row[key]:
-                        comment_text = str(row[key]).strip().strip('"').strip("'")
-                        break
-                
-                # Skip rows with empty comment text
-                if not comment_text:
-                    rows_skipped += 1
-                    print(f"Skipping row {rows_processed}: Empty comment text")
-                    continue
-                
-                # Try to extract post_id from multiple possible sources
-                post_id = ''
-                for key in ['post_id', 'id', 'original_post_id']:
-                    if key in row and row[key]:
-                        post_id = str(row[key]).strip().strip('"').strip("'")
-                        break
-                
-                # Debug: Print field extraction
-                if rows_processed <= 3:
-                    print(f"Extracted comment_id: '{comment_id}', comment_text: '{comment_text}', post_id: '{post_id}'")
-                
-                if not comment_id:
-                    errors.append(f"Row {rows_processed}: Missing comment_id")
-                    rows_skipped += 1
-                    print(f"Skipping row {rows_processed}: Missing comment_id")
-                    continue
-                
-                try:
-                    # Parse date field
-                    date_created_raw = row.get('date_created', None)
-                    parsed_date = None
-                    if date_created_raw:
-                        try:
-                            # Try parsing with dateutil first
-                            from dateutil import parser as date_parser
-                            parsed_date = date_parser.parse(str(date_created_raw))
-                        except (ValueError, TypeError, ImportError):
-                            # Fallback parsing
-                            try:
-                                parsed_date = datetime.datetime.fromisoformat(str(date_created_raw).replace('Z', '+00:00'))
-                            except (ValueError, TypeError):
-                                print(f"Could not parse date_created: {date_created_raw}")
-                    
-                    # Safe integer conversion
-                    def safe_int(value, default=0):
-                        try:
-                            if value is None or value == '' or value == '""':
-                                return default
-                            # Handle string numbers
-                            cleaned_value = str(value).strip().strip('"').strip("'")
-                            if not cleaned_value:
-                                return default
-                            return int(float(cleaned_value))  # Convert via float to handle decimal strings
-                        except (ValueError, TypeError):
-                            return default
-                    
-                    # Extract fields with flexible key names and safe string handling
-                    def get_field(row, *keys):
-                        for key in keys:
-                            if key in row and row[key] is not None:
-                                try:
-                                    value = str(row[key]).strip().strip('"').strip("'")
-                                    return value if value else ''
-                                except (UnicodeEncodeError, UnicodeDecodeError):
-                                    # Handle problematic Unicode characters
-                                    try:
-                                        value = str(row[key]).encode('utf-8', errors='replace').decode('utf-8').strip().strip('"').strip("'")
-                                        return value if value else ''
-                                    except:
-                                        return ''
-                        return ''
-                    
-                    # Try to find related Facebook post
-                    facebook_post = None
-                    if post_id:
-                        try:
-                            facebook_post = FacebookPost.objects.filter(post_id=post_id).first()
-                        except FacebookPost.DoesNotExist:
-                            pass
-                    
-                    # Handle Unicode characters properly in comment text
-                    try:
-                        clean_comment_text = comment_text.encode('utf-8', errors='replace').decode('utf-8')
-                    except:
-                        clean_comment_text = comment_text
-                    
-                    # Prepare the comment data
-                    comment_data = {
-                        'comment_id': comment_id,
-                        'folder': folder,
-                        'facebook_post': facebook_post,
-                        'url': get_field(row, 'url', 'post_url'),
-                        'post_id': post_id,
-                        'post_url': get_field(row, 'post_url', 'url'),
-                        'user_name': get_field(row, 'user_name', 'username'),
-                        'user_id': get_field(row, 'user_id', 'userid'),
-                        'user_url': get_field(row, 'user_url', 'profile_url'),
-                        'commentator_profile': get_field(row, 'commentator_profile', 'profile'),
-                        'comment_text': clean_comment_text,
-                        'date_created': parsed_date,
-                        'comment_link': get_field(row, 'comment_link', 'link'),
-                        'num_likes': safe_int(row.get('num_likes', 0)),
-                        'num_replies': safe_int(row.get('num_replies', 0)),
-                        'attached_files': get_field(row, 'attached_files', 'attachments'),
-                        'video_length': safe_int(row.get('video_length')) if row.get('video_length') else None,
-                        'source_type': get_field(row, 'source_type', 'type'),
-                        'subtype': get_field(row, 'subtype'),
-                        'type': get_field(row, 'type', 'comment_type'),
-                    }
-                    
-                    # Debug: Print comment data for first few rows
-                    if rows_processed <= 3:
-                        print(f"Comment data for row {rows_processed}: {comment_data}")
-                    
-                    # Try to find existing comment
-                    existing_comment = FacebookComment.objects.filter(
-                        comment_id=comment_id,
-                        folder=folder
-                    ).first()
-                    
-                    if existing_comment:
-                        # Update the existing record
-                        for key, value in comment_data.items():
-                            if key != 'folder':  # Don't update the folder field
-                                setattr(existing_comment, key, value)
-                        existing_comment.save()
-                        rows_updated += 1
-                        print(f"Updated comment: {comment_id}")
-                    else:
-                        # Create a new record
-                        new_comment = FacebookComment.objects.create(**comment_data)
-                        rows_added += 1
-                        print(f"Created new comment: {comment_id}")
-                        
-                except Exception as e:
-                    error_msg = f"Error processing row {rows_processed}: {str(e)}"
-                    errors.append(error_msg)
-                    rows_skipped += 1
-                    print(error_msg)
-                    # Continue processing other rows
-                    continue
-            
-            # Prepare response
-            response_data = {
-                'status': 'success',
-                'message': f'CSV processed successfully. {rows_processed} rows processed, {rows_added} added, {rows_updated} updated, {rows_skipped} skipped.',
-                'rows_processed': rows_processed,
-                'rows_added': rows_added,
-                'rows_updated': rows_updated,
-                'rows_skipped': rows_skipped,
-                'detected_content_type': content_type,
-                'detection_reason': detected_reason,
-            }
-            
-            if errors:
-                response_data['errors'] = errors[:10]  # Limit number of errors returned
-                response_data['total_errors'] = len(errors)
-            
-            return Response(response_data, status=status.HTTP_200_OK)
+            # Rows are streamed, validated and upserted in batches by the importer
+            response_data, status_code = import_upload('facebook_posts', csv_file, folder)
+            return Response(response_data, status=status_code)
             
         except Exception as e:
             return Response(
@@ -824,8 +569,10 @@ class FacebookPostViewSet(viewsets.ModelViewSet):
             # Get all posts in the folder
             posts = FacebookPost.objects.filter(folder=folder)
             
-            # Count total posts
-            total_posts = posts.count()
+            # Post count and likes come from the stats rollup; distinct users cannot be summed
+            totals = folder_summary('facebook', [folder.id])
+            total_posts = totals['post_count']
+            avg_likes = average(totals['likes'], total_posts)
             
             # Count unique posters - check if user_posted field exists
             available_fields = [f.name for f in FacebookPost._meta.get_fields()]
@@ -836,16 +583,6 @@ class FacebookPostViewSet(viewsets.ModelViewSet):
             elif 'page_name' in available_fields:
                 unique_users = posts.values('page_name').distinct().count()
             
-            # Calculate average likes - check if likes field exists
-            avg_likes = 0
-            if 'likes' in available_fields:
-                try:
-                    avg_likes = posts.values_list('likes', flat=True).aggregate(
-                        avg_likes=models.Avg('likes')
-                    )['avg_likes'] or 0
-                except Exception as e:
-                    print(f"Error calculating average likes: {str(e)}")
-            
             # Count verified accounts - check if is_verified field exists
             verified_accounts = 0
             if 'is_verified' in available_fields:
@@ -893,146 +630,32 @@ class FacebookPostViewSet(viewsets.ModelViewSet):
             # Get posts
             posts = FacebookPost.objects.filter(**query).order_by('-date_posted')
             
-            # Create CSV response with explicit UTF-8 encoding and BOM
-            response = HttpResponse(content_type='text/csv; charset=utf-8')
-            response['Content-Disposition'] = f'attachment; filename="facebook_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-            
-            # Add UTF-8 BOM for better CSV compatibility
-            response.write('\ufeff')
-            
-            # Create CSV writer and write header
-            writer = csv.writer(response)
-            
-            # Use different headers based on content type
-            if content_type == 'reel':
-                writer.writerow([
-                    'url', 'post_id', 'user_url', 'user_username_raw', 'content', 'date_posted', 'hashtags',
-                    'num_comments', 'num_shares', 'video_view_count', 'likes', 'page_name', 'profile_id',
-                    'page_intro', 'page_category', 'page_logo', 'page_external_website', 'page_likes',
-                    'page_followers', 'page_is_verified', 'thumbnail', 'external_link', 'page_url',
-                    'header_image', 'avatar_image_url', 'profile_handle', 'shortcode', 'length', 'audio',
-                    'num_of_posts', 'posts_to_not_include', 'until_date', 'from_date', 'start_date',
-                    'end_date', 'timestamp', 'input', 'error', 'error_code', 'warning', 'warning_code'
-                ])
-            else:  # Post
-                writer.writerow([
-                    'url', 'post_id', 'user_url', 'user_username_raw', 'content', 'date_posted', 'hashtags',
-                    'num_comments', 'num_shares', 'num_likes_type', 'page_name', 'profile_id',
-                    'page_intro', 'page_category', 'page_logo', 'page_external_website', 'page_likes',
-                    'page_followers', 'page_is_verified', 'original_post', 'attachments_data', 'other_posts_url',
-                    'post_external_link', 'post_external_title', 'post_external_image', 'page_url',
-                    'header_image', 'avatar_image_url', 'profile_handle', 'has_handshake', 'is_sponsored',
-                    'sponsor_name', 'shortcode', 'video_view_count', 'likes', 'days_range', 'num_of_posts',
-                    'post_image', 'posts_to_not_include', 'until_date', 'from_date', 'post_type',
-                    'following', 'start_date', 'end_date', 'link_description_text', 'count_reactions_type',
-                    'is_page', 'include_profile_data', 'page_phone', 'page_email', 'page_creation_time',
-                    'page_reviews_score', 'page_reviewers_amount', 'page_price_range', 'about',
-                    'active_ads_urls', 'delegate_page_id', 'timestamp', 'input', 'error', 'error_code',
-                    'warning', 'warning_code'
-                ])
-            
-            # Write the data rows with proper Unicode handling
-            for post in posts:
-                # Ensure all text fields are properly encoded
-                def safe_text(value):
-                    if value is None:
-                        return ''
-                    try:
-                        # Ensure the value is a string and handle Unicode properly
-                        text_value = str(value)
-                        # Remove any null bytes or control characters that might cause issues
-                        text_value = text_value.replace('\x00', '').replace('\r', '').replace('\n', ' ')
-                        return text_value
-                    except (UnicodeEncodeError, UnicodeDecodeError):
-                        # If there are encoding issues, use replace mode
-                        return str(value).encode('utf-8', errors='replace').decode('utf-8')
-                
-                # Convert JSON fields to strings if needed
-                def safe_json_stringify(field_value):
-                    """Safely convert any value to a JSON string or return empty string"""
-                    if not field_value:
-                        return ''
-                    
-                    if isinstance(field_value, str):
-                        # If it looks like JSON but isn't valid, return as is
-                        if (field_value.startswith('{') and field_value.endswith('}')) or \
-                           (field_value.startswith('[') and field_value.endswith(']')):
-                            try:
-                                # Try to validate it by parsing and re-stringifying
-                                parsed = json.loads(field_value)
-                                return json.dumps(parsed, ensure_ascii=False)
-                            except json.JSONDecodeError:
-                                # Just return as is if it looks like JSON but isn't valid
-                                return safe_text(field_value)
-                        else:
-                            # Regular string, return as is
-                            return safe_text(field_value)
-                    
-                    # Try to convert to JSON
-                    try:
-                        return json.dumps(field_value, ensure_ascii=False)
-                    except (TypeError, ValueError):
-                        # If all else fails, convert to string
-                        return safe_text(field_value)
-                
-                num_likes_type_str = safe_json_stringify(post.num_likes_type)
-                count_reactions_type_str = safe_json_stringify(post.count_reactions_type)
-                attachments_data_str = safe_json_stringify(post.attachments_data)
-                original_post_str = safe_json_stringify(post.original_post)
-                active_ads_urls_str = safe_json_stringify(post.active_ads_urls)
-                input_str = safe_json_stringify(post.input)
-                
-                # Format dates
-                date_posted_str = post.date_posted.isoformat() if post.date_posted else ''
-                page_creation_time_str = post.page_creation_time.isoformat() if post.page_creation_time else ''
-                until_date_str = post.until_date.isoformat() if post.until_date else ''
-                from_date_str = post.from_date.isoformat() if post.from_date else ''
-                start_date_str = post.start_date.isoformat() if post.start_date else ''
-                end_date_str = post.end_date.isoformat() if post.end_date else ''
-                timestamp_str = post.timestamp.isoformat() if post.timestamp else ''
-                
-                # Write row based on content type
-                if post.content_type == 'reel':
-                    writer.writerow([
-                        safe_text(post.url), safe_text(post.post_id), safe_text(post.user_url), 
-                        safe_text(post.user_username_raw), safe_text(post.content),
-                        date_posted_str, safe_text(post.hashtags), post.num_comments, post.num_shares,
-                        post.video_view_count, post.likes, safe_text(post.page_name), safe_text(post.profile_id),
-                        safe_text(post.page_intro), safe_text(post.page_category), safe_text(post.page_logo), 
-                        safe_text(post.page_external_website), post.page_likes, post.page_followers, 
-                        post.page_is_verified, safe_text(post.thumbnail), safe_text(post.external_link), 
-                        safe_text(post.page_url), safe_text(post.header_image), safe_text(post.avatar_image_url),
-                        safe_text(post.profile_handle), safe_text(post.shortcode), safe_text(post.length), 
-                        safe_text(post.audio), post.num_of_posts, safe_text(post.posts_to_not_include), 
-                        until_date_str, from_date_str, start_date_str, end_date_str, timestamp_str, 
-                        input_str, safe_text(post.error), safe_text(post.error_code), safe_text(post.warning), 
-                        safe_text(post.warning_code)
-                    ])
-                else:  # Post
-                    writer.writerow([
-                        safe_text(post.url), safe_text(post.post_id), safe_text(post.user_url), 
-                        safe_text(post.user_username_raw), safe_text(post.content), date_posted_str, 
-                        safe_text(post.hashtags), post.num_comments, post.num_shares, num_likes_type_str, 
-                        safe_text(post.page_name), safe_text(post.profile_id), safe_text(post.page_intro),
-                        safe_text(post.page_category), safe_text(post.page_logo), safe_text(post.page_external_website), 
-                        post.page_likes, post.page_followers, post.page_is_verified, original_post_str, 
-                        attachments_data_str, safe_text(post.other_posts_url), safe_text(post.post_external_link), 
-                        safe_text(post.post_external_title), safe_text(post.post_external_image), 
-                        safe_text(post.page_url), safe_text(post.header_image), safe_text(post.avatar_image_url),
-                        safe_text(post.profile_handle), post.has_handshake, post.is_sponsored, 
-                        safe_text(post.sponsor_name), safe_text(post.shortcode), post.video_view_count, 
-                        post.likes, post.days_range, post.num_of_posts, safe_text(post.post_image), 
-                        safe_text(post.posts_to_not_include), until_date_str, from_date_str, 
-                        safe_text(post.post_type), post.following, start_date_str, end_date_str,
-                        safe_text(post.link_description_text), count_reactions_type_str, post.is_page,
-                        post.include_profile_data, safe_text(post.page_phone), safe_text(post.page_email), 
-                        page_creation_time_str, post.page_reviews_score, post.page_reviewers_amount, 
-                        safe_text(post.page_price_range), safe_text(post.about), active_ads_urls_str, 
-                        safe_text(post.delegate_page_id), timestamp_str, input_str, safe_text(post.error), 
-                        safe_text(post.error_code), safe_text(post.warning), safe_text(post.warning_code)
-                    ])
-            
-            return response
+            # Reel exports use the reel column set, everything else the post column set
+            columns = FACEBOOK_REEL_COLUMNS if content_type == 'reel' else FACEBOOK_POST_COLUMNS
+            filename = f'facebook_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            return stream_csv_response(posts, columns, filename)
+        
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['GET'])
+    def download_columnar(self, request):
+        """
+        Download posts as Parquet (default) or Arrow IPC (?file_format=arrow)
+        """
+        try:
+            folder_id = request.query_params.get('folder_id')
+            content_type = request.query_params.get('content_type')
+            
+            query = {}
+            if folder_id:
+                query['folder_id'] = folder_id
+            if content_type:
+                query['content_type'] = content_type
+            
+            posts = FacebookPost.objects.filter(**query).order_by('id')
+            filename = f'facebook_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}'
+            return columnar_response(posts, filename, request.query_params.get('file_format', PARQUET))
         
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -1157,235 +780,9 @@ class FacebookCommentViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            # Decode and parse CSV with proper encoding handling
-            try:
-                # Try UTF-8 first, then UTF-8 with BOM, then fallback to other encodings
-                try:
-                    decoded_file = csv_file.read().decode('utf-8-sig')
-                except UnicodeDecodeError:
-                    csv_file.seek(0)  # Reset file pointer
-                    try:
-                        decoded_file = csv_file.read().decode('utf-8')
-                    except UnicodeDecodeError:
-                        csv_file.seek(0)  # Reset file pointer
-                        try:
-                            decoded_file = csv_file.read().decode('latin1')
-                        except UnicodeDecodeError:
-                            csv_file.seek(0)  # Reset file pointer
-                            decoded_file = csv_file.read().decode('cp1252', errors='replace')
-                
-                # Clean up any problematic characters that might cause issues
-                # Replace null bytes and other control characters
-                decoded_file = decoded_file.replace('\x00', '').replace('\r\n', '\n').replace('\r', '\n')
-                
-            except Exception as e:
-                return Response(
-                    {'error': f'Error reading CSV file. Please ensure it is a valid UTF-8 encoded CSV file. Error: {str(e)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            csv_data = csv.DictReader(io.StringIO(decoded_file))
-            
-            rows_processed = 0
-            rows_added = 0
-            rows_updated = 0
-            rows_skipped = 0
-            errors = []
-            
-            # Debug: Check CSV headers
-            fieldnames = csv_data.fieldnames
-            print(f"CSV Headers: {fieldnames}")
-            
-            for row in csv_data:
-                # Skip empty rows
-                if not row or all(not v for v in row.values()):
-                    continue
-                
-                rows_processed += 1
-                
-                # Debug: Print first few rows
-                if rows_processed <= 3:
-                    print(f"Row {rows_processed}: {dict(row)}")
-                
-                # Check if this row has warning or error messages indicating no comments
-                warning = row.get('warning', '').strip()
-                error = row.get('error', '').strip()
-                
-                # Skip rows with specific warnings/errors that indicate no actual comment data
-                if warning in ['This post has no comments.', 'For this type of posts (reels) comments are not available.'] or \
-                   error in ['Crawl failed after multiple attempts, please try again later']:
-                    rows_skipped += 1
-                    print(f"Skipping row {rows_processed}: {warning or error}")
-                    continue
-                
-                # Extract and validate required fields - be flexible with field extraction
-                comment_id = ''
-                for key in ['comment_id', 'id']:
-                    if key in row and row[key]:
-                        comment_id = str(row[key]).strip().strip('"').strip("'")
-                        break
-                
-                # Check if comment text exists
-                comment_text = ''
-                for key in ['comment_text', 'text', 'content', 'comment']:
-                    if key in row and row[key]:
-                        comment_text = str(row[key]).strip().strip('"').strip("'")
-                        break
-                
-                # Skip rows with empty comment text
-                if not comment_text:
-                    rows_skipped += 1
-                    print(f"Skipping row {rows_processed}: Empty comment text")
-                    continue
-                
-                # Try to extract post_id from multiple possible sources
-                post_id = ''
-                for key in ['post_id', 'id', 'original_post_id']:
-                    if key in row and row[key]:
-                        post_id = str(row[key]).strip().strip('"').strip("'")
-                        break
-                
-                # Debug: Print field extraction
-                if rows_processed <= 3:
-                    print(f"Extracted comment_id: '{comment_id}', comment_text: '{comment_text}', post_id: '{post_id}'")
-                
-                if not comment_id:
-                    errors.append(f"Row {rows_processed}: Missing comment_id")
-                    rows_skipped += 1
-                    print(f"Skipping row {rows_processed}: Missing comment_id")
-                    continue
-                
-                try:
-                    # Parse date field
-                    date_created_raw = row.get('date_created', None)
-                    parsed_date = None
-                    if date_created_raw:
-                        try:
-                            # Try parsing with dateutil first
-                            from dateutil import parser as date_parser
-                            parsed_date = date_parser.parse(str(date_created_raw))
-                        except (ValueError, TypeError, ImportError):
-                            # Fallback parsing
-                            try:
-                                parsed_date = datetime.datetime.fromisoformat(str(date_created_raw).replace('Z', '+00:00'))
-                            except (ValueError, TypeError):
-                                print(f"Could not parse date_created: {date_created_raw}")
-                    
-                    # Safe integer conversion
-                    def safe_int(value, default=0):
-                        try:
-                            if value is None or value == '' or value == '""':
-                                return default
-                            # Handle string numbers
-                            cleaned_value = str(value).strip().strip('"').strip("'")
-                            if not cleaned_value:
-                                return default
-                            return int(float(cleaned_value))  # Convert via float to handle decimal strings
-                        except (ValueError, TypeError):
-                            return default
-                    
-                    # Extract fields with flexible key names and safe string handling
-                    def get_field(row, *keys):
-                        for key in keys:
-                            if key in row and row[key] is not None:
-                                try:
-                                    value = str(row[key]).strip().strip('"').strip("'")
-                                    return value if value else ''
-                                except (UnicodeEncodeError, UnicodeDecodeError):
-                                    # Handle problematic Unicode characters
-                                    try:
-                                        value = str(row[key]).encode('utf-8', errors='replace').decode('utf-8').strip().strip('"').strip("'")
-                                        return value if value else ''
-                                    except:
-                                        return ''
-                        return ''
-                    
-                    # Try to find related Facebook post
-                    facebook_post = None
-                    if post_id:
-                        try:
-                            facebook_post = FacebookPost.objects.filter(post_id=post_id).first()
-                        except FacebookPost.DoesNotExist:
-                            pass
-                    
-                    # Handle Unicode characters properly in comment text
-                    try:
-                        clean_comment_text = comment_text.encode('utf-8', errors='replace').decode('utf-8')
-                    except:
-                        clean_comment_text = comment_text
-                    
-                    # Prepare the comment data
-                    comment_data = {
-                        'comment_id': comment_id,
-                        'folder': folder,
-                        'facebook_post': facebook_post,
-                        'url': get_field(row, 'url', 'post_url'),
-                        'post_id': post_id,
-                        'post_url': get_field(row, 'post_url', 'url'),
-                        'user_name': get_field(row, 'user_name', 'username'),
-                        'user_id': get_field(row, 'user_id', 'userid'),
-                        'user_url': get_field(row, 'user_url', 'profile_url'),
-                        'commentator_profile': get_field(row, 'commentator_profile', 'profile'),
-                        'comment_text': clean_comment_text,
-                        'date_created': parsed_date,
-                        'comment_link': get_field(row, 'comment_link', 'link'),
-                        'num_likes': safe_int(row.get('num_likes', 0)),
-                        'num_replies': safe_int(row.get('num_replies', 0)),
-                        'attached_files': get_field(row, 'attached_files', 'attachments'),
-                        'video_length': safe_int(row.get('video_length')) if row.get('video_length') else None,
-                        'source_type': get_field(row, 'source_type', 'type'),
-                        'subtype': get_field(row, 'subtype'),
-                        'type': get_field(row, 'type', 'comment_type'),
-                    }
-                    
-                    # Debug: Print comment data for first few rows
-                    if rows_processed <= 3:
-                        print(f"Comment data for row {rows_processed}: {comment_data}")
-                    
-                    # Try to find existing comment
-                    existing_comment = FacebookComment.objects.filter(
-                        comment_id=comment_id,
-                        folder=folder
-                    ).first()
-                    
-                    if existing_comment:
-                        # Update the existing record
-                        for key, value in comment_data.items():
-                            if key != 'folder':  # Don't update the folder field
-                                setattr(existing_comment, key, value)
-                        existing_comment.save()
-                        rows_updated += 1
-                        print(f"Updated comment: {comment_id}")
-                    else:
-                        # Create a new record
-                        new_comment = FacebookComment.objects.create(**comment_data)
-                        rows_added += 1
-                        print(f"Created new comment: {comment_id}")
-                        
-                except Exception as e:
-                    error_msg = f"Error processing row {rows_processed}: {str(e)}"
-                    errors.append(error_msg)
-                    rows_skipped += 1
-                    print(error_msg)
-                    # Continue processing other rows
-                    continue
-            
-            # Prepare response
-            response_data = {
-                'status': 'success',
-                'message': f'CSV processed successfully. {rows_processed} rows processed, {rows_added} added, {rows_updated} updated, {rows_skipped} skipped.',
-                'rows_processed': rows_processed,
-                'rows_added': rows_added,
-                'rows_updated': rows_updated,
-                'rows_skipped': rows_skipped,
-            }
-            
-            if errors:
-                response_data['errors'] = errors[:10]  # Limit number of errors returned
-                response_data['total_errors'] = len(errors)
-            
-            print(f"Upload completed: {response_data}")
-            return Response(response_data, status=status.HTTP_200_OK)
+            # Rows are streamed, validated and upserted in batches by the importer
+            response_data, status_code = import_upload('facebook_comments', csv_file, folder)
+            return Response(response_data, status=status_code)
             
         except Exception as e:
             error_msg = f'Error processing CSV file: {str(e)}'
@@ -1409,57 +806,8 @@ class FacebookCommentViewSet(viewsets.ModelViewSet):
             if folder_id:
                 comments = comments.filter(folder_id=folder_id)
             
-            # Create CSV response with explicit UTF-8 encoding and BOM
-            response = HttpResponse(content_type='text/csv; charset=utf-8')
-            response['Content-Disposition'] = f'attachment; filename="facebook_comments_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-            
-            # Add UTF-8 BOM for better CSV compatibility
-            response.write('\ufeff')
-            
-            # Create CSV writer and write header
-            writer = csv.writer(response)
-            writer.writerow([
-                'comment_id', 'post_id', 'post_url', 'user_name', 'user_id', 'user_url',
-                'comment_text', 'date_created', 'num_likes', 'num_replies', 'source_type',
-                'type', 'commentator_profile', 'comment_link'
-            ])
-            
-            # Write data rows with proper Unicode handling
-            for comment in comments:
-                date_created_str = comment.date_created.isoformat() if comment.date_created else ''
-                
-                # Ensure all text fields are properly encoded
-                def safe_text(value):
-                    if value is None:
-                        return ''
-                    try:
-                        # Ensure the value is a string and handle Unicode properly
-                        text_value = str(value)
-                        # Remove any null bytes or control characters that might cause issues
-                        text_value = text_value.replace('\x00', '').replace('\r', '').replace('\n', ' ')
-                        return text_value
-                    except (UnicodeEncodeError, UnicodeDecodeError):
-                        # If there are encoding issues, use replace mode
-                        return str(value).encode('utf-8', errors='replace').decode('utf-8')
-                
-                writer.writerow([
-                    safe_text(comment.comment_id),
-                    safe_text(comment.post_id),
-                    safe_text(comment.post_url),
-                    safe_text(comment.user_name),
-                    safe_text(comment.user_id),
-                    safe_text(comment.user_url),
-                    safe_text(comment.comment_text),
-                    date_created_str,
-                    comment.num_likes,
-                    comment.num_replies,
-                    safe_text(comment.source_type),
-                    safe_text(comment.type),
-                    safe_text(comment.commentator_profile),
-                    safe_text(comment.comment_link)
-                ])
-            
-            return response
+            filename = f'facebook_comments_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            return stream_csv_response(comments, FACEBOOK_COMMENT_COLUMNS, filename)
         
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
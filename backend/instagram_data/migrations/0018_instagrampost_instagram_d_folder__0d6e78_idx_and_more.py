@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instagram_data', '0017_remove_folder_instagram_d_scrape__ef58af_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='instagrampost',
+            index=models.Index(fields=['folder', 'date_posted', 'id'], name='instagram_d_folder__0d6e78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='instagrampost',
+            index=models.Index(fields=['folder', 'likes', 'id'], name='instagram_d_folder__0ce9a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='instagrampost',
+            index=models.Index(fields=['folder', 'num_comments', 'id'], name='instagram_d_folder__a045ec_idx'),
+        ),
+    ]
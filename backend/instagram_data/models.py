@@ -1,8 +1,18 @@
 from django.db import models
+from reports.folder_counts import ContentCountQuerySet
 from users.models import Project
 
 # Create your models here.
 
+class FolderQuerySet(ContentCountQuerySet):
+    def content_counts(self):
+        return {
+            'post_count': InstagramPost.objects.exclude(content_type='reel'),
+            'reel_count': InstagramPost.objects.filter(content_type='reel'),
+            'comment_count': InstagramComment.objects.all(),
+        }
+
+
 class Folder(models.Model):
     """
     Model for organizing Instagram data into folders
@@ -34,6 +44,8 @@ class Folder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FolderQuerySet.as_manager()
+
     def __str__(self):
         return self.name
     
@@ -174,6 +186,10 @@ class InstagramPost(models.Model):
             models.Index(fields=['date_posted']),
             models.Index(fields=['content_type']),
             models.Index(fields=['product_type']),
+            # Keyset pagination of a folder by each sortable field (reports.pagination)
+            models.Index(fields=['folder', 'date_posted', 'id']),
+            models.Index(fields=['folder', 'likes', 'id']),
+            models.Index(fields=['folder', 'num_comments', 'id']),
         ]
 
 class InstagramComment(models.Model):
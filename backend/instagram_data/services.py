@@ -16,7 +16,9 @@ from django.conf import settings
 from dateutil import parser as date_parser
 
 from .models import InstagramPost, InstagramComment, Folder, CommentScrapingJob
+from brightdata_integration.brightdata_client import TRIGGER_PATH, get_client
 from brightdata_integration.models import BrightdataConfig
+from scrapy_integration.retrieval_index import batched_documents
 
 logger = logging.getLogger(__name__)
 
@@ -139,7 +141,7 @@ class InstagramCommentScraper:
         Make the BrightData API request for Instagram comment scraping
         """
         try:
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -155,7 +157,7 @@ class InstagramCommentScraper:
             
             self.logger.info(f"Submitting {len(payload)} Instagram posts for comment scraping")
             
-            response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+            response = get_client().post(url, headers=headers, params=params, json=payload)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -253,7 +255,7 @@ class InstagramCommentScraper:
         Make a direct BrightData API request (without job tracking)
         """
         try:
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -265,7 +267,7 @@ class InstagramCommentScraper:
             
             self.logger.info(f"Submitting {len(payload)} Instagram URLs for comment scraping")
             
-            response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+            response = get_client().post(url, headers=headers, params=params, json=payload)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -307,7 +309,7 @@ class InstagramCommentScraper:
                 except CommentScrapingJob.DoesNotExist:
                     pass
             
-            with transaction.atomic():
+            with transaction.atomic(), batched_documents():
                 for comment_data in webhook_data:
                     try:
                         self._process_single_instagram_comment(comment_data, result, result_folder, job_id)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('linkedin_data', '0012_remove_folder_linkedin_da_scrape__7b495e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='linkedinpost',
+            index=models.Index(fields=['folder', 'date_posted', 'id'], name='linkedin_da_folder__bf38af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linkedinpost',
+            index=models.Index(fields=['folder', 'likes', 'id'], name='linkedin_da_folder__43ab1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linkedinpost',
+            index=models.Index(fields=['folder', 'num_comments', 'id'], name='linkedin_da_folder__d97625_idx'),
+        ),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
+from reports.folder_counts import ContentCountQuerySet
 from users.models import Project
 import json
 
 # Create your models here.
 
+class FolderQuerySet(ContentCountQuerySet):
+    def content_counts(self):
+        return {
+            'post_count': LinkedInPost.objects.all(),
+        }
+
+
 class Folder(models.Model):
     """
     Model for organizing LinkedIn posts into folders
@@ -37,6 +45,8 @@ class Folder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FolderQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
     
@@ -189,15 +199,18 @@ class LinkedInPost(models.Model):
     def __str__(self):
         return f"Post by {self.user_posted}"
     
-    def save(self, *args, **kwargs):
+    def sync_legacy_fields(self):
+        """Populate backward-compatible text fields (also used by bulk writes, which skip save())"""
         # Convert hashtags list to text for backward compatibility
         if self.hashtags and isinstance(self.hashtags, list):
             self.hashtags_text = ', '.join(self.hashtags)
-        
+
         # Convert latest_comments list to JSON string for backward compatibility
         if self.latest_comments and isinstance(self.latest_comments, list):
             self.latest_comments = json.dumps(self.latest_comments)
-        
+
+    def save(self, *args, **kwargs):
+        self.sync_legacy_fields()
         super().save(*args, **kwargs)
     
     class Meta:
@@ -211,4 +224,8 @@ class LinkedInPost(models.Model):
             models.Index(fields=['date_posted']),
             models.Index(fields=['user_id']),
             models.Index(fields=['post_type']),
+            # Keyset pagination of a folder by each sortable field (reports.pagination)
+            models.Index(fields=['folder', 'date_posted', 'id']),
+            models.Index(fields=['folder', 'likes', 'id']),
+            models.Index(fields=['folder', 'num_comments', 'id']),
         ] 
\ No newline at end of file
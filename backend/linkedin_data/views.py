@@ -1,8 +1,5 @@
 from django.shortcuts import render, get_object_or_404
-import csv
 import json
-import io
-import datetime
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action, permission_classes
@@ -10,15 +7,14 @@ from rest_framework.permissions import AllowAny
 from django.http import HttpResponse
 from .models import LinkedInPost, Folder
 from .serializers import LinkedInPostSerializer, FolderSerializer
-from django.db.models import Q
-
-# Try to import dateparser, but provide a fallback if it's not available
-try:
-    import dateparser
-    HAS_DATEPARSER = True
-except ImportError:
-    HAS_DATEPARSER = False
-    print("Warning: dateparser module not available. Using basic date parsing.")
+from django.db.models import Prefetch, Q
+from brightdata_integration.csv_import import import_upload
+from reports.exports import BASIC_POST_COLUMNS, stream_csv_response
+from reports.columnar import PARQUET, columnar_response
+from reports.pagination import PostKeysetPagination, sort_posts
+from reports.post_stats import move_posts
+from reports.hashtags import posts_with_hashtag
+from reports.search import search_posts
 
 # Create your views here.
 
@@ -48,7 +44,7 @@ class FolderViewSet(viewsets.ModelViewSet):
             return Folder.objects.none()
         
         # Filter by project
-        queryset = Folder.objects.filter(project_id=project_id)
+        queryset = Folder.objects.filter(project_id=project_id).with_content_counts()
         
         # Filter by parent folder if specified
         parent_folder = self.request.query_params.get('parent_folder')
@@ -64,7 +60,9 @@ class FolderViewSet(viewsets.ModelViewSet):
         
         if include_hierarchy:
             # Prefetch related subfolders for hierarchical display
-            queryset = queryset.prefetch_related('subfolders')
+            queryset = queryset.prefetch_related(
+                Prefetch('subfolders', queryset=Folder.objects.with_content_counts())
+            )
         
         return queryset
     
@@ -176,7 +174,7 @@ class FolderViewSet(viewsets.ModelViewSet):
             print(f"Deleting folder: {folder.name} (ID: {folder.id})")
             
             # Move all content in this folder to uncategorized (folder=None) before deletion
-            posts_moved = LinkedInPost.objects.filter(folder=folder).update(folder=None)
+            posts_moved = move_posts(LinkedInPost.objects.filter(folder=folder), None)
             print(f"Moved {posts_moved} posts to uncategorized")
             
             # Delete the folder
@@ -196,6 +194,7 @@ class LinkedInPostViewSet(viewsets.ModelViewSet):
     """
     serializer_class = LinkedInPostSerializer
     permission_classes = [AllowAny]  # Allow any user to access these endpoints for testing
+    pagination_class = PostKeysetPagination
     
     def get_queryset(self):
         """
@@ -245,143 +244,17 @@ class LinkedInPostViewSet(viewsets.ModelViewSet):
         if content_type:
             queryset = queryset.filter(content_type=content_type)
         
-        # Add search functionality
+        # Add search functionality (full-text index, see reports.search)
         search_query = self.request.query_params.get('search', '')
         if search_query:
-            queryset = queryset.filter(
-                Q(user_posted__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(hashtags__icontains=search_query) |
-                Q(content_type__icontains=search_query) |
-                Q(post_id__icontains=search_query)
-            )
-        
-        return queryset
-
-    def _safe_int_convert(self, value):
-        """
-        Safely convert a value to integer, returning 0 if conversion fails
-        """
-        try:
-            if value is None or value == '' or value == '""':
-                return 0
-            return int(value)
-        except (ValueError, TypeError):
-            return 0
-    
-    def _safe_float_convert(self, value):
-        """
-        Safely convert a value to float, returning 0.0 if conversion fails
-        """
-        try:
-            if value is None or value == '' or value == '""':
-                return 0.0
-            return float(value)
-        except (ValueError, TypeError):
-            return 0.0
-            
-    def _safe_bool_convert(self, value):
-        """
-        Safely convert a value to boolean
-        """
-        if value is None or value == '' or value == '""':
-            return False
+            queryset = search_posts(queryset, search_query, rank=self.request.query_params.get('sort_by') == 'relevance')
         
-        if isinstance(value, bool):
-            return value
+        # Posts carrying a hashtag (hashtag index, see reports.hashtags)
+        hashtag = self.request.query_params.get('hashtag')
+        if hashtag:
+            queryset = posts_with_hashtag(queryset, hashtag)
         
-        # Convert string values
-        if isinstance(value, str):
-            value = value.strip().lower()
-            return value in ('true', 'yes', '1', 't', 'y')
-        
-        # Try to convert numbers to bool
-        try:
-            return bool(int(value))
-        except (ValueError, TypeError):
-            return False
-
-    def _parse_date(self, date_str):
-        """
-        Parse a date string using dateparser if available, otherwise use basic parsing
-        """
-        if not date_str or not date_str.strip() or date_str.strip() == '""':
-            return None
-            
-        # Remove any quotes that might be in the CSV data
-        clean_date = date_str.strip().strip('"\'')
-        if not clean_date:
-            return None
-        
-        # Special handling for ISO format dates (like 2025-04-14T08:27:06.000Z)
-        if 'T' in clean_date and (clean_date.endswith('Z') or '+' in clean_date):
-            try:
-                # Use Python's built-in ISO parser for efficiency
-                from datetime import datetime
-                return datetime.fromisoformat(clean_date.replace('Z', '+00:00'))
-            except (ValueError, TypeError):
-                # If that fails, continue with the regular parsing methods
-                print(f"ISO format detection failed for: {clean_date}")
-                pass
-            
-        # Detect and fix common LinkedIn date formats
-        # If it's a Unix timestamp (all digits)
-        if clean_date.isdigit() and len(clean_date) >= 10:
-            try:
-                # Convert Unix timestamp to datetime
-                timestamp = int(clean_date)
-                # Check if it's in milliseconds (13 digits) or seconds (10 digits)
-                if len(clean_date) >= 13:
-                    timestamp = timestamp // 1000  # Convert from milliseconds to seconds
-                return datetime.datetime.fromtimestamp(timestamp)
-            except (ValueError, OverflowError):
-                pass  # If conversion fails, continue with other methods
-            
-        try:
-            if HAS_DATEPARSER:
-                # Use dateparser if available with specific settings for LinkedIn
-                return dateparser.parse(
-                    clean_date,
-                    settings={
-                        'TIMEZONE': 'UTC',
-                        'RETURN_AS_TIMEZONE_AWARE': False,
-                        'DATE_ORDER': 'YMD',  # Prefer Year-Month-Day format
-                    }
-                )
-            else:
-                # Basic parsing for common formats
-                formats_to_try = [
-                    '%Y-%m-%dT%H:%M:%S.%fZ', # 2025-04-14T08:27:06.000Z
-                    '%Y-%m-%dT%H:%M:%SZ',    # 2025-04-14T08:27:06Z
-                    '%Y-%m-%dT%H:%M:%S.%f',  # 2025-04-14T08:27:06.000
-                    '%Y-%m-%dT%H:%M:%S',     # 2025-04-14T08:27:06
-                    '%Y-%m-%d',              # 2023-01-31
-                    '%Y-%m-%d %H:%M:%S',     # 2023-01-31 12:30:45
-                    '%Y-%m-%d %H:%M',        # 2023-01-31 12:30
-                    '%d/%m/%Y',              # 31/01/2023
-                    '%m/%d/%Y',              # 01/31/2023
-                    '%Y/%m/%d',              # 2023/01/31
-                    '%d-%m-%Y',              # 31-01-2023
-                    '%m-%d-%Y',              # 01-31-2023
-                    '%d.%m.%Y',              # 31.01.2023
-                    '%m.%d.%Y',              # 01.31.2023
-                    '%b %d, %Y',             # Jan 31, 2023
-                    '%d %b %Y',              # 31 Jan 2023
-                    '%B %d, %Y',             # January 31, 2023
-                    '%d %B %Y',              # 31 January 2023
-                ]
-                
-                for fmt in formats_to_try:
-                    try:
-                        return datetime.datetime.strptime(clean_date, fmt)
-                    except ValueError:
-                        continue
-                        
-                # If we get here, no format worked
-                return None
-        except Exception as e:
-            print(f"Date parsing error: {str(e)} for value: '{clean_date}'")
-            return None
+        return sort_posts(queryset, self.request)
 
     @action(detail=False, methods=['POST'])
     def upload_csv(self, request):
@@ -404,103 +277,9 @@ class LinkedInPostViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            # Read the CSV file
-            try:
-                decoded_file = csv_file.read().decode('utf-8-sig')
-            except UnicodeDecodeError:
-                try:
-                    # Try with a fallback encoding if UTF-8 fails
-                    decoded_file = csv_file.read().decode('latin-1')
-                except Exception as e:
-                    return Response(
-                        {'error': f'Failed to decode file: {str(e)}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            
-            csv_data = csv.DictReader(io.StringIO(decoded_file))
-            
-            # Check if there are any rows in the CSV
-            rows = list(csv_data)
-            if not rows:
-                return Response(
-                    {'error': 'The CSV file is empty or improperly formatted'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Count how many rows were successfully created
-            created_count = 0
-            failed_rows = []
-            
-            for row in rows:
-                try:
-                    # Map CSV columns to model fields
-                    # Use the GE Tracker LinkedIn CSV column names
-                    post_data = {
-                        'url': row.get('url', ''),
-                        'post_id': row.get('id', ''),
-                        'user_posted': row.get('use_url', '').split('/')[-1] if row.get('use_url') else '',
-                        'description': row.get('post_text', ''),
-                        'hashtags': row.get('hashtags', ''),
-                        'likes': self._safe_int_convert(row.get('num_likes', 0)),
-                        'num_comments': self._safe_int_convert(row.get('num_comments', 0)),
-                        'date_posted': self._parse_date(row.get('date_posted', None)),
-                        'photos': row.get('images', ''),
-                        'videos': row.get('videos', ''),
-                        'latest_comments': row.get('top_visible_comments', ''),
-                        'followers': self._safe_int_convert(row.get('user_followers', 0)),
-                        'posts_count': self._safe_int_convert(row.get('user_posts', 0)),
-                        'profile_image_link': row.get('author_profile_pic', ''),
-                        'content_type': row.get('post_type', ''),
-                        'tagged_users': row.get('tagged_people', ''),
-                        'location': '',  # Not directly available in the CSV
-                        'discovery_input': row.get('discovery_input', ''),
-                    }
-                    
-                    # Calculate an engagement score based on likes and comments
-                    likes = self._safe_int_convert(row.get('num_likes', 0))
-                    comments = self._safe_int_convert(row.get('num_comments', 0))
-                    post_data['engagement_score'] = likes + (comments * 2)  # Comments weighted more
-                    
-                    # Skip if no post_id or URL is provided
-                    if not post_data['post_id'] and not post_data['url']:
-                        failed_rows.append({
-                            'row': row,
-                            'error': 'Missing post_id and URL'
-                        })
-                        continue
-                    
-                    # Set folder if provided
-                    if folder:
-                        post_data['folder'] = folder
-                    
-                    # Create or update the post
-                    if post_data['post_id']:
-                        post, created = LinkedInPost.objects.update_or_create(
-                            post_id=post_data['post_id'],
-                            folder=folder,
-                            defaults=post_data
-                        )
-                    else:
-                        post, created = LinkedInPost.objects.update_or_create(
-                            url=post_data['url'],
-                            folder=folder,
-                            defaults=post_data
-                        )
-                    
-                    created_count += 1
-                    
-                except Exception as e:
-                    failed_rows.append({
-                        'row': row,
-                        'error': str(e)
-                    })
-            
-            return Response({
-                'success': True,
-                'created_count': created_count,
-                'failed_count': len(failed_rows),
-                'failed_rows': failed_rows[:10] if failed_rows else []  # Limit to first 10 for readability
-            })
+            # Rows are streamed, validated and upserted in batches by the importer
+            response_data, status_code = import_upload('linkedin_posts', csv_file, folder)
+            return Response(response_data, status=status_code)
             
         except Exception as e:
             return Response(
@@ -521,10 +300,6 @@ class LinkedInPostViewSet(viewsets.ModelViewSet):
             # Build the filtered queryset
             queryset = self.get_queryset()
             
-            # Create a CSV response
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="linkedin_posts.csv"'
-            
             # Customize filename if we have folder or content type
             filename_parts = ['linkedin_posts']
             if folder_id:
@@ -537,37 +312,23 @@ class LinkedInPostViewSet(viewsets.ModelViewSet):
             if content_type:
                 filename_parts.append(content_type)
                 
-            response['Content-Disposition'] = f'attachment; filename="{"-".join(filename_parts)}.csv"'
+            filename = f'{"-".join(filename_parts)}.csv'
+            return stream_csv_response(queryset, BASIC_POST_COLUMNS, filename, bom=False)
             
-            # Create CSV writer
-            writer = csv.writer(response)
-            
-            # Write header row
-            writer.writerow([
-                'Post ID', 'User Name', 'URL', 'Date Posted', 'Likes', 'Comments',
-                'Description', 'Hashtags', 'Is Verified', 'Is Paid Partnership',
-                'Followers', 'Posts Count', 'Content Type'
-            ])
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['GET'])
+    def download_columnar(self, request):
+        """
+        Download posts as Parquet (default) or Arrow IPC (?file_format=arrow)
+        """
+        try:
+            content_type = request.query_params.get('content_type')
             
-            # Write data rows
-            for post in queryset:
-                writer.writerow([
-                    post.post_id,
-                    post.user_posted,
-                    post.url,
-                    post.date_posted.isoformat() if post.date_posted else '',
-                    post.likes,
-                    post.num_comments,
-                    post.description,
-                    post.hashtags,
-                    'Yes' if post.is_verified else 'No',
-                    'Yes' if post.is_paid_partnership else 'No',
-                    post.followers,
-                    post.posts_count,
-                    post.content_type
-                ])
-                
-            return response
+            queryset = self.get_queryset().order_by('id')
+            filename = f'linkedin_posts-{content_type}' if content_type else 'linkedin_posts'
+            return columnar_response(queryset, filename, request.query_params.get('file_format', PARQUET))
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reports"
+
+    def ready(self):
+        from reports.signals import connect_post_hashtags, connect_post_search, connect_post_stats
+        connect_post_stats()
+        connect_post_search()
+        connect_post_hashtags()
@@ -0,0 +1,269 @@
+"""
+Columnar (Parquet / Arrow IPC) exports of platform posts
+
+CSV exports stringify everything, so analysts re-parse dates, numbers and the JSON
+cells in pandas after every download. These exports keep the model types instead:
+the Arrow schema is derived from the post model, list-valued fields such as
+hashtags, photos and latest_comments become list<string> columns (non-string
+elements are JSON-encoded), other JSON fields become JSON text.
+
+Rows are read in chunks with values_list().iterator() and every chunk is written
+as one row group (Parquet) or record batch (Arrow), so memory is bounded by the
+chunk size. A UnifiedRunFolder tree is exported as a zip holding one file per
+platform, since each platform has its own schema.
+"""
+
+import json
+import re
+import tempfile
+import zipfile
+from typing import IO, Any, Callable, Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import QuerySet
+
+from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+from track_accounts.folder_tree import tree_folder_ids
+
+from .exports import StreamingFileResponse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+PARQUET = 'parquet'
+ARROW = 'arrow'
+
+FILE_FORMATS = {
+    PARQUET: ('.parquet', 'application/vnd.apache.parquet'),
+    ARROW: ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# Fields holding lists, whether stored as JSONField or as JSON text
+LIST_FIELDS = frozenset((
+    'hashtags', 'photos', 'videos', 'images', 'latest_comments', 'top_comments',
+    'tagged_users', 'tagged_people', 'tagged_companies', 'coauthor_producers',
+    'embedded_links', 'attachments_data', 'active_ads_urls',
+))
+
+
+class ColumnarExportError(ValueError):
+    """Unsupported format or missing pyarrow"""
+
+
+def check_format(file_format: str) -> str:
+    file_format = (file_format or PARQUET).lower()
+    if file_format not in FILE_FORMATS:
+        raise ColumnarExportError(
+            f"Unsupported file_format '{file_format}', expected one of: {', '.join(FILE_FORMATS)}"
+        )
+    if not HAS_PYARROW:
+        raise ColumnarExportError('Columnar exports require pyarrow, which is not installed')
+    return file_format
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+def _json_element(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def to_string_list(value) -> Optional[List[Optional[str]]]:
+    """List cell from a JSON list, JSON text or a bare scalar"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith('['):
+            try:
+                value = json.loads(text)
+            except ValueError:
+                return [value]
+        else:
+            return [value]
+    if isinstance(value, (list, tuple)):
+        return [_json_element(element) for element in value]
+    return [_json_element(value)]
+
+
+def to_json_text(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _arrow_type(field: models.Field):
+    """Arrow type and optional value converter for a concrete model field"""
+    if field.name in LIST_FIELDS:
+        return pa.list_(pa.string()), to_string_list
+    if isinstance(field, models.JSONField):
+        return pa.string(), to_json_text
+    if isinstance(field, models.BooleanField):
+        return pa.bool_(), None
+    if isinstance(field, (models.AutoField, models.IntegerField, models.ForeignKey)):
+        return pa.int64(), None
+    if isinstance(field, (models.FloatField, models.DecimalField)):
+        return pa.float64(), (lambda value: None if value is None else float(value))
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC' if settings.USE_TZ else None), None
+    if isinstance(field, models.DateField):
+        return pa.date32(), None
+    if isinstance(field, (models.CharField, models.TextField)):
+        return pa.string(), None
+    return pa.string(), (lambda value: None if value is None else str(value))
+
+
+def model_schema(model) -> Tuple['pa.Schema', List[str], List[Optional[Callable[[Any], Any]]]]:
+    """Arrow schema, column attnames and per-column converters for a model"""
+    fields = model._meta.concrete_fields
+    arrow_fields, converters = [], []
+    for field in fields:
+        arrow_type, converter = _arrow_type(field)
+        arrow_fields.append(pa.field(field.attname, arrow_type, nullable=True))
+        converters.append(converter)
+    return pa.schema(arrow_fields), [field.attname for field in fields], converters
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+class _PositionTrackingSink:
+    """Write-only wrapper reporting tell(), which zip members do not implement"""
+
+    def __init__(self, fileobj: IO[bytes]):
+        self._fileobj = fileobj
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        written = self._fileobj.write(data)
+        self._position += len(data)
+        return written
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        self._fileobj.flush()
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return False
+
+
+def _iter_chunks(queryset: QuerySet, attnames: List[str], chunk_size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in queryset.values_list(*attnames).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _chunk_table(chunk: List[tuple], schema, converters) -> 'pa.Table':
+    columns = list(zip(*chunk))
+    arrays = []
+    for values, converter, field in zip(columns, converters, schema):
+        if converter is not None:
+            values = [converter(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_queryset(queryset: QuerySet, sink: IO[bytes], file_format: str = PARQUET,
+                   row_group_size: Optional[int] = None) -> int:
+    """Write every row of a queryset to sink, one row group per chunk; returns the row count"""
+    file_format = check_format(file_format)
+    row_group_size = row_group_size or getattr(settings, 'COLUMNAR_EXPORT_ROW_GROUP_SIZE', DEFAULT_ROW_GROUP_SIZE)
+    schema, attnames, converters = model_schema(queryset.model)
+
+    sink = _PositionTrackingSink(sink)
+    if file_format == PARQUET:
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+    rows = 0
+    try:
+        for chunk in _iter_chunks(queryset, attnames, row_group_size):
+            writer.write_table(_chunk_table(chunk, schema, converters))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Responses
+# ---------------------------------------------------------------------------
+
+def _attachment(fileobj: IO[bytes], filename: str, content_type: str) -> StreamingFileResponse:
+    fileobj.seek(0)
+    return StreamingFileResponse(fileobj, as_attachment=True, filename=filename, content_type=content_type)
+
+
+def columnar_response(queryset: QuerySet, filename_stem: str, file_format: str = PARQUET) -> StreamingFileResponse:
+    """Spool a queryset export to a temporary file and serve it as an attachment"""
+    file_format = check_format(file_format)
+    extension, content_type = FILE_FORMATS[file_format]
+
+    spool = tempfile.TemporaryFile()
+    try:
+        write_queryset(queryset, spool, file_format)
+    except Exception:
+        spool.close()
+        raise
+    return _attachment(spool, f'{filename_stem}{extension}', content_type)
+
+
+def tree_querysets(root) -> Iterator[Tuple[str, QuerySet]]:
+    """(platform, posts) for every platform with posts somewhere under a UnifiedRunFolder"""
+    folder_ids = tree_folder_ids(type(root).objects.filter(pk=root.pk))
+    for platform, label in PLATFORM_POST_MODELS.items():
+        posts = apps.get_model(label).objects.filter(
+            folder__unified_job_folder_id__in=folder_ids
+        ).order_by('id')
+        if posts.exists():
+            yield platform, posts
+
+
+def folder_tree_response(root, file_format: str = PARQUET) -> StreamingFileResponse:
+    """Zip of one columnar file per platform found under a UnifiedRunFolder tree"""
+    file_format = check_format(file_format)
+    extension, _ = FILE_FORMATS[file_format]
+
+    spool = tempfile.TemporaryFile()
+    try:
+        # Parquet and Arrow files are already compressed
+        with zipfile.ZipFile(spool, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for platform, posts in tree_querysets(root):
+                with archive.open(f'{platform}_posts{extension}', 'w', force_zip64=True) as member:
+                    write_queryset(posts, member, file_format)
+    except Exception:
+        spool.close()
+        raise
+
+    stem = re.sub(r'[^\w-]+', '_', root.name).strip('_').lower() or 'folder'
+    return _attachment(spool, f'{stem}_{root.pk}_{file_format}.zip', 'application/zip')
@@ -0,0 +1,35 @@
+"""
+Content counts of platform folders for folder listings
+
+Each platform app's Folder manager subclasses ContentCountQuerySet and names what
+its folders hold in content_counts(). with_content_counts() then annotates one
+correlated COUNT subquery per entry, so listing folders takes one query however
+many folders there are, and the serializers read the annotations instead of
+counting per folder.
+"""
+
+from typing import Dict
+
+from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_in_folder(queryset):
+    """Correlated COUNT of the queryset's rows in the outer query's folder"""
+    return Coalesce(Subquery(
+        queryset.filter(folder=OuterRef('pk')).order_by().values('folder').annotate(total=Count('pk')).values('total'),
+        output_field=models.IntegerField(),
+    ), 0)
+
+
+class ContentCountQuerySet(models.QuerySet):
+
+    def content_counts(self) -> Dict[str, models.QuerySet]:
+        """Annotation name -> the queryset of content it counts"""
+        raise NotImplementedError
+
+    def with_content_counts(self):
+        return self.annotate(**{
+            name: count_in_folder(queryset) for name, queryset in self.content_counts().items()
+        })
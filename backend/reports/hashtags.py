@@ -0,0 +1,239 @@
+"""
+Normalized hashtag index of platform posts
+
+Hashtags live on the post tables as JSON arrays (Instagram, LinkedIn) or as text
+(Facebook, TikTok: a list literal or '#a #b'), so counting trending hashtags meant
+loading every post and running a Counter in Python. PostHashtag holds one row per
+(post, hashtag) with the post's platform, folder, project and day, and its indexes
+answer both questions the dashboards and the AI chat ask:
+
+- top hashtags of a project, of some folders or of a time window: a GROUP BY over
+  the (project, day, hashtag) or (platform, folder_id, day, hashtag) index
+- posts carrying a hashtag: the (hashtag, day) index, see posts_with_hashtag()
+
+Rows are kept in sync the same way as the post stats rollup:
+- bulk writes (webhook ingestion, CSV imports) collect a PostHashtags batch per
+  chunk and apply it inside the chunk's transaction
+- single saves and deletes go through the signal receivers in reports.signals
+- moving posts between folders with post_stats.move_posts() moves their rows
+rebuild_hashtag_index() (the rebuild_hashtag_index command) recomputes everything.
+"""
+
+import ast
+import json
+import logging
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet
+
+from .models import PostHashtag, PostStatsRollup
+from .post_stats import platform_for_model, post_day
+
+logger = logging.getLogger(__name__)
+
+# Post fields a hashtag row is built from
+FIELDS = ('folder_id', 'date_posted', 'created_at', 'hashtags')
+
+DEFAULT_TOP = 20
+MAX_TOP = 100
+REBUILD_CHUNK_SIZE = 2000
+
+_MAX_LENGTH = PostHashtag._meta.get_field('hashtag').max_length
+_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+def normalize_hashtag(tag: Any) -> str:
+    """'#RunClub ' -> 'runclub'; '' for values that are not a hashtag"""
+    if not isinstance(tag, str):
+        return ''
+    # Quotes and brackets are leftovers of list literals that did not parse
+    return tag.strip(' \t\r\n\'"[]').lstrip('#').strip().lower()[:_MAX_LENGTH]
+
+
+def parse_hashtags(value: Any) -> List[str]:
+    """Distinct normalized hashtags of a post's hashtags value, in order"""
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return []
+        if text[0] == '[':
+            for parse in (json.loads, ast.literal_eval):
+                try:
+                    value = parse(text)
+                    break
+                except (ValueError, SyntaxError):
+                    continue
+        if isinstance(value, str):
+            value = _SEPARATORS.split(text.replace('#', ' #'))
+    if not isinstance(value, (list, tuple)):
+        return []
+    tags = (normalize_hashtag(tag) for tag in value)
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+
+class PostHashtags:
+    """
+    Hashtag rows of posts written in bulk, replaced at once by apply().
+    A no-op for models that are not platform posts.
+    """
+
+    def __init__(self, model, folder=None):
+        self.model = model
+        self.platform = platform_for_model(model)
+        self.projects: Dict[int, Optional[int]] = {PostStatsRollup.NO_FOLDER: None}
+        if folder is not None:
+            self.projects[folder.pk] = folder.project_id
+        self._posts: Dict[int, Tuple[int, date, List[str]]] = {}
+        self._replaced = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.platform is not None
+
+    def watches(self, field_names: Iterable[str]) -> bool:
+        """Whether changing these fields (names or attnames) changes the post's rows"""
+        if not self.enabled:
+            return False
+        return any(name in FIELDS or f'{name}_id' in FIELDS for name in field_names)
+
+    def add(self, post, created: bool = False) -> None:
+        """Post instance or value mapping (with 'pk' or 'id'); created posts have no rows to replace"""
+        if not self.enabled:
+            return
+        if isinstance(post, Mapping):
+            pk, values = post.get('pk', post.get('id')), post
+        else:
+            pk, values = post.pk, {name: getattr(post, name, None) for name in FIELDS}
+        if pk is None:
+            return
+        self._posts[pk] = (
+            values.get('folder_id') or PostStatsRollup.NO_FOLDER,
+            post_day(values),
+            parse_hashtags(values.get('hashtags')),
+        )
+        if not created:
+            self._replaced.add(pk)
+
+    def apply(self) -> int:
+        """Write the rows of the added posts; returns the number of rows written"""
+        posts, replaced = self._posts, self._replaced
+        self._posts, self._replaced = {}, set()
+        if replaced:
+            PostHashtag.objects.filter(platform=self.platform, post_pk__in=replaced).delete()
+
+        self._resolve_projects({folder_id for folder_id, _, tags in posts.values() if tags})
+        rows = [
+            PostHashtag(platform=self.platform, post_pk=pk, hashtag=tag, project_id=self.projects.get(folder_id),
+                        folder_id=folder_id, day=day)
+            for pk, (folder_id, day, tags) in posts.items()
+            for tag in tags
+        ]
+        if rows:
+            PostHashtag.objects.bulk_create(rows, batch_size=REBUILD_CHUNK_SIZE, ignore_conflicts=True)
+        return len(rows)
+
+    def _resolve_projects(self, folder_ids) -> None:
+        unknown = [folder_id for folder_id in folder_ids if folder_id not in self.projects]
+        if not unknown:
+            return
+        folder_model = self.model._meta.get_field('folder').related_model
+        found = dict(folder_model.objects.filter(pk__in=unknown).values_list('pk', 'project_id'))
+        for folder_id in unknown:
+            self.projects[folder_id] = found.get(folder_id)
+
+
+def remove_post_hashtags(model, post_pks: Iterable[int]) -> None:
+    platform = platform_for_model(model)
+    if platform:
+        PostHashtag.objects.filter(platform=platform, post_pk__in=list(post_pks)).delete()
+
+
+def rebuild_hashtag_index(platforms: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Recompute the hashtag rows of every post of the given platforms (default: all)"""
+    from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+
+    counts = {}
+    for platform in platforms or PLATFORM_POST_MODELS:
+        model = apps.get_model(PLATFORM_POST_MODELS[platform])
+        batch = PostHashtags(model)
+        with transaction.atomic():
+            PostHashtag.objects.filter(platform=platform).delete()
+            rows = model.objects.order_by().exclude(hashtags__isnull=True).values('pk', *FIELDS)
+            for count, row in enumerate(rows.iterator(chunk_size=REBUILD_CHUNK_SIZE), start=1):
+                batch.add(row, created=True)
+                if count % REBUILD_CHUNK_SIZE == 0:
+                    batch.apply()
+            batch.apply()
+        counts[platform] = PostHashtag.objects.filter(platform=platform).count()
+        logger.info(f"Rebuilt {counts[platform]} {platform} hashtag rows")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def hashtag_rows(project=None, folders: Optional[Mapping[str, Iterable[int]]] = None,
+                 platform: Optional[str] = None, since: Optional[date] = None,
+                 until: Optional[date] = None) -> QuerySet:
+    """
+    PostHashtag rows of a project and/or of some folders ({platform: folder ids})
+    and/or of one platform, posted between since and until (inclusive)
+    """
+    rows = PostHashtag.objects.all()
+    if project is not None:
+        rows = rows.filter(project=project)
+    if folders is not None:
+        in_folders = Q(pk__in=[])
+        for folder_platform, folder_ids in folders.items():
+            in_folders |= Q(platform=folder_platform, folder_id__in=list(folder_ids))
+        rows = rows.filter(in_folders)
+    if platform is not None:
+        rows = rows.filter(platform=platform)
+    if since is not None:
+        rows = rows.filter(day__gte=since)
+    if until is not None:
+        rows = rows.filter(day__lte=until)
+    return rows
+
+
+def linked_folders(job_folder_ids: Iterable[int]) -> Dict[str, List[int]]:
+    """Platform folders ({platform: folder ids}) linked to unified folders or their descendants"""
+    from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+    from track_accounts.folder_tree import tree_folder_ids
+    from track_accounts.models import UnifiedRunFolder
+
+    tree_ids = tree_folder_ids(UnifiedRunFolder.objects.filter(pk__in=list(job_folder_ids)))
+    folders = {}
+    for platform, label in PLATFORM_POST_MODELS.items():
+        folder_model = apps.get_model(label)._meta.get_field('folder').related_model
+        folders[platform] = list(
+            folder_model.objects.filter(unified_job_folder_id__in=tree_ids).values_list('pk', flat=True)
+        )
+    return folders
+
+
+def top_hashtags(limit: int = DEFAULT_TOP, **filters) -> List[Dict[str, Any]]:
+    """Most used hashtags as [{'hashtag', 'posts'}], most posts first; filters as for hashtag_rows()"""
+    return list(
+        hashtag_rows(**filters).values('hashtag').annotate(posts=Count('*')).order_by('-posts', 'hashtag')[:limit]
+    )
+
+
+def posts_with_hashtag(queryset: QuerySet, hashtag: str) -> QuerySet:
+    """Posts of a platform post queryset carrying the hashtag ('#Run' and 'run' alike)"""
+    platform = platform_for_model(queryset.model)
+    tag = normalize_hashtag(hashtag)
+    if platform is None or not tag:
+        return queryset.none()
+    return queryset.filter(
+        pk__in=PostHashtag.objects.filter(hashtag=tag, platform=platform).values('post_pk')
+    )
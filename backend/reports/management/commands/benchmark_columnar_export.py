@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from instagram_data.models import InstagramPost
+from instagram_data.views import INSTAGRAM_POST_COLUMNS
+from reports.columnar import ARROW, PARQUET, write_queryset
+from reports.exports import iter_csv, iter_queryset_rows
+from reports.management.commands.benchmark_csv_export import Rollback, create_synthetic_posts
+import ast
+import io
+import time
+import pandas as pd
+
+# Columns analysts re-parse after loading the CSV export
+LIST_COLUMNS = ('hashtags', 'photos', 'latest_comments')
+
+
+def load_csv(data):
+    frame = pd.read_csv(io.BytesIO(data), encoding='utf-8-sig')
+    for column in LIST_COLUMNS:
+        frame[column] = frame[column].map(lambda cell: ast.literal_eval(cell) if isinstance(cell, str) else None)
+    frame['date_posted'] = pd.to_datetime(frame['date_posted'], utc=True, format='mixed')
+    return frame
+
+
+def load_parquet(data):
+    return pd.read_parquet(io.BytesIO(data))
+
+
+def load_arrow(data):
+    return pd.read_feather(io.BytesIO(data))
+
+
+class Command(BaseCommand):
+    help = 'Compare file size and pandas load time of CSV, Parquet and Arrow IPC exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=50000,
+            help='Synthetic Instagram posts to export (default: 50000)'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        results = {}
+
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Creating {rows} synthetic posts...")
+                folder = create_synthetic_posts(rows)
+                posts = InstagramPost.objects.filter(folder=folder).order_by('id')
+                results['csv'] = self._measure(self._export_csv, load_csv, posts)
+                results[PARQUET] = self._measure(lambda qs: self._export_columnar(qs, PARQUET), load_parquet, posts)
+                results[ARROW] = self._measure(lambda qs: self._export_columnar(qs, ARROW), load_arrow, posts)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write(f"COLUMNAR EXPORT BENCHMARK ({rows} posts)")
+        self.stdout.write("="*50)
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:>8}: {result['columns']:>3} columns, {result['size_mb']:6.1f} MB, "
+                f"export {result['export']:.2f}s, pandas load {result['load']:.2f}s"
+            )
+
+    def _export_csv(self, posts):
+        return b''.join(iter_csv(iter_queryset_rows(posts, INSTAGRAM_POST_COLUMNS), INSTAGRAM_POST_COLUMNS))
+
+    def _export_columnar(self, posts, file_format):
+        sink = io.BytesIO()
+        write_queryset(posts, sink, file_format)
+        return sink.getvalue()
+
+    def _measure(self, export, load, posts):
+        start = time.perf_counter()
+        data = export(posts)
+        exported = time.perf_counter()
+        frame = load(data)
+        loaded = time.perf_counter()
+        return {
+            'columns': len(frame.columns),
+            'size_mb': len(data) / (1024 * 1024),
+            'export': exported - start,
+            'load': loaded - exported,
+        }
@@ -0,0 +1,129 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from instagram_data.models import Folder, InstagramPost
+from instagram_data.views import INSTAGRAM_POST_COLUMNS, InstagramPostViewSet
+from reports.exports import safe_text
+import csv
+import time
+import tracemalloc
+
+MODES = ('legacy', 'streaming')
+
+
+def legacy_export(posts):
+    """The download_csv body before reports.exports (model instances into one HttpResponse)"""
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response.write('\ufeff')
+    writer = csv.writer(response)
+    writer.writerow([column.header for column in INSTAGRAM_POST_COLUMNS])
+    for post in posts:
+        writer.writerow([
+            safe_text(post.url), safe_text(post.user_posted), safe_text(post.description),
+            safe_text(post.hashtags), post.num_comments, post.date_posted, post.likes,
+            safe_text(post.photos), safe_text(post.videos), safe_text(post.location),
+            safe_text(post.latest_comments), safe_text(post.post_id), safe_text(post.discovery_input),
+            safe_text(post.thumbnail), safe_text(post.content_type), safe_text(post.platform_type),
+            post.engagement_score, safe_text(post.tagged_users), post.followers, post.posts_count,
+            safe_text(post.profile_image_link), post.is_verified, post.is_paid_partnership,
+        ])
+    return response
+
+
+def create_synthetic_posts(rows):
+    """Folder of Instagram posts shaped like webhook ingests (callers roll it back)"""
+    folder = Folder.objects.create(name='Export benchmark', category='posts')
+    description = 'Benchmark post with a caption of typical length #run #train #win ' * 4
+    InstagramPost.objects.bulk_create(
+        (
+            InstagramPost(
+                folder=folder,
+                url=f'https://www.instagram.com/p/BENCH{index}/',
+                post_id=f'BENCH{index}',
+                user_posted=f'account_{index % 500}',
+                description=description,
+                hashtags=['#run', '#train', '#win'],
+                photos=[f'https://cdn.example.com/{index}/1.jpg'],
+                latest_comments=[{'comments': 'Great post', 'user_commenting': 'fan', 'likes': 1}],
+                likes=index,
+            )
+            for index in range(rows)
+        ),
+        batch_size=2000,
+    )
+    return folder
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows once measured"""
+
+
+class Command(BaseCommand):
+    help = 'Compare first-byte latency and peak memory of the legacy and streaming CSV exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=50000,
+            help='Synthetic Instagram posts to export (default: 50000)'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        results = {}
+
+        # The synthetic folder and posts are rolled back once measured
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Creating {rows} synthetic posts...")
+                folder = create_synthetic_posts(rows)
+                for mode in MODES:
+                    results[mode] = self._measure(mode, folder)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write(f"CSV EXPORT BENCHMARK ({rows} posts)")
+        self.stdout.write("="*50)
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:>9}: first byte after {result['first_byte'] * 1000:.0f} ms, "
+                f"complete in {result['total']:.2f}s, {result['size_mb']:.1f} MB, "
+                f"peak Python memory {result['peak_mb']:.1f} MB"
+            )
+
+    def _measure(self, mode, folder):
+        request = RequestFactory().get('/api/instagram/posts/download_csv/', {'folder_id': folder.id})
+        view = InstagramPostViewSet.as_view({'get': 'download_csv'})
+
+        def export():
+            start = time.perf_counter()
+            if mode == 'legacy':
+                response = legacy_export(InstagramPost.objects.filter(folder_id=folder.id))
+                first_byte = time.perf_counter() - start
+                size = len(response.content)
+            else:
+                chunks = iter(view(request).streaming_content)
+                size = len(next(chunks))
+                first_byte = time.perf_counter() - start
+                size += sum(len(chunk) for chunk in chunks)
+            return first_byte, time.perf_counter() - start, size
+
+        first_byte, total, size = export()
+
+        # Separate pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        export()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            'first_byte': first_byte,
+            'total': total,
+            'size_mb': size / (1024 * 1024),
+            'peak_mb': peak / (1024 * 1024),
+        }
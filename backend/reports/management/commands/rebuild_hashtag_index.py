@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+from reports.models import PostHashtag
+from reports.hashtags import rebuild_hashtag_index
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute the normalized hashtag index of platform posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--platform',
+            action='append',
+            choices=sorted(PLATFORM_POST_MODELS),
+            help='Only rebuild this platform (repeatable; default: all platforms)'
+        )
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Do nothing when hashtag rows already exist (used by the deploy hook to backfill once)'
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and PostHashtag.objects.exists():
+            self.stdout.write("Hashtag index already populated, nothing to do.")
+            return
+
+        start = time.perf_counter()
+        counts = rebuild_hashtag_index(options['platform'])
+        elapsed = time.perf_counter() - start
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("HASHTAG INDEX REBUILD SUMMARY")
+        self.stdout.write("="*50)
+        for platform, rows in counts.items():
+            self.stdout.write(f"{platform:>10}: {rows} hashtag rows")
+        self.stdout.write(f"Finished in {elapsed:.2f}s")
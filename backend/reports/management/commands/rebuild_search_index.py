@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+from reports.models import PostSearchDocument
+from reports.search import rebuild_search_index, search_backend
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute the full-text search documents of platform posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--platform',
+            action='append',
+            choices=sorted(PLATFORM_POST_MODELS),
+            help='Only rebuild this platform (repeatable; default: all platforms)'
+        )
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Do nothing when search documents already exist (used by the deploy hook to backfill once)'
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and PostSearchDocument.objects.exists():
+            self.stdout.write("Search index already populated, nothing to do.")
+            return
+
+        start = time.perf_counter()
+        counts = rebuild_search_index(options['platform'])
+        elapsed = time.perf_counter() - start
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write(f"SEARCH INDEX REBUILD SUMMARY ({search_backend()})")
+        self.stdout.write("="*50)
+        for platform, documents in counts.items():
+            self.stdout.write(f"{platform:>10}: {documents} documents")
+        self.stdout.write(f"Finished in {elapsed:.2f}s")
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-17 02:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_reporttemplate_generatedreport'),
+        ('users', '0014_add_display_name_to_organization_membership'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=20)),
+                ('folder_id', models.IntegerField(default=0, help_text='Folder in the platform app, 0 for posts outside any folder')),
+                ('day', models.DateField(help_text='Day the post was published, or collected when the platform did not report it')),
+                ('post_count', models.BigIntegerField(default=0)),
+                ('likes', models.BigIntegerField(default=0)),
+                ('comments', models.BigIntegerField(default=0)),
+                ('shares', models.BigIntegerField(default=0)),
+                ('verified_posts', models.BigIntegerField(default=0)),
+                ('video_posts', models.BigIntegerField(default=0)),
+                ('views', models.BigIntegerField(default=0)),
+                ('audience', models.BigIntegerField(default=0)),
+                ('audience_interactions', models.BigIntegerField(default=0)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='post_stats', to='users.project')),
+            ],
+            options={
+                'db_table': 'post_stats_rollups',
+                'indexes': [models.Index(fields=['project', 'day'], name='post_stats__project_1695ed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('platform', 'folder_id', 'day'), name='post_stats_rollup_bucket')],
+            },
+        ),
+    ]
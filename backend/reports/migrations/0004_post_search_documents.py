@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    from reports.search import create_search_index
+    create_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from reports.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_post_stats_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=20)),
+                ('post_pk', models.BigIntegerField(help_text='Primary key of the post in the platform app')),
+                ('document', models.TextField(help_text="Lower-cased words of the post's author, ids, text and hashtags")),
+            ],
+            options={
+                'db_table': 'post_search_documents',
+                'constraints': [models.UniqueConstraint(fields=('platform', 'post_pk'), name='post_search_document_post')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
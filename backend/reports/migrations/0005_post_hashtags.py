@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 02:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_post_search_documents'),
+        ('users', '0014_add_display_name_to_organization_membership'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=20)),
+                ('post_pk', models.BigIntegerField(help_text='Primary key of the post in the platform app')),
+                ('hashtag', models.CharField(help_text="Lower-cased, without the leading '#'", max_length=100)),
+                ('folder_id', models.IntegerField(default=0, help_text='Folder in the platform app, 0 for posts outside any folder')),
+                ('day', models.DateField(help_text='Day the post was published, or collected when the platform did not report it')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='post_hashtags', to='users.project')),
+            ],
+            options={
+                'db_table': 'post_hashtags',
+                'indexes': [models.Index(fields=['project', 'day', 'hashtag'], name='post_hashtag_project_day'), models.Index(fields=['platform', 'folder_id', 'day', 'hashtag'], name='post_hashtag_folder_day'), models.Index(fields=['hashtag', 'day'], name='post_hashtag_tag_day')],
+                'constraints': [models.UniqueConstraint(fields=('platform', 'post_pk', 'hashtag'), name='post_hashtag_post')],
+            },
+        ),
+    ]
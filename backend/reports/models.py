@@ -81,3 +81,90 @@ class GeneratedReport(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+
+
+class PostStatsRollup(models.Model):
+    """
+    Post count and engagement sums of one platform folder for one day, kept up to
+    date by reports.post_stats as posts are written and deleted (rebuilt from
+    scratch by the rebuild_post_stats command)
+    """
+    NO_FOLDER = 0
+
+    project = models.ForeignKey('users.Project', on_delete=models.CASCADE, related_name='post_stats', null=True, blank=True)
+    platform = models.CharField(max_length=20)
+    folder_id = models.IntegerField(default=NO_FOLDER, help_text="Folder in the platform app, 0 for posts outside any folder")
+    day = models.DateField(help_text="Day the post was published, or collected when the platform did not report it")
+
+    post_count = models.BigIntegerField(default=0)
+    likes = models.BigIntegerField(default=0)
+    comments = models.BigIntegerField(default=0)
+    shares = models.BigIntegerField(default=0)
+    verified_posts = models.BigIntegerField(default=0)
+    # Video posts with a known view count, and the sum of those views
+    video_posts = models.BigIntegerField(default=0)
+    views = models.BigIntegerField(default=0)
+    # Audience (followers at the time of the post) of posts that reported it, and their interactions
+    audience = models.BigIntegerField(default=0)
+    audience_interactions = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'post_stats_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['platform', 'folder_id', 'day'], name='post_stats_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.platform} folder {self.folder_id} on {self.day}: {self.post_count} posts"
+
+
+class PostSearchDocument(models.Model):
+    """
+    Normalized search text of one platform post, kept in sync by reports.search.
+    The full-text index over document lives outside the ORM: a generated tsvector
+    column with a GIN index on PostgreSQL, an FTS5 table on SQLite.
+    """
+    platform = models.CharField(max_length=20)
+    post_pk = models.BigIntegerField(help_text="Primary key of the post in the platform app")
+    document = models.TextField(help_text="Lower-cased words of the post's author, ids, text and hashtags")
+
+    class Meta:
+        db_table = 'post_search_documents'
+        constraints = [
+            models.UniqueConstraint(fields=['platform', 'post_pk'], name='post_search_document_post'),
+        ]
+
+    def __str__(self):
+        return f"{self.platform} post {self.post_pk}"
+
+
+class PostHashtag(models.Model):
+    """
+    One hashtag of one platform post, with the folder, project and day of the post so
+    trending hashtags are counted from indexes; kept in sync by reports.hashtags
+    """
+    platform = models.CharField(max_length=20)
+    post_pk = models.BigIntegerField(help_text="Primary key of the post in the platform app")
+    hashtag = models.CharField(max_length=100, help_text="Lower-cased, without the leading '#'")
+    project = models.ForeignKey('users.Project', on_delete=models.CASCADE, related_name='post_hashtags', null=True, blank=True)
+    folder_id = models.IntegerField(default=PostStatsRollup.NO_FOLDER, help_text="Folder in the platform app, 0 for posts outside any folder")
+    day = models.DateField(help_text="Day the post was published, or collected when the platform did not report it")
+
+    class Meta:
+        db_table = 'post_hashtags'
+        constraints = [
+            models.UniqueConstraint(fields=['platform', 'post_pk', 'hashtag'], name='post_hashtag_post'),
+        ]
+        indexes = [
+            # Top hashtags of a project or of folders over a time window, read from the index alone
+            models.Index(fields=['project', 'day', 'hashtag'], name='post_hashtag_project_day'),
+            models.Index(fields=['platform', 'folder_id', 'day', 'hashtag'], name='post_hashtag_folder_day'),
+            # Posts carrying a hashtag, newest first
+            models.Index(fields=['hashtag', 'day'], name='post_hashtag_tag_day'),
+        ]
+
+    def __str__(self):
+        return f"#{self.hashtag} on {self.platform} post {self.post_pk}"
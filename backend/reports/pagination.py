@@ -0,0 +1,273 @@
+"""
+Keyset (cursor) pagination for the platform post list endpoints
+
+Page numbers cost a COUNT(*) plus an OFFSET scan that grows with the page, so deep
+pages of large folders take seconds. With ?pagination=cursor (or a cursor from a
+previous response) the post viewsets page by position instead: the cursor holds the
+(sort value, id) of the last row shown and the next page is read with
+
+    WHERE folder_id = ? AND (sort_field, id) < (?, ?) ORDER BY sort_field DESC, id DESC
+
+which the (folder, sort_field, id) indexes on the post tables answer without skipping
+rows, so page 500 costs the same as page 1. The total is only counted on request
+(?count=true). NULL sort values sort as the largest values (PostgreSQL's native
+B-tree order) so the same indexes serve both directions.
+
+Without those parameters the endpoints keep DRF's page-number responses.
+
+Folder content endpoints (the contents actions and platform_data) also take a sparse
+?fields= selection, pushed down to .only(), and ?page_size=all, which streams every
+row as JSON in chunks instead of building one multi-megabyte response.
+"""
+
+import base64
+import json
+from typing import Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db.models import F, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .exports import DEFAULT_CHUNK_SIZE, StreamingResponse
+
+# Sort fields backed by (folder, field, id) indexes on every post model
+KEYSET_SORT_FIELDS = ('date_posted', 'likes', 'num_comments')
+
+MAX_PAGE_SIZE = 100
+
+# ?page_size= value asking for every row, streamed
+PAGE_SIZE_ALL = 'all'
+
+
+class FieldSelectionError(ValueError):
+    """Unknown name in ?fields="""
+
+
+def sort_posts(queryset: QuerySet, request, allowed_fields: Iterable[str] = KEYSET_SORT_FIELDS) -> QuerySet:
+    """
+    Apply ?sort_by= / ?sort_order= (default: newest first); sort_by=relevance orders
+    searches by their search_rank (see reports.search)
+    """
+    sort_by = request.query_params.get('sort_by', 'date_posted')
+    if sort_by == 'relevance' and 'search_rank' in queryset.query.annotations:
+        return queryset.order_by('-search_rank', '-id')
+    if sort_by not in allowed_fields:
+        sort_by = 'date_posted'
+    if request.query_params.get('sort_order', 'desc') == 'desc':
+        return queryset.order_by(f'-{sort_by}')
+    return queryset.order_by(sort_by)
+
+
+class PostKeysetPagination(BasePagination):
+    """Page-number pagination by default, keyset pagination on (sort field, id) on request"""
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def __init__(self):
+        self._page_numbers = PageNumberPagination()
+        self.keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        params = request.query_params
+        self.keyset = self.cursor_query_param in params or params.get(self.mode_query_param) == 'cursor'
+        if not self.keyset:
+            return self._page_numbers.paginate_queryset(queryset, request, view)
+
+        self.page_size = self._page_size(params.get(self.page_size_query_param))
+        self.field, self.descending = self._sort_key(queryset)
+        self.count = queryset.count() if params.get(self.count_query_param) == 'true' else None
+
+        queryset = queryset.order_by(*self._ordering())
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(*self._decode(cursor, queryset.model)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_data(self, data) -> dict:
+        if not self.keyset:
+            return dict(self._page_numbers.get_paginated_response(data).data)
+        return {
+            'count': self.count,
+            'next': self._next_link(),
+            'previous': None,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return self._page_numbers.get_paginated_response_schema(schema)
+
+    # ------------------------------------------------------------------
+
+    def _page_size(self, value) -> int:
+        default = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 10
+        try:
+            return max(1, min(int(value), MAX_PAGE_SIZE))
+        except (TypeError, ValueError):
+            return default
+
+    def _sort_key(self, queryset: QuerySet):
+        """Leading ordering field of the queryset (or model), with id as the tiebreaker"""
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or ['-id']
+        first = ordering[0]
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        # Expressions and annotations (such as search relevance) have no keyset; page by id
+        if not isinstance(first, str) or first.lstrip('-') not in columns:
+            first = '-id'
+        return first.lstrip('-'), first.startswith('-')
+
+    def _ordering(self):
+        if self.field == 'id':
+            return ['-id' if self.descending else 'id']
+        if self.descending:
+            return [F(self.field).desc(nulls_first=True), '-id']
+        return [F(self.field).asc(nulls_last=True), 'id']
+
+    def _after(self, value, pk) -> Q:
+        """Rows after (value, pk) in the page order, NULL being the largest value"""
+        field = self.field
+        if field == 'id':
+            return Q(id__lt=pk) if self.descending else Q(id__gt=pk)
+        if self.descending:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, 'id__lt': pk}) | Q(**{f'{field}__isnull': False})
+            return Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'id__gt': pk})
+        return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}) | Q(**{f'{field}__isnull': True})
+
+    def _encode(self, value, pk) -> str:
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps({'f': self.field, 'v': value, 'id': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor: str, model):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if payload['f'] != self.field:
+                raise ValueError('cursor was issued for another sort field')
+            value = payload['v']
+            if value is not None and self.field != 'id':
+                value = model._meta.get_field(self.field).to_python(value)
+            return value, int(payload['id'])
+        except (TypeError, ValueError, KeyError) as e:
+            raise NotFound(f'Invalid cursor: {e}')
+
+    def _next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        url = remove_query_param(url, self.count_query_param)
+        cursor = self._encode(getattr(self.last, self.field), self.last.pk)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+# ---------------------------------------------------------------------------
+# Sparse field selection and streamed listings
+# ---------------------------------------------------------------------------
+
+def requested_fields(request, serializer_class) -> Optional[List[str]]:
+    """Serializer field names from ?fields=a,b,c; None when every field is wanted"""
+    names = [name.strip() for name in request.query_params.get('fields', '').split(',') if name.strip()]
+    if not names:
+        return None
+    available = serializer_class().fields
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise FieldSelectionError(
+            f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+        )
+    return list(dict.fromkeys(names))
+
+
+def select_fields(queryset: QuerySet, serializer, names: Optional[List[str]]) -> QuerySet:
+    """
+    Load only the columns the selected fields read. Fields computed from anything else
+    than a model column keep the full row, since a deferred column read from a
+    property would cost a query per row.
+    """
+    if names is None:
+        return queryset
+    columns = {field.name for field in queryset.model._meta.concrete_fields}
+    sources = []
+    for name in names:
+        source = serializer.fields[name].source.split('.')[0]
+        if source not in columns:
+            return queryset
+        sources.append(source)
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    sources.extend(field.lstrip('-') for field in ordering if isinstance(field, str) and field.lstrip('-') in columns)
+    return queryset.only('pk', *sources)
+
+
+def _child_serializer(serializer_class, names: Optional[List[str]]):
+    serializer = serializer_class(many=True).child
+    if names is not None:
+        for name in list(serializer.fields):
+            if name not in names:
+                serializer.fields.pop(name)
+    return serializer
+
+
+def _stream_rows(queryset: QuerySet, serializer, head: dict, results_key: str, count_key: str) -> Iterator[bytes]:
+    """JSON object holding head, every row under results_key and the row count last"""
+    def dumps(value):
+        return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+
+    opening = dumps(head)[:-1]
+    yield f'{opening}{", " if head else ""}{dumps(results_key)}: ['.encode()
+    count, chunk = 0, []
+    for row in queryset.iterator(chunk_size=DEFAULT_CHUNK_SIZE):
+        chunk.append(dumps(serializer.to_representation(row)))
+        if len(chunk) >= DEFAULT_CHUNK_SIZE:
+            yield ((',' if count else '') + ','.join(chunk)).encode()
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        yield ((',' if count else '') + ','.join(chunk)).encode()
+        count += len(chunk)
+    yield f'], {dumps(count_key)}: {count}}}'.encode()
+
+
+def sparse_list_response(request, queryset: QuerySet, serializer_class, extra: Optional[dict] = None,
+                         results_key: str = 'results', count_key: str = 'count'):
+    """
+    Folder content listing honouring ?fields=, page numbers or keyset pagination
+    (?pagination=cursor) and ?page_size=all, which streams every row.
+    Raises FieldSelectionError for unknown field names.
+    """
+    names = requested_fields(request, serializer_class)
+    serializer = _child_serializer(serializer_class, names)
+    queryset = select_fields(queryset, serializer, names)
+    extra = extra or {}
+
+    if request.query_params.get('page_size') == PAGE_SIZE_ALL:
+        response = StreamingResponse(
+            _stream_rows(queryset, serializer, extra, results_key, count_key),
+            content_type='application/json',
+        )
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    paginator = PostKeysetPagination()
+    rows = paginator.paginate_queryset(queryset, request)
+    data = paginator.get_paginated_data([serializer.to_representation(row) for row in rows])
+    data[results_key] = data.pop('results')
+    data[count_key] = data.pop('count')
+    return Response({**extra, **data})
@@ -0,0 +1,372 @@
+"""
+Per-day post count and engagement rollups of every platform folder
+
+Dashboards used to COUNT and AVG the post tables on every request. PostStatsRollup
+holds one row per (platform, folder, day) instead, and every write path keeps it
+current by adding the difference it made:
+- bulk writes (webhook ingestion, CSV imports) add a PostStatsDelta per chunk,
+  inside the chunk's transaction
+- single saves and deletes go through the signal receivers in reports.signals
+- moving posts between folders with a queryset update goes through move_posts(),
+  which also moves the posts' hashtag rows (see reports.hashtags)
+
+Deltas are applied with one INSERT ... ON CONFLICT DO UPDATE that adds to the
+stored sums, so concurrent writers never overwrite each other's counts.
+rebuild_post_stats() recomputes everything from the post tables.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import PostHashtag, PostStatsRollup
+
+logger = logging.getLogger(__name__)
+
+# Summed columns of PostStatsRollup, in the order PostStatsDelta tallies them
+METRICS = (
+    'post_count', 'likes', 'comments', 'shares', 'verified_posts',
+    'video_posts', 'views', 'audience', 'audience_interactions',
+)
+
+# Fields every post model shares that the rollup reads besides the platform's metrics
+COMMON_FIELDS = ('folder_id', 'date_posted', 'created_at', 'content_type', 'is_verified')
+
+GROWTH_WINDOW_DAYS = 30
+REBUILD_CHUNK_SIZE = 2000
+UPSERT_ROWS_PER_STATEMENT = 50
+
+
+@dataclass(frozen=True)
+class StatsSource:
+    """
+    Where a platform keeps its engagement numbers; each metric reads the first
+    candidate column holding a non-zero value
+    """
+    likes: Tuple[str, ...]
+    comments: Tuple[str, ...] = ('num_comments',)
+    shares: Tuple[str, ...] = ()
+    views: Tuple[str, ...] = ()
+    audience: Tuple[str, ...] = ()
+    # Content types whose view counts are reported; None counts any post with views
+    video_types: Optional[frozenset] = None
+
+    @property
+    def fields(self) -> frozenset:
+        return frozenset(COMMON_FIELDS + self.likes + self.comments + self.shares + self.views + self.audience)
+
+    def metrics(self, values: Mapping[str, Any]) -> Tuple[int, ...]:
+        likes = _first_count(values, self.likes)
+        comments = _first_count(values, self.comments)
+        shares = _first_count(values, self.shares)
+        interactions = likes + comments + shares
+
+        views = _first_known(values, self.views)
+        is_video = views is not None and (
+            self.video_types is None or values.get('content_type') in self.video_types
+        )
+        audience = _first_count(values, self.audience)
+
+        return (
+            1, likes, comments, shares, int(bool(values.get('is_verified'))),
+            int(is_video), _count(views) if is_video else 0,
+            audience, interactions if audience else 0,
+        )
+
+
+STATS_SOURCES = {
+    'instagram': StatsSource(likes=('likes',), views=('views',), audience=('followers',),
+                             video_types=frozenset({'reel'})),
+    'facebook': StatsSource(likes=('likes',), shares=('num_shares',), views=('video_view_count',),
+                            audience=('page_followers', 'followers')),
+    'linkedin': StatsSource(likes=('likes', 'num_likes'), shares=('num_shares',),
+                            audience=('user_followers', 'followers')),
+    'tiktok': StatsSource(likes=('likes',), audience=('followers',)),
+}
+
+
+def _count(value) -> int:
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _first_count(values: Mapping[str, Any], names: Iterable[str]) -> int:
+    for name in names:
+        count = _count(values.get(name))
+        if count:
+            return count
+    return 0
+
+
+def _first_known(values: Mapping[str, Any], names: Iterable[str]):
+    for name in names:
+        if values.get(name) not in (None, ''):
+            return values[name]
+    return None
+
+
+def post_day(values: Mapping[str, Any]) -> date:
+    """Day a post is counted under: published, else collected, else today"""
+    for name in ('date_posted', 'created_at'):
+        moment = values.get(name)
+        if isinstance(moment, str):
+            moment = parse_datetime(moment)
+        if isinstance(moment, datetime):
+            if timezone.is_aware(moment):
+                moment = timezone.localtime(moment)
+            return moment.date()
+        if isinstance(moment, date):
+            return moment
+    return timezone.localdate()
+
+
+def platform_for_model(model) -> Optional[str]:
+    """Platform a post model belongs to, None for any other model"""
+    from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+
+    for platform, label in PLATFORM_POST_MODELS.items():
+        if model._meta.label == label:
+            return platform
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+
+class PostStatsDelta:
+    """
+    Accumulates the rollup changes of a batch of post writes for one post model.
+
+    add(post) counts a post in its bucket, add(post, -1) takes it out again; an
+    update is the old state taken out and the new state added. Deltas for models
+    other than the platform post models are ignored, so callers need not check.
+    """
+
+    def __init__(self, model, folder=None):
+        self.model = model
+        self.platform = platform_for_model(model)
+        self.source = STATS_SOURCES.get(self.platform)
+        self.fields = tuple(sorted(self.source.fields)) if self.source else ()
+        self.buckets: Dict[Tuple[int, date], List[int]] = {}
+        self.projects: Dict[int, Optional[int]] = {PostStatsRollup.NO_FOLDER: None}
+        if folder is not None:
+            self.projects[folder.pk] = folder.project_id
+
+    @property
+    def enabled(self) -> bool:
+        return self.source is not None
+
+    def watches(self, field_names: Iterable[str]) -> bool:
+        """Whether changing these fields (names or attnames) can move the rollup"""
+        if not self.enabled:
+            return False
+        return any(name in self.fields or f'{name}_id' in self.fields for name in field_names)
+
+    def snapshot(self, post) -> Dict[str, Any]:
+        """The values the rollup reads from a post instance"""
+        return {name: getattr(post, name, None) for name in self.fields}
+
+    def add(self, post, sign: int = 1) -> None:
+        """Count a post instance (or a snapshot of one) in, or out with sign=-1"""
+        if not self.enabled:
+            return
+        values = post if isinstance(post, Mapping) else self.snapshot(post)
+        key = (values.get('folder_id') or PostStatsRollup.NO_FOLDER, post_day(values))
+        totals = self.buckets.setdefault(key, [0] * len(METRICS))
+        for index, value in enumerate(self.source.metrics(values)):
+            totals[index] += sign * value
+
+    def add_queryset(self, queryset, sign: int = 1) -> None:
+        if not self.enabled:
+            return
+        for values in queryset.values(*self.fields).iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            self.add(values, sign)
+
+    def apply(self) -> None:
+        """Add the accumulated changes to the stored rollup rows"""
+        changes = [(key, totals) for key, totals in self.buckets.items() if any(totals)]
+        self.buckets = {}
+        if not changes:
+            return
+
+        self._resolve_projects({folder_id for (folder_id, _), _ in changes})
+        rows = [
+            (self.projects.get(folder_id), self.platform, folder_id, day, *totals)
+            for (folder_id, day), totals in changes
+        ]
+        for start in range(0, len(rows), UPSERT_ROWS_PER_STATEMENT):
+            _upsert(rows[start:start + UPSERT_ROWS_PER_STATEMENT])
+
+        emptied = [key for key, totals in changes if totals[0] < 0]
+        if emptied:
+            buckets = Q()
+            for folder_id, day in emptied:
+                buckets |= Q(folder_id=folder_id, day=day)
+            PostStatsRollup.objects.filter(buckets, platform=self.platform, post_count__lte=0).delete()
+
+    def _resolve_projects(self, folder_ids) -> None:
+        unknown = [folder_id for folder_id in folder_ids if folder_id not in self.projects]
+        if not unknown:
+            return
+        folder_model = self.model._meta.get_field('folder').related_model
+        found = dict(folder_model.objects.filter(pk__in=unknown).values_list('pk', 'project_id'))
+        for folder_id in unknown:
+            self.projects[folder_id] = found.get(folder_id)
+
+
+def _upsert(rows: List[tuple]) -> None:
+    quote = connection.ops.quote_name
+    table = quote(PostStatsRollup._meta.db_table)
+    columns = ('project_id', 'platform', 'folder_id', 'day') + METRICS
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    updates = [f'{quote("project_id")} = EXCLUDED.{quote("project_id")}'] + [
+        f'{quote(name)} = {table}.{quote(name)} + EXCLUDED.{quote(name)}' for name in METRICS
+    ]
+    sql = (
+        f'INSERT INTO {table} ({", ".join(quote(name) for name in columns)}) '
+        f'VALUES {", ".join([placeholders] * len(rows))} '
+        f'ON CONFLICT ({quote("platform")}, {quote("folder_id")}, {quote("day")}) '
+        f'DO UPDATE SET {", ".join(updates)}'
+    )
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def move_posts(queryset, folder) -> int:
+    """
+    queryset.update(folder=folder), moving the posts' rollup counts and hashtag rows
+    along with them
+    """
+    delta = PostStatsDelta(queryset.model, folder)
+    with transaction.atomic():
+        if delta.enabled:
+            target_id = folder.pk if folder is not None else None
+            for values in queryset.values(*delta.fields).iterator(chunk_size=REBUILD_CHUNK_SIZE):
+                delta.add(values, -1)
+                delta.add({**values, 'folder_id': target_id})
+            PostHashtag.objects.filter(platform=delta.platform, post_pk__in=queryset.values('pk')).update(
+                folder_id=target_id or PostStatsRollup.NO_FOLDER,
+                project_id=folder.project_id if folder is not None else None,
+            )
+        moved = queryset.update(folder=folder)
+        delta.apply()
+    return moved
+
+
+def rebuild_post_stats(platforms: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Recompute the rollup rows of the given platforms from the post tables"""
+    from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+
+    counts = {}
+    for platform in platforms or PLATFORM_POST_MODELS:
+        model = apps.get_model(PLATFORM_POST_MODELS[platform])
+        delta = PostStatsDelta(model)
+        with transaction.atomic():
+            PostStatsRollup.objects.filter(platform=platform).delete()
+            delta.add_queryset(model.objects.order_by())
+            delta.apply()
+        counts[platform] = PostStatsRollup.objects.filter(platform=platform).count()
+        logger.info(f"Rebuilt {counts[platform]} {platform} post stats rollup rows")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def _sums() -> Dict[str, Any]:
+    # Aliased, since annotations may not shadow the summed columns
+    return {f'total_{name}': Coalesce(Sum(name), 0) for name in METRICS}
+
+
+def _unalias(row: Mapping[str, Any]) -> Dict[str, int]:
+    return {name: row[f'total_{name}'] for name in METRICS}
+
+
+def summarize(rollups) -> Dict[str, int]:
+    """Summed metrics of a PostStatsRollup queryset"""
+    return _unalias(rollups.aggregate(**_sums()))
+
+
+def folder_summary(platform: str, folder_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """Summed metrics of some of a platform's folders, or of all its posts"""
+    rollups = PostStatsRollup.objects.filter(platform=platform)
+    if folder_ids is not None:
+        rollups = rollups.filter(folder_id__in=list(folder_ids))
+    return summarize(rollups)
+
+
+def average(total: int, count: int) -> float:
+    return round(total / count, 2) if count else 0
+
+
+def engagement_rate(totals: Mapping[str, int]) -> float:
+    """Interactions per follower of the posts that reported their audience, in percent"""
+    if not totals['audience']:
+        return 0.0
+    return round(totals['audience_interactions'] * 100 / totals['audience'], 2)
+
+
+def growth_rate(current: int, previous: int) -> float:
+    """Change in percent; 0 when there is no previous period to compare with"""
+    if not previous:
+        return 0.0
+    return round((current - previous) * 100 / previous, 1)
+
+
+def project_summary(project) -> Dict[str, Any]:
+    """
+    Totals, engagement and growth of a project's posts per platform, plus posts
+    per platform for each of the last six months; two queries
+    """
+    today = timezone.localdate()
+    window = timedelta(days=GROWTH_WINDOW_DAYS)
+    current = Q(day__gt=today - window, day__lte=today)
+    previous = Q(day__gt=today - 2 * window, day__lte=today - window)
+
+    rollups = PostStatsRollup.objects.filter(project=project)
+    platforms = {}
+    for row in rollups.values('platform').annotate(
+        **_sums(),
+        current_posts=Coalesce(Sum('post_count', filter=current), 0),
+        previous_posts=Coalesce(Sum('post_count', filter=previous), 0),
+    ).order_by():
+        platforms[row['platform']] = {
+            **_unalias(row), 'current_posts': row['current_posts'], 'previous_posts': row['previous_posts'],
+        }
+
+    totals = {name: sum(row[name] for row in platforms.values()) for name in METRICS}
+    current_posts = sum(row['current_posts'] for row in platforms.values())
+    previous_posts = sum(row['previous_posts'] for row in platforms.values())
+
+    year, month = divmod(today.year * 12 + today.month - 1 - 5, 12)
+    first_month = date(year, month + 1, 1)
+    activity = {}
+    month = first_month
+    while month <= today:
+        activity[month] = {'date': month.strftime('%b'), **{platform: 0 for platform in STATS_SOURCES}}
+        month = (month + timedelta(days=32)).replace(day=1)
+    for day, platform, posts in rollups.filter(day__gte=first_month, day__lte=today).values_list(
+            'day', 'platform').annotate(posts=Sum('post_count')).order_by():
+        entry = activity[day.replace(day=1)]
+        entry[platform] += posts
+
+    return {
+        'totals': totals,
+        'platforms': platforms,
+        'engagement_rate': engagement_rate(totals),
+        'growth_rate': growth_rate(current_posts, previous_posts),
+        'activity': list(activity.values()),
+    }
@@ -0,0 +1,270 @@
+"""
+Full-text search over platform posts
+
+The post viewsets' ?search= used to OR icontains over description, hashtags (a JSON
+column cast to text), user_posted and post_id, a sequential scan of the post table on
+every request. PostSearchDocument now holds one normalized document per post (the
+lower-cased words of those fields) and the database indexes it:
+
+- PostgreSQL: a generated tsvector column (the 'simple' configuration, no stemming,
+  since posts come in every language) with a GIN index, queried with to_tsquery
+- SQLite: an external-content FTS5 table kept in sync by triggers, queried with MATCH
+- any other database: a LIKE scan of the documents, so search still works
+
+Every query word must match the beginning of a word of the post (prefix matching),
+and results can be ordered by relevance (ts_rank / bm25).
+
+Documents are kept in sync the same way as the post stats rollup:
+- bulk writes (webhook ingestion, CSV imports) collect a SearchDocuments batch per
+  chunk and apply it inside the chunk's transaction
+- single saves and deletes go through the signal receivers in reports.signals
+rebuild_search_index() (the rebuild_search_index command) recomputes everything.
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField, OuterRef, QuerySet, Subquery
+from django.db.models.expressions import RawSQL
+
+from .models import PostSearchDocument
+from .post_stats import platform_for_model
+
+logger = logging.getLogger(__name__)
+
+# Fields the previous icontains search covered, per platform
+SEARCH_FIELDS = {
+    'instagram': ('user_posted', 'post_id', 'content_type', 'description', 'hashtags'),
+    'facebook': ('user_posted', 'page_name', 'post_id', 'content_type', 'description', 'content', 'hashtags'),
+    'linkedin': ('user_posted', 'post_id', 'content_type', 'description', 'hashtags'),
+    'tiktok': ('user_posted', 'post_id', 'content_type', 'description', 'hashtags'),
+}
+
+POSTGRESQL = 'postgresql'
+FTS5 = 'fts5'
+LIKE = 'like'
+
+FTS_TABLE = 'post_search_fts'
+
+REBUILD_CHUNK_SIZE = 2000
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+# ---------------------------------------------------------------------------
+# Index DDL (run by the reports 0004 migration)
+# ---------------------------------------------------------------------------
+
+def create_search_index(schema_connection=None) -> Optional[str]:
+    """Create the full-text index over post_search_documents; returns the backend used"""
+    schema_connection = schema_connection or connection
+    table = PostSearchDocument._meta.db_table
+    with schema_connection.cursor() as cursor:
+        if schema_connection.vendor == 'postgresql':
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS vector tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('simple', document)) STORED"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_vector ON {table} USING GIN (vector)")
+            return POSTGRESQL
+        if schema_connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                    f"document, content='{table}', content_rowid='id')"
+                )
+            except Exception as e:
+                logger.warning(f"FTS5 is not available, post search falls back to LIKE: {e}")
+                return LIKE
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {table} BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document); "
+                f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document); END"
+            )
+            # Index documents written before the FTS table existed
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            return FTS5
+    return LIKE
+
+
+def drop_search_index(schema_connection=None):
+    schema_connection = schema_connection or connection
+    table = PostSearchDocument._meta.db_table
+    with schema_connection.cursor() as cursor:
+        if schema_connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {table}_vector")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS vector")
+        elif schema_connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def search_backend() -> str:
+    if connection.vendor == 'postgresql':
+        return POSTGRESQL
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            if cursor.fetchone():
+                return FTS5
+    return LIKE
+
+
+# ---------------------------------------------------------------------------
+# Documents
+# ---------------------------------------------------------------------------
+
+def words(text: str) -> List[str]:
+    """Lower-cased words of a text; punctuation, '#', '@' and '_' separate words"""
+    return _WORD.findall(text.lower())
+
+
+def _texts(value) -> Iterator[str]:
+    if value is None:
+        return
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            yield from _texts(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _texts(item)
+    else:
+        yield str(value)
+
+
+def build_document(values: Mapping[str, Any], fields: Iterable[str]) -> str:
+    return ' '.join(word for field in fields for text in _texts(values.get(field)) for word in words(text))
+
+
+class SearchDocuments:
+    """
+    Search documents of posts written in bulk, upserted at once by apply().
+    A no-op for models that are not platform posts.
+    """
+
+    def __init__(self, model):
+        self.platform = platform_for_model(model)
+        self.fields = SEARCH_FIELDS.get(self.platform, ())
+        self._documents: Dict[int, str] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.fields)
+
+    def watches(self, fields: Iterable[str]) -> bool:
+        """Whether a change of these fields changes the document"""
+        return bool(set(fields) & set(self.fields))
+
+    def add(self, post):
+        """Post instance or value mapping (with 'pk' or 'id')"""
+        if not self.enabled:
+            return
+        if isinstance(post, Mapping):
+            pk, values = post.get('pk', post.get('id')), post
+        else:
+            pk, values = post.pk, {field: getattr(post, field) for field in self.fields}
+        if pk is not None:
+            self._documents[pk] = build_document(values, self.fields)
+
+    def apply(self) -> int:
+        if not self._documents:
+            return 0
+        PostSearchDocument.objects.bulk_create(
+            [
+                PostSearchDocument(platform=self.platform, post_pk=pk, document=document)
+                for pk, document in self._documents.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['platform', 'post_pk'],
+            update_fields=['document'],
+        )
+        written = len(self._documents)
+        self._documents = {}
+        return written
+
+
+def remove_documents(model, post_pks: Iterable[int]):
+    platform = platform_for_model(model)
+    if platform:
+        PostSearchDocument.objects.filter(platform=platform, post_pk__in=list(post_pks)).delete()
+
+
+def rebuild_search_index(platforms: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Recompute the documents of every post of the given platforms (default: all)"""
+    from django.apps import apps
+    from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+
+    counts = {}
+    for platform in platforms or PLATFORM_POST_MODELS:
+        model = apps.get_model(PLATFORM_POST_MODELS[platform])
+        documents = SearchDocuments(model)
+        with transaction.atomic():
+            PostSearchDocument.objects.filter(platform=platform).delete()
+            rows = model.objects.order_by().values('pk', *documents.fields)
+            for count, row in enumerate(rows.iterator(chunk_size=REBUILD_CHUNK_SIZE), start=1):
+                documents.add(row)
+                if count % REBUILD_CHUNK_SIZE == 0:
+                    documents.apply()
+            documents.apply()
+        counts[platform] = PostSearchDocument.objects.filter(platform=platform).count()
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def search_posts(queryset: QuerySet, query: str, rank: bool = False) -> QuerySet:
+    """
+    Posts of queryset matching every word of query as a word prefix. With rank, the
+    posts are annotated with search_rank (higher is more relevant).
+    """
+    terms = words(query or '')
+    platform = platform_for_model(queryset.model)
+    if not terms or platform is None:
+        return queryset if not (query or '').strip() else queryset.none()
+
+    documents = PostSearchDocument.objects.filter(platform=platform)
+    rank_sql = None
+    backend = search_backend()
+    if backend == POSTGRESQL:
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        documents = documents.filter(
+            RawSQL("vector @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField())
+        )
+        rank_sql = RawSQL("ts_rank(vector, to_tsquery('simple', %s))", (tsquery,), output_field=FloatField())
+    elif backend == FTS5:
+        match = ' '.join(f'"{term}"*' for term in terms)
+        documents = documents.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        )
+        # bm25() is lower for better matches; id is the outer document's, FTS5 has no such column
+        rank_sql = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = id",
+            (match,), output_field=FloatField(),
+        )
+    else:
+        for term in terms:
+            documents = documents.filter(document__contains=term)
+
+    queryset = queryset.filter(pk__in=documents.values('post_pk'))
+    if rank:
+        if rank_sql is None:
+            rank_sql = RawSQL('0', (), output_field=FloatField())
+        queryset = queryset.annotate(search_rank=Subquery(
+            documents.filter(post_pk=OuterRef('pk')).annotate(rank=rank_sql).values('rank')[:1]
+        ))
+    return queryset
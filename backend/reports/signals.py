@@ -0,0 +1,165 @@
+"""
+Keep PostStatsRollup, the post search documents and the hashtag index current for
+posts written one at a time (save() and delete()); bulk writes bypass these signals
+and apply a PostStatsDelta, SearchDocuments and PostHashtags batch themselves
+"""
+
+from django.apps import apps
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+
+from .hashtags import PostHashtags, remove_post_hashtags
+from .models import PostHashtag, PostSearchDocument, PostStatsRollup
+from .post_stats import PostStatsDelta
+from .search import SearchDocuments, remove_documents
+
+# Platform of each platform app's Folder model, filled in by connect_post_stats()
+FOLDER_PLATFORMS = {}
+
+
+def track_post_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Remember the stored state of a post about to be updated"""
+    instance._post_stats_previous = None
+    instance._post_stats_skip = False
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    delta = PostStatsDelta(sender)
+    if update_fields is not None and not delta.watches(update_fields):
+        instance._post_stats_skip = True
+        return
+    instance._post_stats_previous = sender._base_manager.filter(pk=instance.pk).values(*delta.fields).first()
+
+
+def track_post_after_save(sender, instance, created, raw=False, **kwargs):
+    if raw or getattr(instance, '_post_stats_skip', False):
+        return
+    delta = PostStatsDelta(sender)
+    previous = getattr(instance, '_post_stats_previous', None)
+    if previous is not None:
+        delta.add(previous, -1)
+    delta.add(instance)
+    delta.apply()
+    instance._post_stats_previous = None
+
+
+def track_post_delete(sender, instance, origin=None, **kwargs):
+    # Posts removed along with their folder (or project) go with the folder's rows
+    if isinstance(origin, Model) and not isinstance(origin, sender):
+        return
+    delta = PostStatsDelta(sender)
+    delta.add(instance, -1)
+    delta.apply()
+
+
+def move_folder_stats(sender, instance, created=False, raw=False, **kwargs):
+    """Follow a folder to another project"""
+    if raw or created:
+        return
+    PostStatsRollup.objects.filter(
+        platform=FOLDER_PLATFORMS[sender], folder_id=instance.pk,
+    ).exclude(project_id=instance.project_id).update(project_id=instance.project_id)
+
+
+def drop_folder_stats(sender, instance, **kwargs):
+    PostStatsRollup.objects.filter(platform=FOLDER_PLATFORMS[sender], folder_id=instance.pk).delete()
+
+
+def index_post(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    documents = SearchDocuments(sender)
+    if update_fields is not None and not documents.watches(update_fields):
+        return
+    documents.add(instance)
+    documents.apply()
+
+
+def remove_post_document(sender, instance, origin=None, **kwargs):
+    # Posts removed along with their folder go with drop_folder_documents()
+    if isinstance(origin, Model) and not isinstance(origin, sender):
+        return
+    remove_documents(sender, [instance.pk])
+
+
+def drop_folder_documents(sender, instance, **kwargs):
+    post_model = apps.get_model(PLATFORM_POST_MODELS[FOLDER_PLATFORMS[sender]])
+    PostSearchDocument.objects.filter(
+        platform=FOLDER_PLATFORMS[sender],
+        post_pk__in=post_model._base_manager.filter(folder=instance).values('pk'),
+    ).delete()
+
+
+def index_post_hashtags(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    hashtags = PostHashtags(sender)
+    if update_fields is not None and not hashtags.watches(update_fields):
+        return
+    hashtags.add(instance, created=created)
+    hashtags.apply()
+
+
+def remove_hashtags(sender, instance, origin=None, **kwargs):
+    # Posts removed along with their folder go with drop_folder_hashtags()
+    if isinstance(origin, Model) and not isinstance(origin, sender):
+        return
+    remove_post_hashtags(sender, [instance.pk])
+
+
+def move_folder_hashtags(sender, instance, created=False, raw=False, **kwargs):
+    """Follow a folder to another project"""
+    if raw or created:
+        return
+    PostHashtag.objects.filter(
+        platform=FOLDER_PLATFORMS[sender], folder_id=instance.pk,
+    ).exclude(project_id=instance.project_id).update(project_id=instance.project_id)
+
+
+def drop_folder_hashtags(sender, instance, **kwargs):
+    # Only the rows of posts deleted along with the folder: moved posts keep theirs
+    post_model = apps.get_model(PLATFORM_POST_MODELS[FOLDER_PLATFORMS[sender]])
+    PostHashtag.objects.filter(
+        platform=FOLDER_PLATFORMS[sender], folder_id=instance.pk,
+        post_pk__in=post_model._base_manager.filter(folder=instance).values('pk'),
+    ).delete()
+
+
+def connect_post_hashtags():
+    """Connect after connect_post_stats(), which maps the folder models"""
+    for platform, label in PLATFORM_POST_MODELS.items():
+        post_model = apps.get_model(label)
+        folder_model = post_model._meta.get_field('folder').related_model
+        uid = f'post_hashtags_{platform}'
+
+        post_save.connect(index_post_hashtags, sender=post_model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(remove_hashtags, sender=post_model, dispatch_uid=f'{uid}_post_delete')
+        post_save.connect(move_folder_hashtags, sender=folder_model, dispatch_uid=f'{uid}_folder_save')
+        pre_delete.connect(drop_folder_hashtags, sender=folder_model, dispatch_uid=f'{uid}_folder_delete')
+
+
+def connect_post_search():
+    """Connect after connect_post_stats(), which maps the folder models"""
+    for platform, label in PLATFORM_POST_MODELS.items():
+        post_model = apps.get_model(label)
+        folder_model = post_model._meta.get_field('folder').related_model
+        uid = f'post_search_{platform}'
+
+        post_save.connect(index_post, sender=post_model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(remove_post_document, sender=post_model, dispatch_uid=f'{uid}_post_delete')
+        pre_delete.connect(drop_folder_documents, sender=folder_model, dispatch_uid=f'{uid}_folder_delete')
+
+
+def connect_post_stats():
+    for platform, label in PLATFORM_POST_MODELS.items():
+        post_model = apps.get_model(label)
+        folder_model = post_model._meta.get_field('folder').related_model
+        FOLDER_PLATFORMS[folder_model] = platform
+        uid = f'post_stats_{platform}'
+
+        pre_save.connect(track_post_before_save, sender=post_model, dispatch_uid=f'{uid}_pre_save')
+        post_save.connect(track_post_after_save, sender=post_model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(track_post_delete, sender=post_model, dispatch_uid=f'{uid}_post_delete')
+        post_save.connect(move_folder_stats, sender=folder_model, dispatch_uid=f'{uid}_folder_save')
+        pre_delete.connect(drop_folder_stats, sender=folder_model, dispatch_uid=f'{uid}_folder_delete')
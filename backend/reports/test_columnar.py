@@ -0,0 +1,109 @@
+"""
+Tests for the Parquet / Arrow IPC exports
+"""
+
+import io
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.test import SimpleTestCase, TestCase
+
+from instagram_data.models import Folder as InstagramFolder, InstagramPost
+from linkedin_data.models import Folder as LinkedInFolder, LinkedInPost
+from reports.columnar import model_schema, to_string_list, write_queryset
+from tiktok_data.models import TikTokPost
+from track_accounts.models import UnifiedRunFolder
+
+
+def _body(response):
+    return b''.join(response.streaming_content)
+
+
+class ConverterTest(SimpleTestCase):
+
+    def test_to_string_list(self):
+        self.assertEqual(to_string_list(['#a', '#b']), ['#a', '#b'])
+        self.assertEqual(to_string_list('["#a", "#b"]'), ['#a', '#b'])
+        self.assertEqual(to_string_list([{'user': 'fan', 'likes': 1}]), ['{"user": "fan", "likes": 1}'])
+        self.assertEqual(to_string_list('#a #b'), ['#a #b'])
+        self.assertIsNone(to_string_list(''))
+        self.assertIsNone(to_string_list(None))
+
+    def test_schema_follows_model_fields(self):
+        schema, attnames, _ = model_schema(InstagramPost)
+
+        self.assertEqual(len(attnames), len(InstagramPost._meta.concrete_fields))
+        self.assertEqual(schema.field('hashtags').type, pa.list_(pa.string()))
+        self.assertEqual(schema.field('latest_comments').type, pa.list_(pa.string()))
+        self.assertEqual(schema.field('audio').type, pa.string())
+        self.assertEqual(schema.field('likes').type, pa.int64())
+        self.assertEqual(schema.field('folder_id').type, pa.int64())
+        self.assertEqual(schema.field('is_verified').type, pa.bool_())
+        self.assertEqual(schema.field('date_posted').type, pa.timestamp('us', tz='UTC'))
+
+
+class ColumnarExportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.run_folder = UnifiedRunFolder.objects.create(name='Run 1', folder_type='run')
+        cls.job = UnifiedRunFolder.objects.create(
+            name='Nike job', folder_type='job', platform_code='instagram', parent_folder=cls.run_folder,
+        )
+        cls.folder = InstagramFolder.objects.create(name='Nike', unified_job_folder=cls.job)
+        for index in range(5):
+            InstagramPost.objects.create(
+                folder=cls.folder, url=f'https://www.instagram.com/p/IG{index}/', post_id=f'IG{index}',
+                user_posted='nike', likes=index, hashtags=['#run', '#win'],
+                latest_comments=[{'comments': 'Great', 'likes': index}],
+            )
+        linkedin_folder = LinkedInFolder.objects.create(name='Acme', unified_job_folder=cls.job)
+        LinkedInPost.objects.create(
+            folder=linkedin_folder, url='https://www.linkedin.com/posts/1', post_id='LI1', user_posted='acme',
+        )
+
+    def test_row_groups_are_written_per_chunk(self):
+        sink = io.BytesIO()
+
+        rows = write_queryset(InstagramPost.objects.order_by('id'), sink, row_group_size=2)
+
+        parquet = pq.ParquetFile(io.BytesIO(sink.getvalue()))
+        self.assertEqual(rows, 5)
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        table = parquet.read()
+        self.assertEqual(table.column('likes').to_pylist(), [0, 1, 2, 3, 4])
+        self.assertEqual(table.column('hashtags').to_pylist()[0], ['#run', '#win'])
+        self.assertEqual(table.column('latest_comments').to_pylist()[0], ['{"comments": "Great", "likes": 0}'])
+
+    def test_platform_endpoint_serves_parquet_and_arrow(self):
+        url = f'/api/instagram-data/posts/download_columnar/?folder_id={self.folder.id}'
+
+        parquet = pq.read_table(io.BytesIO(_body(self.client.get(url))))
+        self.assertEqual(parquet.num_rows, 5)
+
+        response = self.client.get(url + '&file_format=arrow')
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.file')
+        arrow = pa.ipc.open_file(pa.BufferReader(_body(response))).read_all()
+        self.assertEqual(arrow.column('post_id').to_pylist(), [f'IG{index}' for index in range(5)])
+
+    def test_text_list_fields_become_lists(self):
+        TikTokPost.objects.create(url='https://www.tiktok.com/@nike/video/1', post_id='TT1', hashtags='["#fyp"]')
+
+        table = pq.read_table(io.BytesIO(_body(self.client.get('/api/tiktok-data/posts/download_columnar/'))))
+
+        self.assertEqual(table.column('hashtags').to_pylist(), [['#fyp']])
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.client.get('/api/instagram-data/posts/download_columnar/?file_format=xlsx')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_run_tree_is_exported_per_platform(self):
+        response = self.client.get(f'/api/track-accounts/report-folders/{self.run_folder.id}/download_columnar/')
+
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(_body(response)))
+        self.assertEqual(sorted(archive.namelist()), ['instagram_posts.parquet', 'linkedin_posts.parquet'])
+        self.assertEqual(pq.read_table(io.BytesIO(archive.read('instagram_posts.parquet'))).num_rows, 5)
+        self.assertEqual(pq.read_table(io.BytesIO(archive.read('linkedin_posts.parquet'))).num_rows, 1)
@@ -0,0 +1,121 @@
+"""
+Tests for the streaming CSV exports
+"""
+
+import csv
+import io
+from unittest import mock
+
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase
+
+from facebook_data.models import FacebookPost
+from instagram_data.models import Folder, InstagramPost
+from linkedin_data.models import LinkedInPost
+from reports.exports import BASIC_POST_COLUMNS, Column, iter_csv, iter_queryset_rows, json_text, raw
+
+
+def _read_csv(response):
+    body = b''.join(response.streaming_content).decode('utf-8')
+    return list(csv.reader(io.StringIO(body.lstrip('\ufeff'))))
+
+
+class IterCsvTest(SimpleTestCase):
+
+    def test_header_is_yielded_before_rows_are_read(self):
+        def rows():
+            raise AssertionError('rows read before the header was sent')
+            yield
+
+        chunks = iter_csv(rows(), [Column('a'), raw('b')])
+        self.assertEqual(next(chunks), '\ufeffa,b\r\n'.encode('utf-8'))
+
+    def test_cells_are_formatted(self):
+        body = b''.join(iter_csv(
+            [('line\nbreak\x00', 3, {'k': 'é'}), (None, None, None)],
+            [Column('text'), raw('count'), Column('data', format=json_text)],
+            bom=False,
+        )).decode('utf-8')
+
+        self.assertEqual(body, 'text,count,data\r\nline break,3,"{""k"": ""é""}"\r\n,,\r\n')
+
+    def test_large_exports_are_sent_in_several_chunks(self):
+        chunks = list(iter_csv((('x' * 1000,) for _ in range(200)), [Column('text')], bom=False))
+
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(b''.join(chunks).count(b'\r\n'), 201)
+
+
+class DownloadCsvTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.folder = Folder.objects.create(name='Exports', category='posts')
+        InstagramPost.objects.create(
+            folder=cls.folder, url='https://www.instagram.com/p/IG1/', post_id='IG1',
+            user_posted='nike', description='Line one\nline two', likes=42, hashtags=['#run'],
+        )
+        InstagramPost.objects.create(url='https://www.instagram.com/p/IG2/', post_id='IG2', user_posted='other')
+
+    def test_instagram_posts_stream_with_every_header_column(self):
+        response = self.client.get(f'/api/instagram-data/posts/download_csv/?folder_id={self.folder.id}')
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        header, *rows = _read_csv(response)
+        self.assertEqual(len(rows), 1)
+        record = dict(zip(header, rows[0]))
+        self.assertEqual(len(rows[0]), len(header))
+        self.assertEqual((record['post_id'], record['likes']), ('IG1', '42'))
+        self.assertEqual(record['description'], 'Line one line two')
+        self.assertEqual(record['hashtags'], "['#run']")
+
+    def test_facebook_reel_export_uses_reel_columns(self):
+        FacebookPost.objects.create(url='https://www.facebook.com/reel/1', post_id='FB1', content_type='reel', likes=7)
+
+        response = self.client.get('/api/facebook-data/posts/download_csv/?content_type=reel')
+
+        header, *rows = _read_csv(response)
+        record = dict(zip(header, rows[0]))
+        self.assertIn('length', header)
+        self.assertEqual((record['post_id'], record['likes'], record['input']), ('FB1', '7', ''))
+
+    def test_linkedin_export_has_no_bom(self):
+        LinkedInPost.objects.create(url='https://www.linkedin.com/posts/1', post_id='LI1', user_posted='acme')
+
+        response = self.client.get('/api/linkedin-data/posts/download_csv/')
+
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(body.startswith('Post ID,'))
+        self.assertEqual(len(body.splitlines()), 2)
+        self.assertEqual(body.splitlines()[0].split(','), [column.header for column in BASIC_POST_COLUMNS])
+
+
+class AsgiStreamingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.folder = Folder.objects.create(name='Exports', category='posts')
+        InstagramPost.objects.bulk_create(
+            InstagramPost(folder=cls.folder, url=f'https://www.instagram.com/p/IG{index}/', post_id=f'IG{index}')
+            for index in range(3)
+        )
+
+    async def test_first_chunk_is_sent_before_the_rows_are_read(self):
+        read = []
+
+        def counting_rows(*args, **kwargs):
+            for row in iter_queryset_rows(*args, **kwargs):
+                read.append(row)
+                yield row
+
+        url = f'/api/instagram-data/posts/download_csv/?folder_id={self.folder.id}'
+        with mock.patch('reports.exports.iter_queryset_rows', counting_rows):
+            response = await self.async_client.get(url)
+            # The ASGI handler sends the body by iterating the response asynchronously
+            chunks = aiter(response)
+            header = await anext(chunks)
+            self.assertEqual(read, [])
+            body = header + b''.join([chunk async for chunk in chunks])
+
+        self.assertEqual(len(read), 3)
+        self.assertEqual(body.count(b'\r\n'), 4)
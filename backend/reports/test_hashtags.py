@@ -0,0 +1,149 @@
+"""
+Tests for the normalized hashtag index
+"""
+
+import io
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from brightdata_integration.ingestion import BulkPostIngestor
+from facebook_data.models import FacebookPost, Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder, InstagramPost
+from linkedin_data.models import Folder as LinkedInFolder, LinkedInPost
+from reports.hashtags import parse_hashtags, top_hashtags
+from reports.models import PostHashtag
+from reports.post_stats import move_posts
+from tiktok_data.models import Folder as TikTokFolder, TikTokPost
+from users.models import Project
+
+
+def _day(day):
+    return datetime(2025, 3, day, 12, tzinfo=dt_timezone.utc)
+
+
+class HashtagIndexTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tags', password='testpass')
+        cls.project = Project.objects.create(name='Hashtags', owner=cls.user)
+        cls.other_project = Project.objects.create(name='Other', owner=cls.user)
+        cls.folder = InstagramFolder.objects.create(name='IG', project=cls.project)
+        cls.fb_folder = FacebookFolder.objects.create(name='FB', project=cls.project)
+        cls.first = InstagramPost.objects.create(
+            folder=cls.folder, url='https://www.instagram.com/p/H1/', post_id='H1',
+            date_posted=_day(1), hashtags=['#Run', '#sunset'],
+        )
+        cls.second = InstagramPost.objects.create(
+            folder=cls.folder, url='https://www.instagram.com/p/H2/', post_id='H2',
+            date_posted=_day(10), hashtags=['#run', '#RUN', '#city'],
+        )
+        cls.facebook = FacebookPost.objects.create(
+            folder=cls.fb_folder, url='https://www.facebook.com/p/F1', post_id='F1',
+            date_posted=_day(10), hashtags="['#run', '#harbour']",
+        )
+
+    def _top(self, **params):
+        response = self.client.get('/api/reports/hashtags/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(row['hashtag'], row['posts']) for row in response.json()['hashtags']]
+
+    def test_parse_hashtags(self):
+        self.assertEqual(parse_hashtags(['#Run', 'run', '#City ']), ['run', 'city'])
+        self.assertEqual(parse_hashtags("['#run', '#harbour']"), ['run', 'harbour'])
+        self.assertEqual(parse_hashtags('["#run"]'), ['run'])
+        self.assertEqual(parse_hashtags('#run #city,#sea'), ['run', 'city', 'sea'])
+        self.assertEqual(parse_hashtags('#run#city'), ['run', 'city'])
+        self.assertEqual(parse_hashtags(None), [])
+        self.assertEqual(parse_hashtags(''), [])
+
+    def test_top_hashtags_by_project_folder_and_window(self):
+        self.assertEqual(self._top(project=self.project.id), [('run', 3), ('city', 1), ('harbour', 1), ('sunset', 1)])
+        self.assertEqual(
+            self._top(platform='instagram', folder_id=self.folder.id, limit=2), [('run', 2), ('city', 1)]
+        )
+        self.assertEqual(
+            self._top(project=self.project.id, since='2025-03-05', until='2025-03-31'),
+            [('run', 2), ('city', 1), ('harbour', 1)],
+        )
+        self.assertEqual(self._top(project=self.other_project.id), [])
+
+    def test_top_hashtags_queries(self):
+        with self.assertNumQueries(1):
+            top_hashtags(project=self.project, since=_day(1).date())
+
+    def test_invalid_parameters(self):
+        for params in ({'folder_id': self.folder.id}, {'platform': 'myspace'}, {'since': 'March'}, {'limit': 'x'}):
+            response = self.client.get('/api/reports/hashtags/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_posts_with_hashtag(self):
+        response = self.client.get(f'/api/instagram-data/posts/?folder_id={self.folder.id}&hashtag=%23RUN')
+        self.assertEqual({post['id'] for post in response.json()['results']}, {self.first.id, self.second.id})
+        response = self.client.get(f'/api/instagram-data/posts/?folder_id={self.folder.id}&hashtag=sunset')
+        self.assertEqual([post['id'] for post in response.json()['results']], [self.first.id])
+
+    def test_saves_moves_and_deletes_keep_rows_in_sync(self):
+        self.first.hashtags = ['#swim']
+        self.first.save()
+        self.assertEqual(
+            set(PostHashtag.objects.filter(post_pk=self.first.id, platform='instagram').values_list('hashtag', flat=True)),
+            {'swim'},
+        )
+
+        self.folder.project = self.other_project
+        self.folder.save()
+        self.assertEqual(self._top(project=self.other_project.id), [('city', 1), ('run', 1), ('swim', 1)])
+
+        move_posts(FacebookPost.objects.filter(pk=self.facebook.pk), None)
+        self.assertEqual(self._top(project=self.project.id), [])
+
+        self.second.delete()
+        self.assertFalse(PostHashtag.objects.filter(platform='instagram', post_pk=self.second.id).exists())
+
+        self.folder.delete()
+        self.assertFalse(PostHashtag.objects.filter(platform='instagram').exists())
+
+    def test_folder_destroy_views_keep_moved_posts_hashtags(self):
+        linkedin_folder = LinkedInFolder.objects.create(name='LI', project=self.project)
+        tiktok_folder = TikTokFolder.objects.create(name='TT', project=self.project)
+        LinkedInPost.objects.create(folder=linkedin_folder, url='https://www.linkedin.com/posts/1', post_id='L1',
+                                    date_posted=_day(2), hashtags=['#run'])
+        TikTokPost.objects.create(folder=tiktok_folder, url='https://www.tiktok.com/@nike/video/1', post_id='T1',
+                                  date_posted=_day(2), hashtags='#run #trail')
+
+        for app, folder in (('instagram-data', self.folder), ('linkedin-data', linkedin_folder),
+                            ('tiktok-data', tiktok_folder)):
+            response = self.client.delete(f'/api/{app}/folders/{folder.id}/')
+            self.assertEqual(response.status_code, 204, app)
+
+        # The moved posts keep their rows, now uncategorized and outside the project
+        self.assertEqual(
+            sorted(PostHashtag.objects.exclude(platform='facebook').values_list('platform', 'hashtag').distinct()),
+            [('instagram', 'city'), ('instagram', 'run'), ('instagram', 'sunset'), ('linkedin', 'run'),
+             ('tiktok', 'run'), ('tiktok', 'trail')],
+        )
+        self.assertFalse(PostHashtag.objects.exclude(platform='facebook').exclude(project_id=None).exists())
+        self.assertEqual(self._top(project=self.project.id), [('harbour', 1), ('run', 1)])
+
+    def test_bulk_ingestion_and_rebuild(self):
+        BulkPostIngestor('instagram', folder=self.folder).ingest([{
+            'post_id': 'H3', 'url': 'https://www.instagram.com/p/H3/', 'user_posted': 'nike',
+            'date_posted': '2025-03-20T10:00:00.000Z', 'hashtags': ['#Trail', '#run'],
+        }])
+        self.assertEqual(self._top(project=self.project.id, limit=2), [('run', 4), ('city', 1)])
+        self.assertEqual(self._top(project=self.project.id, since='2025-03-20'), [('run', 1), ('trail', 1)])
+
+        PostHashtag.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_hashtag_index', '--if-empty', stdout=out)
+        self.assertIn('HASHTAG INDEX REBUILD SUMMARY', out.getvalue())
+        self.assertEqual(PostHashtag.objects.filter(platform='instagram').count(), 6)
+        self.assertEqual(PostHashtag.objects.filter(platform='facebook').count(), 2)
+
+        out = io.StringIO()
+        call_command('rebuild_hashtag_index', '--if-empty', stdout=out)
+        self.assertIn('already populated', out.getvalue())
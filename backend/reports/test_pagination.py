@@ -0,0 +1,134 @@
+"""
+Tests for keyset pagination, sparse fields and streamed folder contents
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from facebook_data.models import FacebookPost, Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder, InstagramPost
+from track_accounts.models import UnifiedRunFolder
+
+
+class PostKeysetPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.folder = InstagramFolder.objects.create(name='Keyset')
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        InstagramPost.objects.bulk_create([
+            InstagramPost(
+                folder=cls.folder, url=f'https://www.instagram.com/p/K{index}/', post_id=f'K{index}',
+                # Ties on likes, and some posts without a date
+                likes=index % 4, date_posted=None if index % 5 == 0 else start + timedelta(days=index),
+            )
+            for index in range(23)
+        ])
+        InstagramPost.objects.create(url='https://www.instagram.com/p/other/', post_id='other')
+
+    def _walk(self, query):
+        """Post ids of every page, and the query count of each page"""
+        url = f'/api/instagram-data/posts/?folder_id={self.folder.id}&pagination=cursor&page_size=5&{query}'
+        ids, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                body = self.client.get(url).json()
+            queries.append(len(context.captured_queries))
+            self.assertIsNone(body['count'])
+            ids.extend(post['id'] for post in body['results'])
+            url = body['next']
+        return ids, queries
+
+    def _expected(self, *ordering):
+        return list(InstagramPost.objects.filter(folder=self.folder).order_by(*ordering).values_list('id', flat=True))
+
+    def test_pages_match_full_ordering(self):
+        cases = (
+            ('sort_by=likes&sort_order=desc', ('-likes', '-id')),
+            ('sort_by=likes&sort_order=asc', ('likes', 'id')),
+            ('sort_by=date_posted&sort_order=desc', (F('date_posted').desc(nulls_first=True), '-id')),
+            ('sort_by=date_posted&sort_order=asc', (F('date_posted').asc(nulls_last=True), 'id')),
+        )
+        for query, ordering in cases:
+            with self.subTest(query):
+                ids, queries = self._walk(query)
+                self.assertEqual(ids, self._expected(*ordering))
+                # Deep pages cost the same as the first one
+                self.assertEqual(len(set(queries)), 1)
+
+    def test_optional_count_and_invalid_cursor(self):
+        base = f'/api/instagram-data/posts/?folder_id={self.folder.id}'
+
+        body = self.client.get(f'{base}&pagination=cursor&count=true').json()
+        self.assertEqual((body['count'], len(body['results'])), (23, 10))
+        self.assertNotIn('count=', body['next'])
+
+        response = self.client.get(f'{base}&cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+        # Without the cursor parameters the endpoint keeps page numbers
+        body = self.client.get(f'{base}&page=3').json()
+        self.assertEqual((body['count'], len(body['results'])), (23, 3))
+
+    def test_other_platforms_sort_and_page(self):
+        folder = FacebookFolder.objects.create(name='FB')
+        FacebookPost.objects.bulk_create([
+            FacebookPost(folder=folder, url=f'https://www.facebook.com/p/{index}', post_id=f'F{index}', likes=index)
+            for index in range(12)
+        ])
+
+        body = self.client.get(f'/api/facebook-data/posts/?folder_id={folder.id}&sort_by=likes&pagination=cursor').json()
+        self.assertEqual([post['likes'] for post in body['results']], list(range(11, 1, -1)))
+
+        body = self.client.get(body['next']).json()
+        self.assertEqual([post['likes'] for post in body['results']], [1, 0])
+        self.assertIsNone(body['next'])
+
+
+class FolderContentsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = UnifiedRunFolder.objects.create(name='Job', folder_type='job', platform_code='instagram')
+        cls.folder = InstagramFolder.objects.create(name='Contents', category='posts', unified_job_folder=cls.job)
+        InstagramPost.objects.bulk_create([
+            InstagramPost(folder=cls.folder, url=f'https://www.instagram.com/p/C{index}/', post_id=f'C{index}', likes=index)
+            for index in range(15)
+        ])
+
+    def test_contents_with_sparse_fields(self):
+        url = f'/api/instagram-data/folders/{self.folder.id}/contents/?fields=post_id,likes&pagination=cursor&sort_by=likes'
+
+        with CaptureQueriesContext(connection) as context:
+            body = self.client.get(url).json()
+
+        self.assertEqual(body['category'], 'posts')
+        self.assertEqual(len(body['results']), 10)
+        self.assertEqual(set(body['results'][0]), {'post_id', 'likes'})
+        page_query = context.captured_queries[-1]['sql']
+        # Pushed down to the SELECT list
+        self.assertNotIn('description', page_query)
+        self.assertEqual(len(self.client.get(body['next']).json()['results']), 5)
+
+        response = self.client.get(f'/api/instagram-data/folders/{self.folder.id}/contents/?fields=nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown fields: nope', response.json()['error'])
+
+    def test_platform_data_pages_and_streams(self):
+        base = f'/api/track-accounts/report-folders/{self.job.id}/platform_data/'
+
+        body = self.client.get(f'{base}?page=2').json()
+        self.assertEqual((body['platform'], body['folder_id'], body['total_posts']), ('instagram', self.folder.id, 15))
+        self.assertEqual(len(body['posts']), 5)
+
+        response = self.client.get(f'{base}?page_size=all&fields=post_id')
+        self.assertTrue(response.streaming)
+        body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(body['total_posts'], 15)
+        self.assertEqual(body['folder_id'], self.folder.id)
+        self.assertEqual(sorted(post['post_id'] for post in body['posts']), sorted(f'C{index}' for index in range(15)))
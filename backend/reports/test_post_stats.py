@@ -0,0 +1,200 @@
+"""
+Tests for the post stats rollup and the views reading it
+"""
+
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from brightdata_integration.ingestion import BulkPostIngestor
+from facebook_data.models import FacebookPost, Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder, InstagramPost
+from linkedin_data.models import Folder as LinkedInFolder, LinkedInPost
+from reports.models import PostStatsRollup
+from tiktok_data.models import Folder as TikTokFolder, TikTokPost
+from reports.post_stats import METRICS, rebuild_post_stats
+from users.models import Project
+
+
+def _rollup_state():
+    return list(PostStatsRollup.objects.order_by('platform', 'folder_id', 'day').values_list(
+        'project_id', 'platform', 'folder_id', 'day', *METRICS,
+    ))
+
+
+class PostStatsRollupTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='stats', password='testpass')
+        cls.project = Project.objects.create(name='Stats Project', owner=cls.user)
+        cls.folder = InstagramFolder.objects.create(name='Nike', project=cls.project)
+
+    def assertMatchesRebuild(self):
+        incremental = _rollup_state()
+        rebuild_post_stats()
+        self.assertEqual(incremental, _rollup_state())
+
+    def test_saves_and_deletes_update_the_rollup(self):
+        posted = timezone.now() - timedelta(days=2)
+        post = InstagramPost.objects.create(
+            folder=self.folder, url='https://www.instagram.com/p/A/', post_id='A', likes=10, num_comments=2,
+            date_posted=posted, followers=1000, content_type='reel', views=500,
+        )
+        InstagramPost.objects.create(folder=self.folder, url='https://www.instagram.com/p/B/', post_id='B', likes=4)
+
+        row = PostStatsRollup.objects.get(day=timezone.localtime(posted).date())
+        self.assertEqual((row.project_id, row.post_count, row.likes, row.views, row.video_posts), (self.project.id, 1, 10, 500, 1))
+        self.assertEqual((row.audience, row.audience_interactions), (1000, 12))
+
+        post.likes = 30
+        post.save()
+        self.assertEqual(PostStatsRollup.objects.get(day=row.day).likes, 30)
+        self.assertMatchesRebuild()
+
+        post.delete()
+        self.assertFalse(PostStatsRollup.objects.filter(day=row.day).exists())
+        self.assertMatchesRebuild()
+
+    def test_bulk_ingestion_and_csv_imports_apply_deltas(self):
+        posts = [
+            {'post_id': f'IG{index}', 'url': f'https://www.instagram.com/p/IG{index}/', 'user_posted': 'nike',
+             'likes': 10, 'num_comments': 1, 'date_posted': f'2025-01-{10 + index % 3:02d}T10:00:00.000Z'}
+            for index in range(9)
+        ]
+        BulkPostIngestor('instagram', folder=self.folder, batch_size=4).ingest(posts)
+        posts[0]['likes'] = 100
+        BulkPostIngestor('instagram', folder=self.folder, batch_size=4).ingest(posts)
+
+        self.assertEqual(PostStatsRollup.objects.count(), 3)
+        self.assertEqual(sum(PostStatsRollup.objects.values_list('likes', flat=True)), 8 * 10 + 100)
+        self.assertMatchesRebuild()
+
+        content = b'id,url,num_likes,num_comments,date_posted\nL1,https://www.linkedin.com/posts/1,7,1,2025-02-01T00:00:00Z\n'
+        response = self.client.post('/api/linkedin-data/posts/upload_csv/', {
+            'file': SimpleUploadedFile('posts.csv', content, content_type='text/csv'),
+        })
+        self.assertEqual(response.json()['created_count'], 1)
+        row = PostStatsRollup.objects.get(platform='linkedin')
+        self.assertEqual((row.folder_id, row.post_count, row.likes), (PostStatsRollup.NO_FOLDER, 1, 7))
+        self.assertMatchesRebuild()
+
+    def test_folder_moves_and_deletes(self):
+        other_project = Project.objects.create(name='Other', owner=self.user)
+        facebook_folder = FacebookFolder.objects.create(name='Page', project=self.project, category='posts')
+        FacebookPost.objects.create(folder=facebook_folder, url='https://www.facebook.com/p/1', post_id='F1', likes=3)
+        InstagramPost.objects.create(folder=self.folder, url='https://www.instagram.com/p/A/', post_id='A', likes=1)
+
+        self.folder.project = other_project
+        self.folder.save()
+        self.assertEqual(PostStatsRollup.objects.get(platform='instagram').project_id, other_project.id)
+
+        # Deleting a Facebook folder moves its posts to uncategorized
+        response = self.client.delete(f'/api/facebook-data/folders/{facebook_folder.id}/')
+        self.assertEqual(response.status_code, 204)
+        row = PostStatsRollup.objects.get(platform='facebook')
+        self.assertEqual((row.folder_id, row.project_id, row.likes), (PostStatsRollup.NO_FOLDER, None, 3))
+
+        # Other folders take their posts, and the posts' rollup rows, with them
+        self.folder.delete()
+        self.assertFalse(PostStatsRollup.objects.filter(platform='instagram').exists())
+        self.assertMatchesRebuild()
+
+    def test_folder_destroy_views_keep_moved_posts_counted(self):
+        linkedin_folder = LinkedInFolder.objects.create(name='Company', project=self.project)
+        tiktok_folder = TikTokFolder.objects.create(name='Creator', project=self.project)
+        InstagramPost.objects.create(folder=self.folder, url='https://www.instagram.com/p/A/', post_id='A', likes=1)
+        LinkedInPost.objects.create(folder=linkedin_folder, url='https://www.linkedin.com/posts/1', post_id='L1', likes=2)
+        TikTokPost.objects.create(folder=tiktok_folder, url='https://www.tiktok.com/@nike/video/1', post_id='T1', likes=3)
+
+        for app, folder in (('instagram-data', self.folder), ('linkedin-data', linkedin_folder),
+                            ('tiktok-data', tiktok_folder)):
+            response = self.client.delete(f'/api/{app}/folders/{folder.id}/')
+            self.assertEqual(response.status_code, 204, app)
+
+        # The posts live on uncategorized, and so do their counts
+        self.assertEqual(
+            list(PostStatsRollup.objects.order_by('platform').values_list('platform', 'folder_id', 'project_id', 'post_count')),
+            [('instagram', PostStatsRollup.NO_FOLDER, None, 1), ('linkedin', PostStatsRollup.NO_FOLDER, None, 1),
+             ('tiktok', PostStatsRollup.NO_FOLDER, None, 1)],
+        )
+        self.assertMatchesRebuild()
+
+    def test_rebuild_command(self):
+        InstagramPost.objects.create(folder=self.folder, url='https://www.instagram.com/p/A/', post_id='A', likes=1)
+        PostStatsRollup.objects.all().delete()
+
+        call_command('rebuild_post_stats', '--if-empty', stdout=io.StringIO())
+        self.assertEqual(PostStatsRollup.objects.get().likes, 1)
+
+        PostStatsRollup.objects.update(likes=99)
+        call_command('rebuild_post_stats', '--if-empty', stdout=io.StringIO())
+        self.assertEqual(PostStatsRollup.objects.get().likes, 99)
+        call_command('rebuild_post_stats', '--platform', 'instagram', stdout=io.StringIO())
+        self.assertEqual(PostStatsRollup.objects.get().likes, 1)
+
+
+class StatsViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='owner', password='testpass')
+        cls.project = Project.objects.create(name='Dashboard', owner=cls.user)
+        cls.folder = InstagramFolder.objects.create(name='Nike', project=cls.project)
+        cls.linkedin_folder = LinkedInFolder.objects.create(name='Acme', project=cls.project)
+        now = timezone.now()
+        for index in range(4):
+            InstagramPost.objects.create(
+                folder=cls.folder, url=f'https://www.instagram.com/p/IG{index}/', post_id=f'IG{index}',
+                user_posted='nike', likes=10, num_comments=5, followers=1000, is_verified=index == 0,
+                content_type='reel' if index < 2 else 'post', views=100 * (index + 1),
+                # Three posts this month, one the month before
+                date_posted=now - timedelta(days=5 if index < 3 else 40),
+            )
+        LinkedInPost.objects.create(
+            folder=cls.linkedin_folder, url='https://www.linkedin.com/posts/1', post_id='L1',
+            user_posted='acme', num_likes=20, date_posted=now - timedelta(days=45),
+        )
+
+    def test_project_stats_come_from_the_rollup(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/users/projects/{self.project.id}/stats/'
+
+        # Project, access check, rollup totals, monthly activity, folders, accounts, reports
+        with self.assertNumQueries(7):
+            response = client.get(url)
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body['totalPosts'], 5)
+        self.assertEqual(body['platforms']['instagram'], {
+            'posts': 4, 'folders': 1, 'likes': 40, 'comments': 20, 'shares': 0, 'views': 300,
+        })
+        self.assertEqual(body['platforms']['linkedin']['likes'], 20)
+        self.assertEqual(body['platforms']['tiktok'], {
+            'posts': 0, 'folders': 0, 'likes': 0, 'comments': 0, 'shares': 0, 'views': 0,
+        })
+        # 60 interactions on 4000 followers; 3 posts in the last 30 days against 2 before
+        self.assertEqual(body['engagementRate'], 1.5)
+        self.assertEqual(body['growthRate'], 50.0)
+        self.assertEqual(len(body['activity']), 6)
+        self.assertEqual(sum(month['instagram'] for month in body['activity']), 4)
+
+    def test_instagram_stats_read_totals_from_the_rollup(self):
+        response = self.client.get(f'/api/instagram-data/posts/stats/?folder_id={self.folder.id}')
+
+        self.assertEqual(response.json(), {
+            'totalPosts': 4, 'uniqueUsers': 1, 'avgLikes': 10.0, 'avgComments': 5.0,
+            'verifiedAccounts': 1, 'avgViews': 150.0,
+        })
+
+        # Filters the rollup cannot answer fall back to the post table
+        response = self.client.get(f'/api/instagram-data/posts/stats/?folder_id={self.folder.id}&min_likes=11')
+        self.assertEqual(response.json()['totalPosts'], 0)
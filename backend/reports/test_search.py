@@ -0,0 +1,92 @@
+"""
+Tests for the full-text post search index
+"""
+
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from brightdata_integration.ingestion import BulkPostIngestor
+from facebook_data.models import FacebookPost, Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder, InstagramPost
+from reports.models import PostSearchDocument
+from reports.search import FTS5, build_document, create_search_index, search_backend, search_posts
+
+
+class PostSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Test databases built without migrations lack the FTS table
+        create_search_index()
+        cls.folder = InstagramFolder.objects.create(name='Search')
+        cls.sunset = InstagramPost.objects.create(
+            folder=cls.folder, url='https://www.instagram.com/p/S1/', post_id='S1', user_posted='nike.running',
+            description='Sunset run along the beach', hashtags=['#sunset', '#RunClub'],
+        )
+        cls.city = InstagramPost.objects.create(
+            folder=cls.folder, url='https://www.instagram.com/p/S2/', post_id='S2', user_posted='adidas',
+            description='City run at sunrise, sunset tomorrow', hashtags=['#sunset', '#city', '#sunset'],
+        )
+
+    def _ids(self, query, **params):
+        params = '&'.join(f'{key}={value}' for key, value in params.items())
+        response = self.client.get(f'/api/instagram-data/posts/?folder_id={self.folder.id}&search={query}&{params}')
+        return [post['id'] for post in response.json()['results']]
+
+    def test_backend_and_document(self):
+        self.assertEqual(search_backend(), FTS5)
+        self.assertEqual(
+            build_document({'user_posted': 'nike.running', 'hashtags': ['#Run_Club']}, ('user_posted', 'hashtags')),
+            'nike running run club',
+        )
+
+    def test_prefix_and_all_words_match(self):
+        self.assertEqual(set(self._ids('sun')), {self.sunset.id, self.city.id})
+        self.assertEqual(self._ids('sunset beach'), [self.sunset.id])
+        self.assertEqual(self._ids('runclub'), [self.sunset.id])
+        self.assertEqual(self._ids('nike'), [self.sunset.id])
+        self.assertEqual(self._ids('S2'), [self.city.id])
+        self.assertEqual(self._ids('volleyball'), [])
+
+    def test_folder_contents_search_matches_the_list(self):
+        def contents_ids(query):
+            response = self.client.get(f'/api/instagram-data/folders/{self.folder.id}/contents/?search={query}')
+            return {post['id'] for post in response.json()['results']}
+
+        for query in ('sun', 'sunset beach', 'runclub', 'volleyball'):
+            self.assertEqual(contents_ids(query), set(self._ids(query)))
+
+    def test_relevance_ordering(self):
+        # The city post mentions sunset three times
+        self.assertEqual(self._ids('sunset', sort_by='relevance'), [self.city.id, self.sunset.id])
+
+    def test_saves_and_deletes_keep_documents_in_sync(self):
+        self.sunset.description = 'Morning swim'
+        self.sunset.save()
+        self.assertEqual(self._ids('swim'), [self.sunset.id])
+        self.assertEqual(self._ids('beach'), [])
+
+        self.city.delete()
+        self.assertFalse(PostSearchDocument.objects.filter(post_pk=self.city.id).exists())
+
+        self.folder.delete()
+        self.assertFalse(PostSearchDocument.objects.filter(platform='instagram').exists())
+
+    def test_bulk_ingestion_and_rebuild(self):
+        folder = FacebookFolder.objects.create(name='FB')
+        BulkPostIngestor('facebook', folder=folder).ingest([{
+            'post_id': 'F1', 'url': 'https://www.facebook.com/p/F1', 'user_username_raw': 'Acme',
+            'content': 'Grand opening of the harbour store', 'page_name': 'Acme Stores',
+        }])
+        posts = FacebookPost.objects.filter(folder=folder)
+        self.assertEqual(search_posts(posts, 'harb').count(), 1)
+        self.assertEqual(search_posts(posts, 'acme stores').count(), 1)
+
+        PostSearchDocument.objects.all().delete()
+        self.assertEqual(search_posts(posts, 'harbour').count(), 0)
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('facebook: 1 documents', out.getvalue())
+        self.assertEqual(search_posts(posts, 'harbour').count(), 1)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ReportTemplateViewSet, GeneratedReportViewSet
+from .views import ReportTemplateViewSet, GeneratedReportViewSet, HashtagViewSet
 
 router = DefaultRouter()
 router.register(r'templates', ReportTemplateViewSet)
 router.register(r'generated', GeneratedReportViewSet)
+router.register(r'hashtags', HashtagViewSet, basename='hashtag')
 
 urlpatterns = [
     path('', include(router.urls)),
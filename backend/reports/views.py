@@ -9,7 +9,10 @@ import random
 import time
 from datetime import datetime, timedelta
 import csv
+from django.utils.dateparse import parse_date
 from .models import ReportTemplate, GeneratedReport
+from .hashtags import DEFAULT_TOP, MAX_TOP, linked_folders, top_hashtags
+from .post_stats import STATS_SOURCES
 from rest_framework import serializers
 
 # Serializers
@@ -314,3 +317,49 @@ class GeneratedReportViewSet(viewsets.ModelViewSet):
                 {'error': f'Error downloading CSV: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class HashtagViewSet(viewsets.ViewSet):
+    """
+    Trending hashtags, counted from the hashtag index (see reports.hashtags).
+    Posts carrying a hashtag are listed by the platform post endpoints with ?hashtag=.
+    """
+
+    def list(self, request):
+        """
+        Top hashtags, filtered by any of:
+        ?project=<id>, ?platform=<name>, ?folder_id=<platform folder id> (with platform),
+        ?job_folder_id=<unified folder id> (the folder and everything below it),
+        ?since=YYYY-MM-DD / ?until=YYYY-MM-DD or ?days=<last n days>; ?limit= (default 20)
+        """
+        params = request.query_params
+        filters = {}
+        try:
+            if params.get('project'):
+                filters['project'] = int(params['project'])
+            platform = params.get('platform')
+            if platform:
+                if platform not in STATS_SOURCES:
+                    raise ValueError(f"Unknown platform '{platform}'")
+                filters['platform'] = platform
+            if params.get('folder_id'):
+                if not platform:
+                    raise ValueError('folder_id requires platform')
+                filters['folders'] = {platform: [int(params['folder_id'])]}
+            elif params.get('job_folder_id'):
+                filters['folders'] = linked_folders([int(params['job_folder_id'])])
+
+            if params.get('days'):
+                filters['since'] = timezone.localdate() - timedelta(days=max(int(params['days']), 1) - 1)
+            for name in ('since', 'until'):
+                if params.get(name):
+                    day = parse_date(params[name])
+                    if day is None:
+                        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+                    filters[name] = day
+            limit = max(1, min(int(params.get('limit', DEFAULT_TOP)), MAX_TOP))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hashtags = top_hashtags(limit=limit, **filters)
+        return Response({'hashtags': hashtags, 'count': len(hashtags)})
@@ -1,17 +1,21 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from openai import OpenAI
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
 import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db.models import Q, Count, Avg, Sum
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
 import re
 
+from .analysis_snapshot import AnalysisSnapshot, AnalysisSnapshotCache
+from .retrieval_index import SCRAPY_RESULT, RetrievalIndex, load_hits
 from .models import ScrapyJob, ScrapyResult, ScrapyConfig
 from users.models import Project
+from reports.hashtags import hashtag_rows, top_hashtags
 
 # Import platform-specific models
 try:
@@ -40,6 +44,7 @@ logger = logging.getLogger(__name__)
 
 # Configure OpenAI - Use settings API key
 OPENAI_API_KEY = getattr(settings, 'OPENAI_API_KEY', None)
+OPENAI_BASE_URL = getattr(settings, 'OPENAI_BASE_URL', None)  # OpenAI-compatible endpoint, default api.openai.com
 
 # Only initialize OpenAI client if API key is available
 if OPENAI_API_KEY and OPENAI_API_KEY != "your-openai-api-key-here":
@@ -53,6 +58,7 @@ if OPENAI_API_KEY and OPENAI_API_KEY != "your-openai-api-key-here":
         # Initialize with custom http client
         client = OpenAI(
             api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
             http_client=http_client
         )
         logger.info("OpenAI client initialized successfully with custom HTTP client")
@@ -71,8 +77,14 @@ class AIAnalysisChatService:
     
     def __init__(self):
         self.client = client
+        self.api_key = OPENAI_API_KEY if client else None
+        self.base_url = OPENAI_BASE_URL
+        self.model = "gpt-4o-mini"
+        self.temperature = 0.7
         self.max_context_posts = 100  # Maximum number of posts to include in context
         self.max_response_tokens = 4000
+        self.snapshots = AnalysisSnapshotCache()
+        self.max_relevant_documents = int(getattr(settings, 'AI_RETRIEVAL_TOP_K', 8))  # Posts and comments retrieved per question
         
     def get_comprehensive_project_data(self, project_id: int, platforms: Optional[List[str]] = None,
                                        limit: Optional[int] = None) -> Dict[str, Any]:
@@ -219,47 +231,7 @@ class AIAnalysisChatService:
                     
                     for post in posts:
                         if isinstance(post, dict):
-                            # Enhanced data extraction with comments processing
-                            comments = post.get('comments', [])
-                            processed_comments = []
-                            
-                            # Process comments for sentiment analysis
-                            if isinstance(comments, list):
-                                for comment in comments[:20]:  # Limit to 20 comments per post for performance
-                                    if isinstance(comment, dict):
-                                        comment_text = comment.get('text', '')
-                                        processed_comments.append({
-                                            'username': comment.get('username', ''),
-                                            'text': comment_text,
-                                            'likes': self._safe_int(comment.get('likes', 0))
-                                        })
-                                    elif isinstance(comment, str):
-                                        processed_comments.append({
-                                            'username': '',
-                                            'text': comment,
-                                            'likes': 0
-                                        })
-                            
-                            standardized_post = {
-                                'platform': platform,
-                                'job_name': f"Scrapy-{job_name}",
-                                'text_content': post.get('caption', post.get('text', post.get('description', ''))),
-                                'likes': self._safe_int(post.get('likes', post.get('num_likes', 0))),
-                                'comments_count': self._safe_int(post.get('comments_count', post.get('num_comments', 0))),
-                                'shares': self._safe_int(post.get('shares', post.get('num_shares', 0))),
-                                'username': post.get('username', post.get('user', '')),
-                                'timestamp': post.get('timestamp', post.get('date', '')),
-                                'hashtags': post.get('hashtags', []),
-                                'post_url': post.get('url', result.source_url),
-                                'comments': processed_comments,
-                                'comment_sentiment_sample': [c['text'] for c in processed_comments[:5]],  # Sample for AI analysis
-                                'raw_data': post
-                            }
-                            standardized_post['total_engagement'] = (
-                                standardized_post['likes'] + 
-                                standardized_post['comments_count'] + 
-                                standardized_post['shares']
-                            )
+                            standardized_post = self._standardize_scrapy_post(post, platform, job_name, result.source_url)
                             
                             posts_with_metrics.append(standardized_post)
                             
@@ -356,6 +328,50 @@ class AIAnalysisChatService:
                 'error': str(e)
             }
             
+    def _standardize_scrapy_post(self, post: Dict, platform: str, job_name: str, source_url: str) -> Dict:
+        """Standardize one post of a ScrapyResult, with its comments processed for sentiment analysis"""
+        comments = post.get('comments', [])
+        processed_comments = []
+        
+        # Process comments for sentiment analysis
+        if isinstance(comments, list):
+            for comment in comments[:20]:  # Limit to 20 comments per post for performance
+                if isinstance(comment, dict):
+                    comment_text = comment.get('text', '')
+                    processed_comments.append({
+                        'username': comment.get('username', ''),
+                        'text': comment_text,
+                        'likes': self._safe_int(comment.get('likes', 0))
+                    })
+                elif isinstance(comment, str):
+                    processed_comments.append({
+                        'username': '',
+                        'text': comment,
+                        'likes': 0
+                    })
+        
+        standardized_post = {
+            'platform': platform,
+            'job_name': f"Scrapy-{job_name}",
+            'text_content': post.get('caption', post.get('text', post.get('description', ''))),
+            'likes': self._safe_int(post.get('likes', post.get('num_likes', 0))),
+            'comments_count': self._safe_int(post.get('comments_count', post.get('num_comments', 0))),
+            'shares': self._safe_int(post.get('shares', post.get('num_shares', 0))),
+            'username': post.get('username', post.get('user', '')),
+            'timestamp': post.get('timestamp', post.get('date', '')),
+            'hashtags': post.get('hashtags', []),
+            'post_url': post.get('url', source_url),
+            'comments': processed_comments,
+            'comment_sentiment_sample': [c['text'] for c in processed_comments[:5]],  # Sample for AI analysis
+            'raw_data': post
+        }
+        standardized_post['total_engagement'] = (
+            standardized_post['likes'] + 
+            standardized_post['comments_count'] + 
+            standardized_post['shares']
+        )
+        return standardized_post
+    
     def _safe_int(self, value) -> int:
         """Safely convert value to integer"""
         if isinstance(value, (int, float)):
@@ -721,6 +737,55 @@ PLATFORM BREAKDOWN:
         
         return context
     
+    def get_analysis_snapshot(self, project_id: int, platforms: Optional[List[str]] = None,
+                              comprehensive: bool = False) -> AnalysisSnapshot:
+        """Chat context data and summary, reused until the project's scraped data changes"""
+        if comprehensive:
+            build = lambda: self.get_comprehensive_project_data(project_id, platforms, limit=self.max_context_posts)
+        else:
+            build = lambda: self.get_project_scraped_data(project_id, platforms, limit=self.max_context_posts)
+        return self.snapshots.get(
+            project_id, build, self.generate_context_summary,
+            source='comprehensive' if comprehensive else 'scraped',
+            platforms=platforms, limit=self.max_context_posts,
+        )
+    
+    def get_relevant_evidence(self, question: str, project_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """The project's posts and comments most relevant to the question, from its retrieval index"""
+        limit = limit or self.max_relevant_documents
+        try:
+            # Twice as many hits, since those of deleted rows are dropped
+            hits = RetrievalIndex(project_id).search(question, k=limit * 2)
+        except (OSError, ValueError) as e:
+            logger.error(f"Retrieval index search failed for project {project_id}: {str(e)}")
+            return []
+        
+        evidence = []
+        for hit, row in load_hits(hits, project_id)[:limit]:
+            if hit.source.name == SCRAPY_RESULT:
+                result, post = row
+                standardized = self._standardize_scrapy_post(post, result.job.config.platform, result.job.name, result.source_url)
+                standardized.pop('raw_data', None)
+            elif hit.source.is_comment:
+                standardized = self._standardize_comment(row, hit.source.name.split('_')[0])
+            else:
+                standardized = getattr(self, f'_standardize_{hit.source.name}_post')(row)
+            if standardized:
+                standardized.setdefault('kind', 'post')
+                standardized['relevance'] = round(hit.score, 3)
+                evidence.append(standardized)
+        return evidence
+    
+    def _standardize_comment(self, comment, platform: str) -> Dict:
+        """Standardize a platform comment retrieved as evidence"""
+        return {
+            'kind': 'comment',
+            'platform': platform,
+            'text_content': getattr(comment, 'comment_text', None) or getattr(comment, 'comment', '') or '',
+            'username': getattr(comment, 'user_name', None) or getattr(comment, 'comment_user', '') or '',
+            'likes': getattr(comment, 'num_likes', None) or getattr(comment, 'likes_number', None) or getattr(comment, 'num_reactions', 0) or 0,
+        }
+    
     def analyze_with_ai(self, user_question: str, project_id: int, context_data: Optional[Dict] = None) -> Dict[str, Any]:
         """Analyze user question with full access to scraped data"""
         
@@ -731,9 +796,103 @@ PLATFORM BREAKDOWN:
                     'success': False,
                     'error': 'OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable.'
                 }
-            # Get fresh scraped data if not provided - use ScrapyResult data only for now
+            
+            prepared = self.prepare_analysis(user_question, project_id, context_data)
+            if not prepared['success']:
+                return prepared
+            
+            # Call OpenAI API
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=prepared['messages'],
+                max_tokens=self.max_response_tokens,
+                temperature=self.temperature
+            )
+            
+            return {
+                'success': True,
+                'response': response.choices[0].message.content,
+                'data_context': prepared['data_context'],
+                'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in AI analysis: {str(e)}")
+            return {
+                'success': False,
+                'error': f"AI analysis failed: {str(e)}"
+            }
+    
+    async def stream_with_ai(self, user_question: str, project_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze user question like analyze_with_ai(), relaying the answer as it is generated
+        
+        Yields {'type': 'token', 'content': ...} for each piece of the answer, then
+        one {'type': 'done', 'response', 'tokens_used', 'data_context'} with the
+        whole answer, or {'type': 'error', 'error'} if the analysis failed (pieces
+        already yielded are then incomplete)
+        """
+        if not self.api_key:
+            yield {'type': 'error', 'error': 'OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable.'}
+            return
+        
+        # The data load and retrieval are blocking ORM work
+        prepared = await sync_to_async(self.prepare_analysis)(user_question, project_id)
+        if not prepared['success']:
+            yield {'type': 'error', 'error': prepared['error']}
+            return
+        
+        parts, tokens_used = [], None
+        try:
+            async with self._async_client() as async_client:
+                stream = await async_client.chat.completions.create(
+                    model=self.model,
+                    messages=prepared['messages'],
+                    max_tokens=self.max_response_tokens,
+                    temperature=self.temperature,
+                    stream=True,
+                    stream_options={'include_usage': True}
+                )
+                async for chunk in stream:
+                    # The usage chunk comes last, with no choices
+                    if chunk.usage:
+                        tokens_used = chunk.usage.total_tokens
+                    for choice in chunk.choices:
+                        if choice.delta.content:
+                            parts.append(choice.delta.content)
+                            yield {'type': 'token', 'content': choice.delta.content}
+        except Exception as e:
+            logger.error(f"Error in streamed AI analysis: {str(e)}")
+            yield {'type': 'error', 'error': f"AI analysis failed: {str(e)}"}
+            return
+        
+        yield {
+            'type': 'done',
+            'response': ''.join(parts),
+            'data_context': prepared['data_context'],
+            'tokens_used': tokens_used
+        }
+    
+    def _async_client(self) -> AsyncOpenAI:
+        # One per stream: an httpx.AsyncClient is bound to the event loop it first runs on
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=httpx.AsyncClient(timeout=60.0, follow_redirects=True)
+        )
+    
+    def prepare_analysis(self, user_question: str, project_id: int, context_data: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Build the chat completion messages for a user question, with the
+        data_context reported alongside the answer
+        """
+        
+        try:
+            # Use the project's cached snapshot if no data is provided - ScrapyResult data only for now
+            context_summary = None
             if not context_data:
-                context_data = self.get_project_scraped_data(project_id, limit=self.max_context_posts)
+                snapshot = self.get_analysis_snapshot(project_id)
+                context_data, context_summary = snapshot.data, snapshot.context_summary
             
             if context_data.get('error'):
                 return {
@@ -748,26 +907,33 @@ PLATFORM BREAKDOWN:
                 }
             
             # Generate context summary
-            context_summary = self.generate_context_summary(context_data)
+            if context_summary is None:
+                context_summary = self.generate_context_summary(context_data)
             
             # Prepare detailed data for specific questions
             detailed_context = ""
             posts_data = context_data.get('all_posts', [])
             
+            # Evidence relevant to the question; the detail sections sample it before the other posts
+            evidence = self.get_relevant_evidence(user_question, project_id)
+            if evidence:
+                detailed_context += self._get_relevant_context(evidence)
+            relevant_posts = [item for item in evidence if item['kind'] == 'post']
+            
             # Add specific context based on question type
             question_lower = user_question.lower()
             
             if any(term in question_lower for term in ['sentiment', 'feeling', 'emotion', 'mood']):
                 # Add sentiment context
-                detailed_context += self._get_sentiment_context(posts_data)
+                detailed_context += self._get_sentiment_context(relevant_posts or posts_data)
             
             if any(term in question_lower for term in ['hashtag', 'trending', 'popular', 'viral']):
                 # Add hashtag/trending context
-                detailed_context += self._get_hashtag_context(posts_data)
+                detailed_context += self._get_hashtag_context(posts_data, project_id)
             
             if any(term in question_lower for term in ['comment', 'discussion', 'conversation']):
                 # Add comment context
-                detailed_context += self._get_comment_context(posts_data)
+                detailed_context += self._get_comment_context(relevant_posts or posts_data)
             
             if any(term in question_lower for term in ['engagement', 'performance', 'metric']):
                 # Add detailed engagement context
@@ -810,10 +976,9 @@ Remember: You're analyzing their REAL data of {context_data.get('total_results',
 Respond naturally and conversationally:
 """
 
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            return {
+                'success': True,
+                'messages': [
                     {
                         "role": "system",
                         "content": "You are an expert social media data analyst. Provide detailed, data-driven insights based on real scraped social media data. Always reference specific numbers and examples from the provided data."
@@ -823,29 +988,36 @@ Respond naturally and conversationally:
                         "content": prompt
                     }
                 ],
-                max_tokens=self.max_response_tokens,
-                temperature=0.7
-            )
-            
-            return {
-                'success': True,
-                'response': response.choices[0].message.content,
                 'data_context': {
                     'total_posts_analyzed': context_data.get('total_results', 0),
                     'platforms_covered': list(context_data.get('platforms', {}).keys()),
                     'total_engagement': context_data.get('statistics', {}).get('total_engagement', 0),
-                    'date_range': context_data.get('statistics', {}).get('date_range', {})
-                },
-                'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else None
+                    'date_range': context_data.get('statistics', {}).get('date_range', {}),
+                    'relevant_documents': len(evidence)
+                }
             }
             
         except Exception as e:
-            logger.error(f"Error in AI analysis: {str(e)}")
+            logger.error(f"Error preparing AI analysis: {str(e)}")
             return {
                 'success': False,
                 'error': f"AI analysis failed: {str(e)}"
             }
     
+    def _get_relevant_context(self, evidence: List[Dict]) -> str:
+        """Get the retrieved posts and comments, most relevant first"""
+        
+        context = "\nMOST RELEVANT POSTS AND COMMENTS FOR THIS QUESTION:\n"
+        for i, item in enumerate(evidence, 1):
+            text = (item.get('text_content') or '')[:200]
+            if item['kind'] == 'comment':
+                metric = f"{item.get('likes', 0):,} likes"
+            else:
+                metric = f"Engagement: {item.get('total_engagement', 0):,}"
+            context += f"{i}. [{item['platform'].upper()} {item['kind'].upper()}] @{item.get('username') or 'unknown'}: {text} ({metric})\n"
+        
+        return context
+    
     def _get_sentiment_context(self, posts_data: List[Dict]) -> str:
         """Get enhanced sentiment-related context from posts and comments"""
         
@@ -909,8 +1081,20 @@ Comments from various posts:
 """
         return context
     
-    def _get_hashtag_context(self, posts_data: List[Dict]) -> str:
-        """Get hashtag and trending context from posts"""
+    def _get_hashtag_context(self, posts_data: List[Dict], project_id: Optional[int] = None) -> str:
+        """Get hashtag and trending context, from the project's hashtag index when it has rows"""
+        
+        if project_id is not None:
+            top_hashtags_indexed = top_hashtags(project=project_id, limit=15)
+            if top_hashtags_indexed:
+                rows = hashtag_rows(project=project_id)
+                total_hashtags = rows.count()
+                tagged_posts = rows.values('platform', 'post_pk').distinct().count()
+                return f"""
+HASHTAG & TRENDING ANALYSIS:
+Top Hashtags (Total: {total_hashtags} hashtags across {tagged_posts} posts):
+{chr(10).join([f"- #{row['hashtag']}: {row['posts']} times" for row in top_hashtags_indexed])}
+"""
         
         all_hashtags = []
         for post in posts_data:
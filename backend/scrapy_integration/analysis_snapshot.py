@@ -0,0 +1,111 @@
+"""
+Cached analysis snapshots of a project's scraped data for the AI chat
+
+Every chat message used to load the project's results into Python, standardize
+each post, sort them for the top posts and rebuild the statistics and the context
+summary, so a busy thread paid the whole data load for every question. A snapshot
+keeps what the chat reads from that work in the Django cache:
+- the statistics, including the top performing posts and platform breakdown
+- the standardized posts the detail sections sample, without their raw payloads
+- the rendered generate_context_summary() text
+
+Snapshots are keyed by Project.data_version, which every write path for scraped
+data bumps (bulk webhook ingestion and CSV imports once per written chunk, single
+saves and deletes through scrapy_integration.signals). A follow-up question on
+unchanged data reads one integer and skips the data load entirely; the first one
+after new data arrives builds the next snapshot. Snapshots of older versions are
+never looked up again and expire after AI_ANALYSIS_SNAPSHOT_TIMEOUT, which also
+bounds how stale one can get after writes that bypass those paths (queryset
+updates, raw SQL).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+from users.models import Project
+
+logger = logging.getLogger(__name__)
+
+# Part of every key; change it when the snapshot layout changes
+SNAPSHOT_FORMAT = 1
+
+# Bulky per-post fields the chat never reads back
+DROPPED_POST_FIELDS = ('raw_data',)
+
+
+@dataclass
+class AnalysisSnapshot:
+    """A project's analysis data as of one data_version"""
+    version: Optional[int]
+    data: Dict[str, Any]
+    context_summary: str
+
+
+def snapshot_key(project_id: int, version: int, source: str,
+                 platforms: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> str:
+    platforms_part = ','.join(sorted(platforms)) if platforms else 'all'
+    return f"ai_analysis:{SNAPSHOT_FORMAT}:{project_id}:{version}:{source}:{platforms_part}:{limit or 'all'}"
+
+
+def compact_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parts of a project data dict the chat reads: every post once (in
+    all_posts) without its raw payload; the per-platform post lists are dropped
+    """
+    compact = dict(data)
+    compact['all_posts'] = [
+        {name: value for name, value in post.items() if name not in DROPPED_POST_FIELDS}
+        for post in data.get('all_posts', [])
+    ]
+    compact['platforms'] = {
+        platform: {name: value for name, value in platform_data.items() if name != 'posts'}
+        for platform, platform_data in data.get('platforms', {}).items()
+    }
+    return compact
+
+
+class AnalysisSnapshotCache:
+    """
+    Builds analysis snapshots on a miss and keeps them per project data_version
+    """
+
+    def __init__(self, cache_backend=None, timeout: Optional[int] = None):
+        self.cache = cache_backend or self._snapshot_cache()
+        self.timeout = timeout or int(getattr(settings, 'AI_ANALYSIS_SNAPSHOT_TIMEOUT', 3600))
+
+    @staticmethod
+    def _snapshot_cache():
+        alias = getattr(settings, 'AI_ANALYSIS_SNAPSHOT_CACHE', 'default')
+        try:
+            return caches[alias]
+        except InvalidCacheBackendError:
+            return cache
+
+    def get(self, project_id: int, build: Callable[[], Dict[str, Any]],
+            render: Callable[[Dict[str, Any]], str], source: str = 'scraped',
+            platforms: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> AnalysisSnapshot:
+        """
+        The cached snapshot of the project's current data_version, or a new one
+        made from build() (the data) and render(data) (the context summary)
+        """
+        # Read before building: a write landing mid-build moves the version on,
+        # so a snapshot that may have missed it is stored under the old one
+        version = Project.objects.filter(pk=project_id).values_list('data_version', flat=True).first()
+        key = snapshot_key(project_id, version, source, platforms, limit) if version is not None else None
+
+        if key is not None:
+            snapshot = self.cache.get(key)
+            if snapshot is not None:
+                return snapshot
+
+        data = build()
+        snapshot = AnalysisSnapshot(version, compact_data(data), render(data))
+        if key is not None and not data.get('error'):
+            self.cache.set(key, snapshot, timeout=self.timeout)
+            logger.debug(f"Built analysis snapshot {key} ({len(snapshot.data['all_posts'])} posts)")
+        return snapshot
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ScrapyIntegrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scrapy_integration'
+
+    def ready(self):
+        from scrapy_integration.signals import connect_data_version, connect_retrieval_index
+        connect_data_version()
+        connect_retrieval_index()
@@ -1,10 +1,11 @@
 import time
+from contextlib import aclosing
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 import json
 import logging
 
@@ -326,6 +327,126 @@ class ChatThreadViewSet(viewsets.ModelViewSet):
             )
 
 
+
+def _message_data(message):
+    data = {
+        'id': str(message.id),
+        'content': message.content,
+        'sender': message.sender,
+        'timestamp': message.timestamp.isoformat(),
+        'is_error': message.is_error
+    }
+    if message.sender == 'ai':
+        data.update({
+            'tokens_used': message.tokens_used,
+            'response_time': message.response_time,
+            'data_context': message.data_context
+        })
+    return data
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_reply(thread, content):
+    """
+    Save the user message, relay the AI answer token by token and save it once
+    the completion ends; if the client goes away first, what arrived so far is
+    saved as an error message
+    """
+    start_time = time.time()
+    
+    user_message = await ChatMessage.objects.acreate(
+        thread=thread,
+        content=content,
+        sender='user',
+        is_error=False
+    )
+    if not thread.title:
+        thread.title = content[:50] + ('...' if len(content) > 50 else '')
+        await thread.asave()
+    yield _sse_event('user_message', _message_data(user_message))
+    
+    parts, result = [], None
+    try:
+        async with aclosing(ai_chat_service.stream_with_ai(content, thread.project_id)) as events:
+            async for event in events:
+                if event['type'] == 'token':
+                    parts.append(event['content'])
+                    yield _sse_event('token', {'content': event['content']})
+                else:
+                    result = event
+    finally:
+        if result is None:
+            # Disconnected (GeneratorExit) or cancelled by the ASGI handler mid-answer:
+            # nothing more can be sent, but the thread still gets its reply
+            logger.warning(f"Chat stream for thread {thread.id} ended before the answer completed")
+            await ChatMessage.objects.acreate(
+                thread=thread,
+                content=''.join(parts) or 'The response was interrupted before it arrived.',
+                sender='ai',
+                is_error=True,
+                response_time=time.time() - start_time
+            )
+            await thread.asave()
+    response_time = time.time() - start_time
+    
+    if result['type'] == 'done':
+        ai_message = await ChatMessage.objects.acreate(
+            thread=thread,
+            content=result['response'] or 'Sorry, I could not generate a response.',
+            sender='ai',
+            is_error=False,
+            tokens_used=result['tokens_used'],
+            response_time=response_time,
+            data_context=result['data_context']
+        )
+    else:
+        ai_message = await ChatMessage.objects.acreate(
+            thread=thread,
+            content=f"I apologize, but I encountered an error: {result['error']}",
+            sender='ai',
+            is_error=True,
+            response_time=response_time
+        )
+    
+    # Update thread timestamp
+    await thread.asave()
+    yield _sse_event('ai_message', _message_data(ai_message))
+
+
+async def stream_message_view(request, thread_id):
+    """
+    Streaming variant of ChatThreadViewSet.add_message, as server-sent events:
+    a user_message event with the saved message, a token event per piece of the
+    AI answer as OpenAI generates it, then an ai_message event with the saved
+    answer (is_error set when the analysis failed part way)
+    
+    An async view, so a worker is not held while the completion is generated
+    """
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    
+    content = (data.get('content') or '').strip()
+    if not content:
+        return JsonResponse({'error': 'Message content is required'}, status=400)
+    
+    thread = await ChatThread.objects.filter(id=thread_id).afirst()
+    if thread is None:
+        return JsonResponse({'error': 'Chat thread not found'}, status=404)
+    
+    response = StreamingHttpResponse(_stream_reply(thread, content), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let a proxy hold back the tokens
+    return response
+
 def ai_chat_analysis_view(request):
     """Direct AI analysis endpoint for standalone queries"""
     
@@ -0,0 +1,157 @@
+"""
+A local stand-in for the OpenAI chat completions API, for tests
+
+FakeCompletionServer answers POST <base_url>/chat/completions on 127.0.0.1 with a
+canned reply, the way api.openai.com does: a chat.completion JSON body, or with
+"stream": true a text/event-stream of chat.completion.chunk events (one per word
+of the reply, then the usage chunk when stream_options.include_usage is set, then
+[DONE]). Point the real OpenAI clients at it through their base_url, so the HTTP,
+SSE parsing and streaming code under test is the code that runs in production:
+
+    with FakeCompletionServer(reply='Engagement is up 12%') as server:
+        service.base_url = server.base_url
+        ...
+    server.requests  # the JSON bodies received, in order
+
+delay sleeps between streamed chunks; error_status answers every request with that
+status and an OpenAI-style error body instead.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_REPLY = 'Your engagement is up this week! 🎉'
+
+
+class FakeCompletionServer:
+    """OpenAI-compatible chat completions endpoint on a free localhost port"""
+
+    def __init__(self, reply: str = DEFAULT_REPLY, delay: float = 0.0, error_status: Optional[int] = None):
+        self.reply = reply
+        self.delay = delay
+        self.error_status = error_status
+        self.requests: List[Dict[str, Any]] = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self) -> 'FakeCompletionServer':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> 'FakeCompletionServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    def pieces(self) -> List[str]:
+        """The reply as streamed: each word with the whitespace after it"""
+        return re.findall(r'\s*\S+\s*', self.reply) or ['']
+
+    def usage(self, body: Dict[str, Any]) -> Dict[str, int]:
+        prompt_tokens = sum(len(str(message.get('content', '')).split()) for message in body.get('messages', []))
+        completion_tokens = len(self.pieces())
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        }
+
+    def completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-4o-mini'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.reply},
+                'finish_reason': 'stop',
+            }],
+            'usage': self.usage(body),
+        }
+
+    def chunks(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        def chunk(delta, finish_reason=None, usage=None):
+            return {
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': body.get('model', 'gpt-4o-mini'),
+                'choices': [] if delta is None else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+                'usage': usage,
+            }
+
+        chunks = [chunk({'role': 'assistant', 'content': ''})]
+        chunks += [chunk({'content': piece}) for piece in self.pieces()]
+        chunks.append(chunk({}, finish_reason='stop'))
+        if (body.get('stream_options') or {}).get('include_usage'):
+            chunks.append(chunk(None, usage=self.usage(body)))
+        return chunks
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                server.requests.append(body)
+
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    return self._json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+                if server.error_status:
+                    return self._json(server.error_status, {'error': {'message': 'Fake completion failure', 'type': 'server_error'}})
+                if not body.get('stream'):
+                    return self._json(200, server.completion(body))
+
+                # HTTP/1.0: the stream ends when the connection closes
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                try:
+                    for chunk in server.chunks(body):
+                        self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                        self.wfile.flush()
+                        if server.delay:
+                            time.sleep(server.delay)
+                    self.wfile.write(b'data: [DONE]\n\n')
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client stopped reading mid-stream
+
+            def _json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from scrapy_integration.retrieval_index import RetrievalIndex, project_documents
+from users.models import Project
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute the AI chat retrieval index of each project from its posts, comments and scraped results'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            action='append',
+            type=int,
+            help='Only rebuild this project (repeatable; default: all projects)'
+        )
+        parser.add_argument(
+            '--if-empty',
+            action='store_true',
+            help='Skip projects that already have an index (used by the deploy hook to backfill once)'
+        )
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by('pk')
+        if options['project']:
+            projects = projects.filter(pk__in=options['project'])
+
+        start = time.perf_counter()
+        counts = {}
+        for project_id in projects.values_list('pk', flat=True):
+            index = RetrievalIndex(project_id)
+            if options['if_empty'] and index.read_meta() is not None:
+                continue
+            counts[project_id] = index.rebuild(project_documents(project_id))
+        elapsed = time.perf_counter() - start
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("RETRIEVAL INDEX REBUILD SUMMARY")
+        self.stdout.write("="*50)
+        for project_id, documents in counts.items():
+            self.stdout.write(f"Project {project_id:>6}: {documents} documents")
+        self.stdout.write(f"Rebuilt {len(counts)} projects in {elapsed:.2f}s")
@@ -0,0 +1,770 @@
+"""
+On-box retrieval index over a project's post and comment text for the AI chat
+
+analyze_with_ai used to pick its evidence with keyword checks on the question and
+the first 30 posts of the project, whatever they were about. Each project now has
+a BM25 index over the text of its platform posts, their comments and the posts of
+its ScrapyResults, so the prompt carries the posts and comments most relevant to
+the question. No external vector service is involved.
+
+Layout, under AI_RETRIEVAL_INDEX_DIR/project_<id>/:
+- meta.json: the committed sizes, the generation directory and the BM25 totals
+- g<generation>/: flat NumPy arrays, memory-mapped for reading
+    doc_key      int64    one row per document (see document_key())
+    doc_start    int64    offset of the document's first entry
+    doc_len      float32  tokens in the document
+    doc_alive    uint8    0 once the document is replaced or removed
+    entry_term   int32    hashed term of each (document, term) entry
+    entry_tf     float32  occurrences of the term in the document
+    df           int32    live documents containing each hashed term
+
+Terms are the lower-cased words of the text, hashed (crc32) into
+AI_RETRIEVAL_FEATURES buckets, so the vocabulary never has to be stored or
+synchronized. A search maps the arrays, finds the entries of the question's terms
+with one vectorized pass over entry_term and sums their BM25 weights per
+document; that takes well under ten milliseconds for a million entries.
+
+Writes are incremental and append-only: a changed document is marked dead and
+appended again, and df is adjusted in place. Writers serialize on a lock file
+(flock); readers never lock, they only use the prefix committed in meta.json,
+which is replaced atomically after the arrays are written. Once dead documents
+outnumber live ones the index is compacted into a new generation directory.
+
+Write paths feed the index the same way as the post search documents:
+- bulk writes (webhook ingestion, CSV imports) collect a RetrievalDocuments batch
+  per chunk
+- single saves and deletes go through the receivers in scrapy_integration.signals;
+  loops of them (the comment webhooks, the Apify transformer) run inside
+  batched_documents(), so their changes are collected and written once
+- deleting a platform folder or a ScrapyJob removes the documents of every row
+  deleted along with it (remove_parent_documents())
+The changes are written once the surrounding transaction commits. Rows that leave
+the project without a delete (moved to another folder or to uncategorized) keep
+their documents until the next rebuild_retrieval_index; their hits are dropped
+when the evidence is loaded (load_hits()).
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import zlib
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Document keys: (pk << 16) | (item << 5) | kind
+KIND_BITS = 5
+ITEM_BITS = 11
+MAX_ITEMS = 1 << ITEM_BITS
+PARENT_MASK = ~(((1 << ITEM_BITS) - 1) << KIND_BITS)
+
+# Compaction starts once this many documents are dead and they outnumber the live ones
+COMPACT_MIN_DEAD = 1000
+
+# Documents tokenized and appended per write when rebuilding
+REBUILD_CHUNK_SIZE = 2000
+
+# Comments of a ScrapyResult post indexed with it
+SCRAPED_COMMENTS_INDEXED = 20
+
+ARRAYS = {
+    'doc_key': np.int64,
+    'doc_start': np.int64,
+    'doc_len': np.float32,
+    'doc_alive': np.uint8,
+    'entry_term': np.int32,
+    'entry_tf': np.float32,
+}
+ENTRY_ARRAYS = ('entry_term', 'entry_tf')
+
+_WORD = re.compile(r'[^\W_]+')
+
+# Serializes writers within a process where flock is unavailable
+_process_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Document sources
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class DocumentSource:
+    """A model whose rows are indexed, and where their text and project come from"""
+    kind: int
+    name: str
+    label: str
+    text_fields: Tuple[str, ...]
+    # Foreign key whose target holds project_id
+    parent_field: str = 'folder'
+    is_comment: bool = False
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+
+SCRAPY_RESULT = 'scrapy_result'
+
+SOURCES = (
+    DocumentSource(1, 'instagram', 'instagram_data.InstagramPost', ('user_posted', 'description', 'hashtags')),
+    DocumentSource(2, 'facebook', 'facebook_data.FacebookPost', ('user_posted', 'content', 'description', 'hashtags')),
+    DocumentSource(3, 'linkedin', 'linkedin_data.LinkedInPost', ('user_posted', 'description', 'post_text', 'hashtags')),
+    DocumentSource(4, 'tiktok', 'tiktok_data.TikTokPost', ('user_posted', 'description', 'hashtags')),
+    DocumentSource(5, 'instagram_comment', 'instagram_data.InstagramComment', ('comment_user', 'comment'),
+                   is_comment=True),
+    DocumentSource(6, 'facebook_comment', 'facebook_data.FacebookComment', ('user_name', 'comment_text'),
+                   is_comment=True),
+    DocumentSource(7, 'linkedin_comment', 'linkedin_data.LinkedInComment', ('user_name', 'comment_text'),
+                   is_comment=True),
+    DocumentSource(8, 'tiktok_comment', 'tiktok_data.TikTokComment', ('user_name', 'comment_text'),
+                   is_comment=True),
+    DocumentSource(9, SCRAPY_RESULT, 'scrapy_integration.ScrapyResult', ('scraped_data',), parent_field='job'),
+)
+SOURCES_BY_KIND = {source.kind: source for source in SOURCES}
+SOURCES_BY_LABEL = {source.label: source for source in SOURCES}
+
+
+def source_for_model(model) -> Optional[DocumentSource]:
+    return SOURCES_BY_LABEL.get(model._meta.label)
+
+
+def document_key(kind: int, pk: int, item: int = 0) -> int:
+    return (int(pk) << (ITEM_BITS + KIND_BITS)) | (item << KIND_BITS) | kind
+
+
+def split_key(key: int) -> Tuple[int, int, int]:
+    """(kind, pk, item) of a document key"""
+    key = int(key)
+    return key & ((1 << KIND_BITS) - 1), key >> (ITEM_BITS + KIND_BITS), (key >> KIND_BITS) & (MAX_ITEMS - 1)
+
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return ''
+    return str(value)
+
+
+def scraped_items(scraped_data) -> List[dict]:
+    """The posts of a ScrapyResult, in the order get_project_scraped_data() reads them"""
+    if isinstance(scraped_data, dict):
+        return [scraped_data]
+    if isinstance(scraped_data, list):
+        return [post for post in scraped_data if isinstance(post, dict)]
+    return []
+
+
+def scraped_item_text(post: Dict[str, Any]) -> str:
+    parts = [
+        post.get('username', post.get('user', '')),
+        post.get('caption', post.get('text', post.get('description', ''))),
+        post.get('hashtags', []),
+    ]
+    comments = post.get('comments', [])
+    if isinstance(comments, list):
+        for comment in comments[:SCRAPED_COMMENTS_INDEXED]:
+            parts.append(comment.get('text', '') if isinstance(comment, dict) else comment)
+    return ' '.join(_text(part) for part in parts)
+
+
+def instance_documents(source: DocumentSource, instance) -> List[Tuple[int, str]]:
+    """(key, text) of the documents of one row"""
+    if source.name == SCRAPY_RESULT:
+        if not instance.success:
+            return []
+        return [
+            (document_key(source.kind, instance.pk, item), scraped_item_text(post))
+            for item, post in enumerate(scraped_items(instance.scraped_data)[:MAX_ITEMS])
+        ]
+    text = ' '.join(_text(getattr(instance, name, None)) for name in source.text_fields)
+    return [(document_key(source.kind, instance.pk), text)]
+
+
+def project_documents(project_id: int) -> Iterator[Tuple[int, str]]:
+    """Every document of a project, for rebuilding its index"""
+    for source in SOURCES:
+        queryset = source.model.objects.filter(**{f'{source.parent_field}__project_id': project_id})
+        fields = ('pk', 'success') + source.text_fields if source.name == SCRAPY_RESULT else ('pk',) + source.text_fields
+        for instance in queryset.only(*fields).order_by('pk').iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            yield from instance_documents(source, instance)
+
+
+# ---------------------------------------------------------------------------
+# Terms
+# ---------------------------------------------------------------------------
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall((text or '').lower()) if len(word) > 1]
+
+
+def hash_terms(tokens: List[str], features: int) -> np.ndarray:
+    hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint32, count=len(tokens))
+    return (hashes & np.uint32(features - 1)).astype(np.int32)
+
+
+def get_feature_count() -> int:
+    """AI_RETRIEVAL_FEATURES, rounded up to a power of two"""
+    features = max(int(getattr(settings, 'AI_RETRIEVAL_FEATURES', 1 << 20)), 2)
+    return 1 << (features - 1).bit_length()
+
+
+@dataclass
+class Hit:
+    kind: int
+    pk: int
+    item: int
+    score: float
+
+    @property
+    def source(self) -> DocumentSource:
+        return SOURCES_BY_KIND[self.kind]
+
+
+# ---------------------------------------------------------------------------
+# The index
+# ---------------------------------------------------------------------------
+
+class RetrievalIndex:
+    """
+    The BM25 index of one project's documents
+    """
+
+    def __init__(self, project_id: int, root: Optional[str] = None):
+        self.project_id = project_id
+        root = root or getattr(settings, 'AI_RETRIEVAL_INDEX_DIR', None) or Path(settings.BASE_DIR) / 'retrieval_index'
+        self.path = Path(root) / f'project_{project_id}'
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path / 'meta.json') as meta_file:
+                meta = json.load(meta_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if meta.get('format') == INDEX_FORMAT else None
+
+    def _array(self, meta: Dict[str, Any], name: str, mode: str = 'r') -> np.ndarray:
+        """The committed prefix of one array, memory-mapped"""
+        count = meta['features'] if name == 'df' else meta['entries' if name in ENTRY_ARRAYS else 'docs']
+        dtype = np.int32 if name == 'df' else ARRAYS[name]
+        if not count:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._generation_path(meta) / name, dtype=dtype, mode=mode, shape=(count,))
+
+    def _generation_path(self, meta: Dict[str, Any]) -> Path:
+        return self.path / f"g{meta['generation']}"
+
+    def __len__(self) -> int:
+        meta = self.read_meta()
+        return meta['live_docs'] if meta else 0
+
+    def search(self, query: str, k: Optional[int] = None) -> List[Hit]:
+        """The k live documents scoring highest for query, best first"""
+        k = k or int(getattr(settings, 'AI_RETRIEVAL_TOP_K', 8))
+        for attempt in range(2):
+            meta = self.read_meta()
+            if not meta or not meta['live_docs']:
+                return []
+            try:
+                return self._search(meta, query, k)
+            except FileNotFoundError:
+                # A compaction removed the generation between reading meta and mapping it
+                if attempt:
+                    raise
+        return []
+
+    def _search(self, meta: Dict[str, Any], query: str, k: int) -> List[Hit]:
+        terms = np.unique(hash_terms(tokenize(query), meta['features']))
+        if not terms.size:
+            return []
+
+        # A gather through a per-bucket lookup table beats np.isin() on long arrays
+        wanted = np.zeros(meta['features'], dtype=bool)
+        wanted[terms] = True
+        entry_term = self._array(meta, 'entry_term')
+        entries = np.flatnonzero(wanted[entry_term])
+        if not entries.size:
+            return []
+
+        rows = np.searchsorted(self._array(meta, 'doc_start'), entries, side='right') - 1
+        live = self._array(meta, 'doc_alive')[rows] == 1
+        entries, rows = entries[live], rows[live]
+        if not entries.size:
+            return []
+
+        matched = entry_term[entries]
+        tf = self._array(meta, 'entry_tf')[entries]
+        df = self._array(meta, 'df')[matched].astype(np.float64)
+        documents = float(meta['live_docs'])
+        average_length = max(meta['live_length'] / documents, 1.0)
+        idf = np.log1p((documents - df + 0.5) / (df + 0.5))
+        lengths = self._array(meta, 'doc_len')[rows]
+        weights = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths / average_length))
+
+        scored, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if scores.size > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(scores.size)
+        best = best[np.argsort(-scores[best], kind='stable')]
+
+        doc_key = self._array(meta, 'doc_key')
+        return [Hit(*split_key(doc_key[scored[index]]), score=float(scores[index])) for index in best]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def upsert(self, documents: Iterable[Tuple[int, str]]) -> int:
+        """
+        Index documents (key, text), replacing every document of the same rows;
+        returns the number of documents written
+        """
+        documents = list(documents)
+        if not documents:
+            return 0
+        with self._locked():
+            meta = self.read_meta() or self._create_generation(self._empty_meta(), 1)
+            self._drop(meta, {key & PARENT_MASK for key, _ in documents})
+            written = self._append(meta, documents)
+            self._commit(meta)
+            if self._needs_compaction(meta):
+                self._compact(meta)
+        return written
+
+    def delete(self, keys: Iterable[int]) -> None:
+        """Remove every document of the rows these keys belong to"""
+        parents = {key & PARENT_MASK for key in keys}
+        if not parents:
+            return
+        with self._locked():
+            meta = self.read_meta()
+            if meta is None:
+                return
+            if self._drop(meta, parents):
+                self._commit(meta)
+                if self._needs_compaction(meta):
+                    self._compact(meta)
+
+    def rebuild(self, documents: Iterable[Tuple[int, str]]) -> int:
+        """Replace the whole index with documents, in a new generation"""
+        with self._locked():
+            previous = self.read_meta()
+            meta = self._create_generation(self._empty_meta(), (previous['generation'] + 1) if previous else 1)
+            written, chunk = 0, []
+            for document in documents:
+                chunk.append(document)
+                if len(chunk) >= REBUILD_CHUNK_SIZE:
+                    written += self._append(meta, chunk)
+                    chunk = []
+            written += self._append(meta, chunk)
+            self._commit(meta)
+            self._remove_old_generations(meta)
+        return written
+
+    def _empty_meta(self) -> Dict[str, Any]:
+        return {'format': INDEX_FORMAT, 'features': get_feature_count(), 'generation': 0,
+                'docs': 0, 'entries': 0, 'live_docs': 0, 'live_length': 0.0}
+
+    def _create_generation(self, meta: Dict[str, Any], generation: int) -> Dict[str, Any]:
+        meta = dict(meta, generation=generation)
+        path = self._generation_path(meta)
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+        np.zeros(meta['features'], dtype=np.int32).tofile(path / 'df')
+        for name in ARRAYS:
+            (path / name).touch()
+        return meta
+
+    def _drop(self, meta: Dict[str, Any], parents) -> int:
+        """Mark the live documents of these rows dead; returns how many there were"""
+        if not meta['docs']:
+            return 0
+        doc_key = self._array(meta, 'doc_key')
+        alive = self._array(meta, 'doc_alive', mode='r+')
+        parents = np.fromiter(parents, dtype=np.int64, count=len(parents))
+        rows = np.flatnonzero(np.isin(doc_key & PARENT_MASK, parents) & (alive == 1))
+        if not rows.size:
+            return 0
+
+        starts = self._array(meta, 'doc_start')
+        ends = np.append(starts[1:], meta['entries'])
+        entry_term = self._array(meta, 'entry_term')
+        terms = np.concatenate([entry_term[starts[row]:ends[row]] for row in rows])
+        df = self._array(meta, 'df', mode='r+')
+        np.subtract.at(df, terms, 1)
+        df.flush()
+        alive[rows] = 0
+        alive.flush()
+
+        meta['live_docs'] -= int(rows.size)
+        meta['live_length'] -= float(self._array(meta, 'doc_len')[rows].sum())
+        return int(rows.size)
+
+    def _append(self, meta: Dict[str, Any], documents: List[Tuple[int, str]]) -> int:
+        keys, starts, lengths, terms, counts = [], [], [], [], []
+        entries = meta['entries']
+        for key, text in documents:
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            document_terms, term_counts = np.unique(hash_terms(tokens, meta['features']), return_counts=True)
+            keys.append(key)
+            starts.append(entries)
+            lengths.append(len(tokens))
+            terms.append(document_terms)
+            counts.append(term_counts)
+            entries += document_terms.size
+        if not keys:
+            return 0
+
+        all_terms = np.concatenate(terms).astype(np.int32)
+        arrays = {
+            'doc_key': np.array(keys, dtype=np.int64),
+            'doc_start': np.array(starts, dtype=np.int64),
+            'doc_len': np.array(lengths, dtype=np.float32),
+            'doc_alive': np.ones(len(keys), dtype=np.uint8),
+            'entry_term': all_terms,
+            'entry_tf': np.concatenate(counts).astype(np.float32),
+        }
+        path = self._generation_path(meta)
+        for name, values in arrays.items():
+            committed = meta['entries' if name in ENTRY_ARRAYS else 'docs']
+            with open(path / name, 'r+b') as array_file:
+                # Drop whatever an interrupted write left past the committed prefix
+                array_file.truncate(committed * np.dtype(ARRAYS[name]).itemsize)
+                array_file.seek(0, os.SEEK_END)
+                array_file.write(values.tobytes())
+
+        df = self._array(meta, 'df', mode='r+')
+        np.add.at(df, all_terms, 1)
+        df.flush()
+
+        meta['docs'] += len(keys)
+        meta['entries'] = entries
+        meta['live_docs'] += len(keys)
+        meta['live_length'] += float(sum(lengths))
+        return len(keys)
+
+    def _commit(self, meta: Dict[str, Any]) -> None:
+        temporary = self.path / 'meta.json.tmp'
+        with open(temporary, 'w') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temporary, self.path / 'meta.json')
+
+    def _needs_compaction(self, meta: Dict[str, Any]) -> bool:
+        dead = meta['docs'] - meta['live_docs']
+        return dead >= COMPACT_MIN_DEAD and dead > meta['live_docs']
+
+    def _compact(self, meta: Dict[str, Any]) -> None:
+        """Copy the live documents into a new generation"""
+        alive = self._array(meta, 'doc_alive') == 1
+        rows = np.flatnonzero(alive)
+        starts = self._array(meta, 'doc_start')
+        ends = np.append(starts[1:], meta['entries'])
+        sizes = (ends - starts)[rows]
+        keep = np.repeat(alive, ends - starts)
+
+        compacted = self._create_generation(meta, meta['generation'] + 1)
+        path = self._generation_path(compacted)
+        entry_term = np.asarray(self._array(meta, 'entry_term'))[keep]
+        np.asarray(self._array(meta, 'doc_key'))[rows].tofile(path / 'doc_key')
+        (np.cumsum(sizes) - sizes).astype(np.int64).tofile(path / 'doc_start')
+        np.asarray(self._array(meta, 'doc_len'))[rows].tofile(path / 'doc_len')
+        np.ones(rows.size, dtype=np.uint8).tofile(path / 'doc_alive')
+        entry_term.tofile(path / 'entry_term')
+        np.asarray(self._array(meta, 'entry_tf'))[keep].tofile(path / 'entry_tf')
+        np.bincount(entry_term, minlength=meta['features']).astype(np.int32).tofile(path / 'df')
+
+        compacted.update(docs=int(rows.size), entries=int(entry_term.size))
+        self._commit(compacted)
+        self._remove_old_generations(compacted)
+        logger.info(f"Compacted the retrieval index of project {self.project_id}: "
+                    f"{meta['docs']} -> {compacted['docs']} documents")
+
+    def _remove_old_generations(self, meta: Dict[str, Any]) -> None:
+        # Readers that already mapped an old generation keep their open files
+        current = self._generation_path(meta).name
+        for path in self.path.glob('g*'):
+            if path.is_dir() and path.name != current:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _locked(self):
+        return _WriterLock(self.path)
+
+
+class _WriterLock:
+    """Exclusive lock between the writers of one index, across processes where flock exists"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock_file = None
+
+    def __enter__(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not HAS_FCNTL:
+            _process_lock.acquire()
+            return self
+        self.lock_file = open(self.path / 'lock', 'a')
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if not HAS_FCNTL:
+            _process_lock.release()
+            return
+        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.lock_file.close()
+
+
+# ---------------------------------------------------------------------------
+# Write batches
+# ---------------------------------------------------------------------------
+
+class RetrievalDocuments:
+    """
+    Accumulates the index changes of a batch of writes to one model and applies
+    them once the transaction commits. Models that aren't indexed are ignored,
+    so callers need not check.
+    """
+
+    def __init__(self, model, parent=None):
+        self.source = source_for_model(model)
+        self.parent_model = model._meta.get_field(self.source.parent_field).related_model if self.source else None
+        self.projects: Dict[int, Optional[int]] = {}
+        if parent is not None:
+            self.projects[parent.pk] = parent.project_id
+        self.upserts: List[Tuple[Optional[int], Any]] = []
+        self.deletes: List[Tuple[Optional[int], int]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.source is not None
+
+    def watches(self, field_names: Iterable[str]) -> bool:
+        """Whether changing these fields changes the indexed text"""
+        if not self.enabled:
+            return False
+        return any(name in self.source.text_fields or name in ('success', self.source.parent_field)
+                   for name in field_names)
+
+    def add(self, instance) -> None:
+        if self.enabled and instance.pk is not None:
+            self.upserts.append((self._parent_id(instance), instance))
+
+    def remove(self, instance) -> None:
+        if self.enabled and instance.pk is not None:
+            # A row saved and then deleted within the batch must not be indexed
+            self.upserts = [(parent_id, row) for parent_id, row in self.upserts if row.pk != instance.pk]
+            # The pk, since delete() clears it on the instance afterwards
+            self.deletes.append((self._parent_id(instance), instance.pk))
+
+    def _parent_id(self, instance) -> Optional[int]:
+        return getattr(instance, f'{self.source.parent_field}_id')
+
+    def apply(self) -> None:
+        """Write the accumulated changes once the current transaction commits"""
+        if not self.upserts and not self.deletes:
+            return
+        self._resolve_projects({parent_id for parent_id, _ in self.upserts + self.deletes})
+
+        upserts, deletes = defaultdict(list), defaultdict(list)
+        # A row saved several times within the batch is indexed as last saved
+        latest = {instance.pk: (parent_id, instance) for parent_id, instance in self.upserts}
+        for parent_id, instance in latest.values():
+            project_id = self.projects.get(parent_id)
+            if project_id is not None:
+                documents = instance_documents(self.source, instance)
+                upserts[project_id].extend(documents)
+                if not documents:
+                    deletes[project_id].append(document_key(self.source.kind, instance.pk))
+        for parent_id, pk in self.deletes:
+            project_id = self.projects.get(parent_id)
+            if project_id is not None:
+                deletes[project_id].append(document_key(self.source.kind, pk))
+        self.upserts, self.deletes = [], []
+
+        if upserts or deletes:
+            transaction.on_commit(lambda: write_documents(upserts, deletes))
+
+    def _resolve_projects(self, parent_ids) -> None:
+        unknown = [parent_id for parent_id in parent_ids if parent_id is not None and parent_id not in self.projects]
+        if not unknown:
+            return
+        found = dict(self.parent_model.objects.filter(pk__in=unknown).values_list('pk', 'project_id'))
+        for parent_id in unknown:
+            self.projects[parent_id] = found.get(parent_id)
+
+
+class DocumentBatch:
+    """The RetrievalDocuments of every model saved or deleted inside batched_documents()"""
+
+    def __init__(self):
+        self.by_model: Dict[Any, RetrievalDocuments] = {}
+
+    def documents(self, model) -> RetrievalDocuments:
+        if model not in self.by_model:
+            self.by_model[model] = RetrievalDocuments(model)
+        return self.by_model[model]
+
+    def apply(self) -> None:
+        for documents in self.by_model.values():
+            documents.apply()
+
+    def finish(self, failed: bool) -> None:
+        # After a failure inside a transaction the rows are rolled back with it;
+        # without one they were committed row by row and still need indexing
+        if not failed or not transaction.get_connection().in_atomic_block:
+            self.apply()
+
+
+_current_batch: ContextVar[Optional[DocumentBatch]] = ContextVar('retrieval_document_batch', default=None)
+
+
+def current_batch() -> Optional[DocumentBatch]:
+    return _current_batch.get()
+
+
+@contextmanager
+def batched_documents():
+    """
+    Collect the index changes of the single-row saves and deletes inside the block
+    and apply them together when it exits, one project lookup and one index write
+    per model instead of one per row. Open it inside the transaction, if any.
+    """
+    batch = DocumentBatch()
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    except BaseException:
+        _current_batch.reset(token)
+        batch.finish(failed=True)
+        raise
+    _current_batch.reset(token)
+    batch.finish(failed=False)
+
+
+@asynccontextmanager
+async def abatched_documents():
+    """batched_documents() for async code saving rows through sync_to_async"""
+    batch = DocumentBatch()
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    except BaseException:
+        _current_batch.reset(token)
+        await sync_to_async(batch.finish)(failed=True)
+        raise
+    _current_batch.reset(token)
+    await sync_to_async(batch.finish)(failed=False)
+
+
+def write_documents(upserts: Dict[int, List[Tuple[int, str]]], deletes: Dict[int, List[int]]) -> None:
+    """Apply index changes per project; a failing index never fails the write that fed it"""
+    for project_id in set(upserts) | set(deletes):
+        index = RetrievalIndex(project_id)
+        try:
+            if deletes.get(project_id):
+                index.delete(deletes[project_id])
+            if upserts.get(project_id):
+                index.upsert(upserts[project_id])
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not update the retrieval index of project {project_id}: {e}")
+
+
+def parent_models() -> List[Any]:
+    """The models whose deletion cascades to indexed rows (platform folders, ScrapyJob)"""
+    parents = []
+    for source in SOURCES:
+        parent_model = source.model._meta.get_field(source.parent_field).related_model
+        if parent_model not in parents:
+            parents.append(parent_model)
+    return parents
+
+
+def remove_parent_documents(parent) -> None:
+    """
+    Remove the documents of every indexed row that belongs to parent, a platform
+    folder or a ScrapyJob about to be deleted, once the transaction commits
+    """
+    project_id = parent.project_id
+    if project_id is None:
+        return
+    keys = []
+    for source in SOURCES:
+        if source.model._meta.get_field(source.parent_field).related_model is not type(parent):
+            continue
+        pks = source.model._base_manager.filter(**{source.parent_field: parent}).values_list('pk', flat=True)
+        keys.extend(document_key(source.kind, pk) for pk in pks.iterator(chunk_size=REBUILD_CHUNK_SIZE))
+    if keys:
+        transaction.on_commit(lambda: write_documents({}, {project_id: keys}))
+
+
+# ---------------------------------------------------------------------------
+# Hits
+# ---------------------------------------------------------------------------
+
+def load_hits(hits: List[Hit], project_id: int) -> List[Tuple[Hit, Any]]:
+    """
+    The rows behind hits, in hit order, as (hit, row) pairs; a ScrapyResult hit's
+    row is (result, post). Hits whose rows are gone, or no longer belong to the
+    project, are dropped. One query per kind of document.
+    """
+    by_kind = defaultdict(set)
+    for hit in hits:
+        by_kind[hit.kind].add(hit.pk)
+
+    rows = {}
+    for kind, pks in by_kind.items():
+        source = SOURCES_BY_KIND[kind]
+        queryset = source.model.objects.filter(pk__in=pks, **{f'{source.parent_field}__project_id': project_id})
+        queryset = queryset.select_related('job__config' if source.name == SCRAPY_RESULT else 'folder')
+        for row in queryset:
+            rows[(kind, row.pk)] = row
+
+    loaded = []
+    for hit in hits:
+        row = rows.get((hit.kind, hit.pk))
+        if row is None:
+            continue
+        if hit.source.name == SCRAPY_RESULT:
+            items = scraped_items(row.scraped_data)
+            if hit.item >= len(items):
+                continue
+            row = (row, items[hit.item])
+        loaded.append((hit, row))
+    return loaded
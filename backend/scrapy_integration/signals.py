@@ -0,0 +1,94 @@
+"""
+Bump Project.data_version and update the retrieval index for scraped data written
+one row at a time (save() and delete() of platform posts, comments and
+ScrapyResults); bulk ingestion and CSV imports do both once per written chunk
+themselves. Inside batched_documents() the index changes are collected and
+written once for the whole block
+"""
+
+from django.apps import apps
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+from users.models import Project
+
+from .models import ScrapyJob, ScrapyResult
+from .retrieval_index import SOURCES, RetrievalDocuments, current_batch, parent_models, remove_parent_documents
+
+
+def bump_post_project(sender, instance, raw=False, origin=None, **kwargs):
+    # Posts removed along with their folder are covered by bump_folder_project()
+    if raw or (isinstance(origin, Model) and not isinstance(origin, sender)):
+        return
+    if instance.folder_id is None:
+        return
+    folder_model = sender._meta.get_field('folder').related_model
+    Project.bump_data_version(folder_model.objects.filter(pk=instance.folder_id).values('project_id'))
+
+
+def bump_folder_project(sender, instance, **kwargs):
+    Project.bump_data_version([instance.project_id])
+
+
+def bump_result_project(sender, instance, raw=False, origin=None, **kwargs):
+    # Results removed along with their job go with bump_job_project()
+    if raw or (isinstance(origin, Model) and not isinstance(origin, sender)):
+        return
+    Project.bump_data_version(ScrapyJob.objects.filter(pk=instance.job_id).values('project_id'))
+
+
+def bump_job_project(sender, instance, **kwargs):
+    Project.bump_data_version([instance.project_id])
+
+
+def index_document(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    batch = current_batch()
+    documents = batch.documents(sender) if batch else RetrievalDocuments(sender)
+    if update_fields is not None and not documents.watches(update_fields):
+        return
+    documents.add(instance)
+    if batch is None:
+        documents.apply()
+
+
+def remove_document(sender, instance, origin=None, **kwargs):
+    # Rows removed along with their folder or job go with remove_parent_documents()
+    if isinstance(origin, Model) and not isinstance(origin, sender):
+        return
+    batch = current_batch()
+    documents = batch.documents(sender) if batch else RetrievalDocuments(sender)
+    documents.remove(instance)
+    if batch is None:
+        documents.apply()
+
+
+def remove_parent_rows(sender, instance, **kwargs):
+    remove_parent_documents(instance)
+
+
+def connect_retrieval_index():
+    for source in SOURCES:
+        uid = f'retrieval_index_{source.name}'
+        post_save.connect(index_document, sender=source.model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(remove_document, sender=source.model, dispatch_uid=f'{uid}_post_delete')
+    for parent_model in parent_models():
+        pre_delete.connect(remove_parent_rows, sender=parent_model,
+                           dispatch_uid=f'retrieval_index_{parent_model._meta.label_lower}_delete')
+
+
+def connect_data_version():
+    for platform, label in PLATFORM_POST_MODELS.items():
+        post_model = apps.get_model(label)
+        folder_model = post_model._meta.get_field('folder').related_model
+        uid = f'data_version_{platform}'
+
+        post_save.connect(bump_post_project, sender=post_model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(bump_post_project, sender=post_model, dispatch_uid=f'{uid}_post_delete')
+        pre_delete.connect(bump_folder_project, sender=folder_model, dispatch_uid=f'{uid}_folder_delete')
+
+    post_save.connect(bump_result_project, sender=ScrapyResult, dispatch_uid='data_version_result_save')
+    post_delete.connect(bump_result_project, sender=ScrapyResult, dispatch_uid='data_version_result_delete')
+    pre_delete.connect(bump_job_project, sender=ScrapyJob, dispatch_uid='data_version_job_delete')
@@ -0,0 +1,101 @@
+"""
+Tests for the AI chat's cached analysis snapshots
+"""
+
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from brightdata_integration.ingestion import BulkPostIngestor
+from instagram_data.models import Folder as InstagramFolder
+from users.models import Project
+
+from .ai_analysis_chat_service import AIAnalysisChatService
+from .analysis_snapshot import AnalysisSnapshotCache
+from .models import ScrapyConfig, ScrapyJob, ScrapyResult
+
+
+class FakeCompletions:
+    """Stands in for the OpenAI chat completions API, recording prompts"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def create(self, messages, **kwargs):
+        self.prompts.append(messages[-1]['content'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='Looks great'))],
+            usage=SimpleNamespace(total_tokens=42),
+        )
+
+
+class AnalysisSnapshotTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='analyst', password='testpass')
+        cls.project = Project.objects.create(name='Chat Project', owner=cls.user)
+        cls.config = ScrapyConfig.objects.create(platform='instagram')
+        cls.job = ScrapyJob.objects.create(
+            name='Nike', project=cls.project, config=cls.config, target_urls=['https://www.instagram.com/nike/'],
+        )
+        cls.folder = InstagramFolder.objects.create(name='IG Job', project=cls.project)
+
+    def setUp(self):
+        self.completions = FakeCompletions()
+        self.service = AIAnalysisChatService()
+        self.service.client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        self.service.snapshots = AnalysisSnapshotCache(LocMemCache('analysis-snapshot-test', {}))
+        self._result('Just do it', likes=120)
+        self._result('New drop', likes=30)
+
+    def _result(self, caption, likes):
+        return ScrapyResult.objects.create(
+            job=self.job, source_url='https://www.instagram.com/nike/',
+            scraped_data={'caption': caption, 'likes': likes, 'comments_count': 3, 'hashtags': ['#run']},
+        )
+
+    def _version(self):
+        return Project.objects.values_list('data_version', flat=True).get(pk=self.project.pk)
+
+    def test_follow_up_questions_reuse_the_snapshot(self):
+        first = self.service.analyze_with_ai('How is engagement?', self.project.id)
+        self.assertTrue(first['success'])
+        self.assertEqual(first['data_context']['total_posts_analyzed'], 2)
+
+        # The data_version lookup only: no results are loaded again
+        with self.assertNumQueries(1):
+            second = self.service.analyze_with_ai('Which post did best?', self.project.id)
+        self.assertTrue(second['success'])
+        self.assertIn('Just do it', self.completions.prompts[1])
+
+        snapshot = self.service.get_analysis_snapshot(self.project.id)
+        self.assertNotIn('raw_data', snapshot.data['all_posts'][0])
+        self.assertNotIn('posts', snapshot.data['platforms']['instagram'])
+        self.assertEqual(snapshot.data['statistics']['top_performing_posts'][0]['likes'], 120)
+
+    def test_new_results_invalidate_the_snapshot(self):
+        before = self._version()
+        self.service.analyze_with_ai('How is engagement?', self.project.id)
+
+        self._result('Fresh post', likes=500)
+        self.assertEqual(self._version(), before + 1)
+
+        result = self.service.analyze_with_ai('And now?', self.project.id)
+        self.assertEqual(result['data_context']['total_posts_analyzed'], 3)
+        self.assertIn('Fresh post', self.completions.prompts[-1])
+
+    def test_ingestion_and_deletes_bump_the_data_version(self):
+        before = self._version()
+        post = {'post_id': 'IG1', 'url': 'https://www.instagram.com/p/IG1/', 'user_posted': 'nike', 'likes': 5}
+        BulkPostIngestor('instagram', folder=self.folder).ingest([post])
+        self.assertEqual(self._version(), before + 1)
+
+        # Unchanged posts write nothing and leave the version alone
+        BulkPostIngestor('instagram', folder=self.folder).ingest([post])
+        self.assertEqual(self._version(), before + 1)
+
+        self.job.delete()
+        self.assertEqual(self._version(), before + 2)
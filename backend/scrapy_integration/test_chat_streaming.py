@@ -0,0 +1,133 @@
+"""
+Tests for the streamed AI chat replies, against a local fake completion server
+"""
+
+import asyncio
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from chat.models import ChatMessage, ChatThread
+from users.models import Project
+
+from .ai_analysis_chat_service import ai_chat_service
+from .fake_completion_server import FakeCompletionServer
+from .models import ScrapyConfig, ScrapyJob, ScrapyResult
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class ChatStreamingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='streamer', password='testpass')
+        cls.project = Project.objects.create(name='Stream Project', owner=cls.user)
+        cls.config = ScrapyConfig.objects.create(platform='instagram')
+        cls.job = ScrapyJob.objects.create(
+            name='Nike', project=cls.project, config=cls.config, target_urls=['https://www.instagram.com/nike/'],
+        )
+        ScrapyResult.objects.create(
+            job=cls.job, source_url='https://www.instagram.com/nike/',
+            scraped_data={'caption': 'Just do it', 'likes': 120, 'comments_count': 3},
+        )
+        cls.thread = ChatThread.objects.create(project=cls.project, user=cls.user)
+
+    def _url(self, thread_id=None):
+        return f'/api/scrapy/api/chat/threads/{thread_id or self.thread.id}/stream_message/'
+
+    async def _stream(self, server, content='How is engagement?'):
+        with mock.patch.object(ai_chat_service, 'api_key', 'test-key'), \
+                mock.patch.object(ai_chat_service, 'base_url', server.base_url):
+            response = await self.async_client.post(self._url(), {'content': content}, content_type='application/json')
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        return parse_events(body)
+
+    async def test_relays_tokens_and_saves_the_reply(self):
+        with FakeCompletionServer(reply='Engagement is up 12% this week!') as server:
+            events = await self._stream(server)
+
+        names = [name for name, _ in events]
+        self.assertEqual(names[0], 'user_message')
+        self.assertEqual(names[-1], 'ai_message')
+        tokens = [data['content'] for name, data in events if name == 'token']
+        self.assertEqual(tokens, ['Engagement ', 'is ', 'up ', '12% ', 'this ', 'week!'])
+
+        ai_data = events[-1][1]
+        self.assertFalse(ai_data['is_error'])
+        self.assertEqual(ai_data['content'], 'Engagement is up 12% this week!')
+        self.assertEqual(ai_data['data_context']['total_posts_analyzed'], 1)
+
+        saved = await ChatMessage.objects.aget(thread=self.thread, sender='ai')
+        self.assertEqual(saved.content, 'Engagement is up 12% this week!')
+        self.assertEqual(saved.tokens_used, ai_data['tokens_used'])
+        self.assertGreater(saved.tokens_used, 6)
+        self.assertIsNotNone(saved.response_time)
+        self.assertEqual(await ChatMessage.objects.filter(thread=self.thread, sender='user').acount(), 1)
+
+        # The prompt carries the project's data, and usage was asked for
+        request = server.requests[0]
+        self.assertTrue(request['stream'])
+        self.assertEqual(request['stream_options'], {'include_usage': True})
+        self.assertIn('How is engagement?', request['messages'][-1]['content'])
+
+        thread = await ChatThread.objects.aget(pk=self.thread.pk)
+        self.assertEqual(thread.title, 'How is engagement?')
+
+    async def test_completion_failures_are_saved_as_error_messages(self):
+        with FakeCompletionServer(error_status=400) as server:
+            events = await self._stream(server)
+
+        self.assertEqual([name for name, _ in events], ['user_message', 'ai_message'])
+        self.assertTrue(events[-1][1]['is_error'])
+        saved = await ChatMessage.objects.aget(thread=self.thread, sender='ai')
+        self.assertTrue(saved.is_error)
+        self.assertIn('Fake completion failure', saved.content)
+
+    async def test_disconnect_saves_the_partial_reply(self):
+        received = []
+        first_token = asyncio.Event()
+
+        async def consume(response):
+            async for chunk in response.streaming_content:
+                received.append(chunk.decode())
+                if chunk.startswith(b'event: token'):
+                    first_token.set()
+
+        with FakeCompletionServer(reply='Engagement is up 12% this week!', delay=0.2) as server:
+            with mock.patch.object(ai_chat_service, 'api_key', 'test-key'), \
+                    mock.patch.object(ai_chat_service, 'base_url', server.base_url):
+                response = await self.async_client.post(
+                    self._url(), {'content': 'How is engagement?'}, content_type='application/json',
+                )
+                # The ASGI handler cancels the response when the client disconnects
+                task = asyncio.ensure_future(consume(response))
+                await asyncio.wait_for(first_token.wait(), timeout=10)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+        self.assertFalse(any(chunk.startswith('event: ai_message') for chunk in received))
+        saved = await ChatMessage.objects.aget(thread=self.thread, sender='ai')
+        self.assertTrue(saved.is_error)
+        self.assertTrue(saved.content.startswith('Engagement'))
+        self.assertNotEqual(saved.content, 'Engagement is up 12% this week!')
+        self.assertIsNotNone(saved.response_time)
+
+    async def test_rejects_empty_messages_and_unknown_threads(self):
+        response = await self.async_client.post(self._url(), {'content': '  '}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        url = self._url('00000000-0000-0000-0000-000000000000')
+        response = await self.async_client.post(url, {'content': 'Hi'}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(await ChatMessage.objects.acount(), 0)
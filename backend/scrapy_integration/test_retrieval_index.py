@@ -0,0 +1,255 @@
+"""
+Tests for the AI chat retrieval index
+"""
+
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from brightdata_integration.ingestion import BulkPostIngestor
+from instagram_data.models import Folder as InstagramFolder, InstagramComment, InstagramPost
+from users.models import Project
+
+from . import retrieval_index
+from .ai_analysis_chat_service import AIAnalysisChatService
+from .models import ScrapyConfig, ScrapyJob, ScrapyResult
+from .retrieval_index import RetrievalIndex, document_key, split_key
+
+INSTAGRAM, INSTAGRAM_COMMENT, SCRAPED = 1, 5, 9
+
+
+class IndexDirectoryMixin:
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings_override = override_settings(AI_RETRIEVAL_INDEX_DIR=self.root, AI_RETRIEVAL_FEATURES=1 << 12)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class RetrievalIndexTest(IndexDirectoryMixin, SimpleTestCase):
+
+    def _keys(self, hits):
+        return [(hit.kind, hit.pk) for hit in hits]
+
+    def test_ranks_documents_by_bm25(self):
+        index = RetrievalIndex(1)
+        index.upsert([
+            (document_key(INSTAGRAM, 1), 'New running shoes for the marathon season'),
+            (document_key(INSTAGRAM, 2), 'Coffee and croissants this morning'),
+            (document_key(INSTAGRAM, 3), 'Marathon day! Marathon training paid off, running strong'),
+            (document_key(INSTAGRAM_COMMENT, 4), 'those shoes look great'),
+        ])
+
+        self.assertEqual(self._keys(index.search('marathon running', k=5)), [(INSTAGRAM, 3), (INSTAGRAM, 1)])
+        self.assertEqual(self._keys(index.search('SHOES', k=1)), [(INSTAGRAM_COMMENT, 4)])
+        self.assertEqual(index.search('tennis'), [])
+        self.assertEqual(index.search('!!'), [])
+
+        # Persisted: a fresh instance (another process) reads the same files
+        self.assertEqual(len(RetrievalIndex(1)), 4)
+        self.assertEqual(RetrievalIndex(2).search('marathon'), [])
+
+    def test_updates_replace_and_deletes_remove_documents(self):
+        index = RetrievalIndex(1)
+        index.upsert([(document_key(INSTAGRAM, 1), 'marathon shoes'), (document_key(INSTAGRAM, 2), 'marathon')])
+        index.upsert([(document_key(INSTAGRAM, 1), 'cycling jersey')])
+
+        self.assertEqual(self._keys(index.search('marathon')), [(INSTAGRAM, 2)])
+        self.assertEqual(self._keys(index.search('cycling')), [(INSTAGRAM, 1)])
+        self.assertEqual(index.read_meta()['live_docs'], 2)
+
+        index.delete([document_key(INSTAGRAM, 2)])
+        self.assertEqual(index.search('marathon'), [])
+        self.assertEqual(len(index), 1)
+
+    def test_scraped_result_posts_are_replaced_together(self):
+        index = RetrievalIndex(1)
+        index.upsert([(document_key(SCRAPED, 7, item), text) for item, text in enumerate(['alpha', 'beta', 'gamma'])])
+        hit = index.search('gamma')[0]
+        self.assertEqual((hit.kind, hit.pk, hit.item), split_key(document_key(SCRAPED, 7, 2)))
+
+        # The result now holds one post: the other two go
+        index.upsert([(document_key(SCRAPED, 7, 0), 'delta')])
+        self.assertEqual(index.search('alpha beta gamma'), [])
+        self.assertEqual(len(index), 1)
+
+    def test_compaction_keeps_live_documents(self):
+        index = RetrievalIndex(1)
+        with mock.patch.object(retrieval_index, 'COMPACT_MIN_DEAD', 3):
+            index.upsert([(document_key(INSTAGRAM, pk), f'post {pk} marathon') for pk in range(1, 4)])
+            for round_number in range(3):
+                index.upsert([(document_key(INSTAGRAM, 1), f'marathon update {round_number}')])
+                index.upsert([(document_key(INSTAGRAM, 2), f'cycling update {round_number}')])
+
+        meta = index.read_meta()
+        self.assertGreater(meta['generation'], 1)
+        self.assertLessEqual(meta['docs'] - meta['live_docs'], 3)
+        self.assertEqual(sorted(self._keys(index.search('marathon'))), [(INSTAGRAM, 1), (INSTAGRAM, 3)])
+        self.assertEqual(self._keys(index.search('update 2', k=2))[0][0], INSTAGRAM)
+        self.assertEqual(len(list(index.path.glob('g*'))), 1)
+
+
+class FakeCompletions:
+    """Stands in for the OpenAI chat completions API, recording prompts"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def create(self, messages, **kwargs):
+        self.prompts.append(messages[-1]['content'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='Here you go'))],
+            usage=SimpleNamespace(total_tokens=10),
+        )
+
+
+class RetrievalWritePathTest(IndexDirectoryMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='retrieval', password='testpass')
+        cls.project = Project.objects.create(name='Retrieval Project', owner=cls.user)
+        cls.folder = InstagramFolder.objects.create(name='IG Job', project=cls.project)
+        cls.config = ScrapyConfig.objects.create(platform='instagram')
+        cls.job = ScrapyJob.objects.create(
+            name='Nike', project=cls.project, config=cls.config, target_urls=['https://www.instagram.com/nike/'],
+        )
+
+    def _ingest(self, *posts):
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkPostIngestor('instagram', folder=self.folder).ingest(list(posts))
+
+    def _post(self, post_id, description, likes=10):
+        return {'post_id': post_id, 'url': f'https://www.instagram.com/p/{post_id}/', 'user_posted': 'nike',
+                'description': description, 'likes': likes}
+
+    def test_ingestion_indexes_posts_once_committed(self):
+        index = RetrievalIndex(self.project.id)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            BulkPostIngestor('instagram', folder=self.folder).ingest([self._post('IG1', 'Marathon shoes drop')])
+        self.assertEqual(len(index), 0)
+        for callback in callbacks:
+            callback()
+
+        post = InstagramPost.objects.get(post_id='IG1')
+        self.assertEqual([(hit.kind, hit.pk) for hit in index.search('marathon')], [(INSTAGRAM, post.pk)])
+
+        # A changed description replaces the document
+        self._ingest(self._post('IG1', 'Cycling jersey drop'))
+        self.assertEqual(index.search('marathon'), [])
+        self.assertEqual(len(index), 1)
+
+    def test_single_saves_and_deletes_update_the_index(self):
+        index = RetrievalIndex(self.project.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = InstagramComment.objects.create(
+                folder=self.folder, post_id='IG1', post_url='https://www.instagram.com/p/IG1/',
+                comment='Love the marathon colourway', comment_user='runner',
+            )
+            result = ScrapyResult.objects.create(
+                job=self.job, source_url='https://www.instagram.com/nike/',
+                scraped_data=[{'caption': 'Trail running kit'}, {'caption': 'Marathon recap'}],
+            )
+        self.assertEqual(
+            sorted((hit.kind, hit.pk, hit.item) for hit in index.search('marathon')),
+            [(INSTAGRAM_COMMENT, comment.pk, 0), (SCRAPED, result.pk, 1)],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+        self.assertEqual([hit.kind for hit in index.search('marathon')], [SCRAPED])
+
+    def test_batched_single_saves_are_written_once(self):
+        index = RetrievalIndex(self.project.id)
+        write_documents = retrieval_index.write_documents
+
+        with mock.patch.object(retrieval_index, 'write_documents', wraps=write_documents) as write, \
+                self.captureOnCommitCallbacks(execute=True), \
+                retrieval_index.batched_documents():
+            for number in range(3):
+                InstagramComment.objects.update_or_create(
+                    comment_id=f'C{number}',
+                    defaults={'folder': self.folder, 'post_id': 'IG1', 'comment': f'Marathon comment {number}'},
+                )
+            InstagramComment.objects.update_or_create(
+                comment_id='C0', defaults={'folder': self.folder, 'comment': 'Marathon comment edited'},
+            )
+            InstagramComment.objects.get(comment_id='C2').delete()
+
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(len(index), 2)
+        comment = InstagramComment.objects.get(comment_id='C0')
+        self.assertEqual(index.search('edited')[0].pk, comment.pk)
+
+    def test_folder_and_job_deletes_remove_their_rows(self):
+        index = RetrievalIndex(self.project.id)
+        other_folder = InstagramFolder.objects.create(name='Other', project=self.project)
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkPostIngestor('instagram', folder=other_folder).ingest([self._post('IG2', 'Marathon kept')])
+        self._ingest(self._post('IG1', 'Marathon shoes drop'))
+        with self.captureOnCommitCallbacks(execute=True):
+            InstagramComment.objects.create(
+                folder=self.folder, post_id='IG1', post_url='https://www.instagram.com/p/IG1/',
+                comment='Marathon ready', comment_user='runner',
+            )
+            ScrapyResult.objects.create(
+                job=self.job, source_url='https://www.instagram.com/nike/',
+                scraped_data=[{'caption': 'Marathon recap'}, {'caption': 'Marathon finish'}],
+            )
+        self.assertEqual(len(index), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.folder.delete()
+        self.assertEqual(len(index), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        kept = InstagramPost.objects.get(post_id='IG2')
+        self.assertEqual([(hit.kind, hit.pk) for hit in index.search('marathon')], [(INSTAGRAM, kept.pk)])
+        self.assertEqual(index.read_meta()['live_docs'], 1)
+
+    def test_chat_prompt_carries_the_relevant_evidence(self):
+        self._ingest(
+            self._post('IG1', 'Coffee morning with the team', likes=900),
+            self._post('IG2', 'Our marathon shoes sold out in an hour', likes=15),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ScrapyResult.objects.create(
+                job=self.job, source_url='https://www.instagram.com/nike/', scraped_data={'caption': 'Weekend vibes'},
+            )
+
+        completions = FakeCompletions()
+        service = AIAnalysisChatService()
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        result = service.analyze_with_ai('What do people think of the marathon shoes?', self.project.id)
+
+        self.assertTrue(result['success'])
+        # The coffee post only shares "the" with the question, so it ranks last
+        self.assertEqual(result['data_context']['relevant_documents'], 2)
+        prompt = completions.prompts[0]
+        self.assertIn('MOST RELEVANT POSTS AND COMMENTS', prompt)
+        self.assertIn('1. [INSTAGRAM POST] @nike: Our marathon shoes sold out', prompt)
+        self.assertIn('2. [INSTAGRAM POST] @nike: Coffee morning', prompt)
+        self.assertNotIn('Weekend vibes', prompt.split('MOST RELEVANT')[1])
+
+    def test_rebuild_command_indexes_existing_rows(self):
+        InstagramPost.objects.create(folder=self.folder, post_id='IG1', url='https://www.instagram.com/p/IG1/',
+                                     user_posted='nike', description='Marathon shoes')
+        RetrievalIndex(self.project.id).upsert([(document_key(INSTAGRAM, 999999), 'marathon ghost')])
+
+        out = StringIO()
+        call_command('rebuild_retrieval_index', project=[self.project.id], stdout=out)
+        self.assertIn('RETRIEVAL INDEX REBUILD SUMMARY', out.getvalue())
+        self.assertEqual(len(RetrievalIndex(self.project.id).search('marathon')), 1)
+
+        call_command('rebuild_retrieval_index', project=[self.project.id], if_empty=True, stdout=out)
+        self.assertIn('Rebuilt 0 projects', out.getvalue())
@@ -9,6 +9,7 @@ router.register(r'results', views.ScrapyResultViewSet)
 router.register(r'chat/threads', chat_views.ChatThreadViewSet, basename='chat-threads')
 
 urlpatterns = [
+    path('api/chat/threads/<uuid:thread_id>/stream_message/', chat_views.stream_message_view, name='chat_stream_message'),
     path('api/', include(router.urls)),
     path('api/ai-analysis/', views.ai_analysis_view, name='ai_analysis'),
     path('api/enhanced-sentiment-analysis/', views.enhanced_sentiment_analysis_view, name='enhanced_sentiment_analysis'),
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiktok_data', '0012_tiktokcomment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['folder', 'date_posted', 'id'], name='tiktok_data_folder__9813a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['folder', 'likes', 'id'], name='tiktok_data_folder__538f30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiktokpost',
+            index=models.Index(fields=['folder', 'num_comments', 'id'], name='tiktok_data_folder__58078e_idx'),
+        ),
+    ]
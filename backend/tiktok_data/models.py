@@ -1,8 +1,16 @@
 from django.db import models
+from reports.folder_counts import ContentCountQuerySet
 from users.models import Project
 
 # Create your models here.
 
+class FolderQuerySet(ContentCountQuerySet):
+    def content_counts(self):
+        return {
+            'post_count': TikTokPost.objects.all(),
+        }
+
+
 class Folder(models.Model):
     """
     Model for organizing TikTok posts into folders
@@ -34,6 +42,8 @@ class Folder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FolderQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
     
@@ -117,6 +127,10 @@ class TikTokPost(models.Model):
             models.Index(fields=['user_posted']),
             models.Index(fields=['post_id']),
             models.Index(fields=['date_posted']),
+            # Keyset pagination of a folder by each sortable field (reports.pagination)
+            models.Index(fields=['folder', 'date_posted', 'id']),
+            models.Index(fields=['folder', 'likes', 'id']),
+            models.Index(fields=['folder', 'num_comments', 'id']),
         ]
 
 
@@ -66,6 +66,9 @@ class FolderSerializer(serializers.ModelSerializer):
         return instance
     
     def get_post_count(self, obj):
+        # Annotated by Folder.objects.with_content_counts() in list views
+        if hasattr(obj, 'post_count'):
+            return obj.post_count
         return obj.posts.count()
     
     def get_platform(self, obj):
@@ -16,6 +16,7 @@ from django.conf import settings
 from dateutil import parser as date_parser
 
 from .models import TikTokPost, Folder
+from brightdata_integration.brightdata_client import TRIGGER_PATH, get_client
 from brightdata_integration.models import BrightdataConfig
 
 logger = logging.getLogger(__name__)
@@ -121,7 +122,7 @@ class TikTokScraper:
         Make a BrightData API request for TikTok scraping
         """
         try:
-            url = "https://api.brightdata.com/datasets/v3/trigger"
+            url = get_client().url(TRIGGER_PATH)
             headers = {
                 "Authorization": f"Bearer {config.api_token}",
                 "Content-Type": "application/json",
@@ -145,7 +146,7 @@ class TikTokScraper:
             
             self.logger.info(f"Submitting {len(payload)} TikTok URLs for scraping")
             
-            response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+            response = get_client().post(url, headers=headers, params=params, json=payload)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -0,0 +1,141 @@
+"""
+Whole-tree loading for UnifiedRunFolder hierarchies
+
+A run is stored as run -> platform -> service -> job (legacy: content) folders linked
+through parent_folder. Walking that level by level costs one query per level, and
+serializers reading obj.subfolders lazily cost one per node. load_folder_trees()
+fetches every node under a set of roots with one recursive CTE, links the children in
+memory and attaches the counts the folder views show:
+
+- {type}_children: subfolder counts per type, read by get_content_count() without a query
+- item_count: posts and comments stored in the platform folders linked to the node or
+  to any of its descendants, aggregated with one UNION query over the platform apps
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Count, QuerySet
+
+from .models import UnifiedRunFolder
+
+# Guards against parent_folder cycles in bad data; real runs are four levels deep
+MAX_TREE_DEPTH = 16
+
+# Models stored in platform folders that are linked to unified job folders
+CONTENT_MODELS = (
+    'facebook_data.FacebookPost', 'facebook_data.FacebookComment',
+    'instagram_data.InstagramPost', 'instagram_data.InstagramComment',
+    'linkedin_data.LinkedInPost', 'linkedin_data.LinkedInComment',
+    'tiktok_data.TikTokPost', 'tiktok_data.TikTokComment',
+)
+
+
+def _tree_sql(roots: QuerySet, columns: str):
+    """Recursive CTE selecting columns of the roots and all of their descendants"""
+    root_sql, root_params = roots.order_by().values('pk').query.sql_with_params()
+    table = connection.ops.quote_name(UnifiedRunFolder._meta.db_table)
+    sql = f"""
+        WITH RECURSIVE folder_tree (id, depth) AS (
+            SELECT id, 0 FROM {table} WHERE id IN ({root_sql})
+            UNION ALL
+            SELECT child.id, folder_tree.depth + 1
+            FROM {table} child
+            JOIN folder_tree ON child.parent_folder_id = folder_tree.id
+            WHERE folder_tree.depth < %s
+        )
+        SELECT {columns} FROM {table} JOIN folder_tree ON {table}.id = folder_tree.id
+    """
+    return sql, (*root_params, MAX_TREE_DEPTH)
+
+
+def tree_folder_ids(roots: QuerySet) -> List[int]:
+    """Ids of the roots and all of their descendants, in one query"""
+    sql, params = _tree_sql(roots, 'folder_tree.id')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return list(dict.fromkeys(row[0] for row in cursor.fetchall()))
+
+
+def item_counts(folder_ids: Iterable[int]) -> Dict[int, int]:
+    """Posts and comments per unified folder id, summed over every platform"""
+    folder_ids = list(folder_ids)
+    if not folder_ids:
+        return {}
+    counts = [
+        apps.get_model(label).objects.filter(folder__unified_job_folder_id__in=folder_ids)
+        .order_by()
+        .values('folder__unified_job_folder_id')
+        .annotate(total=Count('pk'))
+        .values_list('folder__unified_job_folder_id', 'total')
+        for label in CONTENT_MODELS
+    ]
+    totals = defaultdict(int)
+    for folder_id, total in counts[0].union(*counts[1:], all=True):
+        totals[folder_id] += total
+    return dict(totals)
+
+
+def load_folder_trees(roots: QuerySet, with_item_counts: bool = True) -> List[UnifiedRunFolder]:
+    """
+    Load the roots with their whole hierarchy; children are in node.tree_children,
+    ordered like the folder list views
+    """
+    table = connection.ops.quote_name(UnifiedRunFolder._meta.db_table)
+    sql, params = _tree_sql(roots, f'{table}.*, folder_tree.depth AS tree_depth')
+    by_id = {}
+    # A folder reached twice (nested roots, or a cycle) keeps its shallowest position
+    for node in sorted(UnifiedRunFolder.objects.raw(sql, params), key=lambda node: node.tree_depth):
+        by_id.setdefault(node.pk, node)
+    # Newest first, like UnifiedRunFolder.Meta.ordering
+    nodes = sorted(by_id.values(), key=lambda node: (node.created_at, node.pk), reverse=True)
+
+    for node in nodes:
+        node.tree_children = []
+        for folder_type in UnifiedRunFolder.CHILD_COUNT_TYPES:
+            setattr(node, f'{folder_type}_children', 0)
+
+    roots_found = []
+    for node in nodes:
+        parent = by_id.get(node.parent_folder_id)
+        if node.tree_depth == 0 or parent is None:
+            roots_found.append(node)
+            continue
+        parent.tree_children.append(node)
+        if node.folder_type in UnifiedRunFolder.CHILD_COUNT_TYPES:
+            count_name = f'{node.folder_type}_children'
+            setattr(parent, count_name, getattr(parent, count_name) + 1)
+
+    if with_item_counts:
+        counts = item_counts(by_id)
+
+        def total(node):
+            node.item_count = counts.get(node.pk, 0) + sum(total(child) for child in node.tree_children)
+            return node.item_count
+
+        for root in roots_found:
+            total(root)
+    return roots_found
+
+
+def iter_tree(nodes: Iterable[UnifiedRunFolder]):
+    """Depth-first walk over loaded trees"""
+    for node in nodes:
+        yield node
+        yield from iter_tree(node.tree_children)
+
+
+def prune_empty_content(nodes: List[UnifiedRunFolder]) -> List[UnifiedRunFolder]:
+    """
+    Drop legacy content folders without items, like the list endpoint's filter_empty;
+    job folders are kept even before their first items arrive
+    """
+    kept = []
+    for node in nodes:
+        if node.folder_type == 'content' and not node.item_count:
+            continue
+        node.tree_children = prune_empty_content(node.tree_children)
+        kept.append(node)
+    return kept
@@ -1,3 +1,4 @@
+from django.apps import apps
 from django.db import models
 import json
 from users.models import Project
@@ -130,6 +131,41 @@ class ReportEntry(models.Model):
         verbose_name = "Report Entry"
         verbose_name_plural = "Report Entries"
 
+class UnifiedRunFolderQuerySet(models.QuerySet):
+    def with_content_counts(self):
+        """
+        Annotate the number of subfolders of each type that get_content_count()
+        reads, counted in the folder query itself rather than once per folder
+        """
+        queryset = self.annotate(**{
+            f'{folder_type}_children': models.Count('subfolders', filter=models.Q(subfolders__folder_type=folder_type))
+            for folder_type in UnifiedRunFolder.CHILD_COUNT_TYPES
+        })
+        # Meta.ordering is not applied to GROUP BY queries
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*self.model._meta.ordering)
+        return queryset
+
+    def exclude_empty_content(self):
+        """
+        Drop legacy content folders without posts; other folder types are kept even
+        while empty. Each row is checked with correlated EXISTS subqueries on the
+        indexed unified_job_folder links, so the cost follows the folders listed
+        rather than the size of the post tables.
+        """
+        # Imported here: ingestion imports the platform apps' models
+        from brightdata_integration.ingestion import PLATFORM_POST_MODELS
+
+        has_posts = [
+            models.Exists(apps.get_model(label).objects.filter(folder__unified_job_folder=models.OuterRef('pk')))
+            for label in PLATFORM_POST_MODELS.values()
+        ]
+        condition = ~models.Q(folder_type='content')
+        for exists in has_posts:
+            condition |= exists
+        return self.filter(condition)
+
+
 class UnifiedRunFolder(models.Model):
     """
     Model for storing unified run folders (platform-agnostic)
@@ -176,27 +212,39 @@ class UnifiedRunFolder(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Subfolder types counted by get_content_count()
+    CHILD_COUNT_TYPES = ('platform', 'service', 'job', 'content')
+
+    objects = UnifiedRunFolderQuerySet.as_manager()
     
     def __str__(self):
         return self.name
     
+    def _child_count(self, folder_type):
+        # Annotated by UnifiedRunFolder.objects.with_content_counts() in list views
+        annotated = getattr(self, f'{folder_type}_children', None)
+        if annotated is not None:
+            return annotated
+        return self.subfolders.filter(folder_type=folder_type).count()
+
     def get_content_count(self):
         """Get the count of content items in this folder"""
         if self.folder_type == 'run':
             # Count all platform folders (new), fallback to service if platform layer not present
-            platform_children = self.subfolders.filter(folder_type='platform').count()
+            platform_children = self._child_count('platform')
             if platform_children:
                 return platform_children
-            return self.subfolders.filter(folder_type='service').count()
+            return self._child_count('service')
         elif self.folder_type == 'platform':
             # Count all service folders under this platform
-            return self.subfolders.filter(folder_type='service').count()
+            return self._child_count('service')
         elif self.folder_type == 'service':
             # Count all job folders (new), fallback to legacy content
-            job_children = self.subfolders.filter(folder_type='job').count()
+            job_children = self._child_count('job')
             if job_children:
                 return job_children
-            return self.subfolders.filter(folder_type='content').count()
+            return self._child_count('content')
         else:
             # Job/content folder - no subfolders
             return 0
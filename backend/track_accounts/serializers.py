@@ -132,4 +132,14 @@ class UnifiedRunFolderSerializer(serializers.ModelSerializer):
         return []
     
     def get_post_count(self, obj):
-        return obj.get_content_count() 
\ No newline at end of file
+        return obj.get_content_count() 
+
+class UnifiedRunFolderTreeSerializer(UnifiedRunFolderSerializer):
+    """Nested folder built by folder_tree.load_folder_trees(), read without queries"""
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta(UnifiedRunFolderSerializer.Meta):
+        fields = UnifiedRunFolderSerializer.Meta.fields + ['item_count']
+
+    def get_subfolders(self, obj):
+        return UnifiedRunFolderTreeSerializer(obj.tree_children, many=True).data
@@ -0,0 +1,123 @@
+"""
+Query-count regression tests for the folder list endpoints
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from facebook_data.models import FacebookComment, FacebookPost, Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder, InstagramComment, InstagramPost
+from linkedin_data.models import Folder as LinkedInFolder, LinkedInPost
+from tiktok_data.models import Folder as TikTokFolder, TikTokPost
+from track_accounts.models import UnifiedRunFolder
+from users.models import Project
+
+
+class FolderListQueryCountTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='folders', password='testpass')
+        cls.project = Project.objects.create(name='Folders', owner=user)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()
+
+    def assertConstantQueries(self, url, add_folders):
+        """The query count of url does not change when more folders are listed"""
+        add_folders(2)
+        queries, _ = self._queries(url)
+        add_folders(5)
+        more_queries, body = self._queries(url)
+        self.assertEqual(queries, more_queries)
+        return body['results'] if isinstance(body, dict) else body
+
+    def test_instagram_folders(self):
+        def add_folders(count):
+            for index in range(count):
+                folder = InstagramFolder.objects.create(name=f'IG {index}', project=self.project)
+                InstagramPost.objects.create(folder=folder, url=f'https://www.instagram.com/p/{folder.id}/', post_id=f'P{folder.id}')
+                InstagramPost.objects.create(folder=folder, url=f'https://www.instagram.com/reel/{folder.id}/', post_id=f'R{folder.id}', content_type='reel')
+                InstagramComment.objects.create(folder=folder, comment_id=f'C{folder.id}', post_url='https://www.instagram.com/p/1/')
+
+        folders = self.assertConstantQueries(f'/api/instagram-data/folders/?project={self.project.id}', add_folders)
+
+        self.assertEqual(len(folders), 7)
+        self.assertEqual({(f['post_count'], f['reel_count'], f['comment_count']) for f in folders}, {(1, 1, 1)})
+
+    def test_facebook_folders(self):
+        def add_folders(count):
+            for index in range(count):
+                folder = FacebookFolder.objects.create(name=f'FB {index}', project=self.project)
+                FacebookPost.objects.create(folder=folder, url=f'https://www.facebook.com/p/{folder.id}', post_id=f'P{folder.id}', content_type='post')
+                FacebookComment.objects.create(folder=folder, comment_id=f'C{folder.id}', url='https://www.facebook.com/p/1', post_id='P1', post_url='https://www.facebook.com/p/1')
+
+        folders = self.assertConstantQueries(f'/api/facebook-data/folders/?project={self.project.id}', add_folders)
+
+        self.assertEqual({(f['post_count'], f['reel_count'], f['comment_count']) for f in folders}, {(1, 0, 1)})
+
+    def test_linkedin_and_tiktok_folders(self):
+        for folder_model, post_model, prefix in (
+            (LinkedInFolder, LinkedInPost, 'linkedin'), (TikTokFolder, TikTokPost, 'tiktok'),
+        ):
+            def add_folders(count):
+                for index in range(count):
+                    folder = folder_model.objects.create(name=f'{prefix} {index}', project=self.project)
+                    post_model.objects.create(folder=folder, url=f'https://example.com/{prefix}/{folder.id}', post_id=str(folder.id))
+
+            folders = self.assertConstantQueries(f'/api/{prefix}-data/folders/?project={self.project.id}', add_folders)
+
+            self.assertEqual({folder['post_count'] for folder in folders}, {1})
+
+    def test_hierarchy_prefetch(self):
+        def add_folders(count):
+            for index in range(count):
+                parent = InstagramFolder.objects.create(name=f'Run {index}', project=self.project, folder_type='run')
+                child = InstagramFolder.objects.create(name=f'Content {index}', project=self.project, parent_folder=parent)
+                InstagramPost.objects.create(folder=child, url=f'https://www.instagram.com/p/{child.id}/', post_id=f'P{child.id}')
+
+        url = f'/api/instagram-data/folders/?project={self.project.id}&include_hierarchy=true'
+        folders = self.assertConstantQueries(url, add_folders)
+
+        runs = [folder for folder in folders if folder['subfolders']]
+        self.assertTrue(runs)
+        self.assertEqual(runs[0]['subfolders'][0]['post_count'], 1)
+
+    def test_unified_run_folders(self):
+        def add_folders(count):
+            for index in range(count):
+                run = UnifiedRunFolder.objects.create(name=f'Run {index}', folder_type='run', project=self.project)
+                for platform in ('instagram', 'facebook'):
+                    UnifiedRunFolder.objects.create(
+                        name=platform, folder_type='platform', platform_code=platform,
+                        parent_folder=run, project=self.project,
+                    )
+
+        url = f'/api/track-accounts/report-folders/?project={self.project.id}&folder_type=run&include_hierarchy=true'
+        folders = self.assertConstantQueries(url, add_folders)
+
+        self.assertEqual(len(folders), 7)
+        self.assertEqual({folder['post_count'] for folder in folders}, {2})
+        self.assertEqual({sub['post_count'] for sub in folders[0]['subfolders']}, {0})
+
+    def test_filter_empty_checks_each_folder(self):
+        job = UnifiedRunFolder.objects.create(name='Job', folder_type='job', project=self.project)
+        empty_job = UnifiedRunFolder.objects.create(name='Empty job', folder_type='job', project=self.project)
+        content = UnifiedRunFolder.objects.create(name='Content', folder_type='content', project=self.project)
+        UnifiedRunFolder.objects.create(name='Empty content', folder_type='content', project=self.project)
+        storage = TikTokFolder.objects.create(name='TikTok', project=self.project, unified_job_folder=content)
+        TikTokPost.objects.create(folder=storage, url='https://example.com/tiktok/1', post_id='1')
+        InstagramFolder.objects.create(name='IG', project=self.project, unified_job_folder=job)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/track-accounts/report-folders/?project={self.project.id}')
+
+        names = {folder['name'] for folder in response.json()['results']}
+        self.assertEqual(names, {job.name, empty_job.name, content.name})
+        response = self.client.get(f'/api/track-accounts/report-folders/?project={self.project.id}&filter_empty=false')
+        self.assertEqual(response.json()['count'], 4)
@@ -0,0 +1,99 @@
+"""
+Tests for loading whole UnifiedRunFolder hierarchies in a constant number of queries
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from instagram_data.models import Folder as InstagramFolder, InstagramComment, InstagramPost
+from tiktok_data.models import Folder as TikTokFolder, TikTokPost
+from track_accounts.folder_tree import load_folder_trees, tree_folder_ids
+from track_accounts.models import UnifiedRunFolder
+from users.models import Project
+from workflow.correct_folder_service import CorrectFolderService
+from workflow.models import ScrapingRun
+
+
+class FolderTreeTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='tree', password='testpass')
+        cls.project = Project.objects.create(name='Tree', owner=user)
+        cls.scraping_run = ScrapingRun.objects.create(project=cls.project, name='Run')
+        cls.run_folder = cls._add_run(cls.scraping_run)
+
+    @classmethod
+    def _add_run(cls, scraping_run=None):
+        """run -> instagram/tiktok -> posts service -> job, with one item per job (IG has a comment too)"""
+        def folder(name, folder_type, parent=None, **codes):
+            return UnifiedRunFolder.objects.create(
+                name=name, folder_type=folder_type, parent_folder=parent,
+                project=cls.project, scraping_run=scraping_run, **codes,
+            )
+
+        run_folder = folder('Run', 'run')
+        for platform, folder_model, post_model in (
+            ('instagram', InstagramFolder, InstagramPost), ('tiktok', TikTokFolder, TikTokPost),
+        ):
+            platform_folder = folder(platform, 'platform', run_folder, platform_code=platform)
+            service = folder('Posts', 'service', platform_folder, platform_code=platform, service_code='posts')
+            job = folder('Job', 'job', service, platform_code=platform, service_code='posts')
+            storage = folder_model.objects.create(name=f'{platform} {job.id}', project=cls.project, unified_job_folder=job)
+            post_model.objects.create(folder=storage, url=f'https://example.com/{platform}/{job.id}', post_id=str(job.id))
+            if platform == 'instagram':
+                InstagramComment.objects.create(folder=storage, comment_id=f'C{job.id}', post_url='https://example.com/p')
+        return run_folder
+
+    def test_loads_whole_tree_in_two_queries(self):
+        with self.assertNumQueries(2):
+            trees = load_folder_trees(UnifiedRunFolder.objects.filter(pk=self.run_folder.pk))
+
+        run_folder = trees[0]
+        self.assertEqual(run_folder.item_count, 3)
+        self.assertEqual(run_folder.get_content_count(), 2)
+        platforms = {folder.platform_code: folder for folder in run_folder.tree_children}
+        instagram_job = platforms['instagram'].tree_children[0].tree_children[0]
+        self.assertEqual((instagram_job.folder_type, instagram_job.item_count), ('job', 2))
+        self.assertEqual(platforms['tiktok'].item_count, 1)
+
+    def test_project_tree_endpoint(self):
+        self._add_run()
+        UnifiedRunFolder.objects.create(
+            name='Empty legacy', folder_type='content', project=self.project,
+            parent_folder=self.run_folder.subfolders.get(platform_code='tiktok').subfolders.get(),
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/track-accounts/report-folders/tree/?project={self.project.id}')
+
+        runs = response.json()
+        self.assertEqual(len(runs), 2)
+        self.assertEqual({run['item_count'] for run in runs}, {3})
+        tiktok = next(folder for folder in runs[-1]['subfolders'] if folder['platform_code'] == 'tiktok')
+        service = tiktok['subfolders'][0]
+        # The empty legacy content folder is dropped unless filter_empty=false
+        self.assertEqual([folder['folder_type'] for folder in service['subfolders']], ['job'])
+        self.assertEqual(service['post_count'], 1)
+
+        response = self.client.get(f'/api/track-accounts/report-folders/tree/?project={self.project.id}&filter_empty=false')
+        tiktok = next(folder for folder in response.json()[-1]['subfolders'] if folder['platform_code'] == 'tiktok')
+        self.assertEqual(len(tiktok['subfolders'][0]['subfolders']), 2)
+
+    def test_folder_tree_endpoint_and_ids(self):
+        platform_folder = self.run_folder.subfolders.get(platform_code='instagram')
+
+        response = self.client.get(f'/api/track-accounts/report-folders/{platform_folder.id}/tree/')
+
+        body = response.json()
+        self.assertEqual(len(body), 1)
+        self.assertEqual((body[0]['id'], body[0]['item_count']), (platform_folder.id, 2))
+        self.assertEqual(len(tree_folder_ids(UnifiedRunFolder.objects.filter(pk=self.run_folder.pk))), 7)
+
+    def test_correct_folder_hierarchy(self):
+        hierarchy = CorrectFolderService().get_correct_folder_hierarchy(self.scraping_run)
+
+        self.assertEqual(hierarchy['run_folder']['id'], self.run_folder.id)
+        self.assertEqual([folder['name'] for folder in hierarchy['platform_folders']], ['instagram', 'tiktok'])
+        self.assertEqual(len(hierarchy['service_folders']), 2)
+        self.assertEqual(len(hierarchy['job_folders']), 2)
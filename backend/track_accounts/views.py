@@ -9,13 +9,17 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.pagination import PageNumberPagination
 from django.http import HttpResponse
-from django.db.models import Q
+from django.utils.module_loading import import_string
+from django.db.models import Prefetch, Q
 from .models import TrackSource, ReportFolder, ReportEntry, UnifiedRunFolder
 from .serializers import (
     TrackSourceSerializer,
     ReportFolderSerializer, ReportEntrySerializer, ReportFolderDetailSerializer,
-    UnifiedRunFolderSerializer
+    UnifiedRunFolderSerializer, UnifiedRunFolderTreeSerializer
 )
+from .folder_tree import load_folder_trees, prune_empty_content
+from reports.columnar import PARQUET, ColumnarExportError, folder_tree_response
+from reports.pagination import FieldSelectionError, sparse_list_response
 
 class CustomPageNumberPagination(PageNumberPagination):
     """
@@ -555,49 +559,60 @@ class UnifiedRunFolderViewSet(viewsets.ModelViewSet):
         # Only apply this filter for content type folders, NOT job folders
         filter_empty = self.request.query_params.get('filter_empty', 'true').lower() == 'true'
         if filter_empty:
-            from django.db.models import Q, Count
-            from instagram_data.models import InstagramPost
-            from facebook_data.models import FacebookPost
-            from linkedin_data.models import LinkedInPost
-            from tiktok_data.models import TikTokPost
-            
-            # Get folders that have posts in any platform
-            folders_with_posts = set()
-            
-            # Check Instagram posts
-            insta_folders = InstagramPost.objects.values_list('folder__unified_job_folder_id', flat=True).distinct()
-            folders_with_posts.update(insta_folders)
-            
-            # Check Facebook posts
-            fb_folders = FacebookPost.objects.values_list('folder__unified_job_folder_id', flat=True).distinct()
-            folders_with_posts.update(fb_folders)
-            
-            # Check LinkedIn posts
-            linkedin_folders = LinkedInPost.objects.values_list('folder__unified_job_folder_id', flat=True).distinct()
-            folders_with_posts.update(linkedin_folders)
-            
-            # Check TikTok posts
-            tiktok_folders = TikTokPost.objects.values_list('folder__unified_job_folder_id', flat=True).distinct()
-            folders_with_posts.update(tiktok_folders)
-            
-            # Filter to only include folders with posts, or non-content folders (run, platform, service, job)
-            # Note: Job folders are NOT filtered out even if they don't have posts yet
-            queryset = queryset.filter(
-                Q(id__in=folders_with_posts) | 
-                ~Q(folder_type='content')
-            )
+            queryset = queryset.exclude_empty_content()
         
         # Check if hierarchical data is requested
         include_hierarchy = self.request.query_params.get('include_hierarchy', 'false').lower() == 'true'
         if include_hierarchy:
-            queryset = queryset.prefetch_related('subfolders')
+            queryset = queryset.prefetch_related(
+                Prefetch('subfolders', queryset=UnifiedRunFolder.objects.with_content_counts())
+            )
         
-        return queryset
+        return queryset.with_content_counts()
     
+    def _tree_response(self, roots):
+        trees = load_folder_trees(roots)
+        if self.request.query_params.get('filter_empty', 'true').lower() == 'true':
+            trees = prune_empty_content(trees)
+        return Response(UnifiedRunFolderTreeSerializer(trees, many=True).data)
+
+    @action(detail=False, methods=['GET'], url_path='tree')
+    def project_tree(self, request):
+        """
+        Every run folder of a project with its whole platform -> service -> job
+        hierarchy nested under subfolders, in one payload
+        """
+        project_id = request.query_params.get('project')
+        if not project_id:
+            return Response({'error': 'project parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            roots = UnifiedRunFolder.objects.filter(project_id=int(project_id), folder_type='run')
+        except (ValueError, TypeError):
+            return Response({'error': 'Invalid project ID'}, status=status.HTTP_400_BAD_REQUEST)
+        return self._tree_response(roots)
+
+    @action(detail=True, methods=['GET'])
+    def tree(self, request, pk=None):
+        """
+        This folder with its whole hierarchy nested under subfolders
+        """
+        folder = self.get_object()
+        return self._tree_response(UnifiedRunFolder.objects.filter(pk=folder.pk))
+
+    # Post serializer for the platform folder linked to a job folder
+    PLATFORM_POST_SERIALIZERS = {
+        'instagram': 'instagram_data.serializers.InstagramPostSerializer',
+        'facebook': 'facebook_data.serializers.FacebookPostSerializer',
+        'linkedin': 'linkedin_data.serializers.LinkedInPostSerializer',
+        'tiktok': 'tiktok_data.serializers.TikTokPostSerializer',
+    }
+
     @action(detail=True, methods=['GET'])
     def platform_data(self, request, pk=None):
         """
-        Get platform-specific data (posts) for a job folder
+        Get platform-specific data (posts) for a job folder, paginated (?page=,
+        or ?pagination=cursor) or streamed with ?page_size=all, optionally
+        restricted to ?fields=
         """
         try:
             job_folder = self.get_object()
@@ -618,78 +633,10 @@ class UnifiedRunFolderViewSet(viewsets.ModelViewSet):
             
             # Find the platform-specific folder linked to this job folder
             platform_folder = None
-            
-            if platform_code == 'instagram':
-                from instagram_data.models import Folder as InstagramFolder
-                platform_folder = InstagramFolder.objects.filter(
-                    unified_job_folder=job_folder
-                ).first()
-                
-                if platform_folder:
-                    # Get posts from this folder
-                    posts = platform_folder.posts.all()
-                    from instagram_data.serializers import InstagramPostSerializer
-                    serializer = InstagramPostSerializer(posts, many=True)
-                    return Response({
-                        'platform': 'instagram',
-                        'folder_id': platform_folder.id,
-                        'posts': serializer.data,
-                        'total_posts': posts.count()
-                    })
-            
-            elif platform_code == 'facebook':
-                from facebook_data.models import Folder as FacebookFolder
-                platform_folder = FacebookFolder.objects.filter(
-                    unified_job_folder=job_folder
-                ).first()
-                
-                if platform_folder:
-                    # Get posts from this folder
-                    posts = platform_folder.posts.all()
-                    from facebook_data.serializers import FacebookPostSerializer
-                    serializer = FacebookPostSerializer(posts, many=True)
-                    return Response({
-                        'platform': 'facebook',
-                        'folder_id': platform_folder.id,
-                        'posts': serializer.data,
-                        'total_posts': posts.count()
-                    })
-            
-            elif platform_code == 'linkedin':
-                from linkedin_data.models import Folder as LinkedInFolder
-                platform_folder = LinkedInFolder.objects.filter(
-                    unified_job_folder=job_folder
-                ).first()
-                
-                if platform_folder:
-                    # Get posts from this folder
-                    posts = platform_folder.posts.all()
-                    from linkedin_data.serializers import LinkedInPostSerializer
-                    serializer = LinkedInPostSerializer(posts, many=True)
-                    return Response({
-                        'platform': 'linkedin',
-                        'folder_id': platform_folder.id,
-                        'posts': serializer.data,
-                        'total_posts': posts.count()
-                    })
-            
-            elif platform_code == 'tiktok':
-                from tiktok_data.models import Folder as TikTokFolder
-                platform_folder = TikTokFolder.objects.filter(
-                    unified_job_folder=job_folder
-                ).first()
-                
-                if platform_folder:
-                    # Get posts from this folder
-                    posts = platform_folder.posts.all()
-                    from tiktok_data.serializers import TikTokPostSerializer
-                    serializer = TikTokPostSerializer(posts, many=True)
-                    return Response({
-                        'platform': 'tiktok',
-                        'folder_id': platform_folder.id,
-                        'posts': serializer.data,
-                        'total_posts': posts.count()
-                    })
+            serializer_path = self.PLATFORM_POST_SERIALIZERS.get(platform_code)
+            if serializer_path:
+                FolderModel = UnifiedRunFolder._meta.apps.get_model(f'{platform_code}_data', 'Folder')
+                platform_folder = FolderModel.objects.filter(unified_job_folder=job_folder).first()
             
             if not platform_folder:
                 return Response({
@@ -699,7 +646,32 @@ class UnifiedRunFolderViewSet(viewsets.ModelViewSet):
                     'total_posts': 0,
                     'message': f'No platform-specific folder found for {platform_code}'
                 })
+            
+            return sparse_list_response(
+                request, platform_folder.posts.all(), import_string(serializer_path),
+                extra={'platform': platform_code, 'folder_id': platform_folder.id},
+                results_key='posts', count_key='total_posts',
+            )
                 
+        except FieldSelectionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=True, methods=['GET'])
+    def download_columnar(self, request, pk=None):
+        """
+        Download every post under this folder (run, platform, service or job) as a zip
+        with one Parquet (default) or Arrow IPC (?file_format=arrow) file per platform
+        """
+        try:
+            folder = self.get_object()
+            return folder_tree_response(folder, request.query_params.get('file_format', PARQUET))
+        except ColumnarExportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
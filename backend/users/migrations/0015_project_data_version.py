@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_add_display_name_to_organization_membership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, help_text="Changes whenever the project's scraped data changes"),
+        ),
+    ]
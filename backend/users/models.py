@@ -162,12 +162,30 @@ class Project(models.Model):
     # M2M relationship for specific users who have access (in addition to admins and owner)
     authorized_users = models.ManyToManyField(User, related_name='accessible_projects', blank=True)
     
+    # Bumped by every write path for the project's scraped posts; keys cached analysis snapshots
+    data_version = models.PositiveIntegerField(default=0, help_text="Changes whenever the project's scraped data changes")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
     
+    @classmethod
+    def bump_data_version(cls, project_ids) -> int:
+        """
+        Mark the scraped data of these projects (ids, or a values() queryset of
+        them) as changed, in one UPDATE; None ids are ignored
+        """
+        if isinstance(project_ids, models.QuerySet):
+            projects = cls.objects.filter(pk__in=project_ids)
+        else:
+            project_ids = {project_id for project_id in project_ids if project_id is not None}
+            if not project_ids:
+                return 0
+            projects = cls.objects.filter(pk__in=project_ids)
+        return projects.update(data_version=models.F('data_version') + 1)
+    
     class Meta:
         ordering = ['-created_at']
 
@@ -202,54 +202,44 @@ class ProjectStatsView(APIView):
         try:
             # Check if user has access to the project
             project = Project.objects.get(id=project_id)
-            if not project.authorized_users.filter(id=request.user.id).exists() and project.owner != request.user:
+            if not project.authorized_users.filter(id=request.user.id).exists() and project.owner_id != request.user.id:
                 raise PermissionDenied("You don't have access to this project")
 
             # Import models for statistics calculation
-            from facebook_data.models import FacebookPost, Folder as FacebookFolder
-            from instagram_data.models import InstagramPost, Folder as InstagramFolder
-            from linkedin_data.models import LinkedInPost, Folder as LinkedInFolder
-            from tiktok_data.models import TikTokPost, Folder as TikTokFolder
+            from facebook_data.models import Folder as FacebookFolder
+            from instagram_data.models import Folder as InstagramFolder
+            from linkedin_data.models import Folder as LinkedInFolder
+            from tiktok_data.models import Folder as TikTokFolder
             from track_accounts.models import TrackSource
             from reports.models import GeneratedReport
-            from django.db.models import Count, Q
+            from reports.post_stats import project_summary
+            from django.db.models import CharField, Q, Value
+
+            # Post counts, engagement and growth come from the post stats rollup
+            summary = project_summary(project)
+            total_posts = summary['totals']['post_count']
+
+            # Folders of every platform in one query
+            folder_querysets = [
+                folder_model.objects.filter(project=project).annotate(
+                    platform=Value(platform, output_field=CharField())
+                ).values_list('platform', 'id').order_by()
+                for platform, folder_model in (
+                    ('facebook', FacebookFolder), ('instagram', InstagramFolder),
+                    ('linkedin', LinkedInFolder), ('tiktok', TikTokFolder),
+                )
+            ]
+            folder_counts = {'facebook': 0, 'instagram': 0, 'linkedin': 0, 'tiktok': 0}
+            for platform, _ in folder_querysets[0].union(*folder_querysets[1:], all=True):
+                folder_counts[platform] += 1
 
-            # Calculate total posts across all platforms
-            total_posts = 0
-            total_accounts = 0
-            
-            # Facebook posts
-            facebook_folders = FacebookFolder.objects.filter(project=project)
-            facebook_posts = FacebookPost.objects.filter(folder__in=facebook_folders)
-            total_posts += facebook_posts.count()
-            
-            # Instagram posts
-            instagram_folders = InstagramFolder.objects.filter(project=project)
-            instagram_posts = InstagramPost.objects.filter(folder__in=instagram_folders)
-            total_posts += instagram_posts.count()
-            
-            # LinkedIn posts
-            linkedin_folders = LinkedInFolder.objects.filter(project=project)
-            linkedin_posts = LinkedInPost.objects.filter(folder__in=linkedin_folders)
-            total_posts += linkedin_posts.count()
-            
-            # TikTok posts
-            tiktok_folders = TikTokFolder.objects.filter(project=project)
-            tiktok_posts = TikTokPost.objects.filter(folder__in=tiktok_folders)
-            total_posts += tiktok_posts.count()
-            
             # Track sources (accounts)
             total_accounts = TrackSource.objects.filter(project=project).count()
             
-            # Generated reports
-            total_reports = GeneratedReport.objects.filter(project=project).count()
-            
-            # Calculate engagement rate (simplified - could be enhanced with actual engagement data)
-            # For now, we'll use a placeholder calculation
-            engagement_rate = 3.2  # Placeholder - could be calculated from actual engagement data
-            
-            # Calculate growth rate (simplified - could be enhanced with historical data)
-            growth_rate = 5.8  # Placeholder - could be calculated from historical data
+            # Generated reports are not linked to projects, so count the ones made by project members
+            total_reports = GeneratedReport.objects.filter(
+                Q(user_id=project.owner_id) | Q(user__in=project.authorized_users.all())
+            ).count()
             
             # Calculate storage used (simplified - could be enhanced with actual file sizes)
             # For now, we'll estimate based on number of posts
@@ -263,6 +253,18 @@ class ProjectStatsView(APIView):
             credit_balance = 2400
             max_credits = 5000
 
+            platforms = {}
+            for platform, folders in folder_counts.items():
+                totals = summary['platforms'].get(platform, {})
+                platforms[platform] = {
+                    'posts': totals.get('post_count', 0),
+                    'folders': folders,
+                    'likes': totals.get('likes', 0),
+                    'comments': totals.get('comments', 0),
+                    'shares': totals.get('shares', 0),
+                    'views': totals.get('views', 0),
+                }
+
             stats = {
                 'totalPosts': total_posts,
                 'totalAccounts': total_accounts,
@@ -270,26 +272,10 @@ class ProjectStatsView(APIView):
                 'totalStorageUsed': total_storage_used,
                 'creditBalance': credit_balance,
                 'maxCredits': max_credits,
-                'engagementRate': engagement_rate,
-                'growthRate': growth_rate,
-                'platforms': {
-                    'facebook': {
-                        'posts': facebook_posts.count(),
-                        'folders': facebook_folders.count()
-                    },
-                    'instagram': {
-                        'posts': instagram_posts.count(),
-                        'folders': instagram_folders.count()
-                    },
-                    'linkedin': {
-                        'posts': linkedin_posts.count(),
-                        'folders': linkedin_folders.count()
-                    },
-                    'tiktok': {
-                        'posts': tiktok_posts.count(),
-                        'folders': tiktok_folders.count()
-                    }
-                }
+                'engagementRate': summary['engagement_rate'],
+                'growthRate': summary['growth_rate'],
+                'platforms': platforms,
+                'activity': summary['activity'],
             }
 
             return Response(stats)
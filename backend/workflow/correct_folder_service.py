@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional
 from django.db import transaction
 from django.utils import timezone
+from .folder_materializer import FolderMaterializer
 from .models import ScrapingRun
 from track_accounts.models import TrackSource
 from users.models import Project
@@ -45,6 +46,10 @@ class CorrectFolderService:
           - LinkedIn Profile - user2 (Job Folder)
           - LinkedIn Profile - user3 (Job Folder)
         
+        The whole tree is planned first and written with a fixed number of
+        queries per level by FolderMaterializer, which also pre-creates each job
+        folder's storage folder in its platform app.
+        
         Args:
             scraping_run: ScrapingRun instance
             track_sources: List of TrackSource items for this run
@@ -53,60 +58,28 @@ class CorrectFolderService:
             Dict containing created folders
         """
         try:
-            with transaction.atomic():
-                # Create the parent run folder
-                run_folder = self._create_run_folder(scraping_run)
-
-                created_folders = {
-                    'run_folder': run_folder,
-                    'platform_folders': {},
-                    'service_folders': {},
-                    'job_folders': {}
-                }
-
-                # Group track sources by platform and service
-                by_platform: Dict[str, Dict[str, List[TrackSource]]] = {}
-                for track_source in track_sources:
-                    if not track_source.platform or not track_source.service_name:
-                        # Skip sources lacking identity
-                        logger.warning(f"TrackSource {track_source.id} missing platform/service; skipping")
-                        continue
-                    platform = track_source.platform.lower()
-                    service = track_source.service_name.lower()
-                    by_platform.setdefault(platform, {})
-                    by_platform[platform].setdefault(service, [])
-                    by_platform[platform][service].append(track_source)
-
-                # For each platform, create platform folder, then service folders, then job folders
-                for platform, services_map in by_platform.items():
-                    platform_folder = self._create_platform_folder(run_folder, platform, scraping_run)
-                    created_folders['platform_folders'][platform] = platform_folder
+            materializer = FolderMaterializer(self)
+            plan = materializer.plan(scraping_run, track_sources)
+            for track_source in plan.skipped:
+                # Skip sources lacking identity
+                logger.warning(f"TrackSource {track_source.id} missing platform/service; skipping")
 
-                    for service, sources in services_map.items():
-                        service_folder = self._create_service_folder(platform_folder, platform, service, scraping_run)
-                        created_folders['service_folders'][f"{platform}_{service}"] = service_folder
+            created_folders = materializer.materialize(plan)
 
-                        # Maintain ServiceFolderIndex for O(1) lookups
-                        self._upsert_service_folder_index(scraping_run, platform, service, service_folder)
-
-                        for track_source in sources:
-                            job_folder = self._create_job_folder(service_folder, track_source, scraping_run)
-                            created_folders['job_folders'][track_source.id] = job_folder
-                
-                total_services = sum(len(services_map) for services_map in by_platform.values())
-                logger.info(
-                    f"Created correct folder structure for scraping run {scraping_run.id}: "
-                    f"{len(by_platform)} platform folders, {total_services} service folders, {len(track_sources)} job folders"
-                )
-                return created_folders
+            logger.info(
+                f"Created correct folder structure for scraping run {scraping_run.id}: "
+                f"{len(plan.services)} platform folders, {plan.service_count} service folders, "
+                f"{plan.source_count} job folders"
+            )
+            return created_folders.as_dict()
                 
         except Exception as e:
             logger.error(f"Error creating correct folder structure: {str(e)}")
             raise
     
-    def _create_run_folder(self, scraping_run: ScrapingRun):
+    def _build_run_folder(self, scraping_run: ScrapingRun):
         """
-        Create the top-level Scraping Run folder
+        Build (unsaved) the top-level Scraping Run folder
         
         Args:
             scraping_run: ScrapingRun instance
@@ -120,7 +93,7 @@ class CorrectFolderService:
         # Create a single run folder in the track_accounts app (platform-agnostic)
         from track_accounts.models import UnifiedRunFolder
         
-        run_folder = UnifiedRunFolder.objects.create(
+        return UnifiedRunFolder(
             name=name,
             description=description,
             folder_type='run',
@@ -128,13 +101,10 @@ class CorrectFolderService:
             project=scraping_run.project,
             category='posts'
         )
-        
-        logger.info(f"Created unified run folder: {name}")
-        return run_folder
     
-    def _create_service_folder(self, parent_folder, platform: str, service: str, scraping_run: ScrapingRun):
+    def _build_service_folder(self, parent_folder, platform: str, service: str, scraping_run: ScrapingRun):
         """
-        Create a service folder (child of platform folder)
+        Build (unsaved) a service folder (child of platform folder)
         
         Args:
             parent_folder: Parent platform folder
@@ -153,7 +123,7 @@ class CorrectFolderService:
         # Map service to category
         category = self._map_service_to_category(service)
         
-        service_folder = UnifiedRunFolder.objects.create(
+        return UnifiedRunFolder(
             name=service_name,
             description=f"Service folder for {platform} {service}",
             category=category,
@@ -164,13 +134,10 @@ class CorrectFolderService:
             platform_code=platform.lower(),
             service_code=service.lower(),
         )
-        
-        logger.info(f"Created service folder: {service_name}")
-        return service_folder
 
-    def _create_platform_folder(self, run_folder, platform: str, scraping_run: ScrapingRun):
+    def _build_platform_folder(self, run_folder, platform: str, scraping_run: ScrapingRun):
         """
-        Create a platform folder (child of run folder)
+        Build (unsaved) a platform folder (child of run folder)
 
         Args:
             run_folder: Parent run folder
@@ -183,7 +150,7 @@ class CorrectFolderService:
         from track_accounts.models import UnifiedRunFolder
 
         platform_name = platform.title()
-        platform_folder = UnifiedRunFolder.objects.create(
+        return UnifiedRunFolder(
             name=platform_name,
             description=f"Platform folder for {platform}",
             category='posts',
@@ -193,12 +160,10 @@ class CorrectFolderService:
             scraping_run=scraping_run,
             platform_code=platform.lower(),
         )
-        logger.info(f"Created platform folder: {platform_name}")
-        return platform_folder
     
-    def _create_job_folder(self, service_folder, track_source: TrackSource, scraping_run: ScrapingRun):
+    def _build_job_folder(self, service_folder, track_source: TrackSource, scraping_run: ScrapingRun):
         """
-        Create a job folder for a single TrackSource (child of service folder)
+        Build (unsaved) a job folder for a single TrackSource (child of service folder)
         
         Args:
             service_folder: Parent service folder
@@ -214,6 +179,22 @@ class CorrectFolderService:
         job_name = self._generate_job_folder_name(track_source)
         
         # Get the appropriate URL for description
+        url = self._source_url(track_source)
+        
+        return UnifiedRunFolder(
+            name=job_name,
+            description=f"Job output for {url or 'unknown source'}",
+            folder_type='job',
+            parent_folder=service_folder,  # Parent is the service folder
+            scraping_run=scraping_run,
+            project=scraping_run.project,
+            category=self._map_service_to_category(track_source.service_name),
+            platform_code=(track_source.platform or '').lower() or None,
+            service_code=(track_source.service_name or '').lower() or None,
+        )
+
+    def _source_url(self, track_source: TrackSource) -> Optional[str]:
+        """The TrackSource URL for its platform (other_social_media as a fallback)"""
         platform = track_source.platform.lower()
         url = None
         
@@ -227,33 +208,7 @@ class CorrectFolderService:
             url = track_source.tiktok_link
         elif track_source.other_social_media:
             url = track_source.other_social_media
-        
-        job_folder = UnifiedRunFolder.objects.create(
-            name=job_name,
-            description=f"Job output for {url or 'unknown source'}",
-            folder_type='job',
-            parent_folder=service_folder,  # Parent is the service folder
-            scraping_run=scraping_run,
-            project=scraping_run.project,
-            category=self._map_service_to_category(track_source.service_name),
-            platform_code=(track_source.platform or '').lower() or None,
-            service_code=(track_source.service_name or '').lower() or None,
-        )
-        
-        logger.info(f"Created job folder: {job_name}")
-        return job_folder
-
-    def _upsert_service_folder_index(self, scraping_run: ScrapingRun, platform: str, service: str, folder) -> None:
-        """Create or update the ServiceFolderIndex entry for this (run, platform, service)."""
-        from track_accounts.models import ServiceFolderIndex
-        ServiceFolderIndex.objects.update_or_create(
-            scraping_run=scraping_run,
-            platform_code=platform.lower(),
-            service_code=service.lower(),
-            defaults={
-                'folder': folder,
-            }
-        )
+        return url
     
     def _generate_job_folder_name(self, track_source: TrackSource) -> str:
         """
@@ -267,18 +222,7 @@ class CorrectFolderService:
         """
         # Get the appropriate URL based on platform
         platform = track_source.platform.lower()
-        url = None
-        
-        if platform == 'facebook' and track_source.facebook_link:
-            url = track_source.facebook_link
-        elif platform == 'instagram' and track_source.instagram_link:
-            url = track_source.instagram_link
-        elif platform == 'linkedin' and track_source.linkedin_link:
-            url = track_source.linkedin_link
-        elif platform == 'tiktok' and track_source.tiktok_link:
-            url = track_source.tiktok_link
-        elif track_source.other_social_media:
-            url = track_source.other_social_media
+        url = self._source_url(track_source)
         
         if not url:
             return f"{track_source.platform.title()} Profile - Unknown Source"
@@ -382,39 +326,26 @@ class CorrectFolderService:
             Dict containing the folder hierarchy
         """
         try:
+            from track_accounts.folder_tree import iter_tree, load_folder_trees
             from track_accounts.models import UnifiedRunFolder
             
-            # Get the run folder
-            run_folder = UnifiedRunFolder.objects.filter(
-                scraping_run=scraping_run,
-                folder_type='run'
-            ).first()
-            
-            if not run_folder:
+            # Load the run's whole hierarchy in one query; the newest run folder wins
+            trees = load_folder_trees(
+                UnifiedRunFolder.objects.filter(scraping_run=scraping_run, folder_type='run'),
+                with_item_counts=False,
+            )
+            if not trees:
                 return {'error': 'Run folder not found'}
+            run_folder = trees[0]
             
-            # Get all platform folders for this run
-            platform_folders = UnifiedRunFolder.objects.filter(
-                scraping_run=scraping_run,
-                folder_type='platform'
-            ).order_by('created_at')
-
-            # Get all service folders for this run
-            service_folders = UnifiedRunFolder.objects.filter(
-                scraping_run=scraping_run,
-                folder_type='service'
-            ).order_by('created_at')
-
-            # Get all job folders for this run (new type), fallback legacy content
-            job_folders = UnifiedRunFolder.objects.filter(
-                scraping_run=scraping_run,
-                folder_type='job'
-            ).order_by('created_at')
-            if not job_folders.exists():
-                job_folders = UnifiedRunFolder.objects.filter(
-                    scraping_run=scraping_run,
-                    folder_type='content'
-                ).order_by('created_at')
+            folders_by_type = {}
+            for folder in sorted(iter_tree(trees), key=lambda folder: (folder.created_at, folder.pk)):
+                if folder.scraping_run_id == scraping_run.pk:
+                    folders_by_type.setdefault(folder.folder_type, []).append(folder)
+            platform_folders = folders_by_type.get('platform', [])
+            service_folders = folders_by_type.get('service', [])
+            # Job folders (new type), fallback legacy content
+            job_folders = folders_by_type.get('job') or folders_by_type.get('content', [])
 
             return {
                 'run_folder': self._serialize_folder(run_folder),
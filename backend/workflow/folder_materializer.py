@@ -0,0 +1,227 @@
+"""
+Bulk materializer for a scraping run's folder tree
+
+A run's UnifiedRunFolder tree (run → platform → service → one job folder per
+TrackSource) used to be created one create() at a time, with a separate
+ServiceFolderIndex upsert per service, so starting a run cost a few queries per
+source. The materializer plans the whole tree in memory first and then writes it
+level by level:
+
+- the run folder, then one bulk INSERT each for the platform, service and job
+  levels (parents first, so every child can point at its parent's id)
+- the ServiceFolderIndex rows in one upsert (INSERT ... ON CONFLICT DO UPDATE)
+- one storage Folder per job folder in its platform app, linked through
+  Folder.unified_job_folder, with one bulk INSERT per platform, so webhooks find
+  the pre-created folder instead of creating it
+
+The query count is fixed per level (one statement per FOLDER_BULK_CREATE_SIZE
+rows) however many sources the run has. bulk_create only sets primary keys on
+backends that return rows from bulk inserts (PostgreSQL, SQLite 3.35+, MariaDB
+10.5+); elsewhere levels whose ids are needed fall back to one save() per folder.
+
+Names, descriptions and categories come from CorrectFolderService, which builds
+the (unsaved) folders.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import connections, router, transaction
+
+from track_accounts.models import ServiceFolderIndex, TrackSource, UnifiedRunFolder
+
+from .models import ScrapingRun
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement
+FOLDER_BULK_CREATE_SIZE = 500
+
+# Length of the platform apps' Folder.name
+STORAGE_FOLDER_NAME_LENGTH = 100
+
+
+def insert_rows(model, objs: Iterable, batch_size: int = FOLDER_BULK_CREATE_SIZE, need_ids: bool = True) -> List:
+    """
+    INSERT objs in bulk and return them with their primary keys set; where the
+    database can't return ids from a bulk insert and they are needed, each
+    object is saved on its own instead
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    connection = connections[router.db_for_write(model)]
+    if need_ids and not connection.features.can_return_rows_from_bulk_insert:
+        for obj in objs:
+            obj.save(force_insert=True)
+        return objs
+    return model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+@dataclass
+class FolderPlan:
+    """The folders a run needs: its sources grouped by platform, then service"""
+    scraping_run: ScrapingRun
+    services: Dict[str, Dict[str, List[TrackSource]]] = field(default_factory=dict)
+    # Sources without a platform or service, which get no folder
+    skipped: List[TrackSource] = field(default_factory=list)
+
+    @property
+    def source_count(self) -> int:
+        return sum(len(sources) for by_service in self.services.values() for sources in by_service.values())
+
+    @property
+    def service_count(self) -> int:
+        return sum(len(by_service) for by_service in self.services.values())
+
+
+@dataclass
+class MaterializedFolders:
+    """The folders written for a FolderPlan"""
+    run_folder: UnifiedRunFolder
+    platform_folders: Dict[str, UnifiedRunFolder] = field(default_factory=dict)
+    # Keyed "<platform>_<service>"
+    service_folders: Dict[str, UnifiedRunFolder] = field(default_factory=dict)
+    # Keyed by TrackSource id
+    job_folders: Dict[int, UnifiedRunFolder] = field(default_factory=dict)
+    # Platform app Folders, keyed by (platform, job folder id)
+    storage_folders: Dict[Tuple[str, int], Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The created_folders dict CorrectFolderService returns"""
+        return {
+            'run_folder': self.run_folder,
+            'platform_folders': self.platform_folders,
+            'service_folders': self.service_folders,
+            'job_folders': self.job_folders,
+            'storage_folders': self.storage_folders,
+        }
+
+
+class FolderMaterializer:
+    """
+    Writes a run's folder tree with a fixed number of queries per level
+    """
+
+    def __init__(self, naming, batch_size: Optional[int] = None):
+        # naming: a CorrectFolderService, which names and builds the folders
+        self.naming = naming
+        self.batch_size = batch_size or FOLDER_BULK_CREATE_SIZE
+
+    def plan(self, scraping_run: ScrapingRun, track_sources: Iterable[TrackSource]) -> FolderPlan:
+        """Group the run's sources by platform and service, in source order"""
+        plan = FolderPlan(scraping_run)
+        for track_source in track_sources:
+            if not track_source.platform or not track_source.service_name:
+                plan.skipped.append(track_source)
+                continue
+            platform = track_source.platform.lower()
+            service = track_source.service_name.lower()
+            plan.services.setdefault(platform, {}).setdefault(service, []).append(track_source)
+        return plan
+
+    def materialize(self, plan: FolderPlan, storage_folders: bool = True) -> MaterializedFolders:
+        """Write the planned tree (and, by default, its storage folders) in one transaction"""
+        scraping_run = plan.scraping_run
+        with transaction.atomic():
+            run_folder = insert_rows(UnifiedRunFolder, [self.naming._build_run_folder(scraping_run)])[0]
+            result = MaterializedFolders(run_folder)
+
+            platform_folders = insert_rows(UnifiedRunFolder, (
+                self.naming._build_platform_folder(run_folder, platform, scraping_run)
+                for platform in plan.services
+            ), self.batch_size)
+            result.platform_folders = dict(zip(plan.services, platform_folders))
+
+            service_keys = [
+                (platform, service)
+                for platform, by_service in plan.services.items()
+                for service in by_service
+            ]
+            service_folders = insert_rows(UnifiedRunFolder, (
+                self.naming._build_service_folder(result.platform_folders[platform], platform, service, scraping_run)
+                for platform, service in service_keys
+            ), self.batch_size)
+            by_service_key = dict(zip(service_keys, service_folders))
+            result.service_folders = {f"{platform}_{service}": folder for (platform, service), folder in by_service_key.items()}
+            self._index_service_folders(scraping_run, by_service_key)
+
+            sources = [
+                (service_key, track_source)
+                for service_key in service_keys
+                for track_source in plan.services[service_key[0]][service_key[1]]
+            ]
+            job_folders = insert_rows(UnifiedRunFolder, (
+                self.naming._build_job_folder(by_service_key[service_key], track_source, scraping_run)
+                for service_key, track_source in sources
+            ), self.batch_size)
+            result.job_folders = {track_source.id: folder for (_, track_source), folder in zip(sources, job_folders)}
+
+            if storage_folders:
+                result.storage_folders = self.create_storage_folders(job_folders)
+
+        return result
+
+    def _index_service_folders(self, scraping_run: ScrapingRun,
+                               service_folders: Dict[Tuple[str, str], UnifiedRunFolder]) -> None:
+        """Point the run's ServiceFolderIndex rows at the new service folders in one upsert"""
+        rows = [
+            ServiceFolderIndex(scraping_run=scraping_run, platform_code=platform, service_code=service, folder=folder)
+            for (platform, service), folder in service_folders.items()
+        ]
+        if not rows:
+            return
+        features = connections[router.db_for_write(ServiceFolderIndex)].features
+        if not features.supports_update_conflicts:
+            for row in rows:
+                ServiceFolderIndex.objects.update_or_create(
+                    scraping_run=scraping_run, platform_code=row.platform_code, service_code=row.service_code,
+                    defaults={'folder': row.folder},
+                )
+            return
+        unique_fields = ['scraping_run', 'platform_code', 'service_code']
+        ServiceFolderIndex.objects.bulk_create(
+            rows,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields if features.supports_update_conflicts_with_target else None,
+            update_fields=['folder'],
+        )
+
+    def create_storage_folders(self, job_folders: Sequence[UnifiedRunFolder],
+                               platforms: Optional[Sequence[str]] = None,
+                               need_ids: bool = False) -> Dict[Tuple[str, int], Any]:
+        """
+        Create the platform app Folder each job folder's posts are stored in,
+        linked through unified_job_folder: one per job folder in its own
+        platform, or one per job folder in each of platforms. One bulk INSERT
+        per platform; the folders only get ids on every backend with need_ids.
+        """
+        by_platform: Dict[str, List[UnifiedRunFolder]] = {}
+        for job_folder in job_folders:
+            for platform in (platforms or [job_folder.platform_code]):
+                if platform:
+                    by_platform.setdefault(platform, []).append(job_folder)
+
+        storage_folders = {}
+        for platform, folders in by_platform.items():
+            try:
+                folder_model = self.naming._get_folder_model(platform)
+            except ValueError:
+                logger.warning(f"No storage folder model for platform {platform}; skipping {len(folders)} folders")
+                continue
+            created = insert_rows(folder_model, (
+                folder_model(
+                    name=job_folder.name[:STORAGE_FOLDER_NAME_LENGTH],
+                    description=f'Created from UnifiedRunFolder {job_folder.id}',
+                    category=job_folder.category or 'posts',
+                    project_id=job_folder.project_id,
+                    scraping_run_id=job_folder.scraping_run_id,
+                    unified_job_folder=job_folder,
+                )
+                for job_folder in folders
+            ), self.batch_size, need_ids=need_ids)
+            for job_folder, storage_folder in zip(folders, created):
+                storage_folders[(platform, job_folder.id)] = storage_folder
+        return storage_folders
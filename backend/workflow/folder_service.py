@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional
 from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
+from .folder_materializer import insert_rows
 from .models import ScrapingRun
 from track_accounts.models import TrackSource
 from users.models import Project
@@ -47,19 +48,28 @@ class FolderService:
                     'content_folders': {}
                 }
                 
-                # Create platform-service folders under the unified run folder
-                for (platform, service), sources in platform_service_groups.items():
-                    service_folder = self._create_service_folder(
-                        run_folder, platform, service, scraping_run
-                    )
+                # Create platform-service folders under the unified run folder,
+                # then content folders for each source: one bulk INSERT per
+                # platform Folder model and level
+                group_keys = list(platform_service_groups)
+                service_folders = self._insert_by_model([
+                    self._build_service_folder(run_folder, platform, service, scraping_run)
+                    for platform, service in group_keys
+                ])
+                for (platform, service), service_folder in zip(group_keys, service_folders):
                     created_folders['service_folders'][f"{platform}_{service}"] = service_folder
-                    
-                    # Create content folders for each source
-                    for source in sources:
-                        content_folder = self._create_content_folder(
-                            service_folder, source, scraping_run
-                        )
-                        created_folders['content_folders'][source.id] = content_folder
+
+                sources = [
+                    (service_folder, source)
+                    for key, service_folder in zip(group_keys, service_folders)
+                    for source in platform_service_groups[key]
+                ]
+                content_folders = self._insert_by_model([
+                    self._build_content_folder(service_folder, source, scraping_run)
+                    for service_folder, source in sources
+                ])
+                for (_, source), content_folder in zip(sources, content_folders):
+                    created_folders['content_folders'][source.id] = content_folder
                 
                 logger.info(f"Created hierarchical folders for scraping run {scraping_run.id}")
                 return created_folders
@@ -96,9 +106,18 @@ class FolderService:
         logger.info(f"Created unified run folder: {name}")
         return run_folder
     
-    def _create_service_folder(self, parent_folder, platform: str, service: str, scraping_run: ScrapingRun):
+    def _insert_by_model(self, folders: List) -> List:
+        """Bulk insert folders of several platform Folder models, keeping their order"""
+        by_model = {}
+        for folder in folders:
+            by_model.setdefault(type(folder), []).append(folder)
+        for model, model_folders in by_model.items():
+            insert_rows(model, model_folders)
+        return folders
+
+    def _build_service_folder(self, parent_folder, platform: str, service: str, scraping_run: ScrapingRun):
         """
-        Create a platform-service folder
+        Build (unsaved) a platform-service folder
         
         Args:
             parent_folder: Parent folder (run folder)
@@ -115,7 +134,7 @@ class FolderService:
         name = f"{platform.title()} - {service.title()}"
         
         # Create service folder without parent_folder (since it's cross-platform)
-        service_folder = folder_model.objects.create(
+        return folder_model(
             name=name,
             description=f"{platform.title()} {service} data from scraping run",
             folder_type='service',
@@ -124,13 +143,10 @@ class FolderService:
             project=scraping_run.project,
             category=self._map_service_to_category(service)
         )
-        
-        logger.info(f"Created service folder: {name}")
-        return service_folder
     
-    def _create_content_folder(self, parent_folder, track_source: TrackSource, scraping_run: ScrapingRun):
+    def _build_content_folder(self, parent_folder, track_source: TrackSource, scraping_run: ScrapingRun):
         """
-        Create a content folder for a specific TrackSource
+        Build (unsaved) a content folder for a specific TrackSource
         
         Args:
             parent_folder: Parent folder (service folder)
@@ -161,7 +177,7 @@ class FolderService:
         elif track_source.other_social_media:
             url = track_source.other_social_media
         
-        content_folder = folder_model.objects.create(
+        return folder_model(
             name=folder_name,
             description=f"Content from {url or 'unknown source'}",
             folder_type='content',
@@ -170,9 +186,6 @@ class FolderService:
             project=scraping_run.project,
             category=self._map_service_to_category(track_source.service_name)
         )
-        
-        logger.info(f"Created content folder: {folder_name}")
-        return content_folder
     
     def _group_tracksources_by_platform_service(self, track_sources: List[TrackSource]) -> Dict[tuple, List[TrackSource]]:
         """
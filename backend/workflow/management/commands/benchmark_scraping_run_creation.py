@@ -0,0 +1,168 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from brightdata_integration.models import BatchScraperJob, BrightdataConfig
+from track_accounts.models import TrackSource
+from users.models import Platform, PlatformService, Project, Service
+from workflow.models import ScrapingJob, ScrapingRun
+from workflow.services import WorkflowService
+from datetime import datetime
+import time
+
+MODES = ('legacy', 'bulk')
+PLATFORMS = ('facebook', 'instagram', 'linkedin', 'tiktok')
+CONFIGURATION = {
+    'start_date': '2025-01-01T00:00:00Z',
+    'end_date': '2025-01-31T00:00:00Z',
+    'num_of_posts': 10,
+}
+
+
+def legacy_create_jobs(service, scraping_run, configuration):
+    """The _create_scraping_jobs_from_tracksources body before the bulk fan-out (queries per source)"""
+    for track_source in TrackSource.objects.filter(project=scraping_run.project):
+        platform_name = track_source.platform.lower()
+        service_name = track_source.service_name.lower()
+        try:
+            platform_service = PlatformService.objects.get(
+                platform__name=platform_name, service__name=service_name, is_enabled=True
+            )
+        except PlatformService.DoesNotExist:
+            continue
+        url = getattr(track_source, f'{platform_name}_link', None) or track_source.other_social_media
+        if not url:
+            continue
+
+        dataset_id = service._get_dataset_id(platform_name, service_name)
+        config = service._get_or_create_brightdata_config(platform_service)
+        if not config:
+            continue
+        start_date = datetime.fromisoformat(configuration['start_date'].replace('Z', '+00:00')).strftime('%Y-%m-%d')
+        end_date = datetime.fromisoformat(configuration['end_date'].replace('Z', '+00:00')).strftime('%Y-%m-%d')
+        content_type = service._map_service_to_content_type(service_name)
+
+        batch_job = BatchScraperJob.objects.create(
+            name=f"Batch Job - {platform_name} - {service_name}",
+            project=scraping_run.project,
+            source_folder_ids=[],
+            platforms_to_scrape=[platform_name],
+            content_types_to_scrape={platform_name: [content_type]},
+            num_of_posts=configuration.get('num_of_posts', 10),
+            start_date=start_date,
+            end_date=end_date,
+            platform_params={
+                'track_source_id': track_source.id,
+                'dataset_id': dataset_id,
+                'brightdata_config_id': config.id,
+                'platform_name': platform_name,
+                'service_name': service_name
+            }
+        )
+        ScrapingJob.objects.create(
+            scraping_run=scraping_run,
+            batch_job=batch_job,
+            status='pending',
+            dataset_id=dataset_id,
+            platform=platform_name,
+            service_type=service_name,
+            url=url
+        )
+
+
+def create_synthetic_project(sources):
+    """Project with sources TrackSources spread over the platforms (callers roll it back)"""
+    posts, _ = Service.objects.get_or_create(name='posts', defaults={'display_name': 'Posts'})
+    for name in PLATFORMS:
+        platform, _ = Platform.objects.get_or_create(name=name, defaults={'display_name': name.title()})
+        PlatformService.objects.get_or_create(platform=platform, service=posts, defaults={'is_enabled': True})
+        if not BrightdataConfig.objects.filter(platform=f'{name}_posts', is_active=True).exists():
+            BrightdataConfig.objects.create(platform=f'{name}_posts', api_token='benchmark', dataset_id=f'gd_{name}')
+
+    owner, _ = User.objects.get_or_create(username='run-benchmark')
+    project = Project.objects.create(name='Run creation benchmark', owner=owner)
+    TrackSource.objects.bulk_create(
+        (
+            TrackSource(
+                project=project,
+                name=f'Account {index}',
+                platform=PLATFORMS[index % len(PLATFORMS)],
+                service_name='posts',
+                **{f'{PLATFORMS[index % len(PLATFORMS)]}_link': f'https://example.com/account{index}/'},
+            )
+            for index in range(sources)
+        ),
+        batch_size=2000,
+    )
+    return project
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic rows once measured"""
+
+
+class Command(BaseCommand):
+    help = 'Compare the time and queries of creating a scraping run\'s jobs one by one and in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sources',
+            default='10,100,1000,10000',
+            help='Comma-separated TrackSource counts to benchmark (default: 10,100,1000,10000)'
+        )
+        parser.add_argument(
+            '--skip-legacy-above',
+            type=int,
+            default=2000,
+            help='Only time the legacy loop up to this many sources (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sources'].split(',') if size.strip()]
+        service = WorkflowService()
+        results = []
+
+        for sources in sizes:
+            # The synthetic project, runs and jobs are rolled back once measured
+            try:
+                with transaction.atomic():
+                    self.stdout.write(f"Creating {sources} synthetic track sources...")
+                    project = create_synthetic_project(sources)
+                    for mode in MODES:
+                        if mode == 'legacy' and sources > options['skip_legacy_above']:
+                            continue
+                        results.append((sources, mode, self._measure(service, project, mode)))
+                    raise Rollback()
+            except Rollback:
+                pass
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("SCRAPING RUN CREATION BENCHMARK")
+        self.stdout.write("="*50)
+        for sources, mode, result in results:
+            self.stdout.write(
+                f"{sources:>6} sources {mode:>6}: {result['jobs']} jobs in {result['seconds']:.2f}s "
+                f"({result['queries']} queries)"
+            )
+
+    def _measure(self, service, project, mode):
+        scraping_run = ScrapingRun.objects.create(project=project, configuration=CONFIGURATION)
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        # Counted with a wrapper: connection.queries only keeps the last 9000
+        with connection.execute_wrapper(count_query):
+            start = time.perf_counter()
+            if mode == 'legacy':
+                legacy_create_jobs(service, scraping_run, CONFIGURATION)
+            else:
+                service._create_scraping_jobs_from_tracksources(scraping_run, CONFIGURATION)
+            seconds = time.perf_counter() - start
+        return {
+            'jobs': scraping_run.scraping_jobs.count(),
+            'seconds': seconds,
+            'queries': len(queries),
+        }
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from workflow.models import ScrapingRun
+
+
+class Command(BaseCommand):
+    help = 'Recount ScrapingRun job counters and status from their jobs (repairs drifted counters)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--run',
+            type=int,
+            action='append',
+            dest='run_ids',
+            help='Only recount this run (can be repeated)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which runs would change without saving them',
+        )
+
+    def handle(self, *args, **options):
+        runs = ScrapingRun.objects.all()
+        if options['run_ids']:
+            runs = runs.filter(pk__in=options['run_ids'])
+
+        checked = 0
+        repaired = 0
+        for run in runs.iterator():
+            checked += 1
+            changed = run.recount_jobs() if options['dry_run'] else run.update_status_from_jobs()
+            if changed:
+                repaired += 1
+                values = ', '.join(f"{field}={getattr(run, field)}" for field in changed)
+                self.stdout.write(f"Run {run.id}: {values}")
+
+        self.stdout.write("\n" + "=" * 50)
+        self.stdout.write("RECOUNT SUMMARY")
+        self.stdout.write("=" * 50)
+        self.stdout.write(f"Runs checked: {checked}")
+        self.stdout.write(f"Runs {'to repair' if options['dry_run'] else 'repaired'}: {repaired}")
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from workflow.scheduler import TaskScheduler, due_tasks
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Run due scheduled scraping tasks through batch scraper jobs (long-running unless --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Dispatch the tasks due now and exit instead of running as a daemon'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which tasks are due without running them'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Batch jobs executed concurrently (default: SCHEDULER_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--max-per-project',
+            type=int,
+            default=None,
+            help='Active batch jobs allowed per project (default: SCHEDULER_MAX_JOBS_PER_PROJECT)'
+        )
+
+    def handle(self, *args, **options):
+        scheduler = TaskScheduler(concurrency=options['workers'], max_per_project=options['max_per_project'])
+
+        if options['dry_run']:
+            self._dry_run()
+            return
+
+        if not options['once']:
+            self.stdout.write(f"Starting task scheduler {scheduler.scheduler_id} "
+                              f"(workers: {scheduler.concurrency}, per project: {scheduler.max_per_project})")
+            try:
+                scheduler.run_forever()
+            except KeyboardInterrupt:
+                self.stdout.write("Task scheduler stopped.")
+            return
+
+        summary = scheduler.run_once()
+        if not summary['dispatched']:
+            self.stdout.write("No scheduled tasks are due.")
+            return
+
+        # Summary
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("SCHEDULER SUMMARY")
+        self.stdout.write("="*50)
+        self.stdout.write(f"Tasks dispatched: {summary['dispatched']}")
+        self.stdout.write(f"Successful: {summary['successful']}")
+        self.stdout.write(f"Failed: {summary['failed']}")
+
+    def _dry_run(self):
+        now = timezone.now()
+        tasks = list(due_tasks().filter(next_run__lte=now).order_by('next_run')) + \
+            list(due_tasks().filter(next_run__isnull=True))
+
+        if not tasks:
+            self.stdout.write("No scheduled tasks are due.")
+            return
+
+        self.stdout.write(f"Found {len(tasks)} due scheduled tasks")
+        for task in tasks:
+            due = task.next_run.isoformat() if task.next_run else 'never run'
+            self.stdout.write(f"  [DRY RUN] Would run: {task.name} ({task.platform} {task.service_type}, due {due})")
+
+        self.stdout.write("\nThis was a dry run - no tasks were run.")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('track_accounts', '0022_remove_unifiedrunfolder_unique_service_folder_per_run_and_more'),
+        ('users', '0014_add_display_name_to_organization_membership'),
+        ('workflow', '0015_remove_scrapeoutput_job_folder_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduledscrapingtask',
+            index=models.Index(fields=['is_active', 'status', 'next_run'], name='scheduled_task_due'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-17 02:56
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_run_jobs(apps, schema_editor):
+    """Fill the new counters (and recount the old ones) of existing runs"""
+    ScrapingRun = apps.get_model('workflow', 'ScrapingRun')
+    runs = ScrapingRun.objects.annotate(
+        total=Count('scraping_jobs'),
+        pending=Count('scraping_jobs', filter=Q(scraping_jobs__status='pending')),
+        processing=Count('scraping_jobs', filter=Q(scraping_jobs__status='processing')),
+        completed=Count('scraping_jobs', filter=Q(scraping_jobs__status='completed')),
+        failed=Count('scraping_jobs', filter=Q(scraping_jobs__status='failed')),
+        cancelled=Count('scraping_jobs', filter=Q(scraping_jobs__status='cancelled')),
+    )
+    for run in runs.iterator():
+        ScrapingRun.objects.filter(pk=run.pk).update(
+            total_jobs=run.total,
+            pending_jobs=run.pending,
+            processing_jobs=run.processing,
+            completed_jobs=run.completed + run.failed + run.cancelled,
+            successful_jobs=run.completed,
+            failed_jobs=run.failed,
+            cancelled_jobs=run.cancelled,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0016_scheduled_task_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapingrun',
+            name='cancelled_jobs',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapingrun',
+            name='pending_jobs',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapingrun',
+            name='processing_jobs',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_run_jobs, migrations.RunPython.noop),
+    ]
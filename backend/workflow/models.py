@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 from users.models import Project, PlatformService
@@ -37,6 +38,21 @@ class InputCollection(models.Model):
     def url_count(self):
         return len(self.urls)
 
+# ScrapingRun counters each ScrapingJob status is counted in. completed_jobs counts
+# every finished job; successful_jobs and failed_jobs split it by outcome.
+JOB_STATUS_COUNTERS = {
+    'pending': ('pending_jobs',),
+    'processing': ('processing_jobs',),
+    'completed': ('successful_jobs', 'completed_jobs'),
+    'failed': ('failed_jobs', 'completed_jobs'),
+    'cancelled': ('cancelled_jobs', 'completed_jobs'),
+}
+
+RUN_COUNTER_FIELDS = (
+    'total_jobs', 'pending_jobs', 'processing_jobs', 'completed_jobs',
+    'successful_jobs', 'failed_jobs', 'cancelled_jobs',
+)
+
 class ScrapingRun(models.Model):
     """Represents a single run of data scraping for all inputs with global configuration"""
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='scraping_runs')
@@ -49,10 +65,15 @@ class ScrapingRun(models.Model):
         ('failed', 'Failed'),
         ('cancelled', 'Cancelled')
     ], default='pending')
+    # Job counters, kept up to date by ScrapingJob.save() and ScrapingJob deletes
+    # (see apply_job_transition); update_status_from_jobs() recounts them
     total_jobs = models.IntegerField(default=0)
+    pending_jobs = models.IntegerField(default=0)
+    processing_jobs = models.IntegerField(default=0)
     completed_jobs = models.IntegerField(default=0)
     successful_jobs = models.IntegerField(default=0)
     failed_jobs = models.IntegerField(default=0)
+    cancelled_jobs = models.IntegerField(default=0)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     started_at = models.DateTimeField(null=True, blank=True)
@@ -69,60 +90,126 @@ class ScrapingRun(models.Model):
         if self.total_jobs == 0:
             return 0
         return int((self.completed_jobs / self.total_jobs) * 100)
-    
-    def update_status_from_jobs(self):
+
+    def derive_status(self):
         """
-        Update the run status based on the status of all jobs in this run
+        Run status implied by the job counters, or None when they don't decide it
+        (e.g. a mix of cancelled and failed jobs keeps the current status)
         """
-        jobs = self.scraping_jobs.all()
-        total_jobs = jobs.count()
-        
-        if total_jobs == 0:
-            self.status = 'pending'
-            return
-        
-        # Count jobs by status
-        pending_jobs = jobs.filter(status='pending').count()
-        processing_jobs = jobs.filter(status='processing').count()
-        completed_jobs = jobs.filter(status='completed').count()
-        failed_jobs = jobs.filter(status='failed').count()
-        cancelled_jobs = jobs.filter(status='cancelled').count()
-        
-        # Update job counts
-        self.total_jobs = total_jobs
-        self.completed_jobs = completed_jobs + failed_jobs + cancelled_jobs
-        self.successful_jobs = completed_jobs
-        self.failed_jobs = failed_jobs
-        
-        # Determine run status based on job statuses
-        if processing_jobs > 0:
+        if self.total_jobs == 0:
+            return 'pending'
+        if self.processing_jobs > 0:
             # If any job is still running, status is 'processing' (in progress)
-            self.status = 'processing'
-        elif pending_jobs > 0:
+            return 'processing'
+        if self.pending_jobs > 0:
             # If any job is still pending, status is 'pending'
-            self.status = 'pending'
-        elif completed_jobs == total_jobs:
+            return 'pending'
+        if self.successful_jobs == self.total_jobs:
             # All jobs completed successfully
-            self.status = 'completed'
-            if not self.completed_at:
-                self.completed_at = timezone.now()
-        elif failed_jobs == total_jobs:
+            return 'completed'
+        if self.failed_jobs == self.total_jobs:
             # All jobs failed
-            self.status = 'failed'
-            if not self.completed_at:
-                self.completed_at = timezone.now()
-        elif failed_jobs > 0 and completed_jobs > 0:
-            # Mixed results - some succeeded, some failed
-            self.status = 'completed'  # Partial success
-            if not self.completed_at:
-                self.completed_at = timezone.now()
-        elif cancelled_jobs == total_jobs:
+            return 'failed'
+        if self.failed_jobs > 0 and self.successful_jobs > 0:
+            # Mixed results - some succeeded, some failed (partial success)
+            return 'completed'
+        if self.cancelled_jobs == self.total_jobs:
             # All jobs cancelled
-            self.status = 'cancelled'
-            if not self.completed_at:
-                self.completed_at = timezone.now()
-        
-        self.save()
+            return 'cancelled'
+        return None
+
+    def _apply_derived_status(self):
+        """Set status (and completed_at) from the counters; returns the changed fields"""
+        changed = []
+        status = self.derive_status()
+        if status and status != self.status:
+            self.status = status
+            changed.append('status')
+        if status in ('completed', 'failed', 'cancelled') and not self.completed_at:
+            self.completed_at = timezone.now()
+            changed.append('completed_at')
+        return changed
+
+    @classmethod
+    def apply_job_transition(cls, run_id, old_status, new_status, count=1):
+        """
+        Move count jobs of the run from old_status to new_status in the counters
+        (None as old_status: the jobs were created; as new_status: they were
+        deleted) and update the run status if that changes it.
+
+        The counters are changed with F() expressions in a single UPDATE, so
+        concurrent transitions (webhooks for jobs of the same run) never lose a
+        count; the UPDATE also locks the run row until the transaction ends, so
+        the status is derived from counters no other transition is changing.
+        """
+        deltas = dict.fromkeys(RUN_COUNTER_FIELDS, 0)
+        if old_status is None:
+            deltas['total_jobs'] += count
+        else:
+            for field in JOB_STATUS_COUNTERS.get(old_status, ()):
+                deltas[field] -= count
+        if new_status is None:
+            deltas['total_jobs'] -= count
+        else:
+            for field in JOB_STATUS_COUNTERS.get(new_status, ()):
+                deltas[field] += count
+
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        with transaction.atomic(savepoint=False):
+            updated = cls.objects.filter(pk=run_id).update(
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+            if not updated:
+                return
+            run = cls.objects.only('status', 'completed_at', *RUN_COUNTER_FIELDS).get(pk=run_id)
+            changed = run._apply_derived_status()
+            if changed:
+                run.save(update_fields=changed)
+
+    def recount_jobs(self):
+        """
+        Set the job counters and status from the jobs themselves (one aggregate
+        query) without saving; returns the changed fields
+        """
+        counts = self.scraping_jobs.aggregate(
+            total_jobs=Count('id'),
+            **{
+                f'{status}_count': Count('id', filter=Q(status=status))
+                for status in JOB_STATUS_COUNTERS
+            }
+        )
+        counters = {
+            'total_jobs': counts['total_jobs'],
+            'pending_jobs': counts['pending_count'],
+            'processing_jobs': counts['processing_count'],
+            'completed_jobs': counts['completed_count'] + counts['failed_count'] + counts['cancelled_count'],
+            'successful_jobs': counts['completed_count'],
+            'failed_jobs': counts['failed_count'],
+            'cancelled_jobs': counts['cancelled_count'],
+        }
+
+        changed = []
+        for field, value in counters.items():
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed.append(field)
+        return changed + self._apply_derived_status()
+
+    def update_status_from_jobs(self):
+        """
+        Recount the job counters and update the run status from them.
+
+        Job saves and deletes keep the counters current, so this is only needed
+        to repair runs whose jobs were changed behind the model's back (queryset
+        updates, raw SQL, runs from before the counters existed).
+        """
+        changed = self.recount_jobs()
+        if changed:
+            self.save(update_fields=changed)
+        return changed
 
 class ScrapingJob(models.Model):
     """Individual scraping job for each input entry"""
@@ -158,13 +245,25 @@ class ScrapingJob(models.Model):
         return f"Job {self.id} - {self.platform} {self.service_type} ({self.status})"
     
     def save(self, *args, **kwargs):
-        """Override save to automatically update parent run status"""
-        # Save the job first
-        super().save(*args, **kwargs)
-        
-        # Update the parent run status
-        if self.scraping_run:
-            self.scraping_run.update_status_from_jobs()
+        """Override save to keep the parent run's job counters and status current"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            previous_status = None
+            if not self._state.adding and self.pk is not None:
+                # Lock the row so concurrent saves of this job see each other's status
+                previous_status = (
+                    ScrapingJob.objects.select_for_update()
+                    .filter(pk=self.pk).order_by().values_list('status', flat=True).first()
+                )
+
+            super().save(*args, **kwargs)
+
+            if previous_status != self.status:
+                ScrapingRun.apply_job_transition(self.scraping_run_id, previous_status, self.status)
 
 class WorkflowTask(models.Model):
     """Model for workflow tasks that manage scraping jobs"""
@@ -241,6 +340,10 @@ class ScheduledScrapingTask(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The scheduler's due-task scan and its earliest next_run lookup
+            models.Index(fields=['is_active', 'status', 'next_run'], name='scheduled_task_due'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.track_source.name} ({self.platform})"
@@ -269,20 +372,21 @@ class ScheduledScrapingTask(models.Model):
         from django.utils import timezone
         return timezone.now() >= self.next_run
 
-    def update_next_run(self):
-        """Update the next run time based on schedule"""
-        from django.utils import timezone
+    def get_schedule_interval(self):
+        """Time between two runs of the task"""
         from datetime import timedelta
-        
-        now = timezone.now()
-        
-        if self.schedule_type == 'daily':
-            self.next_run = now + timedelta(days=1)
-        elif self.schedule_type == 'weekly':
-            self.next_run = now + timedelta(weeks=1)
+
+        if self.schedule_type == 'weekly':
+            return timedelta(weeks=1)
         elif self.schedule_type == 'monthly':
-            self.next_run = now + timedelta(days=30)
+            return timedelta(days=30)
         elif self.schedule_type == 'custom':
-            self.next_run = now + timedelta(hours=self.schedule_interval)
-        
+            return timedelta(hours=max(self.schedule_interval or 1, 1))
+        return timedelta(days=1)
+
+    def update_next_run(self):
+        """Update the next run time based on schedule"""
+        from django.utils import timezone
+
+        self.next_run = timezone.now() + self.get_schedule_interval()
         self.save()
@@ -0,0 +1,249 @@
+"""
+Scheduler for ScheduledScrapingTask
+
+Runs due tasks through the same BatchScraperJob path as the run_now action:
+- the earliest next_run of the active tasks (one lookup on the scheduled_task_due
+  index) tells the scheduler how long to sleep, capped at SCHEDULER_MAX_SLEEP so
+  tasks created or edited in the meantime are noticed
+- due tasks are claimed with row locking (SELECT ... FOR UPDATE SKIP LOCKED where
+  supported), so several scheduler replicas never dispatch the same run; the
+  projects of the claimed tasks are locked too, which makes the per-project limit
+  hold across replicas
+- a project may have at most SCHEDULER_MAX_JOBS_PER_PROJECT batch jobs pending or
+  processing; further due tasks are put back by SCHEDULER_DEFER_SECONDS
+- runs missed while no scheduler was running are coalesced: the task runs once
+  and next_run moves to the first slot of its schedule after now
+- claimed jobs are executed in a bounded thread pool after the claiming
+  transaction commits, so no lock is held during BrightData calls
+
+Tasks without a next_run (new ones) are due immediately, as should_run() says.
+"""
+
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from brightdata_integration.models import BatchScraperJob
+from users.models import Project
+
+from .models import ScheduledScrapingTask
+
+logger = logging.getLogger(__name__)
+
+# Batch job statuses that count against a project's concurrency limit
+ACTIVE_JOB_STATUSES = ('pending', 'processing')
+
+
+def due_tasks():
+    """Tasks the scheduler runs once their next_run has passed"""
+    return ScheduledScrapingTask.objects.filter(is_active=True, status='active')
+
+
+def coalesced_next_run(task: ScheduledScrapingTask, now: datetime) -> Tuple[datetime, int]:
+    """
+    (next run after now on the task's schedule, number of runs missed before now
+    that are skipped). A task due at 09:00 daily that is run at 13:00 three days
+    late is next due tomorrow at 09:00, and the 3 runs it missed are dropped.
+    """
+    interval = task.get_schedule_interval()
+    due = task.next_run or now
+    if due > now:
+        return due, 0
+    periods = (now - due) // interval + 1
+    return due + periods * interval, periods - 1
+
+
+def create_task_batch_job(task: ScheduledScrapingTask, platform_url: str, now: Optional[datetime] = None) -> BatchScraperJob:
+    """The BatchScraperJob of one run of a scheduled task"""
+    now = now or timezone.now()
+    return BatchScraperJob.objects.create(
+        name=f"Scheduled_{task.name}_{now.strftime('%Y%m%d_%H%M%S')}",
+        project=task.project,
+        source_folder_ids=[],
+        platforms_to_scrape=[task.platform],
+        content_types_to_scrape={
+            task.platform: [task.service_type]
+        },
+        num_of_posts=task.num_of_posts,
+        start_date=task.start_date,
+        end_date=task.end_date,
+        auto_create_folders=task.auto_create_folders,
+        status='pending',
+        platform_params={
+            'track_source_id': task.track_source_id,
+            'platform': task.platform,
+            'service_type': task.service_type,
+            'scheduled_task_id': task.id,
+            'urls': [platform_url]
+        }
+    )
+
+
+class TaskScheduler:
+    """
+    Claims due ScheduledScrapingTasks, creates their batch jobs and executes them
+    """
+
+    def __init__(self, max_per_project: Optional[int] = None, batch_size: Optional[int] = None,
+                 concurrency: Optional[int] = None, max_sleep: Optional[float] = None,
+                 defer_seconds: Optional[int] = None, job_timeout: Optional[int] = None,
+                 scheduler_id: Optional[str] = None):
+        self.max_per_project = max(1, max_per_project or int(getattr(settings, 'SCHEDULER_MAX_JOBS_PER_PROJECT', 2)))
+        self.batch_size = max(1, batch_size or int(getattr(settings, 'SCHEDULER_BATCH_SIZE', 20)))
+        self.concurrency = max(1, concurrency or int(getattr(settings, 'SCHEDULER_CONCURRENCY', 4)))
+        self.max_sleep = max_sleep or float(getattr(settings, 'SCHEDULER_MAX_SLEEP', 60))
+        self.defer_seconds = defer_seconds or int(getattr(settings, 'SCHEDULER_DEFER_SECONDS', 60))
+        self.job_timeout = job_timeout or int(getattr(settings, 'SCHEDULER_JOB_TIMEOUT', 6 * 3600))
+        self.scheduler_id = scheduler_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    def next_due(self) -> Optional[datetime]:
+        """Earliest next_run of the active tasks (None when nothing is scheduled)"""
+        return due_tasks().aggregate(next_due=Min('next_run'))['next_due']
+
+    def seconds_until_due(self, now: Optional[datetime] = None) -> float:
+        """How long the scheduler may sleep before something is due"""
+        now = now or timezone.now()
+        if due_tasks().filter(next_run__isnull=True).exists():
+            return 0.0
+        next_due = self.next_due()
+        if next_due is None:
+            return self.max_sleep
+        return min(max((next_due - now).total_seconds(), 0.0), self.max_sleep)
+
+    def claim_due_tasks(self, now: Optional[datetime] = None) -> List[Tuple[ScheduledScrapingTask, BatchScraperJob]]:
+        """
+        Lock up to batch_size due tasks, create a batch job for each one its project
+        has room for and move every claimed task's next_run on.
+        """
+        now = now or timezone.now()
+        claimed = []
+        with transaction.atomic():
+            due_tasks().filter(next_run__isnull=True).update(next_run=now)
+            tasks = list(
+                due_tasks().select_for_update(skip_locked=True, of=('self',))
+                .select_related('track_source')
+                .filter(next_run__lte=now)
+                .order_by('next_run', 'id')[:self.batch_size]
+            )
+            if not tasks:
+                return []
+
+            project_ids = sorted({task.project_id for task in tasks})
+            # Serializes dispatch per project between replicas (in pk order, so no deadlocks)
+            list(Project.objects.select_for_update().filter(pk__in=project_ids).order_by('pk').values_list('pk', flat=True))
+            running = self._running_jobs(project_ids, now)
+
+            for task in tasks:
+                if running.get(task.project_id, 0) >= self.max_per_project:
+                    task.next_run = now + timedelta(seconds=self.defer_seconds)
+                    task.save(update_fields=['next_run', 'updated_at'])
+                    logger.info(f"Scheduled task {task.id} deferred: project {task.project_id} "
+                                f"has {self.max_per_project} batch jobs running")
+                    continue
+
+                next_run, missed = coalesced_next_run(task, now)
+                if missed:
+                    logger.warning(f"Scheduled task {task.id} missed {missed} runs; running once")
+
+                platform_url = task.get_platform_url()
+                if not platform_url:
+                    logger.error(f"Scheduled task {task.id} has no {task.platform} URL on its track source")
+                    task.status = 'error'
+                    task.failed_runs += 1
+                    task.next_run = next_run
+                    task.save(update_fields=['status', 'failed_runs', 'next_run', 'updated_at'])
+                    continue
+
+                job = create_task_batch_job(task, platform_url, now)
+                task.total_runs += 1
+                task.last_run = now
+                task.next_run = next_run
+                task.save(update_fields=['total_runs', 'last_run', 'next_run', 'updated_at'])
+                running[task.project_id] = running.get(task.project_id, 0) + 1
+                claimed.append((task, job))
+
+        for task, job in claimed:
+            logger.info(f"Scheduler {self.scheduler_id} created batch job {job.id} for scheduled task {task.id}")
+        return claimed
+
+    def _running_jobs(self, project_ids: List[int], now: datetime) -> Dict[int, int]:
+        # Jobs stuck in an active status for longer than job_timeout no longer count
+        return dict(
+            BatchScraperJob.objects.filter(
+                project_id__in=project_ids,
+                status__in=ACTIVE_JOB_STATUSES,
+                created_at__gte=now - timedelta(seconds=self.job_timeout),
+            ).values('project_id').annotate(jobs=Count('id')).values_list('project_id', 'jobs')
+        )
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def execute(self, task: ScheduledScrapingTask, job: BatchScraperJob) -> bool:
+        """Run a claimed task's batch job and count the outcome on the task"""
+        from brightdata_integration.services import AutomatedBatchScraper
+
+        try:
+            success = AutomatedBatchScraper().execute_batch_job(job.id)
+        except Exception:
+            logger.exception(f"Batch job {job.id} of scheduled task {task.id} failed")
+            success = False
+
+        counter = 'successful_runs' if success else 'failed_runs'
+        ScheduledScrapingTask.objects.filter(pk=task.pk).update(**{counter: F(counter) + 1})
+        return success
+
+    def _execute_in_thread(self, claim: Tuple[ScheduledScrapingTask, BatchScraperJob]) -> bool:
+        try:
+            return self.execute(*claim)
+        finally:
+            # Each pool thread holds its own connection; don't leak it
+            connection.close()
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Claim the due tasks and execute their jobs; returns a summary"""
+        claimed = self.claim_due_tasks(now)
+
+        if self.concurrency == 1 or len(claimed) <= 1:
+            results = [self.execute(task, job) for task, job in claimed]
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                results = list(pool.map(self._execute_in_thread, claimed))
+
+        return {
+            'dispatched': len(results),
+            'successful': sum(1 for result in results if result),
+            'failed': sum(1 for result in results if not result),
+        }
+
+    def run_forever(self) -> None:
+        """Sleep until the earliest task is due, run what is due, repeat"""
+        logger.info(f"Task scheduler {self.scheduler_id} started (concurrency: {self.concurrency}, "
+                    f"per project: {self.max_per_project})")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while True:
+                claimed = self.claim_due_tasks()
+                for claim in claimed:
+                    pool.submit(self._execute_in_thread, claim)
+
+                delay = self.seconds_until_due()
+                if not claimed:
+                    # Due tasks locked by another replica: don't spin while it dispatches them
+                    delay = max(delay, 1.0)
+                if delay > 0:
+                    time.sleep(delay)
@@ -61,13 +61,15 @@ class ScrapingRunSerializer(serializers.ModelSerializer):
         model = ScrapingRun
         fields = [
             'id', 'project', 'project_name', 'name', 'configuration', 'status',
-            'total_jobs', 'completed_jobs', 'successful_jobs', 'failed_jobs',
+            'total_jobs', 'pending_jobs', 'processing_jobs', 'completed_jobs',
+            'successful_jobs', 'failed_jobs', 'cancelled_jobs',
             'progress_percentage', 'created_by', 'created_by_name',
             'created_at', 'started_at', 'completed_at', 'scraping_jobs'
         ]
         read_only_fields = ['id', 'created_at', 'started_at', 'completed_at',
                            'project_name', 'created_by_name', 'progress_percentage',
-                           'total_jobs', 'completed_jobs', 'successful_jobs', 'failed_jobs']
+                           'total_jobs', 'pending_jobs', 'processing_jobs', 'completed_jobs',
+                           'successful_jobs', 'failed_jobs', 'cancelled_jobs']
     
     def validate(self, data):
         """Validate that start_date and end_date are provided in configuration"""
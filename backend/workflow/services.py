@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 from django.db import transaction
 from django.utils import timezone
@@ -9,6 +10,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT when a run's jobs are created in bulk
+JOB_BULK_CREATE_SIZE = 500
+
+# TrackSource field holding each platform's profile URL
+TRACK_SOURCE_LINK_FIELDS = {
+    'facebook': 'facebook_link',
+    'instagram': 'instagram_link',
+    'linkedin': 'linkedin_link',
+    'tiktok': 'tiktok_link',
+}
+
 class WorkflowService:
     """Service class for managing workflow operations"""
     
@@ -460,11 +472,9 @@ class WorkflowService:
                 logger.info(f"No InputCollection records found for project {project.name}, creating from TrackSource data")
                 input_collections = self._create_input_collections_from_tracksources(project, user)
             
-            scraping_run.total_jobs = len(input_collections)
-            scraping_run.save()
-            
-            # Create individual scraping jobs
+            # Create individual scraping jobs (each one is counted on the run as it is created)
             self._create_scraping_jobs(scraping_run, input_collections)
+            scraping_run.refresh_from_db()
             
             return scraping_run
             
@@ -742,88 +752,57 @@ class WorkflowService:
     def _create_scraping_jobs_from_tracksources(self, scraping_run: ScrapingRun, configuration: Dict[str, Any]):
         """
         Create individual scraping jobs directly from TrackSource items
+
+        Platform services are loaded once and BrightData configs looked up once
+        per platform service, the run configuration is parsed once, and the batch
+        jobs and scraping jobs are inserted with bulk_create in one transaction,
+        so starting a run costs a fixed number of queries per JOB_BULK_CREATE_SIZE
+        sources instead of several per source.
         
         Args:
             scraping_run: ScrapingRun instance
             configuration: Global configuration from ScrapingRun
         """
-        from track_accounts.models import TrackSource
-        from users.models import PlatformService
-        
         # Get all TrackSource records for this project
         track_sources = TrackSource.objects.filter(project=scraping_run.project)
-        
-        for track_source in track_sources:
+
+        platform_services = {
+            (platform_service.platform.name, platform_service.service.name): platform_service
+            for platform_service in PlatformService.objects.filter(is_enabled=True).select_related('platform', 'service')
+        }
+        configs = {}
+        batch_job_options = self._run_batch_job_options(configuration)
+
+        new_jobs = []
+        for track_source in track_sources.iterator(chunk_size=JOB_BULK_CREATE_SIZE):
             # Get platform and service info
-            platform_name = track_source.platform.lower()
-            service_name = track_source.service_name.lower()
+            platform_name = (track_source.platform or '').lower()
+            service_name = (track_source.service_name or '').lower()
             
             # Find the corresponding PlatformService
-            try:
-                platform_service = PlatformService.objects.get(
-                    platform__name=platform_name,
-                    service__name=service_name,
-                    is_enabled=True
-                )
-            except PlatformService.DoesNotExist:
+            platform_service = platform_services.get((platform_name, service_name))
+            if platform_service is None:
                 logger.warning(f"No PlatformService found for {platform_name} - {service_name}")
                 continue
             
-            # Extract URL for the specific platform
-            url = None
-            if platform_name == 'facebook' and track_source.facebook_link:
-                url = track_source.facebook_link
-            elif platform_name == 'instagram' and track_source.instagram_link:
-                url = track_source.instagram_link
-            elif platform_name == 'linkedin' and track_source.linkedin_link:
-                url = track_source.linkedin_link
-            elif platform_name == 'tiktok' and track_source.tiktok_link:
-                url = track_source.tiktok_link
-            elif track_source.other_social_media:
-                url = track_source.other_social_media
-            
+            url = self._track_source_url(track_source, platform_name)
             if not url:
                 logger.warning(f"No URL found for {platform_name} - {service_name}")
                 continue
-            
+
+            if platform_service.id not in configs:
+                configs[platform_service.id] = self._get_or_create_brightdata_config(platform_service)
+            config = configs[platform_service.id]
+            if not config:
+                logger.error(f"No BrightData config found for platform service {platform_service}")
+                continue
+
             try:
-                # Get dataset ID
                 dataset_id = self._get_dataset_id(platform_name, service_name)
-                
-                # Get or create BrightData config
-                config = self._get_or_create_brightdata_config(platform_service)
-                
-                if not config:
-                    logger.error(f"No BrightData config found for platform service {platform_service}")
-                    continue
-                
-                # Convert ISO date strings to YYYY-MM-DD format for Django DateField
-                start_date = None
-                end_date = None
-                
-                if configuration.get('start_date'):
-                    try:
-                        # Parse ISO date string and convert to YYYY-MM-DD
-                        from datetime import datetime
-                        start_date_obj = datetime.fromisoformat(configuration['start_date'].replace('Z', '+00:00'))
-                        start_date = start_date_obj.strftime('%Y-%m-%d')
-                    except (ValueError, AttributeError):
-                        logger.warning(f"Invalid start_date format: {configuration.get('start_date')}")
-                
-                if configuration.get('end_date'):
-                    try:
-                        # Parse ISO date string and convert to YYYY-MM-DD
-                        from datetime import datetime
-                        end_date_obj = datetime.fromisoformat(configuration['end_date'].replace('Z', '+00:00'))
-                        end_date = end_date_obj.strftime('%Y-%m-%d')
-                    except (ValueError, AttributeError):
-                        logger.warning(f"Invalid end_date format: {configuration.get('end_date')}")
-                
                 # Map service name to content type for BrightData
                 content_type = self._map_service_to_content_type(service_name)
-                
-                # Create batch scraper job
-                batch_job = BatchScraperJob.objects.create(
+
+                batch_job = BatchScraperJob(
                     name=f"Batch Job - {platform_name} - {service_name}",
                     project=scraping_run.project,
                     source_folder_ids=[],
@@ -831,40 +810,95 @@ class WorkflowService:
                     content_types_to_scrape={
                         platform_name: [content_type]
                     },
-                    num_of_posts=configuration.get('num_of_posts', 10),
-                    start_date=start_date,
-                    end_date=end_date,
-                    auto_create_folders=configuration.get('auto_create_folders', True),
-                    output_folder_pattern=configuration.get('output_folder_pattern', 'scraped_data'),
                     platform_params={
                         'track_source_id': track_source.id,
                         'dataset_id': dataset_id,
                         'brightdata_config_id': config.id,
                         'platform_name': platform_name,
                         'service_name': service_name
-                    }
+                    },
+                    **batch_job_options
                 )
-                
-                # Create scraping job (without InputCollection)
-                ScrapingJob.objects.create(
+                # Scraping job (without InputCollection); batch_job is set once it is saved
+                scraping_job = ScrapingJob(
                     scraping_run=scraping_run,
-                    input_collection=None,  # No InputCollection needed
-                    batch_job=batch_job,
+                    input_collection=None,
                     status='pending',
                     dataset_id=dataset_id,
                     platform=platform_name,
                     service_type=service_name,
                     url=url
                 )
-                
-                logger.info(f"Created scraping job for TrackSource {track_source.id} - {url}")
-                
+                # Bad data in one source is caught here, not by the bulk insert for the whole run
+                self._check_insertable(batch_job)
+                self._check_insertable(scraping_job, exclude=('batch_job',))
             except Exception as e:
                 logger.error(f"Error creating scraping job for TrackSource {track_source.id}: {str(e)}")
-        
-        # Update run statistics
-        scraping_run.total_jobs = scraping_run.scraping_jobs.count()
-        scraping_run.save() 
+                continue
+            new_jobs.append((batch_job, scraping_job))
+
+        if new_jobs:
+            with transaction.atomic():
+                BatchScraperJob.objects.bulk_create(
+                    [batch_job for batch_job, _ in new_jobs], batch_size=JOB_BULK_CREATE_SIZE
+                )
+                for batch_job, scraping_job in new_jobs:
+                    scraping_job.batch_job = batch_job
+                ScrapingJob.objects.bulk_create(
+                    [scraping_job for _, scraping_job in new_jobs], batch_size=JOB_BULK_CREATE_SIZE
+                )
+                # bulk_create bypasses ScrapingJob.save(), so count the new jobs on the run here
+                ScrapingRun.apply_job_transition(scraping_run.id, None, 'pending', count=len(new_jobs))
+
+        logger.info(f"Created {len(new_jobs)} scraping jobs for scraping run {scraping_run.id}")
+        scraping_run.refresh_from_db()
+
+    @staticmethod
+    def _check_insertable(instance, exclude=()) -> None:
+        """
+        Raise ValueError for values the database would reject on insert: too long
+        for the column or NULL in a NOT NULL column. Nothing else is validated, so
+        e.g. a link without a scheme is scraped as before.
+        """
+        for field in instance._meta.concrete_fields:
+            if field.primary_key or field.name in exclude:
+                continue
+            value = getattr(instance, field.attname)
+            if value is None:
+                # auto_now(_add) dates are filled in by the insert itself
+                if not field.null and not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False):
+                    raise ValueError(f"{field.name} cannot be null")
+            elif field.max_length and isinstance(value, str) and len(value) > field.max_length:
+                raise ValueError(f"{field.name} is longer than {field.max_length} characters")
+
+    def _run_batch_job_options(self, configuration: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        BatchScraperJob fields shared by every job of a run, from its configuration
+        (ISO date strings become YYYY-MM-DD for the DateFields)
+        """
+        dates = {}
+        for field in ('start_date', 'end_date'):
+            dates[field] = None
+            if configuration.get(field):
+                try:
+                    value = datetime.fromisoformat(configuration[field].replace('Z', '+00:00'))
+                    dates[field] = value.strftime('%Y-%m-%d')
+                except (ValueError, AttributeError):
+                    logger.warning(f"Invalid {field} format: {configuration.get(field)}")
+
+        return {
+            'num_of_posts': configuration.get('num_of_posts', 10),
+            'start_date': dates['start_date'],
+            'end_date': dates['end_date'],
+            'auto_create_folders': configuration.get('auto_create_folders', True),
+            'output_folder_pattern': configuration.get('output_folder_pattern', 'scraped_data'),
+        }
+
+    def _track_source_url(self, track_source: TrackSource, platform_name: str) -> Optional[str]:
+        """The TrackSource URL to scrape for a platform"""
+        link_field = TRACK_SOURCE_LINK_FIELDS.get(platform_name)
+        url = getattr(track_source, link_field) if link_field else None
+        return url or track_source.other_social_media or None
 
 def update_scraping_jobs_from_batch_job(batch_job_id: int) -> bool:
     """
@@ -0,0 +1,17 @@
+"""
+Keep ScrapingRun job counters current when ScrapingJobs are deleted; job saves
+move the counters themselves (ScrapingJob.save)
+"""
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ScrapingJob, ScrapingRun
+
+
+@receiver(post_delete, sender=ScrapingJob)
+def remove_job_from_run(sender, instance, origin=None, **kwargs):
+    # Jobs removed along with their run leave no counters to update
+    if isinstance(origin, ScrapingRun):
+        return
+    ScrapingRun.apply_job_transition(instance.scraping_run_id, instance.status, None)
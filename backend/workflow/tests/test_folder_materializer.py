@@ -0,0 +1,99 @@
+"""
+Tests for writing a scraping run's folder tree in bulk
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from facebook_data.models import Folder as FacebookFolder
+from instagram_data.models import Folder as InstagramFolder
+from track_accounts.models import ServiceFolderIndex, TrackSource, UnifiedRunFolder
+from users.models import Project
+from workflow.correct_folder_service import CorrectFolderService
+from workflow.folder_materializer import FolderMaterializer
+from workflow.folder_service import FolderService
+from workflow.models import ScrapingRun
+
+
+class FolderMaterializerTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='folders', password='testpass')
+        cls.project = Project.objects.create(name='Folders', owner=cls.user)
+
+    def setUp(self):
+        self.scraping_run = ScrapingRun.objects.create(project=self.project)
+
+    def _sources(self, count, platform='instagram', service_name='posts'):
+        return TrackSource.objects.bulk_create(
+            TrackSource(project=self.project, name=f'{platform} {index}', platform=platform, service_name=service_name,
+                        **{f'{platform}_link': f'https://www.{platform}.com/account{index}/'})
+            for index in range(count)
+        )
+
+    def _materialize(self, sources):
+        with CaptureQueriesContext(connection) as queries:
+            folders = CorrectFolderService().create_correct_folder_structure(self.scraping_run, sources)
+        return folders, len(queries)
+
+    def test_tree_index_and_storage_folders(self):
+        sources = self._sources(2) + self._sources(1, platform='facebook') + self._sources(1, service_name='reels')
+        sources.append(TrackSource.objects.create(project=self.project, name='No identity'))
+
+        folders, _ = self._materialize(sources)
+
+        run_folder = folders['run_folder']
+        self.assertEqual((run_folder.folder_type, run_folder.scraping_run_id), ('run', self.scraping_run.id))
+        self.assertEqual(set(folders['platform_folders']), {'instagram', 'facebook'})
+        self.assertEqual(set(folders['service_folders']), {'instagram_posts', 'instagram_reels', 'facebook_posts'})
+
+        reels = folders['service_folders']['instagram_reels']
+        self.assertEqual((reels.name, reels.category, reels.parent_folder_id),
+                         ('Instagram - Reels', 'reels', folders['platform_folders']['instagram'].id))
+        job = folders['job_folders'][sources[0].id]
+        self.assertEqual((job.name, job.folder_type, job.parent_folder_id),
+                         ('Instagram Profile - account0', 'job', folders['service_folders']['instagram_posts'].id))
+        self.assertEqual(job.description, 'Job output for https://www.instagram.com/account0/')
+        self.assertEqual(len(folders['job_folders']), 4)
+        self.assertEqual(UnifiedRunFolder.objects.filter(scraping_run=self.scraping_run).count(), 1 + 2 + 3 + 4)
+
+        index = ServiceFolderIndex.objects.get(scraping_run=self.scraping_run, platform_code='facebook', service_code='posts')
+        self.assertEqual(index.folder_id, folders['service_folders']['facebook_posts'].id)
+        self.assertEqual(ServiceFolderIndex.objects.filter(scraping_run=self.scraping_run).count(), 3)
+
+        storage = InstagramFolder.objects.get(unified_job_folder=job)
+        self.assertEqual((storage.name, storage.project_id, storage.scraping_run_id),
+                         (job.name, self.project.id, self.scraping_run.id))
+        self.assertEqual(InstagramFolder.objects.filter(scraping_run=self.scraping_run).count(), 3)
+        self.assertEqual(FacebookFolder.objects.filter(scraping_run=self.scraping_run).count(), 1)
+
+    def test_query_count_does_not_depend_on_sources(self):
+        _, few = self._materialize(self._sources(2) + self._sources(1, platform='facebook'))
+        self.scraping_run = ScrapingRun.objects.create(project=self.project)
+        # Few enough for one INSERT per level under SQLite's 999 parameter limit
+        _, many = self._materialize(self._sources(50) + self._sources(20, platform='facebook'))
+        # savepoint, run, platforms, services, index upsert, jobs, two storage levels, release
+        self.assertEqual(few, 9)
+        self.assertEqual(many, few)
+
+    def test_index_rows_are_repointed(self):
+        first = FolderMaterializer(CorrectFolderService()).materialize(
+            FolderMaterializer(CorrectFolderService()).plan(self.scraping_run, self._sources(1)), storage_folders=False,
+        )
+        folders, _ = self._materialize(self._sources(1))
+        index = ServiceFolderIndex.objects.get(scraping_run=self.scraping_run)
+        self.assertNotEqual(index.folder_id, first.service_folders['instagram_posts'].id)
+        self.assertEqual(index.folder_id, folders['service_folders']['instagram_posts'].id)
+
+    def test_legacy_hierarchical_folders(self):
+        sources = self._sources(2) + self._sources(1, platform='facebook')
+        folders = FolderService().create_hierarchical_folders(self.scraping_run, sources)
+
+        service = folders['service_folders']['instagram_posts']
+        self.assertIsInstance(service, InstagramFolder)
+        content = folders['content_folders'][sources[1].id]
+        self.assertEqual((content.name, content.parent_folder_id), ('Instagram Profile - account1', service.id))
+        self.assertIsInstance(folders['content_folders'][sources[2].id], FacebookFolder)
@@ -0,0 +1,117 @@
+"""
+Tests for the incremental ScrapingRun job counters
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from brightdata_integration.models import BatchScraperJob
+from users.models import Project
+from workflow.models import ScrapingJob, ScrapingRun
+
+
+class ScrapingRunCountersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='counters', password='testpass')
+        cls.project = Project.objects.create(name='Counters', owner=cls.user)
+        cls.batch_job = BatchScraperJob.objects.create(name='batch', project=cls.project, source_folder_ids=[])
+
+    def setUp(self):
+        self.scraping_run = ScrapingRun.objects.create(project=self.project)
+
+    def _job(self, status='pending', **extra):
+        return ScrapingJob.objects.create(
+            scraping_run=self.scraping_run, batch_job=self.batch_job, status=status,
+            dataset_id='gd_ig', platform='instagram', service_type='posts',
+            url=f'https://www.instagram.com/account{ScrapingJob.objects.count()}/', **extra,
+        )
+
+    def _counters(self):
+        self.scraping_run.refresh_from_db()
+        run = self.scraping_run
+        return (run.status, run.total_jobs, run.pending_jobs, run.processing_jobs,
+                run.completed_jobs, run.successful_jobs, run.failed_jobs, run.cancelled_jobs)
+
+    def test_transitions_move_counters_and_status(self):
+        jobs = [self._job() for _ in range(3)]
+        self.assertEqual(self._counters(), ('pending', 3, 3, 0, 0, 0, 0, 0))
+
+        for job in jobs:
+            job.status = 'processing'
+            job.save()
+        self.assertEqual(self._counters(), ('processing', 3, 0, 3, 0, 0, 0, 0))
+
+        jobs[0].status = 'completed'
+        jobs[0].save()
+        jobs[1].status = 'failed'
+        jobs[1].save()
+        self.assertEqual(self._counters(), ('processing', 3, 0, 1, 2, 1, 1, 0))
+        self.assertIsNone(self.scraping_run.completed_at)
+
+        jobs[2].status = 'completed'
+        jobs[2].save()
+        self.assertEqual(self._counters(), ('completed', 3, 0, 0, 3, 2, 1, 0))
+        self.assertIsNotNone(self.scraping_run.completed_at)
+
+    def test_transition_cost_does_not_grow_with_the_run(self):
+        jobs = [self._job() for _ in range(20)]
+        job = jobs[0]
+        job.status = 'processing'
+        # savepoint, job lock, job update, counter update, counter read, run status update, release
+        with self.assertNumQueries(7):
+            job.save()
+
+        # Same status: no counter work; other fields only: no lock either
+        with self.assertNumQueries(4):
+            job.save()
+        with self.assertNumQueries(1):
+            job.save(update_fields=['error_message'])
+
+    def test_stale_instances_count_the_stored_status(self):
+        job = self._job()
+        stale = ScrapingJob.objects.get(pk=job.pk)
+        job.status = 'failed'
+        job.save()
+
+        stale.status = 'failed'
+        stale.save()
+        self.assertEqual(self._counters(), ('failed', 1, 0, 0, 1, 0, 1, 0))
+
+    def test_deletes_are_counted(self):
+        done = self._job('completed')
+        pending = self._job()
+        self.assertEqual(self._counters()[:3], ('pending', 2, 1))
+
+        pending.delete()
+        self.assertEqual(self._counters(), ('completed', 1, 0, 0, 1, 1, 0, 0))
+        done.delete()
+        self.assertEqual(self._counters()[:2], ('pending', 0))
+
+    def test_recount_repairs_queryset_updates(self):
+        jobs = [self._job() for _ in range(4)]
+        ScrapingJob.objects.filter(pk__in=[job.pk for job in jobs[:3]]).update(status='completed')
+        ScrapingJob.objects.filter(pk=jobs[3].pk).update(status='failed')
+        self.assertEqual(self._counters()[:3], ('pending', 4, 4))
+
+        with self.assertNumQueries(2):
+            changed = self.scraping_run.update_status_from_jobs()
+        self.assertIn('status', changed)
+        self.assertEqual(self._counters(), ('completed', 4, 0, 0, 4, 3, 1, 0))
+        self.assertEqual(self.scraping_run.update_status_from_jobs(), [])
+
+    def test_recount_command(self):
+        self._job()
+        ScrapingRun.objects.filter(pk=self.scraping_run.pk).update(total_jobs=7, pending_jobs=0)
+
+        out = StringIO()
+        call_command('recount_scraping_runs', '--dry-run', stdout=out)
+        self.assertIn('Runs to repair: 1', out.getvalue())
+        self.assertEqual(self._counters()[1:3], (7, 0))
+
+        call_command('recount_scraping_runs', '--run', str(self.scraping_run.pk), stdout=StringIO())
+        self.assertEqual(self._counters(), ('pending', 1, 1, 0, 0, 0, 0, 0))
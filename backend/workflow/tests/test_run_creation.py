@@ -0,0 +1,96 @@
+"""
+Tests for creating a scraping run's jobs from TrackSources in bulk
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from brightdata_integration.models import BatchScraperJob, BrightdataConfig
+from track_accounts.models import TrackSource
+from users.models import Platform, PlatformService, Project, Service
+from workflow.models import ScrapingJob, ScrapingRun
+from workflow.services import WorkflowService
+
+CONFIGURATION = {'start_date': '2025-01-01T00:00:00Z', 'end_date': '2025-01-31T12:00:00Z', 'num_of_posts': 25}
+
+
+class TrackSourceRunCreationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='runs', password='testpass')
+        cls.project = Project.objects.create(name='Runs', owner=cls.user)
+        posts, _ = Service.objects.get_or_create(name='posts', defaults={'display_name': 'Posts'})
+        for name in ('instagram', 'facebook'):
+            platform, _ = Platform.objects.get_or_create(name=name, defaults={'display_name': name.title()})
+            PlatformService.objects.get_or_create(platform=platform, service=posts)
+        cls.config = BrightdataConfig.objects.create(platform='instagram_posts', api_token='token', dataset_id='gd_ig')
+
+    def _sources(self, count, start=0, **fields):
+        fields.setdefault('platform', 'instagram')
+        TrackSource.objects.bulk_create(
+            TrackSource(project=self.project, name=f'Account {index}', service_name='posts',
+                        instagram_link=f'https://www.instagram.com/account{index}/', **fields)
+            for index in range(start, start + count)
+        )
+
+    def _create_jobs(self):
+        scraping_run = ScrapingRun.objects.create(project=self.project, configuration=CONFIGURATION)
+        with CaptureQueriesContext(connection) as queries:
+            WorkflowService()._create_scraping_jobs_from_tracksources(scraping_run, CONFIGURATION)
+        return scraping_run, len(queries)
+
+    def test_jobs_are_created_in_bulk_and_counted(self):
+        self._sources(3)
+        # Skipped: no BrightData config, no URL, no platform
+        TrackSource.objects.create(project=self.project, name='Facebook', platform='facebook', service_name='posts',
+                                   facebook_link='https://www.facebook.com/account/')
+        TrackSource.objects.create(project=self.project, name='No link', platform='instagram', service_name='posts')
+        TrackSource.objects.create(project=self.project, name='Other', other_social_media='https://example.com/other')
+
+        scraping_run, _ = self._create_jobs()
+
+        self.assertEqual((scraping_run.status, scraping_run.total_jobs, scraping_run.pending_jobs), ('pending', 3, 3))
+        jobs = ScrapingJob.objects.filter(scraping_run=scraping_run).select_related('batch_job').order_by('url')
+        self.assertEqual([job.url for job in jobs],
+                         [f'https://www.instagram.com/account{index}/' for index in range(3)])
+
+        job = jobs[0]
+        self.assertEqual((job.status, job.platform, job.service_type, job.dataset_id),
+                         ('pending', 'instagram', 'posts', 'gd_lk5ns7kz21pck8jpis'))
+        batch_job = job.batch_job
+        self.assertEqual((str(batch_job.start_date), str(batch_job.end_date), batch_job.num_of_posts),
+                         ('2025-01-01', '2025-01-31', 25))
+        self.assertEqual(batch_job.content_types_to_scrape, {'instagram': ['post']})
+        self.assertEqual(batch_job.platform_params['brightdata_config_id'], self.config.id)
+        self.assertEqual(BatchScraperJob.objects.filter(project=self.project).count(), 3)
+
+    def test_queries_are_not_per_source(self):
+        self._sources(300)
+        scraping_run, queries = self._create_jobs()
+
+        self.assertEqual(scraping_run.total_jobs, 300)
+        # One by one this took about ten queries per source; SQLite's parameter
+        # limit splits the bulk inserts into a few more batches than elsewhere
+        self.assertLess(queries, 30)
+
+    def test_only_sources_the_insert_would_reject_are_skipped(self):
+        self._sources(2)
+        # Not a valid URL, but it fits the column: scraped as before
+        TrackSource.objects.create(project=self.project, name='No scheme', platform='instagram', service_name='posts',
+                                   instagram_link='instagram.com/noscheme')
+        TrackSource.objects.create(project=self.project, name='Too long', platform='instagram', service_name='posts',
+                                   instagram_link='https://www.instagram.com/' + 'a' * 500)
+
+        with self.assertLogs('workflow.services', level='ERROR') as logs:
+            scraping_run, _ = self._create_jobs()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('url is longer than 500 characters', logs.output[0])
+        self.assertEqual(scraping_run.total_jobs, 3)
+        self.assertEqual(sorted(ScrapingJob.objects.filter(scraping_run=scraping_run).values_list('url', flat=True)),
+                         [f'https://www.instagram.com/account{index}/' for index in range(2)]
+                         + ['instagram.com/noscheme'])
+        self.assertEqual(BatchScraperJob.objects.filter(project=self.project).count(), 3)
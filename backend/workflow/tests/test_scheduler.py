@@ -0,0 +1,115 @@
+"""
+Tests for the ScheduledScrapingTask scheduler
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from brightdata_integration.fake_brightdata import FakeBrightData
+from brightdata_integration.models import BatchScraperJob, BrightdataConfig
+from track_accounts.models import TrackSource
+from users.models import Project
+from workflow.models import ScheduledScrapingTask
+from workflow.scheduler import TaskScheduler, coalesced_next_run
+
+
+class TaskSchedulerTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='scheduler', password='testpass')
+        cls.project = Project.objects.create(name='Scheduled', owner=cls.user)
+        cls.other_project = Project.objects.create(name='Other', owner=cls.user)
+        cls.source = TrackSource.objects.create(
+            project=cls.project, name='Nike', instagram_link='https://www.instagram.com/nike/',
+        )
+
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _task(self, name, next_run, project=None, **extra):
+        extra.setdefault('platform', 'instagram')
+        return ScheduledScrapingTask.objects.create(
+            name=name, project=project or self.project, track_source=self.source, next_run=next_run, **extra,
+        )
+
+    def test_missed_runs_are_coalesced(self):
+        task = self._task('daily', self.now - timedelta(days=3, hours=4))
+        next_run, missed = coalesced_next_run(task, self.now)
+        self.assertEqual((next_run, missed), (task.next_run + timedelta(days=4), 3))
+
+        task.next_run = self.now + timedelta(hours=1)
+        self.assertEqual(coalesced_next_run(task, self.now), (task.next_run, 0))
+
+        task.schedule_type, task.schedule_interval, task.next_run = 'custom', 6, self.now - timedelta(hours=1)
+        self.assertEqual(coalesced_next_run(task, self.now), (self.now + timedelta(hours=5), 0))
+
+    def test_due_tasks_are_claimed_once(self):
+        late = self._task('late', self.now - timedelta(days=3, hours=4))
+        new = self._task('new', None, project=self.other_project)
+        later = self._task('later', self.now + timedelta(hours=1))
+        self._task('paused', self.now - timedelta(hours=1), is_active=False, status='paused')
+
+        claimed = TaskScheduler(max_per_project=5).claim_due_tasks(self.now)
+
+        self.assertEqual([task.id for task, _ in claimed], [late.id, new.id])
+        late.refresh_from_db()
+        self.assertEqual((late.total_runs, late.last_run), (1, self.now))
+        self.assertEqual(late.next_run - self.now, timedelta(hours=20))
+        new.refresh_from_db()
+        self.assertEqual(new.next_run, self.now + timedelta(days=1))
+
+        job = claimed[0][1]
+        self.assertEqual((job.project_id, job.status, job.platforms_to_scrape), (self.project.id, 'pending', ['instagram']))
+        self.assertEqual(job.platform_params['scheduled_task_id'], late.id)
+        self.assertEqual(job.platform_params['urls'], ['https://www.instagram.com/nike/'])
+
+        self.assertEqual(TaskScheduler().claim_due_tasks(self.now), [])
+        later.refresh_from_db()
+        self.assertEqual(later.total_runs, 0)
+
+    def test_per_project_limit_defers_tasks(self):
+        BatchScraperJob.objects.create(name='running', project=self.project, source_folder_ids=[], status='processing')
+        stuck = BatchScraperJob.objects.create(name='stuck', project=self.project, source_folder_ids=[], status='processing')
+        BatchScraperJob.objects.filter(pk=stuck.pk).update(created_at=self.now - timedelta(days=1))
+        first = self._task('first', self.now - timedelta(minutes=2))
+        second = self._task('second', self.now - timedelta(minutes=1))
+
+        claimed = TaskScheduler(max_per_project=2, defer_seconds=120).claim_due_tasks(self.now)
+
+        self.assertEqual([task.id for task, _ in claimed], [first.id])
+        second.refresh_from_db()
+        self.assertEqual((second.next_run, second.total_runs), (self.now + timedelta(seconds=120), 0))
+
+    def test_task_without_platform_url_is_marked_error(self):
+        task = self._task('no url', self.now - timedelta(minutes=1), platform='tiktok')
+        self.assertEqual(TaskScheduler().claim_due_tasks(self.now), [])
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.failed_runs, task.total_runs), ('error', 1, 0))
+        self.assertFalse(BatchScraperJob.objects.exists())
+
+    def test_sleeps_until_the_earliest_due_task(self):
+        scheduler = TaskScheduler(max_sleep=300)
+        self.assertEqual(scheduler.seconds_until_due(self.now), 300)
+        self._task('soon', self.now + timedelta(seconds=45))
+        self._task('later', self.now + timedelta(hours=2))
+        self.assertEqual(scheduler.seconds_until_due(self.now), 45)
+        self._task('new', None)
+        self.assertEqual(scheduler.seconds_until_due(self.now), 0)
+
+    def test_run_once_executes_batch_jobs(self):
+        BrightdataConfig.objects.create(platform='instagram_posts', api_token='token', dataset_id='gd_ig')
+        task = self._task('run', self.now - timedelta(minutes=1))
+
+        with FakeBrightData() as server:
+            with override_settings(BRIGHTDATA_API_URL=server.url, BRIGHTDATA_WEBHOOK_BASE_URL='https://hooks.test'):
+                summary = TaskScheduler(concurrency=1).run_once()
+
+        self.assertEqual(summary, {'dispatched': 1, 'successful': 1, 'failed': 0})
+        self.assertEqual([request.dataset_id for request in server.requests], ['gd_ig'])
+        task.refresh_from_db()
+        self.assertEqual((task.total_runs, task.successful_runs), (1, 1))
+        self.assertEqual(BatchScraperJob.objects.get().status, 'completed')
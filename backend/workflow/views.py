@@ -316,29 +316,9 @@ class ScheduledScrapingTaskViewSet(viewsets.ModelViewSet):
                 )
             
             # Create a batch scraper job for this task
-            from brightdata_integration.models import BatchScraperJob
-            
-            batch_job = BatchScraperJob.objects.create(
-                name=f"Scheduled_{task.name}_{timezone.now().strftime('%Y%m%d_%H%M%S')}",
-                project=task.project,
-                source_folder_ids=[],
-                platforms_to_scrape=[task.platform],
-                content_types_to_scrape={
-                    task.platform: [task.service_type]
-                },
-                num_of_posts=task.num_of_posts,
-                start_date=task.start_date,
-                end_date=task.end_date,
-                auto_create_folders=task.auto_create_folders,
-                status='pending',
-                platform_params={
-                    'track_source_id': task.track_source.id,
-                    'platform': task.platform,
-                    'service_type': task.service_type,
-                    'scheduled_task_id': task.id,
-                    'urls': [platform_url]
-                }
-            )
+            from .scheduler import create_task_batch_job
+
+            batch_job = create_task_batch_job(task, platform_url)
             
             # Update task statistics
             task.total_runs += 1
@@ -455,7 +435,7 @@ class ScrapingRunViewSet(viewsets.ModelViewSet):
             # Update run status
             scraping_run.status = 'processing'
             scraping_run.started_at = timezone.now()
-            scraping_run.save()
+            scraping_run.save(update_fields=['status', 'started_at'])
             
             # Start all pending jobs
             pending_jobs = scraping_run.scraping_jobs.filter(status='pending')
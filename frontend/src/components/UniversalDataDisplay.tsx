@@ -195,6 +195,25 @@ function a11yProps(index: number) {
   };
 }
 
+// Large CSV uploads are imported in the background; poll the job until it finishes
+async function waitForCsvImport(statusUrl: string, onProgress: (progress: number) => void) {
+  for (;;) {
+    await new Promise(resolve => setTimeout(resolve, 2000));
+    const response = await apiFetch(statusUrl);
+    if (!response.ok) {
+      throw new Error('Failed to check the status of the CSV import');
+    }
+    const job = await response.json();
+    if (job.status === 'completed') {
+      return job.result;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error_message || 'CSV import failed');
+    }
+    onProgress(job.progress);
+  }
+}
+
 const UniversalDataDisplay: React.FC<UniversalDataDisplayProps> = ({
   folder,
   platform,
@@ -978,7 +997,13 @@ const UniversalDataDisplay: React.FC<UniversalDataDisplayProps> = ({
           throw new Error(errorMessage);
         }
 
-        const data = await response.json();
+        let data = await response.json();
+        if (response.status === 202 && data.status_url) {
+          setUploadSuccess(data.message);
+          data = await waitForCsvImport(data.status_url, (progress) => {
+            setUploadSuccess(`Importing ${selectedFile?.name}: ${progress}%`);
+          });
+        }
         console.log('🔧 Upload success response:', data);
         
         let successMessage = `${data.message}`;
@@ -150,60 +150,31 @@ const DataStorage = () => {
     }
   };
 
-  const fetchUnifiedChildren = async (parentId: number, type: string) => {
-    try {
-      const resp = await apiFetch(`/api/track-accounts/report-folders/?project=${projectId}&parent_folder=${parentId}&folder_type=${type}&include_hierarchy=true`);
-      if (resp.ok) {
-        const data = await resp.json();
-        return data.results || data || [];
-      }
-    } catch (e) {
-      console.warn('Failed to fetch unified children', parentId, type, e);
-    }
-    return [];
-  };
-
   const fetchAllFolders = async () => {
     setLoading(true);
     setError(null);
     
     try {
-      // Fetch run folders from track_accounts (unified run folders)
+      // Fetch every run folder with its whole platform -> service -> job tree in one request
       let runFolders: any[] = [];
       try {
-        const runFoldersResponse = await apiFetch(`/api/track-accounts/report-folders/?project=${projectId}&folder_type=run&include_hierarchy=true`);
-        if (runFoldersResponse.ok) {
-          const runData = await runFoldersResponse.json();
-          runFolders = (runData.results || runData).map((folder: any) => ({
-            ...folder,
-            platform: 'unified'
-          }));
+        const treeResponse = await apiFetch(`/api/track-accounts/report-folders/tree/?project=${projectId}`);
+        if (treeResponse.ok) {
+          runFolders = await treeResponse.json();
         }
       } catch (error) {
         console.warn('Could not fetch run folders from track_accounts:', error);
       }
 
-      // Fetch Unified hierarchy: platform -> service -> job
-      const platformLevelResults = await Promise.all(
-        runFolders.map((rf: any) => fetchUnifiedChildren(rf.id, 'platform').then(arr => arr.map((f: any) => ({ ...f, platform: 'unified' }))))
-      );
-      const platformFoldersUnified = platformLevelResults.flat();
-
-      const serviceLevelResults = await Promise.all(
-        platformFoldersUnified.map((pf: any) => fetchUnifiedChildren(pf.id, 'service').then(arr => arr.map((f: any) => ({ ...f, platform: 'unified' }))))
-      );
-      const serviceFoldersUnified = serviceLevelResults.flat();
+      const childrenOfType = (parents: any[], type: string) =>
+        parents.flatMap((parent: any) => (parent.subfolders || []).filter((f: any) => f.folder_type === type));
 
+      const platformFoldersUnified = childrenOfType(runFolders, 'platform');
+      const serviceFoldersUnified = childrenOfType(platformFoldersUnified, 'service');
       // Prefer job; if none, fall back to legacy content
-      const jobLevelJobResults = await Promise.all(
-        serviceFoldersUnified.map((sf: any) => fetchUnifiedChildren(sf.id, 'job').then(arr => arr.map((f: any) => ({ ...f, platform: 'unified' }))))
-      );
-      const jobFoldersUnified = jobLevelJobResults.flat();
+      const jobFoldersUnified = childrenOfType(serviceFoldersUnified, 'job');
       const needLegacy = serviceFoldersUnified.filter(sf => !jobFoldersUnified.some((jf: any) => jf.parent_folder === sf.id));
-      const legacyContentResults = await Promise.all(
-        needLegacy.map((sf: any) => fetchUnifiedChildren(sf.id, 'content').then(arr => arr.map((f: any) => ({ ...f, platform: 'unified' }))))
-      );
-      const legacyContentFoldersUnified = legacyContentResults.flat();
+      const legacyContentFoldersUnified = childrenOfType(needLegacy, 'content');
 
       // Combine all unified levels; keep platform-specific folders if needed for other parts of the page
       const allFolders = [
@@ -212,7 +183,7 @@ const DataStorage = () => {
         ...serviceFoldersUnified,
         ...jobFoldersUnified,
         ...legacyContentFoldersUnified,
-      ];
+      ].map((folder: any) => ({ ...folder, platform: 'unified' }));
 
       setFolders(allFolders);
       
@@ -167,8 +167,8 @@ const JobFolderView = () => {
            // If we have platform folders, try to get posts from the first one with posts
            for (const pf of platformFolders) {
              if (pf.folder && pf.folder.post_count > 0) {
-               // Fetch posts from this platform folder
-               const platformDataResponse = await apiFetch(`/api/track-accounts/report-folders/${folderId}/platform_data/`);
+               // Fetch every post of this platform folder (streamed by the backend)
+               const platformDataResponse = await apiFetch(`/api/track-accounts/report-folders/${folderId}/platform_data/?page_size=all`);
                if (platformDataResponse.ok) {
                  const platformData = await platformDataResponse.json();
                  fetchedPosts = platformData.posts || [];
@@ -108,8 +108,16 @@ interface ProjectStats {
   growthRate: number;
 }
 
+interface ActivityPoint {
+  date: string;
+  instagram: number;
+  facebook: number;
+  linkedin: number;
+  tiktok: number;
+}
+
 // Demo data for the charts
-const activityData = [
+const activityData: ActivityPoint[] = [
   { date: 'Jun', instagram: 340, facebook: 240, linkedin: 180, tiktok: 120 },
   { date: 'Jul', instagram: 520, facebook: 320, linkedin: 220, tiktok: 180 },
   { date: 'Aug', instagram: 450, facebook: 280, linkedin: 310, tiktok: 240 },
@@ -247,6 +255,7 @@ const ProjectDashboard = () => {
     growthRate: 0
   });
   const [statsLoading, setStatsLoading] = useState(true);
+  const [activitySeries, setActivitySeries] = useState<ActivityPoint[]>(activityData);
 
   // Determine which URL pattern we're using
   const isOrgProjectUrl = location.pathname.includes('/organizations/') && location.pathname.includes('/projects/');
@@ -332,6 +341,10 @@ const ProjectDashboard = () => {
         engagementRate: data.engagementRate || 0,
         growthRate: data.growthRate || 0
       });
+      // Posts per platform per month from the stats rollup; keep the demo chart for empty projects
+      if (Array.isArray(data.activity) && data.totalPosts > 0) {
+        setActivitySeries(data.activity);
+      }
     } catch (error) {
       console.error('Error fetching project statistics:', error);
       // Don't set error state for stats - just log it and keep using default values
@@ -649,7 +662,7 @@ const ProjectDashboard = () => {
               <Box sx={{ height: 320, width: '100%', mt: 2 }}>
                 <ResponsiveContainer width="100%" height="100%">
                   <AreaChart
-                    data={activityData}
+                    data={activitySeries}
                     margin={{ top: 10, right: 10, left: 0, bottom: 0 }}
                   >
                     <defs>